@@ -31,14 +31,30 @@ TEST_TRANSFER_SIZE = 16 * 1024
 # have scheduled at a given time.
 TRANSFER_QUEUE_DEPTH = 16
 
+# Descriptor type of a SuperSpeed Endpoint Companion descriptor.
+SUPERSPEED_COMPANION_DESCRIPTOR = 0x30
+
+
+def get_max_burst(device, endpoint_address):
+    """ Returns the number of packets per burst a SuperSpeed endpoint supports; or None if it's not SuperSpeed. """
+
+    for setting in device.getDevice()[0][0]:
+        for endpoint in setting:
+            if endpoint.getAddress() != endpoint_address:
+                continue
+
+            # Our endpoint's companion descriptor is stored with its "extra" descriptors; its
+            # bMaxBurst field holds the number of packets per burst, minus one.
+            for descriptor in endpoint.getExtra():
+                if len(descriptor) >= 3 and descriptor[1] == SUPERSPEED_COMPANION_DESCRIPTOR:
+                    return descriptor[2] + 1
+
+    return None
+
 
 def run_speed_test(direction=usb1.ENDPOINT_IN):
     """ Runs a simple speed test, and reports throughput. """
 
-    if os.getenv('LUNA_SUPERSPEED') and not direction == usb1.ENDPOINT_IN:
-        logging.error("The SuperSpeed test device does not currently support OUT transfers.")
-        sys.exit(1)
-
     total_data_exchanged = 0
     failed_out = False
 
@@ -88,6 +104,12 @@ def run_speed_test(direction=usb1.ENDPOINT_IN):
         # ... and claim its bulk interface.
         device.claimInterface(0)
 
+        # If we're talking to a SuperSpeed device, report how many packets it'll send per burst;
+        # so runs with different burst sizes can be compared.
+        max_burst = get_max_burst(device, direction | BULK_ENDPOINT_NUMBER)
+        if max_burst is not None:
+            logging.info(f"Device endpoint supports bursts of up to {max_burst} packet(s).")
+
         # Submit a set of transfers to perform async comms with.
         active_transfers = []
         for _ in range(TRANSFER_QUEUE_DEPTH):
@@ -99,7 +121,9 @@ def run_speed_test(direction=usb1.ENDPOINT_IN):
             if direction == usb1.ENDPOINT_IN:
                 transfer.setBulk(endpoint, TEST_TRANSFER_SIZE, callback=_transfer_completed, timeout=1000)
             else:
-                out_test_data = bytearray([x % 256 for x in range(512)])
+                # SuperSpeed devices can accept whole bursts of data; so we'll send them full-sized transfers.
+                out_transfer_size = TEST_TRANSFER_SIZE if os.getenv('LUNA_SUPERSPEED') else 512
+                out_test_data = bytearray([x % 256 for x in range(out_transfer_size)])
                 transfer.setBulk(endpoint, out_test_data, callback=_transfer_completed, timeout=1000)
 
             # ... and store it.
@@ -138,6 +162,8 @@ def run_speed_test(direction=usb1.ENDPOINT_IN):
         bytes_per_second = total_data_exchanged / elapsed
         logging.info(f"Exchanged {total_data_exchanged / 1000000}MB total at {bytes_per_second / 1000000}MB/s.")
 
+        return bytes_per_second
+
 
 if __name__ == "__main__":
 
@@ -152,7 +178,8 @@ if __name__ == "__main__":
         # Selectively create our device to be either USB3 or USB2 based on the
         # SuperSpeed variable.
         if os.getenv('LUNA_SUPERSPEED'):
-            device = top_level_cli(USBInSuperSpeedTestDevice)
+            device = top_level_cli(USBInSuperSpeedTestDevice,
+                                   max_burst=int(os.getenv('LUNA_MAX_BURST', USBInSuperSpeedTestDevice.MAX_BURST)))
         else:
             device = top_level_cli(USBSpeedTestDevice,
                                    fs_only=bool(os.getenv('LUNA_FULL_ONLY')))
@@ -164,14 +191,13 @@ if __name__ == "__main__":
 
     # Run our Bulk IN test.
     logging.info(f"Starting Bulk IN speed test.")
-    run_speed_test(direction=usb1.ENDPOINT_IN)
+    in_bytes_per_second = run_speed_test(direction=usb1.ENDPOINT_IN)
+
+    # If we've been given a reference throughput (e.g. from a run with bursting disabled), report our gain over it.
+    if os.getenv('LUNA_REFERENCE_MBPS'):
+        reference = float(os.getenv('LUNA_REFERENCE_MBPS'))
+        logging.info(f"Bulk IN throughput is {in_bytes_per_second / 1000000 / reference:.2f}x the {reference}MB/s reference.")
 
     # Run our Bulk OUT speed test.
-    #
-    # Note: The SuperSpeed test device does not yet support an OUT speed test.
-    if os.getenv('LUNA_SUPERSPEED'):
-        logging.info("Skipping Bulk OUT speed test.")
-        logging.info("This test is not yet supported on SuperSpeed devices.")
-    else:
-        logging.info(f"Starting Bulk OUT speed test.")
-        run_speed_test(direction=usb1.ENDPOINT_OUT)
+    logging.info(f"Starting Bulk OUT speed test.")
+    run_speed_test(direction=usb1.ENDPOINT_OUT)
@@ -12,24 +12,31 @@ import random
 from prompt_toolkit import HTML
 from prompt_toolkit import print_formatted_text as pprint
 
-from amaranth import Signal, Elaboratable, Module
+from amaranth import Signal, Elaboratable, Module, Mux
 from amaranth.lib.fifo import SyncFIFO
 
 from luna                             import top_level_cli
 from apollo_fpga                      import ApolloDebugger
 from luna.gateware.interface.jtag     import JTAGRegisterInterface
 from luna.gateware.interface.psram    import HyperRAMPHY, HyperRAMInterface, HyperRAMDQSInterface, HyperRAMDQSPHY
+from luna.gateware.interface.psram    import HyperRAMStreamInterface
 
 REGISTER_RAM_REGISTER_SPACE = 1
 REGISTER_RAM_ADDR           = 2
 REGISTER_RAM_READ_LENGTH    = 3
 REGISTER_RAM_FIFO           = 4
 REGISTER_RAM_START          = 5
+REGISTER_RAM_WORDS          = 6
+REGISTER_RAM_CYCLES         = 7
+REGISTER_SYNC_FREQUENCY     = 8
 
 DQS = False
 REG_WIDTH = 32 if DQS else 16
 REG_SHIFT = 16 if DQS else 0
 
+# The longest burst our streaming front-end performs; and thus the longest read or write we support.
+MAX_BURST_LENGTH = 32
+
 class HyperRAMDiagnostic(Elaboratable):
     """
     Temporary gateware that evaluates HyperRAM skews.
@@ -58,7 +65,9 @@ class HyperRAMDiagnostic(Elaboratable):
             psram_phy = HyperRAMPHY(bus=ram_bus)
             psram = HyperRAMInterface(phy=psram_phy.phy)
 
-        m.submodules += [psram_phy, psram]
+        # Drive our RAM via a streaming front-end; which also measures the RAM's bandwidth.
+        frontend = HyperRAMStreamInterface(ram=psram, max_burst_length=MAX_BURST_LENGTH)
+        m.submodules += [psram_phy, frontend]
 
         # Generate our clock domains.
         clocking = platform.clock_domain_generator(clock_frequencies=clock_frequencies)
@@ -71,13 +80,14 @@ class HyperRAMDiagnostic(Elaboratable):
         psram_address = registers.add_register(REGISTER_RAM_ADDR)
         read_length   = registers.add_register(REGISTER_RAM_READ_LENGTH, init=1)
 
-        m.submodules.read_fifo  = read_fifo  = SyncFIFO(width=REG_WIDTH, depth=32)
-        m.submodules.write_fifo = write_fifo = SyncFIFO(width=REG_WIDTH, depth=32)
+        m.submodules.read_fifo  = read_fifo  = SyncFIFO(width=REG_WIDTH, depth=MAX_BURST_LENGTH)
+        m.submodules.write_fifo = write_fifo = SyncFIFO(width=REG_WIDTH, depth=MAX_BURST_LENGTH)
+        fifo_write = Signal()
         registers.add_sfr(REGISTER_RAM_FIFO,
             read=read_fifo.r_data,
             read_strobe=read_fifo.r_en,
             write_signal=write_fifo.w_data,
-            write_strobe=write_fifo.w_en)
+            write_strobe=fifo_write)
 
         register_space = registers.add_register(REGISTER_RAM_REGISTER_SPACE, size=1)
 
@@ -87,44 +97,54 @@ class HyperRAMDiagnostic(Elaboratable):
             read_strobe=start_read,
             write_strobe=start_write)
 
-        read_counter = Signal.like(read_length)
-        final_word = Signal()
-        m.d.comb += final_word.eq(1)
-        with m.FSM() as fsm:
-            with m.State("IDLE"):
-                with m.If(start_read):
-                    m.d.sync += read_counter.eq(read_length)
-                    m.next = "READ"
-
-                with m.If(start_write):
-                    m.next = "WRITE"
+        # Expose our bandwidth counters; writing to either clears both.
+        clear_words  = Signal()
+        clear_cycles = Signal()
+        registers.add_sfr(REGISTER_RAM_WORDS,
+            read=frontend.words_transferred,
+            write_strobe=clear_words)
+        registers.add_sfr(REGISTER_RAM_CYCLES,
+            read=frontend.busy_cycles,
+            write_strobe=clear_cycles)
+        registers.add_read_only_register(REGISTER_SYNC_FREQUENCY,
+            read=int(clock_frequencies["sync"] * 1e6))
+
+        # Count the words written since our last write burst; which sets the length of our next one.
+        # Our write FIFO drains into the front-end as soon as each word arrives, so its level can't tell us
+        # this. Words beyond a single burst's worth are discarded.
+        write_length = Signal(range(MAX_BURST_LENGTH + 1))
+        accept_write = fifo_write & (write_length < MAX_BURST_LENGTH)
+        m.d.comb += write_fifo.w_en.eq(accept_write)
+
+        with m.If(start_write):
+            m.d.sync += write_length.eq(0)
+        with m.Elif(accept_write):
+            m.d.sync += write_length.eq(write_length + 1)
+
+        # The front-end can only perform bursts of between one and MAX_BURST_LENGTH words; so we'll
+        # ignore any request for a burst outside of that range.
+        read_valid  = start_read  & (read_length != 0) & (read_length <= MAX_BURST_LENGTH)
+        write_valid = start_write & (write_length != 0)
+
+        # Hook up our PSRAM; issuing a single burst for each read or write request.
+        m.d.comb += [
+            ram_bus.reset.o                 .eq(0),
 
-            with m.State("READ"):
-                m.d.comb += final_word.eq(read_counter == 1)
-                with m.If(psram.read_ready):
-                    m.d.sync += read_counter.eq(read_counter - 1)
-                with m.If(psram.idle):
-                    m.next = "IDLE"
+            frontend.command.valid          .eq(read_valid | write_valid),
+            frontend.command.payload        .eq(psram_address),
+            frontend.command.length         .eq(Mux(start_write, write_length, read_length)),
+            frontend.command.write          .eq(start_write),
+            frontend.command.register_space .eq(register_space),
 
-            with m.State("WRITE"):
-                m.d.comb += final_word.eq(write_fifo.level == 1)
-                with m.If(psram.idle):
-                    m.next = "IDLE"
+            frontend.write_stream.payload   .eq(write_fifo.r_data),
+            frontend.write_stream.valid     .eq(write_fifo.r_rdy),
+            write_fifo.r_en                 .eq(frontend.write_stream.ready),
 
+            read_fifo.w_data                .eq(frontend.read_stream.payload),
+            read_fifo.w_en                  .eq(frontend.read_stream.valid),
+            frontend.read_stream.ready      .eq(read_fifo.w_rdy),
 
-        # Hook up our PSRAM.
-        m.d.comb += [
-            ram_bus.reset.o        .eq(0),
-            psram.single_page      .eq(0),
-            psram.register_space   .eq(register_space),
-            psram.final_word       .eq(final_word),
-            psram.perform_write    .eq(start_write),
-            psram.start_transfer   .eq(start_read | start_write),
-            psram.address          .eq(psram_address),
-            psram.write_data       .eq(write_fifo.r_data),
-            read_fifo.w_data       .eq(psram.read_data),
-            read_fifo.w_en         .eq(psram.read_ready),
-            write_fifo.r_en        .eq(psram.write_ready),
+            frontend.clear_counters         .eq(clear_words | clear_cycles),
         ]
 
         # Return our elaborated module.
@@ -188,6 +208,28 @@ if __name__ == "__main__":
 
         return True
 
+    def measure_bandwidth():
+        """ Measures the RAM's effective bandwidth for a full-length read burst; in MB/s. """
+        dut.registers.register_write(REGISTER_RAM_REGISTER_SPACE, 0)
+        dut.registers.register_write(REGISTER_RAM_WORDS, 0)
+
+        # Perform a single, full-length read...
+        dut.registers.register_write(REGISTER_RAM_ADDR, 0)
+        dut.registers.register_write(REGISTER_RAM_READ_LENGTH, MAX_BURST_LENGTH)
+        dut.registers.register_read(REGISTER_RAM_START)
+        time.sleep(0.1)
+
+        # ... and figure out how quickly it was performed.
+        words     = dut.registers.register_read(REGISTER_RAM_WORDS)
+        cycles    = dut.registers.register_read(REGISTER_RAM_CYCLES)
+        frequency = dut.registers.register_read(REGISTER_SYNC_FREQUENCY)
+
+        # Drain the data we read, so it doesn't interfere with further tests.
+        for _ in range(words):
+            dut.registers.register_read(REGISTER_RAM_FIFO)
+
+        return (words * REG_WIDTH // 8) / (cycles / frequency) / 1e6 if cycles else 0
+
     # Run each of our tests.
     for test in (test_id_read, test_config_read, test_mem_readback):
         for i in range(iterations):
@@ -211,3 +253,4 @@ if __name__ == "__main__":
 
 
     print(f"\nDiagnostics completed with {passes} passes and {failures} failures.\n")
+    print(f"Measured {'DQS ' if DQS else ''}read bandwidth: {measure_bandwidth():.1f} MB/s.\n")
@@ -31,7 +31,8 @@ def configure_default_logging(level=logging.INFO, logger=logging):
 
 
 def top_level_cli(fragment, *pos_args, **kwargs):
-    from .gateware.platform import get_appropriate_platform
+    from .gateware.platform       import get_appropriate_platform
+    from .gateware.platform.cache import BuildCache
 
     """ Runs a default CLI that assists in building and running gateware.
 
@@ -62,6 +63,8 @@ def top_level_cli(fragment, *pos_args, **kwargs):
          help="Overrides build configuration to build for a given FPGA. Useful if no FPGA is connected during build.")
     parser.add_argument('--console', metavar="port",
          help="Attempts to open a convenience 115200 8N1 UART console on the specified port immediately after uploading.")
+    parser.add_argument('--no-cache', action='store_true',
+         help="Always rebuilds the design, rather than reusing the products of an identical earlier build.")
 
     # Disable UnusedElaboarable warnings until we decide to build things.
     # This is sort of cursed, but it keeps us categorically from getting UnusedElaborable warnings
@@ -118,11 +121,25 @@ def top_level_cli(fragment, *pos_args, **kwargs):
         # Now that we're actually building, re-enable Unused warnings.
         MustUse._MustUse__silence = False
 
-        # Perform the build.
-        products = platform.build(fragment,
-            do_program=args.upload,
-            build_dir=build_dir
-        )
+        # Prepare our build; and, unless we've been asked not to, check for identical earlier builds.
+        plan = platform.build(fragment, do_build=False)
+
+        if args.no_cache:
+            products = plan.execute_local(build_dir)
+        else:
+            cache = BuildCache()
+            key   = cache.key_for(platform, plan)
+
+            products = cache.lookup(key)
+            if products is not None:
+                logging.info("Design unchanged; using cached build.")
+            else:
+                plan.execute_local(build_dir)
+                products = cache.store(key, build_dir)
+
+        # If requested, upload the design.
+        if args.upload:
+            platform.toolchain_program(products, "top")
 
         logging.info(f"{'Upload' if args.upload else 'Build'} complete.")
 
@@ -8,7 +8,7 @@ from amaranth                import *
 from usb_protocol.emitters   import DeviceDescriptorCollection, SuperSpeedDeviceDescriptorCollection
 
 from luna.usb2               import USBDevice, USBStreamInEndpoint, USBStreamOutEndpoint
-from luna.usb3               import USBSuperSpeedDevice, SuperSpeedStreamInEndpoint
+from luna.usb3               import USBSuperSpeedDevice, SuperSpeedStreamInEndpoint, SuperSpeedStreamOutEndpoint
 
 from luna.gateware.platform  import NullPin
 from luna.gateware.platform.core import LUNAApolloPlatform
@@ -165,12 +165,24 @@ class USBSpeedTestDevice(Elaboratable):
 
 
 class USBInSuperSpeedTestDevice(Elaboratable):
-    """ Simple example of a USB SuperSpeed device using the LUNA framework. """
+    """ Simple example of a USB SuperSpeed device using the LUNA framework.
+
+    Provides a bulk IN endpoint that sends data to the host as fast as the hardware can; and
+    a bulk OUT endpoint that discards any data the host sends it.
+
+    Parameters
+    ----------
+    max_burst: int
+        The number of packets our bulk endpoints will exchange per burst; from 1 to 16.
+        A value of 1 disables bursting; which is useful for comparing throughput.
+    """
 
     MAX_BULK_PACKET_SIZE = 1024
+    MAX_BURST            = 16
 
-    def __init__(self, generate_clocks=True):
+    def __init__(self, generate_clocks=True, max_burst=MAX_BURST):
         self.generate_clocks = generate_clocks
+        self.max_burst       = max_burst
 
     def create_descriptors(self):
         """ Create the descriptors we want to use for our device. """
@@ -207,10 +219,22 @@ class USBInSuperSpeedTestDevice(Elaboratable):
             with c.InterfaceDescriptor() as i:
                 i.bInterfaceNumber = 0
 
-                with i.EndpointDescriptor(add_default_superspeed=True) as e:
+                with i.EndpointDescriptor() as e:
                     e.bEndpointAddress = 0x80 | BULK_ENDPOINT_NUMBER
                     e.wMaxPacketSize   = self.MAX_BULK_PACKET_SIZE
 
+                    # Let the host know how many packets we can send per burst.
+                    with e.SuperSpeedCompanion() as s:
+                        s.bMaxBurst = self.max_burst - 1
+
+                with i.EndpointDescriptor() as e:
+                    e.bEndpointAddress = BULK_ENDPOINT_NUMBER
+                    e.wMaxPacketSize   = self.MAX_BULK_PACKET_SIZE
+
+                    # Let the host know how many packets we can receive per burst.
+                    with e.SuperSpeedCompanion() as s:
+                        s.bMaxBurst = self.max_burst - 1
+
         return descriptors
 
 
@@ -235,7 +259,8 @@ class USBInSuperSpeedTestDevice(Elaboratable):
         # Create our example bulk endpoint.
         stream_in_ep = SuperSpeedStreamInEndpoint(
             endpoint_number=BULK_ENDPOINT_NUMBER,
-            max_packet_size=self.MAX_BULK_PACKET_SIZE
+            max_packet_size=self.MAX_BULK_PACKET_SIZE,
+            max_burst=self.max_burst
         )
         usb.add_endpoint(stream_in_ep)
 
@@ -255,5 +280,14 @@ class USBInSuperSpeedTestDevice(Elaboratable):
         with m.If(stream_in.ready):
             m.d.ss += counter.eq(counter + 1)
 
+        # Create our example bulk OUT endpoint; which discards any data it receives.
+        stream_out_ep = SuperSpeedStreamOutEndpoint(
+            endpoint_number=BULK_ENDPOINT_NUMBER,
+            max_packet_size=self.MAX_BULK_PACKET_SIZE,
+            max_burst=self.max_burst
+        )
+        usb.add_endpoint(stream_out_ep)
+        m.d.comb += stream_out_ep.stream.ready.eq(1)
+
         # Return our elaborated module.
         return m
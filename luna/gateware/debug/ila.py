@@ -9,15 +9,17 @@
 import io
 import os
 import sys
-import math
+import mmap
+import shutil
 import tempfile
+import threading
 import subprocess
 
 from abc                 import ABCMeta, abstractmethod
 
-from amaranth            import Cat, DomainRenamer, Elaboratable, Module, Signal
-from amaranth.lib.cdc    import FFSynchronizer
-from amaranth.lib.fifo   import AsyncFIFOBuffered
+from amaranth            import Array, Cat, DomainRenamer, Elaboratable, Module, Mux, Signal
+from amaranth.lib.cdc    import FFSynchronizer, PulseSynchronizer
+from amaranth.lib.fifo   import AsyncFIFOBuffered, SyncFIFOBuffered
 from amaranth.lib.memory import Memory
 from vcd                 import VCDWriter
 from vcd.gtkw            import GTKWSave
@@ -25,6 +27,224 @@ from vcd.gtkw            import GTKWSave
 from ..stream            import StreamInterface
 from ..interface.uart    import UARTMultibyteTransmitter
 from ..interface.spi     import SPIDeviceInterface, SPIBus
+from ..interface.psram   import HyperRAMStreamInterface
+
+
+def _delay_samples(m, inputs, samples_pretrigger):
+    """ Returns a version of the given inputs delayed by ``samples_pretrigger`` cycles of `sync`. """
+
+    if samples_pretrigger >= 2:
+        delayed_inputs = Signal.like(inputs)
+        m.submodules += FFSynchronizer(inputs,  delayed_inputs, stages=samples_pretrigger)
+    elif samples_pretrigger == 1:
+        delayed_inputs = Signal.like(inputs)
+        m.d.sync += delayed_inputs.eq(inputs)
+    else:
+        delayed_inputs = inputs
+
+    return delayed_inputs
+
+
+class ILATriggerStage:
+    """ Runtime configuration for a single stage of an :class:`ILATrigger`.
+
+    A stage matches on any cycle in which every bit selected by ``mask`` equals the corresponding
+    bit of ``value``; and every bit selected by ``edge_mask`` has changed since the previous cycle.
+    Selecting a bit in both masks requires a rising edge (if its value bit is 1) or falling edge
+    (if its value bit is 0); selecting it only in ``edge_mask`` accepts either edge.
+
+    Attributes
+    ----------
+    value: Signal(sample_width), input
+        The value to compare each sample against.
+    mask: Signal(sample_width), input
+        Selects the bits that must match ``value``.
+    edge_mask: Signal(sample_width), input
+        Selects the bits that must have just changed.
+    count: Signal(counter_width), input
+        The number of matching cycles required to complete this stage. Zero is treated as one.
+    """
+
+    def __init__(self, *, sample_width, counter_width, index):
+        self.value     = Signal(sample_width,  name=f"stage{index}_value")
+        self.mask      = Signal(sample_width,  name=f"stage{index}_mask")
+        self.edge_mask = Signal(sample_width,  name=f"stage{index}_edge_mask")
+        self.count     = Signal(counter_width, name=f"stage{index}_count")
+
+
+class ILATrigger(Elaboratable):
+    """ Runtime-configurable, multi-stage trigger unit for the ILA.
+
+    Each stage compares every sample against a value/mask pair and an edge mask (see
+    :class:`ILATriggerStage`), and completes after a configurable number of matching cycles.
+    Stages are evaluated in sequence; once the last active stage completes, ``trigger`` is
+    strobed and the unit disarms until ``arm`` is strobed again. The unit starts out disarmed, so
+    it can be configured before its first sequence begins.
+
+    Attributes
+    ----------
+    inputs: Signal(sample_width), input
+        The samples to match against; typically Cat(*signals).
+    arm: Signal(), input
+        Strobe that restarts the trigger sequence from its first stage.
+    armed: Signal(), output
+        Indicates that the trigger sequence is in progress.
+    stage: Signal(range(stage_count)), output
+        The index of the stage currently being evaluated.
+    trigger: Signal(), output
+        Strobe that indicates the trigger sequence has completed.
+
+    stages: list of ILATriggerStage
+        The configuration for each of our stages.
+    active_stages: Signal(range(1, stage_count + 1)), input
+        The number of stages in the trigger sequence. Defaults to one.
+
+    Parameters
+    ----------
+    sample_width: int
+        The width of the samples to match against.
+    stage_count: int
+        The number of sequence stages to provide.
+    counter_width: int
+        The width of each stage's match counter.
+    """
+
+    def __init__(self, *, sample_width, stage_count=4, counter_width=16):
+        self.sample_width  = sample_width
+        self.stage_count   = stage_count
+        self.counter_width = counter_width
+
+        # Any registers we've been connected to; see add_registers.
+        self._register_connections = []
+        self._register_arm_strobes = []
+
+        #
+        # I/O port
+        #
+        self.inputs        = Signal(sample_width)
+        self.arm           = Signal()
+        self.armed         = Signal()
+        self.stage         = Signal(range(stage_count))
+        self.trigger       = Signal()
+
+        self.stages        = [
+            ILATriggerStage(sample_width=sample_width, counter_width=counter_width, index=i)
+                for i in range(stage_count)
+        ]
+        self.active_stages = Signal(range(1, stage_count + 1), init=1)
+
+
+    def add_registers(self, registers, *, base_address):
+        """ Makes this trigger configurable via a register interface.
+
+        Works with any :class:`SPIRegisterInterface`, including a :class:`JTAGRegisterInterface`.
+        Values wider than the interface's registers are split across consecutive registers, least
+        significant word first. Starting at ``base_address``, the register map is:
+
+            - a write-only control register; writing bit 0 arms the trigger
+            - a read-only status register: Cat(armed, stage)
+            - the number of active stages
+            - for each stage, in order: its value, mask, edge mask, and match count
+
+        The register interface must be clocked from the same domain as this trigger.
+
+        Returns the first address after the trigger's registers.
+        """
+
+        register_size = registers.register_size
+        address       = base_address
+
+        def add_wide_register(target, name):
+            nonlocal address
+
+            for word, lsb in enumerate(range(0, len(target), register_size)):
+                width  = min(register_size, len(target) - lsb)
+                source = registers.add_register(address, size=width, name=f"ila_trigger_{name}_{word}")
+                self._register_connections.append(target[lsb:lsb + width].eq(source))
+                address += 1
+
+        # Control register.
+        arm_write   = Signal(register_size, name="ila_trigger_control_write")
+        arm_strobe  = Signal(name="ila_trigger_control_strobe")
+        registers.add_sfr(address, write_signal=arm_write, write_strobe=arm_strobe)
+        self._register_arm_strobes.append(arm_strobe & arm_write[0])
+        address += 1
+
+        # Status register.
+        registers.add_read_only_register(address, read=Cat(self.armed, self.stage))
+        address += 1
+
+        # Sequence configuration.
+        add_wide_register(self.active_stages, "active_stages")
+        for i, stage in enumerate(self.stages):
+            add_wide_register(stage.value,     f"stage{i}_value")
+            add_wide_register(stage.mask,      f"stage{i}_mask")
+            add_wide_register(stage.edge_mask, f"stage{i}_edge_mask")
+            add_wide_register(stage.count,     f"stage{i}_count")
+
+        return address
+
+
+    def elaborate(self, platform):
+        m = Module()
+
+        # Apply any configuration provided by our register interfaces.
+        m.d.comb += self._register_connections
+        arm = Cat(self.arm, *self._register_arm_strobes).any()
+
+        # Keep track of our previous sample, so we can detect edges.
+        previous_inputs = Signal.like(self.inputs)
+        m.d.sync += previous_inputs.eq(self.inputs)
+
+        # Select the configuration for our current stage...
+        values     = Array(stage.value     for stage in self.stages)
+        masks      = Array(stage.mask      for stage in self.stages)
+        edge_masks = Array(stage.edge_mask for stage in self.stages)
+        counts     = Array(stage.count     for stage in self.stages)
+
+        value      = values[self.stage]
+        mask       = masks[self.stage]
+        edge_mask  = edge_masks[self.stage]
+        count      = counts[self.stage]
+
+        # ... and check whether our current sample matches it.
+        level_matches = ((self.inputs ^ value) & mask) == 0
+        edge_matches  = ((self.inputs ^ previous_inputs) & edge_mask) == edge_mask
+
+        stage_matches = Signal()
+        m.d.comb += stage_matches.eq(self.armed & level_matches & edge_matches)
+
+        # Count the matches we've seen in this stage; and figure out if this one completes it.
+        match_count    = Signal(self.counter_width)
+        stage_complete = Signal()
+        m.d.comb += stage_complete.eq(stage_matches & ((match_count + 1) >= count))
+
+        with m.If(arm):
+            m.d.sync += [
+                self.armed  .eq(1),
+                self.stage  .eq(0),
+                match_count .eq(0),
+            ]
+
+        with m.Elif(stage_complete):
+            m.d.sync += match_count.eq(0)
+
+            # If this was our last stage, fire our trigger and disarm...
+            with m.If(self.stage + 1 >= self.active_stages):
+                m.d.comb += self.trigger.eq(1)
+                m.d.sync += [
+                    self.armed .eq(0),
+                    self.stage .eq(0),
+                ]
+
+            # ... otherwise, move on to our next stage.
+            with m.Else():
+                m.d.sync += self.stage.eq(self.stage + 1)
+
+        with m.Elif(stage_matches):
+            m.d.sync += match_count.eq(match_count + 1)
+
+        return m
 
 
 class IntegratedLogicAnalyzer(Elaboratable):
@@ -36,16 +256,33 @@ class IntegratedLogicAnalyzer(Elaboratable):
         A strobe that determines when we should start sampling.
     sampling: Signal(), output
         Indicates when sampling is in progress.
+    arm: Signal(), input
+        When using a pre-trigger buffer, a strobe that starts recording pre-trigger samples
+        for the next capture. The ILA is armed automatically after reset. Also arms our
+        ``trigger_unit``, if we have one.
+    armed: Signal(), output
+        Indicates when a trigger would be accepted.
+    triggered: Signal(), output
+        Strobe that indicates a trigger has been accepted; and so sampling begins on the next cycle.
 
     complete: Signal(), output
         Indicates when sampling is complete and ready to be read.
 
+    trigger_unit: ILATrigger
+        If ``trigger_stages`` is provided, a runtime-configurable trigger unit that watches our
+        signals. Its trigger is combined with our ``trigger`` input. It starts out disarmed; and
+        is armed by our ``arm`` strobe, or via its registers. The unit matches against the same
+        samples we store, so the sample that completes its sequence is always the first sample
+        after any pre-trigger buffer: sample number ``pretrigger_depth``.
+
     captured_sample_number: Signal(), input
         Selects which sample the ILA will output. Effectively the address for the ILA's
         sample buffer.
     captured_sample: Signal(), output
         The sample corresponding to the relevant sample number.
-        Can be broken apart by using Cat(*signals).
+        Can be broken apart by using Cat(*signals). If compression is enabled, the sample
+        is followed by a ``delta_width``-bit field containing the number of cycles since the
+        previous sample; e.g. Cat(*signals, delta).
 
     Parameters
     ----------
@@ -63,18 +300,55 @@ class IntegratedLogicAnalyzer(Elaboratable):
         This also can act like an implicit synchronizer; so asynchronous inputs
         are allowed if this number is >= 2. Note that the trigger strobe is read
         on the rising edge of the clock.
+    compress: bool
+        If true, only samples that differ from the previous sample are stored, each alongside
+        the number of cycles elapsed since the previous stored sample. For signals that are
+        often idle, this stretches the capture window far beyond ``sample_depth`` cycles.
+    delta_width: int
+        The width of the cycle-delta field stored with each sample when compressing. If a signal
+        is unchanged for ``2 ** delta_width - 1`` cycles, a repeated sample is stored.
+    pretrigger_depth: int
+        If non-zero, our sample buffer is used as a circular buffer that continuously records
+        samples until a trigger arrives; so each capture includes this many samples from before
+        its trigger. Unlike ``samples_pretrigger``, this costs no additional logic per sample.
+        Triggers are ignored until enough pre-trigger samples have been recorded.
+    trigger_stages: int
+        If non-zero, adds an :class:`ILATrigger` with the given number of stages. Requires
+        ``samples_pretrigger`` to be at least one.
+    trigger_counter_width: int
+        The width of each trigger stage's match counter.
     """
 
-    def __init__(self, *, signals, sample_depth, domain="sync", sample_rate=60e6, samples_pretrigger=1):
+    def __init__(self, *, signals, sample_depth, domain="sync", sample_rate=60e6, samples_pretrigger=1,
+            compress=False, delta_width=16, pretrigger_depth=0, trigger_stages=0, trigger_counter_width=16):
         self.domain             = domain
         self.signals            = signals
         self.inputs             = Cat(*signals)
-        self.sample_width       = len(self.inputs)
+        self.delta_width        = delta_width if compress else 0
+        self.sample_width       = len(self.inputs) + self.delta_width
         self.sample_depth       = sample_depth
         self.samples_pretrigger = samples_pretrigger
+        self.pretrigger_depth   = pretrigger_depth
         self.sample_rate        = sample_rate
         self.sample_period      = 1 / sample_rate
 
+        if pretrigger_depth and compress:
+            raise ValueError("a pre-trigger buffer can't be used with compressed sample storage")
+        if pretrigger_depth >= sample_depth:
+            raise ValueError("pretrigger_depth must be smaller than sample_depth")
+        if trigger_stages and not samples_pretrigger:
+            raise ValueError("a trigger unit requires samples_pretrigger to be at least one")
+
+        # Create our trigger unit, if we have one.
+        if trigger_stages:
+            self.trigger_unit = ILATrigger(
+                sample_width=len(self.inputs),
+                stage_count=trigger_stages,
+                counter_width=trigger_counter_width
+            )
+        else:
+            self.trigger_unit = None
+
         #
         # Create a backing store for our samples.
         #
@@ -84,9 +358,12 @@ class IntegratedLogicAnalyzer(Elaboratable):
         #
         # I/O port
         #
-        self.trigger  = Signal()
-        self.sampling = Signal()
-        self.complete = Signal()
+        self.trigger   = Signal()
+        self.sampling  = Signal()
+        self.arm       = Signal()
+        self.armed     = Signal()
+        self.triggered = Signal()
+        self.complete  = Signal()
 
         self.captured_sample_number = Signal(range(0, self.sample_depth))
         self.captured_sample        = Signal(self.sample_width)
@@ -100,28 +377,62 @@ class IntegratedLogicAnalyzer(Elaboratable):
         read_port  = self.mem.read_port(domain="sync")
         m.submodules['ila_buffer'] = self.mem
 
-        # If necessary, create synchronized versions of the relevant signals.
-        if self.samples_pretrigger >= 2:
-            delayed_inputs = Signal.like(self.inputs)
-            m.submodules += FFSynchronizer(self.inputs,  delayed_inputs,
-                stages=self.samples_pretrigger)
-        elif self.samples_pretrigger == 1:
+        # If we have a trigger unit, allow it to trigger us alongside our trigger input.
+        trigger = Signal()
+        if self.trigger_unit:
+            m.submodules.trigger_unit = self.trigger_unit
+
+            # Our samples are stored a cycle after a trigger is accepted. So our trigger unit matches
+            # our inputs one register earlier than we store them; which means the sample it matches
+            # is exactly the first one we store.
+            trigger_inputs = _delay_samples(m, self.inputs, self.samples_pretrigger - 1)
             delayed_inputs = Signal.like(self.inputs)
-            m.d.sync += delayed_inputs.eq(self.inputs)
+            m.d.sync += delayed_inputs.eq(trigger_inputs)
+
+            m.d.comb += [
+                self.trigger_unit.inputs  .eq(trigger_inputs),
+                self.trigger_unit.arm     .eq(self.arm),
+                trigger                   .eq(self.trigger | self.trigger_unit.trigger)
+            ]
+        else:
+            # If necessary, create synchronized versions of the relevant signals.
+            delayed_inputs = _delay_samples(m, self.inputs, self.samples_pretrigger)
+            m.d.comb += trigger.eq(self.trigger)
+
+        # We accept any trigger that arrives while we're armed.
+        m.d.comb += self.triggered.eq(self.armed & trigger)
+
+        # Set up our read port to provide the output.
+        m.d.comb += self.captured_sample.eq(read_port.data)
+
+        # Capture our samples: into a circular buffer, compressed, or as-is.
+        if self.pretrigger_depth:
+            self._elaborate_circular_capture(m, write_port, read_port, delayed_inputs, trigger)
         else:
-            delayed_inputs  = self.inputs
+            m.d.comb += read_port.addr.eq(self.captured_sample_number)
+
+            if self.delta_width:
+                self._elaborate_compressed_capture(m, write_port, delayed_inputs, trigger)
+            else:
+                self._elaborate_capture(m, write_port, delayed_inputs, trigger)
+
+        # Convert our sync domain to the domain requested by the user, if necessary.
+        if self.domain != "sync":
+            m = DomainRenamer(self.domain)(m)
+
+        return m
+
+
+    def _elaborate_capture(self, m, write_port, delayed_inputs, trigger):
+        """ Adds logic that stores every sample while we're sampling. """
 
         # Counter that keeps track of our write position.
         write_position = Signal(range(0, self.sample_depth))
 
-        # Set up our write port to capture the input signals,
-        # and our read port to provide the output.
+        # Set up our write port to capture the input signals.
         m.d.comb += [
             write_port.data        .eq(delayed_inputs),
             write_port.addr        .eq(write_position),
-
-            self.captured_sample   .eq(read_port.data),
-            read_port.addr         .eq(self.captured_sample_number)
         ]
 
         # Don't sample unless our FSM asserts our sample signal explicitly.
@@ -129,12 +440,15 @@ class IntegratedLogicAnalyzer(Elaboratable):
 
         with m.FSM(name="ila_state") as fsm:
 
-            m.d.comb += self.sampling.eq(~fsm.ongoing("IDLE"))
+            m.d.comb += [
+                self.sampling .eq(~fsm.ongoing("IDLE")),
+                self.armed    .eq(fsm.ongoing("IDLE")),
+            ]
 
             # IDLE: wait for the trigger strobe
             with m.State('IDLE'):
 
-                with m.If(self.trigger):
+                with m.If(trigger):
                     m.next = 'SAMPLE'
 
                     # Grab a sample as our trigger is asserted.
@@ -164,11 +478,159 @@ class IntegratedLogicAnalyzer(Elaboratable):
                     ]
 
 
-        # Convert our sync domain to the domain requested by the user, if necessary.
-        if self.domain != "sync":
-            m = DomainRenamer(self.domain)(m)
+    def _elaborate_compressed_capture(self, m, write_port, delayed_inputs, trigger):
+        """ Adds logic that stores only the samples that differ from their predecessor. """
+
+        # Counter that keeps track of our write position.
+        write_position = Signal(range(0, self.sample_depth))
+
+        # Keep track of our last stored sample, and how many cycles have passed since.
+        previous_sample    = Signal.like(delayed_inputs)
+        delta              = Signal(self.delta_width)
+        first_sample       = Signal()
+
+        # We'll store a sample whenever it's our first, whenever our inputs change, or
+        # whenever our delta is about to overflow.
+        store_sample = Signal()
+        m.d.comb += [
+            write_port.data  .eq(Cat(delayed_inputs, Mux(first_sample, 0, delta))),
+            write_port.addr  .eq(write_position),
+            write_port.en    .eq(store_sample),
+        ]
+
+        with m.FSM(name="ila_state") as fsm:
+
+            m.d.comb += [
+                self.sampling .eq(~fsm.ongoing("IDLE")),
+                self.armed    .eq(fsm.ongoing("IDLE")),
+            ]
+
+            # IDLE: wait for the trigger strobe
+            with m.State('IDLE'):
+
+                with m.If(trigger):
+                    m.next = 'SAMPLE'
+
+                    m.d.sync += [
+                        write_position .eq(0),
+                        first_sample   .eq(1),
+
+                        self.complete  .eq(0),
+                    ]
+
+            # SAMPLE: store each sample that carries new information
+            with m.State('SAMPLE'):
+                m.d.comb += store_sample.eq(
+                    first_sample |
+                    (delayed_inputs != previous_sample) |
+                    (delta == (2 ** self.delta_width - 1))
+                )
+
+                with m.If(store_sample):
+                    m.d.sync += [
+                        write_position  .eq(write_position + 1),
+                        previous_sample .eq(delayed_inputs),
+                        delta           .eq(1),
+                        first_sample    .eq(0),
+                    ]
+
+                    # If this is the last sample, we're done. Finish up.
+                    with m.If(write_position + 1 == self.sample_depth):
+                        m.next = "IDLE"
+                        m.d.sync += self.complete.eq(1)
+
+                with m.Else():
+                    m.d.sync += delta.eq(delta + 1)
+
+
+    def _elaborate_circular_capture(self, m, write_port, read_port, delayed_inputs, trigger):
+        """ Adds logic that continuously records into a circular buffer until we're triggered. """
+
+        depth      = self.sample_depth
+        pretrigger = self.pretrigger_depth
+
+        # Counter that keeps track of our write position; which wraps around our buffer.
+        write_position = Signal(range(0, depth))
+        next_position  = Signal.like(write_position)
+        m.d.comb += next_position.eq(Mux(write_position == depth - 1, 0, write_position + 1))
+
+        # Keep track of where our capture begins in our buffer; and translate sample numbers
+        # into buffer addresses relative to it.
+        start_position = Signal.like(write_position)
+        read_position  = Signal(range(0, 2 * depth))
+        m.d.comb += [
+            read_position  .eq(start_position + self.captured_sample_number),
+            read_port.addr .eq(Mux(read_position >= depth, read_position - depth, read_position)),
+        ]
+
+        # Once we're triggered, our trigger-coincident sample will be taken on the next cycle;
+        # so our capture begins ``pretrigger`` samples before that one.
+        trigger_start = Signal(range(0, 2 * depth))
+        m.d.comb += trigger_start.eq(write_position + 1 + depth - pretrigger)
+
+        # Counters for our pre-trigger fill, and for the samples we've yet to take after our trigger.
+        samples_recorded  = Signal(range(0, pretrigger + 1))
+        samples_remaining = Signal(range(0, depth))
+
+        m.d.comb += [
+            write_port.data .eq(delayed_inputs),
+            write_port.addr .eq(write_position),
+        ]
+
+        # Start filling our buffer after reset, so we're armed automatically.
+        with m.FSM(init="FILL", name="ila_state") as fsm:
+
+            m.d.comb += [
+                self.sampling  .eq(fsm.ongoing("SAMPLE")),
+                self.armed     .eq(fsm.ongoing("ARMED")),
+                write_port.en  .eq(~fsm.ongoing("IDLE")),
+            ]
+
+            # IDLE: our buffer holds a complete capture; wait until we're re-armed.
+            with m.State('IDLE'):
+
+                with m.If(self.arm):
+                    m.next = 'FILL'
+
+                    m.d.sync += [
+                        samples_recorded .eq(0),
+                        self.complete    .eq(0),
+                    ]
+
+            # FILL: record samples until we have enough to satisfy our pre-trigger depth.
+            with m.State('FILL'):
+                m.d.sync += [
+                    write_position   .eq(next_position),
+                    samples_recorded .eq(samples_recorded + 1),
+                ]
+
+                with m.If(samples_recorded + 1 == pretrigger):
+                    m.next = 'ARMED'
+
+            # ARMED: keep recording, until we're triggered.
+            with m.State('ARMED'):
+                m.d.sync += write_position.eq(next_position)
+
+                with m.If(trigger):
+                    m.next = 'SAMPLE'
+
+                    m.d.sync += [
+                        start_position    .eq(Mux(trigger_start >= depth, trigger_start - depth, trigger_start)),
+                        samples_remaining .eq(depth - pretrigger - 1),
+                    ]
+
+            # SAMPLE: record the remainder of our capture.
+            with m.State('SAMPLE'):
+                m.d.sync += [
+                    write_position    .eq(next_position),
+                    samples_remaining .eq(samples_remaining - 1),
+                ]
+
+                # If this is the last sample, we're done. Finish up.
+                with m.If(samples_remaining == 0):
+                    m.next = "IDLE"
+                    m.d.sync += self.complete.eq(1)
 
-        return m
 
 
 class SyncSerialILA(Elaboratable):
@@ -252,6 +714,7 @@ class SyncSerialILA(Elaboratable):
         self.sample_depth  = self.ila.sample_depth
         self.sample_rate   = self.ila.sample_rate
         self.sample_period = self.ila.sample_period
+        self.delta_width   = self.ila.delta_width
 
         # Figure out how many bytes we'll send per sample.
         # We'll always send things squished into 32-bit chunks, as this is what the SPI engine
@@ -269,6 +732,11 @@ class SyncSerialILA(Elaboratable):
         self.trigger  = self.ila.trigger
         self.sampling = self.ila.sampling
         self.complete = self.ila.complete
+        self.arm      = self.ila.arm
+        self.armed    = self.ila.armed
+
+        # Expose our ILA's trigger unit, if it has one.
+        self.trigger_unit = self.ila.trigger_unit
 
 
     def elaborate(self, platform):
@@ -346,6 +814,9 @@ class StreamILA(Elaboratable):
         Indicates when sampling is in progress.
     complete: Signal(), output
         Indicates when sampling is complete and ready to be read.
+    arm: Signal(), input
+        Strobe that arms our ILA, and its trigger unit, if it has one. We re-arm automatically
+        once each capture has been sent.
 
     stream: output stream
         Stream output for the ILA.
@@ -389,6 +860,7 @@ class StreamILA(Elaboratable):
         self.sample_depth  = self.ila.sample_depth
         self.sample_rate   = self.ila.sample_rate
         self.sample_period = self.ila.sample_period
+        self.delta_width   = self.ila.delta_width
 
         # Bolster our bits per sample "word" up to a power of two.
         self.bits_per_sample = 2 ** ((self.ila.sample_width - 1).bit_length())
@@ -399,11 +871,16 @@ class StreamILA(Elaboratable):
         #
         self.stream  = StreamInterface(payload_width=self.bits_per_sample)
         self.trigger = Signal()
+        self.arm     = Signal()
 
 
         # Expose our ILA's trigger and status ports directly.
         self.sampling = self.ila.sampling
         self.complete = self.ila.complete
+        self.armed    = self.ila.armed
+
+        # Expose our ILA's trigger unit, if it has one.
+        self.trigger_unit = self.ila.trigger_unit
 
 
     def elaborate(self, platform):
@@ -422,7 +899,8 @@ class StreamILA(Elaboratable):
         # sample value to the UART.
         m.d.comb += [
             ila.captured_sample_number  .eq(current_sample_number),
-            in_domain_stream.payload    .eq(ila.captured_sample)
+            in_domain_stream.payload    .eq(ila.captured_sample),
+            ila.arm                     .eq(self.arm),
         ]
 
         with m.FSM():
@@ -433,8 +911,9 @@ class StreamILA(Elaboratable):
                 # Always allow triggering, as we're ready for the data.
                 m.d.comb += self.ila.trigger.eq(self.trigger)
 
-                # Once we're triggered, move onto the SAMPLING state.
-                with m.If(self.trigger):
+                # Once the ILA has accepted a trigger -- either from us, or from its trigger unit --
+                # move onto the SAMPLING state.
+                with m.If(self.ila.triggered):
                     m.next = "SAMPLING"
 
 
@@ -473,8 +952,9 @@ class StreamILA(Elaboratable):
                             in_domain_stream.first  .eq(0)
                         ]
 
-                        # If this was the last sample, we're done! Move back to idle.
+                        # If this was the last sample, we're done! Re-arm our ILA, and move back to idle.
                         with m.If(in_domain_stream.last):
+                            m.d.comb += self.ila.arm.eq(1)
                             m.next = "IDLE"
                     with m.Else():
                         m.d.sync += data_valid.eq(1)
@@ -521,111 +1001,806 @@ class StreamILA(Elaboratable):
         return m
 
 
-class AsyncSerialILA(Elaboratable):
-    """ Super-simple ILA that reads samples out over a UART connection.
-    Create a receiver for this object by calling apollo_fpga.ila_receiver_for(<this>).
+class HyperRAMStreamILA(Elaboratable):
+    """ ILA that stores its samples in HyperRAM; and outputs them over a Stream.
 
-    This protocol is simple: we wait for a trigger; and then broadcast our samples.
-    We broadcast one buffer of samples per each subsequent trigger.
+    This ILA behaves like a :class:`StreamILA`; but rather than storing its samples in on-chip memory,
+    it writes them into a HyperRAM via a small on-chip staging FIFO, which allows captures of millions
+    of samples. Once a capture is complete, its samples are read back out of the RAM and broadcast
+    over our output stream.
+
+    Samples are moved into the RAM in bursts, so the RAM's sustained bandwidth must exceed the rate at
+    which samples are captured; the staging FIFO only absorbs the latency of each burst. If the FIFO
+    overflows, the affected samples are dropped, ``overflow`` is set, and the capture is padded with
+    zero-valued samples so it retains its length.
 
     Attributes
     ----------
     trigger: Signal(), input
-        A strobe that determines when we should start sampling.
+        A strobe that determines when we should start sampling. The first sample is taken in the
+        cycle the trigger is asserted.
     sampling: Signal(), output
         Indicates when sampling is in progress.
+    armed: Signal(), output
+        Indicates when a trigger would be accepted.
+    overflow: Signal(), output
+        Set if samples were dropped during the most recent capture.
     complete: Signal(), output
-        Indicates when sampling is complete and ready to be read.
+        Indicates when sampling is complete, and its samples are being read out of the RAM.
+        Synchronous to the RAM's domain.
 
-    tx: Signal(), output
-        Serial output for the ILA.
+    stream: output stream
+        Stream output for the ILA.
 
     Parameters
     ----------
     signals: iterable of Signals
         An iterable of signals that should be captured by the ILA.
     sample_depth: int
-        The depth of the desired buffer, in samples.
-
-    divisor: int
-        The number of `sync` clock cycles per bit period.
+        The number of samples in each capture.
+    ram: HyperRAMInterface or HyperRAMDQSInterface
+        The RAM interface used to store our samples. This ILA takes control of the interface, and adds it
+        as a submodule; the RAM's PHY must be added separately.
 
     domain: string
         The clock domain in which the ILA should operate.
+    ram_domain: string
+        The clock domain in which the RAM interface operates.
+    o_domain: string
+        The clock domain in which the output stream will be generated.
+        If omitted, defaults to the same domain as the core ILA.
+    sample_rate: float
+        Cosmetic indication of the sample rate. Used to format output.
     samples_pretrigger: int
         The number of our samples which should be captured _before_ the trigger.
         This also can act like an implicit synchronizer; so asynchronous inputs
         are allowed if this number is >= 2.
+    staging_depth: int
+        The depth of the on-chip FIFO that stages samples on their way to the RAM.
+    burst_length: int
+        The number of RAM words moved in each RAM transaction.
+    base_address: int
+        The RAM address at which our samples are stored.
     """
 
-    def __init__(self, *, signals, sample_depth, divisor, **kwargs):
-        self.divisor = divisor
+    def __init__(self, *, signals, sample_depth, ram, domain="sync", ram_domain="sync", o_domain=None,
+            sample_rate=60e6, samples_pretrigger=1, staging_depth=512, burst_length=64, base_address=0):
+        self.domain             = domain
+        self._ram_domain        = ram_domain
+        self._o_domain          = o_domain if o_domain else domain
+
+        self.signals            = signals
+        self.inputs             = Cat(*signals)
+        self.sample_width       = len(self.inputs)
+        self.sample_depth       = sample_depth
+        self.samples_pretrigger = samples_pretrigger
+        self.delta_width        = 0
+        self.sample_rate        = sample_rate
+        self.sample_period      = 1 / sample_rate
+
+        self.staging_depth      = staging_depth
+        self.burst_length       = burst_length
+        self.base_address       = base_address
+
+        # Create the front-end we'll use to move bursts of samples to and from our RAM.
+        self.frontend = HyperRAMStreamInterface(ram=ram, max_burst_length=burst_length)
+        self.word_width = self.frontend.word_width
+
+        # Bolster our bits per sample "word" up to a power of two; and to at least one RAM word.
+        self.bits_per_sample  = max(2 ** ((self.sample_width - 1).bit_length()), self.word_width)
+        self.bytes_per_sample = (self.bits_per_sample + 7) // 8
+        self.words_per_sample = self.bits_per_sample // self.word_width
+
+        # We don't provide a trigger unit; but expose the attribute for compatibility with StreamILA.
+        self.trigger_unit = None
 
         #
         # I/O port
         #
-        self.tx      = Signal()
+        self.trigger  = Signal()
+        self.sampling = Signal()
+        self.armed    = Signal()
+        self.overflow = Signal()
+        self.complete = Signal()
 
-        # Extract the domain from our keyword arguments, and then translate it to sync
-        # before we pass it back below. We'll use a DomainRenamer at the boundary to
-        # handle non-sync domains.
-        self.domain = kwargs.get('domain', 'sync')
-        kwargs['domain'] = 'sync'
+        self.stream   = StreamInterface(payload_width=self.bits_per_sample)
 
-        # Create our core integrated logic analyzer.
-        self.ila = StreamILA(
-            signals=signals,
-            sample_depth=sample_depth,
-            **kwargs)
 
-        # Copy some core parameters from our inner ILA.
-        self.signals          = signals
-        self.sample_width     = self.ila.sample_width
-        self.sample_depth     = self.ila.sample_depth
-        self.sample_rate      = self.ila.sample_rate
-        self.sample_period    = self.ila.sample_period
-        self.bits_per_sample  = self.ila.bits_per_sample
-        self.bytes_per_sample = self.ila.bytes_per_sample
+    def elaborate(self, platform):
+        m = Module()
 
-        # Expose our ILA's trigger and status ports directly.
-        self.trigger  = self.ila.trigger
-        self.sampling = self.ila.sampling
-        self.complete = self.ila.complete
+        # We'll build our capture logic in `sync`, and our RAM logic in `ram`; and then rename
+        # both to the domains we've been asked to use.
+        crosses_domains = (self._ram_domain != self.domain)
 
+        m.submodules.frontend = frontend = DomainRenamer("ram")(self.frontend)
 
-    def elaborate(self, platform):
-        m  = Module()
-        m.submodules.ila = ila = self.ila
+        total_words  = self.sample_depth * self.words_per_sample
+        address_step = self.word_width // 16
 
-        # Create our UART transmitter, and connect it to our stream interface.
-        m.submodules.uart = uart = UARTMultibyteTransmitter(
-            byte_width=self.bytes_per_sample,
-            divisor=self.divisor
-        )
-        m.d.comb +=[
-            uart.stream  .stream_eq(ila.stream),
-            self.tx      .eq(uart.tx)
-        ]
+        #
+        # Staging FIFO.
+        #
+        if crosses_domains:
+            m.submodules.staging = staging = AsyncFIFOBuffered(
+                width=self.bits_per_sample,
+                depth=self.staging_depth,
+                w_domain="sync",
+                r_domain="ram"
+            )
+        else:
+            m.submodules.staging = staging = \
+                DomainRenamer("ram")(SyncFIFOBuffered(width=self.bits_per_sample, depth=self.staging_depth))
+
+        # Strobe that indicates our capture has been fully read out; in our capture domain.
+        readout_done     = Signal()
+        ram_readout_done = Signal()
+        if crosses_domains:
+            m.submodules.readout_done = readout_sync = PulseSynchronizer(i_domain="ram", o_domain="sync")
+            m.d.comb += [
+                readout_sync.i  .eq(ram_readout_done),
+                readout_done    .eq(readout_sync.o),
+            ]
+        else:
+            m.d.comb += readout_done.eq(ram_readout_done)
 
 
-        # Convert our sync domain to the domain requested by the user, if necessary.
-        if self.domain != "sync":
-            m = DomainRenamer({"sync": self.domain})(m)
+        #
+        # Capture logic.
+        #
+        delayed_inputs = _delay_samples(m, self.inputs, self.samples_pretrigger)
 
-        return m
+        capture_sample    = Signal()
+        samples_remaining = Signal(range(0, self.sample_depth))
+        samples_to_pad    = Signal(range(0, self.sample_depth + 1))
 
+        m.d.comb += staging.w_data.eq(delayed_inputs)
 
+        # Note any samples we have to drop, so we can pad our capture to its full length.
+        with m.If(capture_sample & ~staging.w_rdy):
+            m.d.sync += [
+                self.overflow   .eq(1),
+                samples_to_pad  .eq(samples_to_pad + 1),
+            ]
 
-class ILAFrontend(metaclass=ABCMeta):
-    """ Class that communicates with an ILA module and emits useful output. """
+        with m.FSM(name="capture_state") as fsm:
 
-    def __init__(self, ila):
-        """
-        Parameters:
+            m.d.comb += [
+                self.sampling  .eq(fsm.ongoing("SAMPLE")),
+                self.armed     .eq(fsm.ongoing("IDLE")),
+                staging.w_en   .eq(capture_sample),
+            ]
+
+            # IDLE: wait for the trigger strobe; and take our first sample as it's asserted.
+            with m.State("IDLE"):
+                with m.If(self.trigger):
+                    m.d.comb += capture_sample.eq(1)
+                    m.d.sync += [
+                        samples_remaining  .eq(self.sample_depth - 1),
+                        samples_to_pad     .eq(0),
+                        self.overflow      .eq(0),
+                    ]
+                    m.next = "SAMPLE" if (self.sample_depth > 1) else "PAD"
+
+            # SAMPLE: stage a sample each cycle, until we've captured them all.
+            with m.State("SAMPLE"):
+                m.d.comb += capture_sample.eq(1)
+                m.d.sync += samples_remaining.eq(samples_remaining - 1)
+
+                with m.If(samples_remaining == 1):
+                    m.next = "PAD"
+
+            # PAD: replace any samples we've dropped, so our capture retains its length.
+            with m.State("PAD"):
+                m.d.comb += [
+                    staging.w_data  .eq(0),
+                    staging.w_en    .eq(samples_to_pad != 0),
+                ]
+
+                with m.If(samples_to_pad == 0):
+                    m.next = "READOUT"
+                with m.Elif(staging.w_rdy):
+                    m.d.sync += samples_to_pad.eq(samples_to_pad - 1)
+
+            # READOUT: wait for our samples to be read out before accepting another trigger.
+            with m.State("READOUT"):
+                with m.If(readout_done):
+                    m.next = "IDLE"
+
+
+        #
+        # RAM writer: split each staged sample into RAM words.
+        #
+        write_stream = frontend.write_stream
+        m.d.comb += write_stream.valid.eq(staging.r_rdy)
+
+        if self.words_per_sample == 1:
+            m.d.comb += [
+                write_stream.payload  .eq(staging.r_data),
+                staging.r_en          .eq(write_stream.ready),
+            ]
+        else:
+            write_index = Signal(range(0, self.words_per_sample))
+            m.d.comb += [
+                write_stream.payload  .eq(staging.r_data.word_select(write_index, self.word_width)),
+                staging.r_en          .eq(write_stream.ready & (write_index == self.words_per_sample - 1)),
+            ]
+            with m.If(write_stream.valid & write_stream.ready):
+                m.d.ram += write_index.eq(Mux(write_index == self.words_per_sample - 1, 0, write_index + 1))
+
+
+        #
+        # RAM reader: reassemble each sample from its RAM words.
+        #
+        if self._o_domain == self._ram_domain:
+            out_stream = self.stream
+        else:
+            out_stream = StreamInterface(payload_width=self.bits_per_sample)
+
+        read_stream = frontend.read_stream
+        sample_number = Signal(range(0, self.sample_depth))
+
+        m.d.comb += [
+            out_stream.first  .eq(sample_number == 0),
+            out_stream.last   .eq(sample_number == self.sample_depth - 1),
+        ]
+
+        if self.words_per_sample == 1:
+            m.d.comb += [
+                out_stream.payload  .eq(read_stream.payload),
+                out_stream.valid    .eq(read_stream.valid),
+                read_stream.ready   .eq(out_stream.ready),
+            ]
+        else:
+            read_index = Signal(range(0, self.words_per_sample))
+            held_words = Array(Signal(self.word_width, name=f"held_word{i}") for i in range(self.words_per_sample - 1))
+            on_last_word = (read_index == self.words_per_sample - 1)
+
+            m.d.comb += [
+                out_stream.payload  .eq(Cat(*held_words, read_stream.payload)),
+                out_stream.valid    .eq(read_stream.valid & on_last_word),
+                read_stream.ready   .eq(~on_last_word | out_stream.ready),
+            ]
+
+            with m.If(read_stream.valid & read_stream.ready):
+                with m.If(on_last_word):
+                    m.d.ram += read_index.eq(0)
+                with m.Else():
+                    m.d.ram += [
+                        held_words[read_index]  .eq(read_stream.payload),
+                        read_index              .eq(read_index + 1),
+                    ]
+
+
+        #
+        # RAM command control.
+        #
+        command          = frontend.command
+        command_address  = Signal(32)
+        words_to_command = Signal(range(0, total_words + 1))
+        words_to_write   = Signal(range(0, total_words + 1))
+
+        burst_length = Signal.like(command.length)
+        m.d.comb += [
+            burst_length     .eq(Mux(words_to_command < self.burst_length, words_to_command, self.burst_length)),
+
+            command.payload  .eq(command_address),
+            command.length   .eq(burst_length),
+        ]
+
+        # Issue a burst command whenever we have words left to command.
+        with m.If(command.valid & command.ready):
+            m.d.ram += [
+                command_address   .eq(command_address + burst_length * address_step),
+                words_to_command  .eq(words_to_command - burst_length),
+            ]
+
+        with m.If(write_stream.valid & write_stream.ready):
+            m.d.ram += words_to_write.eq(words_to_write - 1)
+
+        with m.FSM(domain="ram", name="ram_state"):
+
+            # SETUP: prepare to write a capture.
+            with m.State("SETUP"):
+                m.d.ram += [
+                    command_address   .eq(self.base_address),
+                    words_to_command  .eq(total_words),
+                    words_to_write    .eq(total_words),
+                ]
+                m.next = "WRITE"
+
+            # WRITE: queue write bursts for our capture, as its samples arrive.
+            with m.State("WRITE"):
+                m.d.comb += [
+                    command.write  .eq(1),
+                    command.valid  .eq(words_to_command != 0),
+                ]
+
+                with m.If((words_to_command == 0) & (words_to_write == 0)):
+                    m.next = "FLUSH"
+
+            # FLUSH: wait for our final burst to be written.
+            with m.State("FLUSH"):
+                with m.If(frontend.idle):
+                    m.d.ram += [
+                        command_address   .eq(self.base_address),
+                        words_to_command  .eq(total_words),
+                        sample_number     .eq(0),
+                    ]
+                    m.next = "READ"
+
+            # READ: read our capture back out, and broadcast it.
+            with m.State("READ"):
+                m.d.comb += [
+                    self.complete  .eq(1),
+                    command.write  .eq(0),
+                    command.valid  .eq(words_to_command != 0),
+                ]
+
+                with m.If(out_stream.valid & out_stream.ready):
+                    m.d.ram += sample_number.eq(sample_number + 1)
+
+                    # If this was our last sample, we're ready for another capture.
+                    with m.If(out_stream.last):
+                        m.d.comb += ram_readout_done.eq(1)
+                        m.next = "SETUP"
+
+
+        # If we're not streaming out of the same domain as our RAM, we'll add some clock-domain crossing hardware.
+        if self._o_domain != self._ram_domain:
+            in_domain_signals  = Cat(out_stream.first,  out_stream.payload,  out_stream.last)
+            out_domain_signals = Cat(self.stream.first, self.stream.payload, self.stream.last)
+
+            m.submodules.cdc = fifo = AsyncFIFOBuffered(
+                width=len(in_domain_signals),
+                depth=16,
+                w_domain="ram",
+                r_domain=self._o_domain
+            )
+
+            m.d.comb += [
+                fifo.w_data             .eq(in_domain_signals),
+                fifo.w_en               .eq(out_stream.valid),
+                out_stream.ready        .eq(fifo.w_rdy),
+
+                out_domain_signals      .eq(fifo.r_data),
+                self.stream.valid       .eq(fifo.r_rdy),
+                fifo.r_en               .eq(self.stream.ready)
+            ]
+
+        # Convert our internal domains to the domains requested by the user.
+        return DomainRenamer({"sync": self.domain, "ram": self._ram_domain})(m)
+
+
+class ContinuousStreamILA(Elaboratable):
+    """ ILA that continuously streams its samples out over a Stream.
+
+    Rather than capturing a single buffer of samples per trigger, this ILA streams every
+    sample from the moment it's triggered until it's stopped; which makes it usable as a
+    long-running bus monitor. Samples are buffered in a FIFO to absorb back-pressure; any
+    samples that arrive while that FIFO is full are dropped, and counted.
+
+    Attributes
+    ----------
+    trigger: Signal(), input
+        A strobe that determines when we should start sampling.
+    stop: Signal(), input
+        A strobe that ends sampling.
+    sampling: Signal(), output
+        Indicates when sampling is in progress.
+
+    overflow: Signal(), output
+        Strobe that indicates a sample was dropped because our output stream couldn't keep up.
+        Synchronous to the capture domain.
+    dropped_samples: Signal(32), output
+        A running count of samples dropped since the last trigger. Synchronous to the
+        output domain; in which it's updated every few cycles.
+
+    stream: output stream
+        Stream output for the ILA.
+
+    Parameters
+    ----------
+    signals: iterable of Signals
+        An iterable of signals that should be captured by the ILA.
+    sample_depth: int
+        The depth of the buffer used to absorb back-pressure, in samples.
+
+    domain: string
+        The clock domain in which the ILA should operate.
+    o_domain: string
+        The clock domain in which the output stream will be generated.
+        If omitted, defaults to the same domain as the core ILA.
+    sample_rate: float
+        Cosmetic indication of the sample rate. Used to format output.
+    samples_pretrigger: int
+        The number of our samples which should be captured _before_ the trigger.
+        This also can act like an implicit synchronizer; so asynchronous inputs
+        are allowed if this number is >= 2.
+    """
+
+    def __init__(self, *, signals, sample_depth, domain="sync", o_domain=None, sample_rate=60e6, samples_pretrigger=1):
+        self.domain             = domain
+        self._o_domain          = o_domain if o_domain else domain
+
+        self.signals            = signals
+        self.inputs             = Cat(*signals)
+        self.sample_width       = len(self.inputs)
+        self.sample_depth       = sample_depth
+        self.samples_pretrigger = samples_pretrigger
+        self.delta_width        = 0
+        self.sample_rate        = sample_rate
+        self.sample_period      = 1 / sample_rate
+
+        # Bolster our bits per sample "word" up to a power of two.
+        self.bits_per_sample = 2 ** ((self.sample_width - 1).bit_length())
+        self.bytes_per_sample = (self.bits_per_sample + 7) // 8
+
+        #
+        # I/O port
+        #
+        self.trigger         = Signal()
+        self.stop            = Signal()
+        self.sampling        = Signal()
+
+        self.overflow        = Signal()
+        self.dropped_samples = Signal(32)
+
+        self.stream          = StreamInterface(payload_width=self.bits_per_sample)
+
+
+    def elaborate(self, platform):
+        m  = Module()
+
+        delayed_inputs = _delay_samples(m, self.inputs, self.samples_pretrigger)
+
+        # Create the FIFO that will absorb any back-pressure from our output stream.
+        if self._o_domain == self.domain:
+            m.submodules.fifo = fifo = SyncFIFOBuffered(width=self.sample_width, depth=self.sample_depth)
+        else:
+            m.submodules.fifo = fifo = AsyncFIFOBuffered(
+                width=self.sample_width,
+                depth=self.sample_depth,
+                w_domain="sync",
+                r_domain=self._o_domain
+            )
+
+        # Start sampling on our trigger; and continue until we're stopped.
+        with m.If(self.trigger):
+            m.d.sync += self.sampling.eq(1)
+        with m.Elif(self.stop):
+            m.d.sync += self.sampling.eq(0)
+
+        # While we're sampling, push every sample into our FIFO; noting any we can't fit.
+        m.d.comb += [
+            fifo.w_data    .eq(delayed_inputs),
+            fifo.w_en      .eq(self.sampling),
+            self.overflow  .eq(self.sampling & ~fifo.w_rdy),
+        ]
+
+        # Keep count of our dropped samples, restarting our count with each trigger.
+        dropped_samples = Signal.like(self.dropped_samples)
+        with m.If(self.trigger & ~self.sampling):
+            m.d.sync += dropped_samples.eq(0)
+        with m.Elif(self.overflow):
+            m.d.sync += dropped_samples.eq(dropped_samples + 1)
+
+        # Our FIFO directly drives our output stream.
+        m.d.comb += [
+            self.stream.payload  .eq(fifo.r_data),
+            self.stream.valid    .eq(fifo.r_rdy),
+            fifo.r_en            .eq(self.stream.ready),
+        ]
+
+        # Provide our dropped-sample count in the output domain. If that's a different domain, we'll
+        # cross it with a handshake: we snapshot our count, and hold that snapshot steady until the
+        # output domain has captured it. Our count resets on each trigger, so it's not safe to cross
+        # bit-by-bit, even as a Gray code.
+        if self._o_domain == self.domain:
+            m.d.comb += self.dropped_samples.eq(dropped_samples)
+        else:
+            dropped_snapshot = Signal.like(dropped_samples)
+            snapshot_request = Signal()
+            snapshot_ack     = Signal()
+            o_request        = Signal()
+            o_ack            = Signal()
+
+            m.submodules += [
+                FFSynchronizer(snapshot_request, o_request, o_domain=self._o_domain),
+                FFSynchronizer(o_ack, snapshot_ack, o_domain="sync"),
+            ]
+
+            # Once our previous snapshot has been captured, take a new one...
+            with m.If(snapshot_request == snapshot_ack):
+                m.d.sync += [
+                    dropped_snapshot  .eq(dropped_samples),
+                    snapshot_request  .eq(~snapshot_request),
+                ]
+
+            # ... and capture each new snapshot in our output domain.
+            with m.If(o_request != o_ack):
+                m.d[self._o_domain] += [
+                    self.dropped_samples  .eq(dropped_snapshot),
+                    o_ack                 .eq(o_request),
+                ]
+
+        # Convert our sync domain to the domain requested by the user, if necessary.
+        if self.domain != "sync":
+            m = DomainRenamer(self.domain)(m)
+
+        return m
+
+
+class AsyncSerialILA(Elaboratable):
+    """ Super-simple ILA that reads samples out over a UART connection.
+    Create a receiver for this object by calling apollo_fpga.ila_receiver_for(<this>).
+
+    This protocol is simple: we wait for a trigger; and then broadcast our samples.
+    We broadcast one buffer of samples per each subsequent trigger.
+
+    Attributes
+    ----------
+    trigger: Signal(), input
+        A strobe that determines when we should start sampling.
+    sampling: Signal(), output
+        Indicates when sampling is in progress.
+    complete: Signal(), output
+        Indicates when sampling is complete and ready to be read.
+
+    tx: Signal(), output
+        Serial output for the ILA.
+
+    Parameters
+    ----------
+    signals: iterable of Signals
+        An iterable of signals that should be captured by the ILA.
+    sample_depth: int
+        The depth of the desired buffer, in samples.
+
+    divisor: int
+        The number of `sync` clock cycles per bit period.
+
+    domain: string
+        The clock domain in which the ILA should operate.
+    samples_pretrigger: int
+        The number of our samples which should be captured _before_ the trigger.
+        This also can act like an implicit synchronizer; so asynchronous inputs
+        are allowed if this number is >= 2.
+    """
+
+    def __init__(self, *, signals, sample_depth, divisor, **kwargs):
+        self.divisor = divisor
+
+        #
+        # I/O port
+        #
+        self.tx      = Signal()
+
+        # Extract the domain from our keyword arguments, and then translate it to sync
+        # before we pass it back below. We'll use a DomainRenamer at the boundary to
+        # handle non-sync domains.
+        self.domain = kwargs.get('domain', 'sync')
+        kwargs['domain'] = 'sync'
+
+        # Create our core integrated logic analyzer.
+        self.ila = StreamILA(
+            signals=signals,
+            sample_depth=sample_depth,
+            **kwargs)
+
+        # Copy some core parameters from our inner ILA.
+        self.signals          = signals
+        self.sample_width     = self.ila.sample_width
+        self.sample_depth     = self.ila.sample_depth
+        self.sample_rate      = self.ila.sample_rate
+        self.sample_period    = self.ila.sample_period
+        self.delta_width      = self.ila.delta_width
+        self.bits_per_sample  = self.ila.bits_per_sample
+        self.bytes_per_sample = self.ila.bytes_per_sample
+
+        # Expose our ILA's trigger and status ports directly.
+        self.trigger  = self.ila.trigger
+        self.sampling = self.ila.sampling
+        self.complete = self.ila.complete
+        self.armed    = self.ila.armed
+
+        # Expose our ILA's trigger unit, if it has one.
+        self.trigger_unit = self.ila.trigger_unit
+
+
+    def elaborate(self, platform):
+        m  = Module()
+        m.submodules.ila = ila = self.ila
+
+        # Create our UART transmitter, and connect it to our stream interface.
+        m.submodules.uart = uart = UARTMultibyteTransmitter(
+            byte_width=self.bytes_per_sample,
+            divisor=self.divisor
+        )
+        m.d.comb +=[
+            uart.stream  .stream_eq(ila.stream),
+            self.tx      .eq(uart.tx)
+        ]
+
+
+        # Convert our sync domain to the domain requested by the user, if necessary.
+        if self.domain != "sync":
+            m = DomainRenamer({"sync": self.domain})(m)
+
+        return m
+
+
+
+class ILARingBuffer:
+    """ Bounded, thread-safe ring buffer for raw ILA samples; for continuous captures.
+
+    Storage is backed by an ``mmap``; either of an anonymous region, or of a file on disk,
+    which allows captures larger than would comfortably fit in memory.
+
+    When the buffer is full, writers either wait for space to become available (back-pressure),
+    or overwrite the oldest samples. Both conditions are counted: ``stalls`` counts the writes
+    that had to wait for space; and ``overwritten_samples`` counts samples lost to overwriting.
+
+    Parameters
+    ----------
+    capacity: int
+        The capacity of the buffer, in samples.
+    bytes_per_sample: int
+        The size of each raw sample, in bytes.
+    filename: str, optional
+        If provided, the buffer will be backed by the given file, rather than by memory.
+    """
+
+    def __init__(self, *, capacity, bytes_per_sample, filename=None):
+        self.bytes_per_sample = bytes_per_sample
+        self.capacity         = capacity * bytes_per_sample
+
+        # Create our backing storage.
+        if filename:
+            self._file = open(filename, 'w+b')
+            self._file.truncate(self.capacity)
+            self._map  = mmap.mmap(self._file.fileno(), self.capacity)
+        else:
+            self._file = None
+            self._map  = mmap.mmap(-1, self.capacity)
+
+        # Our read and write positions are tracked as a running count of bytes, and
+        # wrapped only when we access our storage.
+        self._write_position = 0
+        self._read_position  = 0
+        self._condition      = threading.Condition()
+
+        self.stalls              = 0
+        self.overwritten_samples = 0
+
+
+    def __len__(self):
+        """ Returns the number of complete samples currently stored in the buffer. """
+        with self._condition:
+            return self._bytes_available() // self.bytes_per_sample
+
+
+    def _bytes_available(self):
+        return self._write_position - self._read_position
+
+
+    def _bytes_free(self):
+        return self.capacity - self._bytes_available()
+
+
+    def write(self, data, *, overwrite=False, timeout=None):
+        """ Adds raw sample data to the buffer.
+
+        Parameters:
+            data      -- The raw data to add. Should consist of whole samples.
+            overwrite -- If true, the oldest samples will be discarded to make room for this data,
+                         rather than waiting for space to become available.
+            timeout   -- The maximum time to wait for space, in seconds; or None to wait indefinitely.
+
+        Returns True if the data was written; or False if we timed out waiting for space.
+        """
+
+        data = memoryview(data).cast('B')
+
+        with self._condition:
+
+            # If we're allowed to overwrite data, make room by discarding our oldest samples.
+            if overwrite:
+                if len(data) > self.capacity:
+                    self.overwritten_samples += (len(data) - self.capacity) // self.bytes_per_sample
+                    data = data[-self.capacity:]
+
+                shortfall = len(data) - self._bytes_free()
+                if shortfall > 0:
+                    self._read_position      += shortfall
+                    self.overwritten_samples += shortfall // self.bytes_per_sample
+
+            # Otherwise, apply back-pressure: wait until we have room for the whole write.
+            elif len(data) > self._bytes_free():
+                if len(data) > self.capacity:
+                    raise ValueError("write is larger than the ring buffer")
+
+                self.stalls += 1
+                if not self._condition.wait_for(lambda: len(data) <= self._bytes_free(), timeout):
+                    return False
+
+            # Copy our data in; splitting it in two if it wraps around the end of our buffer.
+            start = self._write_position % self.capacity
+            first = min(len(data), self.capacity - start)
+            self._map[start:start + first] = data[:first]
+            self._map[0:len(data) - first] = data[first:]
+
+            self._write_position += len(data)
+            self._condition.notify_all()
+
+        return True
+
+
+    def read(self, sample_count, *, timeout=None):
+        """ Removes up to ``sample_count`` samples from the buffer, and returns their raw data.
+
+        Waits until the requested number of samples are available, or the timeout expires;
+        in which case only the samples available are returned.
+        """
+
+        requested = sample_count * self.bytes_per_sample
+
+        with self._condition:
+            self._condition.wait_for(lambda: self._bytes_available() >= requested, timeout)
+
+            # Figure out how many whole samples we can return...
+            length = min(requested, self._bytes_available())
+            length -= length % self.bytes_per_sample
+
+            # ... and copy them out; again handling any wrap-around.
+            start = self._read_position % self.capacity
+            first = min(length, self.capacity - start)
+            data  = self._map[start:start + first] + self._map[0:length - first]
+
+            self._read_position += length
+            self._condition.notify_all()
+
+        return data
+
+
+    def close(self):
+        """ Releases the buffer's backing storage. """
+        self._map.close()
+        if self._file:
+            self._file.close()
+
+
+
+class ILAFrontend(metaclass=ABCMeta):
+    """ Class that communicates with an ILA module and emits useful output.
+
+    Samples are decoded in a columnar fashion: after :meth:`refresh`, ``self.columns`` maps each
+    signal's name to a NumPy array containing that signal's value for every captured sample;
+    and ``self.sample_times`` holds the time of each sample, in sample periods. For compatibility,
+    ``self.samples`` still provides the same data as a list of per-sample dictionaries.
+
+    Note that each sample value is now a plain integer, rather than the ``bits`` object some frontends
+    previously provided; so code that sliced a value should extract its bits with shifts and masks instead,
+    e.g. ``(value >> 4) & 0xf`` rather than ``value[4:8]``.
+    """
+
+    # The byte order in which each raw sample is transmitted by the relevant ILA.
+    SAMPLE_BYTEORDER = 'little'
+
+    # The name used for the cycle-delta field of compressed samples. Can't collide with a signal name.
+    DELTA_FIELD = '$delta'
+
+    def __init__(self, ila):
+        """
+        Parameters:
             ila -- The ILA object to work with.
         """
         self.ila = ila
-        self.samples = None
+        self.columns = None
+        self.sample_times = None
+
+        # Our row-oriented view of our samples; built only if someone asks for it.
+        self._sample_rows = None
 
 
     @abstractmethod
@@ -633,71 +1808,252 @@ class ILAFrontend(metaclass=ABCMeta):
         """ Read samples from the target ILA. Should return an iterable of samples. """
 
 
-    def _parse_sample(self, raw_sample):
-        """ Converts a single binary sample to a dictionary of names -> sample values. """
+    def _read_sample_buffer(self):
+        """ Reads samples from the target ILA as a single, raw binary buffer.
+
+        Frontends that can provide their samples as one contiguous buffer of
+        ``bytes_per_sample``-sized samples should override this; doing so allows the
+        whole buffer to be decoded in a single pass. Returns None if unsupported.
+        """
+        return None
+
+
+    @staticmethod
+    def _extract_field(raw_samples, lsb, width):
+        """ Extracts a bit-field from every row of a 2D array of little-endian sample bytes.
 
+        Returns an array of ``uint64`` values for fields of up to 64 bits; or an array
+        of Python integers for wider fields.
+        """
+        import numpy
+
+        first_byte = lsb // 8
+        shift      = lsb % 8
+        byte_count = (shift + width + 7) // 8
+
+        # If our field is too wide to assemble in a 64-bit lane, split it in half,
+        # and glue the two halves back together as arbitrary-precision integers.
+        if byte_count > 8:
+            low_width  = width // 2
+            low_half   = ILAFrontend._extract_field(raw_samples, lsb, low_width)
+            high_half  = ILAFrontend._extract_field(raw_samples, lsb + low_width, width - low_width)
+            return low_half.astype(object) | (high_half.astype(object) << low_width)
+
+        # Otherwise, assemble each of the bytes that contain our field into a single word...
+        value = numpy.zeros(len(raw_samples), dtype=numpy.uint64)
+        for i in range(byte_count):
+            byte = raw_samples[:, first_byte + i].astype(numpy.uint64)
+            value |= byte << numpy.uint64(8 * i)
+
+        # ... and then trim it down to only our field.
+        mask = numpy.uint64((1 << width) - 1)
+        return (value >> numpy.uint64(shift)) & mask
+
+
+    def _unpack_sample_buffer(self, buffer):
+        """ Converts a raw binary buffer of samples into a dictionary of name -> sample array. """
+        import numpy
+
+        bytes_per_sample = self.ila.bytes_per_sample
+
+        # View our buffer as a two-dimensional array, with one row per sample...
+        raw_samples  = numpy.frombuffer(buffer, dtype=numpy.uint8)
+        sample_count = len(raw_samples) // bytes_per_sample
+        raw_samples  = raw_samples[:sample_count * bytes_per_sample].reshape(sample_count, bytes_per_sample)
+
+        # ... with its bytes always in little-endian order.
+        if self.SAMPLE_BYTEORDER == 'big':
+            raw_samples = raw_samples[:, ::-1]
+
+        # Split each row into its component fields, and associate them with their names.
         position = 0
-        sample   = {}
+        columns  = {}
+        for name, width in self._sample_fields():
+            columns[name] = self._extract_field(raw_samples, position, width)
+            position += width
+
+        return columns
+
+
+    def _parse_samples(self, raw_samples):
+        """ Converts an iterable of raw, binary samples to a dictionary of name -> sample array. """
+        import numpy
+
+        raw_samples = [int(sample) for sample in raw_samples]
+
+        position = 0
+        columns  = {}
+        for name, width in self._sample_fields():
+            mask  = (1 << width) - 1
+            dtype = numpy.uint64 if width <= 64 else object
+
+            values = [(sample >> position) & mask for sample in raw_samples]
+            columns[name] = numpy.array(values, dtype=dtype)
+            position += width
+
+        return columns
+
+
+    def _sample_fields(self):
+        """ Returns an iterator over the (name, width) of each field in a raw sample, from LSB to MSB. """
 
-        # Split our raw, bits(0) signal into smaller slices, and associate them with their names.
         for signal in self.ila.signals:
-            signal_width = len(signal)
-            signal_bits  = raw_sample[position : position + signal_width]
-            position += signal_width
+            yield signal.name, len(signal)
 
-            sample[signal.name] = signal_bits
+        # Compressed samples also carry the number of cycles since the previous sample.
+        delta_width = getattr(self.ila, 'delta_width', 0)
+        if delta_width:
+            yield self.DELTA_FIELD, delta_width
 
-        return sample
 
+    def _extract_sample_times(self, columns):
+        """ Removes any cycle-delta field from a set of columns, and returns each sample's time in sample periods. """
+        import numpy
 
-    def _parse_samples(self, raw_samples):
-        """ Converts raw, binary samples to dictionaries of name -> sample. """
-        return [self._parse_sample(sample) for sample in raw_samples]
+        deltas = columns.pop(self.DELTA_FIELD, None)
+
+        # If our samples were compressed, reconstruct their times from their deltas...
+        if deltas is not None:
+            return numpy.cumsum(deltas, dtype=numpy.uint64)
+
+        # ... otherwise, we have exactly one sample per period.
+        sample_count = len(next(iter(columns.values()), ()))
+        return numpy.arange(sample_count, dtype=numpy.uint64)
 
 
     def refresh(self):
         """ Fetches the latest set of samples from the target ILA. """
-        self.samples = self._parse_samples(self._read_samples())
 
+        # If we can fetch our samples as a single buffer, decode it in one pass;
+        # otherwise, fall back to decoding an iterable of individual samples.
+        buffer = self._read_sample_buffer()
+        if buffer is not None:
+            columns = self._unpack_sample_buffer(buffer)
+        else:
+            columns = self._parse_samples(self._read_samples())
+
+        self.sample_times = self._extract_sample_times(columns)
+        self.columns      = columns
+        self._sample_rows = None
 
-    def enumerate_samples(self):
-        """ Returns an iterator that returns pairs of (timestamp, sample). """
 
-        # If we don't have any samples, fetch samples from the ILA.
-        if self.samples is None:
+    def _sample_columns(self):
+        """ Returns our columnar sample data, fetching it from the ILA if necessary. """
+
+        if self.columns is None:
             self.refresh()
 
-        timestamp = 0
+        return self.columns
 
-        # Iterate over each sample...
-        for sample in self.samples:
-            yield timestamp, sample
 
-            # ... and advance the timestamp by the relevant interval.
-            timestamp += self.ila.sample_period
+    @property
+    def samples(self):
+        """ Our most recent samples, as a list of dictionaries of name -> value; or None if none have been read.
+
+        This is the row-oriented view older code used; it's built from :attr:`columns` the first time it's needed.
+        Each value is a plain ``int``, rather than a sliceable ``bits`` object.
+        """
+
+        if self.columns is None:
+            return None
+
+        if self._sample_rows is None:
+            names  = list(self.columns.keys())
+            values = [column.tolist() for column in self.columns.values()]
+            self._sample_rows = [dict(zip(names, row)) for row in zip(*values)]
+
+        return self._sample_rows
+
+
+    def enumerate_samples(self):
+        """ Returns an iterator that returns pairs of (timestamp, sample). """
+
+        columns = self._sample_columns()
+
+        # Convert each of our columns to native integers once, rather than per-sample...
+        names  = list(columns.keys())
+        values = [column.tolist() for column in columns.values()]
+        times  = self.sample_times.tolist()
+
+        # ... and then walk them in lockstep.
+        for time, row in zip(times, zip(*values)):
+            yield time * self.ila.sample_period, dict(zip(names, row))
 
 
     def print_samples(self):
         """ Simple method that prints each of our samples; for simple CLI debugging."""
 
-        for timestamp, sample in self.enumerate_samples():
-            timestamp_scaled = 1000000 * timestamp
-            print(f"{timestamp_scaled:08f}us: {sample}")
+        columns = self._sample_columns()
+
+        names  = list(columns.keys())
+        values = [column.tolist() for column in columns.values()]
+        times  = self.sample_times.tolist()
+
+        for time, row in zip(times, zip(*values)):
+            timestamp_scaled = 1000000 * time * self.ila.sample_period
+            fields = ", ".join(f"{name}: {value:#x}" for name, value in zip(names, row))
+            print(f"{timestamp_scaled:08f}us: {{{fields}}}")
+
+
+
+    def _enumerate_changes(self, columns):
+        """ Returns an iterator over (sample index, signal name, value) for each value change.
+
+        Changes are computed column-by-column, so signals that rarely change cost almost nothing;
+        and are yielded in time order, as required by a value-change dump.
+        """
+        import numpy
+
+        names         = list(columns.keys())
+        change_points = []
+        change_owners = []
+
+        # Find the samples at which each signal takes on a new value. The first sample
+        # always counts as a change, as it establishes the signal's initial value.
+        for signal_id, column in enumerate(columns.values()):
+            if not len(column):
+                continue
+
+            changes = numpy.flatnonzero(column[1:] != column[:-1]) + 1
+            changes = numpy.concatenate(([0], changes))
 
+            change_points.append(changes)
+            change_owners.append(numpy.full(len(changes), signal_id))
+
+        if not change_points:
+            return
+
+        # Merge our per-signal changes into a single, time-ordered list.
+        change_points = numpy.concatenate(change_points)
+        change_owners = numpy.concatenate(change_owners)
+        order         = numpy.lexsort((change_owners, change_points))
+
+        for index, signal_id in zip(change_points[order].tolist(), change_owners[order].tolist()):
+            name = names[signal_id]
+            yield index, name, int(columns[name][index])
 
 
     def emit_vcd(self, filename, *, gtkw_filename=None, add_clock=True):
         """ Emits a VCD file containing the ILA samples.
 
+        Only value changes are written, so the cost of emitting a capture scales with its
+        activity rather than with its depth.
+
         Parameters:
             filename      -- The filename to write to, or '-' to write to stdout.
             gtkw_filename -- If provided, a gtkwave save file will be generated that
                              automatically displays all of the relevant signals in the
                              order provided to the ILA.
             add_clock     -- If true or not provided, adds a replica of the ILA's sample
-                             clock to make change points easier to see.
+                             clock to make change points easier to see. For compressed
+                             captures, this adds an edge for every cycle in the capture
+                             window, and may make the dump much larger.
         """
 
+        columns       = self._sample_columns()
+        sample_times  = self.sample_times.tolist()
+        sample_period = self.ila.sample_period
+
         # Select the file-like object we're working with.
         if filename == "-":
             stream = sys.stdout
@@ -708,9 +2064,6 @@ class ILAFrontend(metaclass=ABCMeta):
 
         # Create our basic VCD.
         with VCDWriter(stream, timescale=f"1 ns", date='today') as writer:
-            first_timestamp = math.inf
-            last_timestamp  = 0
-
             signals = {}
 
             # If we're adding a clock...
@@ -722,23 +2075,32 @@ class ILAFrontend(metaclass=ABCMeta):
             for signal in self.ila.signals:
                 signals[signal.name] = writer.register_var('ila', signal.name, 'integer', size=len(signal))
 
-            # Dump the each of our samples into the VCD.
-            clock_time = 0
-            for timestamp, sample in self.enumerate_samples():
-                for signal_name, signal_value in sample.items():
+            # Helper that adds any clock edges that occur before a given time, in sample periods.
+            clock_edge = 0
+            def advance_clock_to(time):
+                nonlocal clock_edge, clock_value
 
-                    # If we're adding a clock signal, add any changes necessary since
-                    # the last value-change.
-                    if add_clock:
-                        while clock_time < timestamp:
-                            writer.change(clock_signal, clock_time / 1e-9, clock_value)
+                while clock_edge < (time * 2):
+                    writer.change(clock_signal, clock_edge * sample_period / 2 / 1e-9, clock_value)
 
-                            clock_value ^= 1
-                            clock_time  += (self.ila.sample_period / 2)
+                    clock_value ^= 1
+                    clock_edge  += 1
 
-                    # Register the signal change.
-                    writer.change(signals[signal_name], timestamp / 1e-9, signal_value.to_int())
+            # Stream each of our value changes straight into the VCD...
+            for index, signal_name, value in self._enumerate_changes(columns):
+                time = sample_times[index]
 
+                if add_clock:
+                    advance_clock_to(time)
+
+                writer.change(signals[signal_name], time * sample_period / 1e-9, value)
+
+            # ... and finish off our clock, if we have one.
+            if add_clock and sample_times:
+                advance_clock_to(sample_times[-1])
+
+        if close_after:
+            stream.close()
 
         # If we're generating a GTKW, delegate that to our helper function.
         if gtkw_filename:
@@ -746,12 +2108,43 @@ class ILAFrontend(metaclass=ABCMeta):
             self._emit_gtkw(gtkw_filename, filename, add_clock=add_clock)
 
 
+    def emit_fst(self, filename, *, gtkw_filename=None, add_clock=True):
+        """ Emits an FST file containing the ILA samples.
+
+        FST is GTKWave's compressed, indexed dump format; it's much smaller than a VCD,
+        and large captures open near-instantly. Conversion is performed by GTKWave's
+        ``vcd2fst`` utility, which must be available on the PATH.
+
+        Parameters:
+            filename      -- The filename to write to.
+            gtkw_filename -- If provided, a gtkwave save file will be generated that
+                             automatically displays all of the relevant signals in the
+                             order provided to the ILA.
+            add_clock     -- If true or not provided, adds a replica of the ILA's sample
+                             clock to make change points easier to see.
+        """
+
+        if shutil.which("vcd2fst") is None:
+            raise RuntimeError("emitting an FST requires GTKWave's `vcd2fst` utility")
+
+        # Generate an intermediary VCD, and convert it.
+        vcd_filename = os.path.join(tempfile.gettempdir(), os.urandom(24).hex() + '.vcd')
+        try:
+            self.emit_vcd(vcd_filename, add_clock=add_clock)
+            subprocess.run(["vcd2fst", "-v", vcd_filename, "-f", filename], check=True, stdout=subprocess.DEVNULL)
+        finally:
+            os.remove(vcd_filename)
+
+        if gtkw_filename:
+            self._emit_gtkw(gtkw_filename, filename, add_clock=add_clock)
+
+
     def _emit_gtkw(self, filename, dump_filename, *, add_clock=True):
         """ Emits a GTKWave save file to accompany a generated VCD.
 
         Parameters:
             filename      -- The filename to write the GTKW save to.
-            dump_filename -- The filename of the VCD that should be opened with this save.
+            dump_filename -- The filename of the VCD or FST that should be opened with this save.
             add_clock     -- True iff a clock signal should be added to the GTKW save.
         """
 
@@ -765,7 +2158,8 @@ class ILAFrontend(metaclass=ABCMeta):
             gtkw.dumpfile(dump_filename)
 
             # If we're adding a clock, add it to the top of the view.
-            gtkw.trace('ila.ila_clock')
+            if add_clock:
+                gtkw.trace('ila.ila_clock')
 
             # Add each of our signals to the file.
             for signal in self.ila.signals:
@@ -775,15 +2169,22 @@ class ILAFrontend(metaclass=ABCMeta):
     def interactive_display(self, *, add_clock=True):
         """ Attempts to spawn a GTKWave instance to display the ILA results interactively. """
 
+        # Prefer an FST where we can generate one, as GTKWave loads them much faster.
+        use_fst = shutil.which("vcd2fst") is not None
+        dump_extension = '.fst' if use_fst else '.vcd'
+
         # Hack: generate files in a way that doesn't trip macOS's fancy guards.
         try:
-            vcd_filename = os.path.join(tempfile.gettempdir(), os.urandom(24).hex() + '.vcd')
+            dump_filename = os.path.join(tempfile.gettempdir(), os.urandom(24).hex() + dump_extension)
             gtkw_filename = os.path.join(tempfile.gettempdir(), os.urandom(24).hex() + '.gtkw')
 
-            self.emit_vcd(vcd_filename, gtkw_filename=gtkw_filename)
-            subprocess.run(["gtkwave", "-f", vcd_filename, "-a", gtkw_filename])
+            if use_fst:
+                self.emit_fst(dump_filename, gtkw_filename=gtkw_filename, add_clock=add_clock)
+            else:
+                self.emit_vcd(dump_filename, gtkw_filename=gtkw_filename, add_clock=add_clock)
+            subprocess.run(["gtkwave", "-f", dump_filename, "-a", gtkw_filename])
         finally:
-            os.remove(vcd_filename)
+            os.remove(dump_filename)
             os.remove(gtkw_filename)
 
 
@@ -798,6 +2199,8 @@ class AsyncSerialILAFrontend(ILAFrontend):
         The ILA object to work with.
     """
 
+    SAMPLE_BYTEORDER = 'big'
+
     def __init__(self, *args, ila, **kwargs):
         import serial
 
@@ -821,12 +2224,16 @@ class AsyncSerialILAFrontend(ILAFrontend):
             yield bits.from_bytes(raw_sample, length=sample_length, byteorder='big')
 
 
-    def _read_samples(self):
-        """ Reads a set of ILA samples, and returns them. """
+    def _read_sample_buffer(self):
+        """ Reads a set of ILA samples, and returns them as a single raw buffer. """
 
         sample_width_bytes = self.ila.bytes_per_sample
         total_to_read      = self.ila.sample_depth * sample_width_bytes
 
         # Fetch all of our samples from the given device.
-        all_samples = self._port.read(total_to_read)
-        return list(self._split_samples(all_samples))
+        return self._port.read(total_to_read)
+
+
+    def _read_samples(self):
+        """ Reads a set of ILA samples, and returns them. """
+        return list(self._split_samples(self._read_sample_buffer()))
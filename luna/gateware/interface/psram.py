@@ -6,9 +6,12 @@
 
 """ Interfaces to LUNA's PSRAM chips."""
 
-from amaranth import Const, Signal, Module, Cat, Elaboratable, Record, ClockSignal, ResetSignal, Instance
+from amaranth import Const, Signal, Module, Cat, Elaboratable, Record, ClockSignal, ResetSignal, Instance, Mux
 from amaranth.hdl.rec import DIR_FANIN, DIR_FANOUT
 from amaranth.lib.cdc import FFSynchronizer
+from amaranth.lib.fifo import SyncFIFOBuffered
+
+from ..stream import StreamInterface
 
 
 class HyperBusPHY(Record):
@@ -57,11 +60,15 @@ class HyperRAMInterface(Elaboratable):
     LOW_LATENCY_CLOCKS  = 7
     HIGH_LATENCY_CLOCKS = 14
 
-    def __init__(self, *, phy):
+    def __init__(self, *, phy, variable_latency=False):
         """
         Parmeters:
-            phy           -- The RAM record that should be connected to this RAM chip.
+            phy              -- The RAM record that should be connected to this RAM chip.
+            variable_latency -- If set, the latency of each transaction is determined by the RWDS value the
+                                RAM presents at its start; rather than always assuming the RAM's longest latency.
+                                Only use this with parts configured for variable latency.
         """
+        self.variable_latency = variable_latency
 
         #
         # I/O port.
@@ -214,9 +221,9 @@ class HyperRAMInterface(Elaboratable):
                 with m.Else():
                     m.next = "HANDLE_LATENCY"
 
-                    # FIXME: our HyperRAM part has a fixed latency, but we could need to detect 
-                    # different variants from the configuration register in the future.
-                    with m.If(extra_latency | 1):
+                    # Our HyperRAM parts default to a fixed latency; so unless we've been told the part
+                    # uses variable latency, we'll always assume the longer latency period.
+                    with m.If(extra_latency | (not self.variable_latency)):
                         m.d.sync += latency_clocks_remaining.eq(self.HIGH_LATENCY_CLOCKS-2)
                     with m.Else():
                         m.d.sync += latency_clocks_remaining.eq(self.LOW_LATENCY_CLOCKS-2)
@@ -453,11 +460,15 @@ class HyperRAMDQSInterface(Elaboratable):
     LOW_LATENCY_CLOCKS  = 3
     HIGH_LATENCY_CLOCKS = 5
 
-    def __init__(self, *, phy):
+    def __init__(self, *, phy, variable_latency=False):
         """
         Parmeters:
-            phy           -- The RAM record that should be connected to this RAM chip.
+            phy              -- The RAM record that should be connected to this RAM chip.
+            variable_latency -- If set, the latency of each transaction is determined by the RWDS value the
+                                RAM presents at its start; rather than always assuming the RAM's longest latency.
+                                Only use this with parts configured for variable latency.
         """
+        self.variable_latency = variable_latency
 
         #
         # I/O port.
@@ -600,9 +611,9 @@ class HyperRAMDQSInterface(Elaboratable):
                 with m.Else():
                     m.next = "HANDLE_LATENCY"
 
-                    # FIXME: our HyperRAM part has a fixed latency, but we could need to detect 
-                    # different variants from the configuration register in the future.
-                    with m.If(extra_latency | 1):
+                    # Our HyperRAM parts default to a fixed latency; so unless we've been told the part
+                    # uses variable latency, we'll always assume the longer latency period.
+                    with m.If(extra_latency | (not self.variable_latency)):
                         m.d.sync += latency_clocks_remaining.eq(self.HIGH_LATENCY_CLOCKS)
                     with m.Else():
                         m.d.sync += latency_clocks_remaining.eq(self.LOW_LATENCY_CLOCKS)
@@ -915,3 +926,198 @@ class HyperRAMDQSPHY(Elaboratable):
             ]
 
         return m
+
+
+
+class HyperRAMStreamInterface(Elaboratable):
+    """ Burst-oriented, streaming front-end for HyperRAMInterface and HyperRAMDQSInterface.
+
+    Accepts a queue of (address, length) burst commands, and performs each as a single HyperRAM transaction;
+    starting each transaction as soon as the RAM is free. Write data is provided via a stream, and staged
+    until a full burst is available; read data is staged so it can be consumed at any pace. This means
+    callers never need to perform the RAM interface's ``start_transfer``/``final_word`` choreography.
+
+    Attributes
+    ----------
+    command: StreamInterface(payload_width=32), input stream
+        Queue of burst commands. The payload carries the RAM address at which each burst starts;
+        the ``length`` field carries the number of words in the burst, and ``write`` / ``register_space``
+        select the type of transaction. Each burst must be between one and ``max_burst_length`` words long;
+        and a write burst won't start until all of its data has been provided on ``write_stream``.
+    write_stream: StreamInterface(payload_width=word_width), input stream
+        The data to be written by our write bursts, in command order.
+    read_stream: StreamInterface(payload_width=word_width), output stream
+        The data read by our read bursts; with ``first`` and ``last`` marking the start and end of each burst.
+
+    idle: Signal(), output
+        High when no commands are pending, and the RAM is idle.
+
+    clear_counters: Signal(), input
+        Strobe that resets our performance counters.
+    words_transferred: Signal(32), output
+        The number of words read or written since our counters were last cleared.
+    busy_cycles: Signal(32), output
+        The number of cycles the RAM has spent performing transactions since our counters were last cleared.
+        Together with ``words_transferred``, this allows measurement of the RAM's effective bandwidth.
+
+    Parameters
+    ----------
+    ram: HyperRAMInterface or HyperRAMDQSInterface
+        The RAM interface to drive. This module takes control of the interface; and adds it as a submodule.
+    max_burst_length: int, optional
+        The maximum number of words in a single burst; which also sets the depth of our data buffers.
+    command_queue_depth: int, optional
+        The number of commands that can be queued.
+    """
+
+    def __init__(self, *, ram, max_burst_length=64, command_queue_depth=4):
+        self._ram                = ram
+        self.max_burst_length    = max_burst_length
+        self.command_queue_depth = command_queue_depth
+
+        self.word_width          = len(ram.read_data)
+        length_width             = max_burst_length.bit_length()
+
+        #
+        # I/O port
+        #
+        self.command      = StreamInterface(payload_width=32, extra_fields=[
+            ('length',         length_width),
+            ('write',          1),
+            ('register_space', 1),
+        ])
+        self.write_stream = StreamInterface(payload_width=self.word_width)
+        self.read_stream  = StreamInterface(payload_width=self.word_width)
+
+        self.idle              = Signal()
+
+        self.clear_counters    = Signal()
+        self.words_transferred = Signal(32)
+        self.busy_cycles       = Signal(32)
+
+
+    def elaborate(self, platform):
+        m = Module()
+
+        ram = self._ram
+        m.submodules.ram = ram
+
+        command = self.command
+        length_width = len(command.length)
+
+        #
+        # Command queue.
+        #
+        m.submodules.command_queue = command_queue = \
+            SyncFIFOBuffered(width=32 + length_width + 2, depth=self.command_queue_depth)
+        m.d.comb += [
+            command_queue.w_data  .eq(Cat(command.payload, command.length, command.write, command.register_space)),
+            command_queue.w_en    .eq(command.valid),
+            command.ready         .eq(command_queue.w_rdy),
+        ]
+
+        next_address        = command_queue.r_data[0:32]
+        next_length         = command_queue.r_data[32:32 + length_width]
+        next_write          = command_queue.r_data[32 + length_width]
+        next_register_space = command_queue.r_data[33 + length_width]
+
+
+        #
+        # Data staging buffers.
+        #
+        m.submodules.write_buffer = write_buffer = \
+            SyncFIFOBuffered(width=self.word_width, depth=self.max_burst_length)
+        m.d.comb += [
+            write_buffer.w_data       .eq(self.write_stream.payload),
+            write_buffer.w_en         .eq(self.write_stream.valid),
+            self.write_stream.ready   .eq(write_buffer.w_rdy),
+        ]
+
+        # Our read buffer also stores the first/last flags for each word.
+        m.submodules.read_buffer = read_buffer = \
+            SyncFIFOBuffered(width=self.word_width + 2, depth=self.max_burst_length)
+        m.d.comb += [
+            self.read_stream.payload  .eq(read_buffer.r_data[0:self.word_width]),
+            self.read_stream.first    .eq(read_buffer.r_data[self.word_width]),
+            self.read_stream.last     .eq(read_buffer.r_data[self.word_width + 1]),
+            self.read_stream.valid    .eq(read_buffer.r_rdy),
+            read_buffer.r_en          .eq(self.read_stream.ready),
+        ]
+
+        # The RAM can't be stalled mid-transaction; so we'll only start a write once all of its data
+        # is buffered, and only start a read once we have space to store all of its data.
+        read_space = self.max_burst_length - read_buffer.level
+        command_can_start = Mux(next_write,
+            write_buffer.level >= next_length,
+            read_space >= next_length
+        )
+
+
+        #
+        # Transaction control.
+        #
+        is_write        = Signal()
+        burst_length    = Signal.like(command.length)
+        words_remaining = Signal.like(command.length)
+
+        m.d.comb += [
+            ram.single_page     .eq(0),
+            ram.final_word      .eq(words_remaining == 1),
+            ram.write_data      .eq(write_buffer.r_data),
+        ]
+
+        with m.FSM():
+
+            # IDLE -- wait for a command we can perform, and for the RAM to be ready for it.
+            with m.State("IDLE"):
+                m.d.comb += self.idle.eq((command_queue.level == 0) & ram.idle)
+
+                with m.If(command_queue.r_rdy & command_can_start & ram.idle):
+                    m.d.comb += [
+                        command_queue.r_en  .eq(1),
+
+                        ram.start_transfer  .eq(1),
+                        ram.address         .eq(next_address),
+                        ram.perform_write   .eq(next_write),
+                        ram.register_space  .eq(next_register_space),
+                    ]
+                    m.d.sync += [
+                        is_write            .eq(next_write),
+                        burst_length        .eq(next_length),
+                        words_remaining     .eq(next_length),
+                    ]
+                    m.next = "TRANSFER"
+
+            # TRANSFER -- move each word of our burst to or from the RAM.
+            with m.State("TRANSFER"):
+                word_strobe = Mux(is_write, ram.write_ready, ram.read_ready)
+
+                m.d.comb += [
+                    write_buffer.r_en  .eq(is_write & ram.write_ready),
+
+                    read_buffer.w_data .eq(Cat(ram.read_data, words_remaining == burst_length, words_remaining == 1)),
+                    read_buffer.w_en   .eq(~is_write & ram.read_ready),
+                ]
+
+                with m.If(word_strobe):
+                    m.d.sync += words_remaining.eq(words_remaining - 1)
+
+                    with m.If(words_remaining == 1):
+                        m.next = "IDLE"
+
+
+        #
+        # Performance counters.
+        #
+        with m.If(self.clear_counters):
+            m.d.sync += [
+                self.words_transferred  .eq(0),
+                self.busy_cycles        .eq(0),
+            ]
+        with m.Else():
+            with m.If(read_buffer.w_en | write_buffer.r_en):
+                m.d.sync += self.words_transferred.eq(self.words_transferred + 1)
+            with m.If(~ram.idle):
+                m.d.sync += self.busy_cycles.eq(self.busy_cycles + 1)
+
+        return m
@@ -8,10 +8,14 @@
 This module contains definitions of memory units that work well for USB applications.
 """
 
-from amaranth import Elaboratable, Module, Signal
+from amaranth import Cat, Elaboratable, Module, Signal, Mux
+from amaranth.lib.fifo import SyncFIFOBuffered
 from amaranth.lib.memory import Memory
 from amaranth.hdl.xfrm import DomainRenamer
 
+from .stream         import StreamInterface
+from .stream.gearbox import StreamDownConverter, StreamUpConverter
+
 
 class TransactionalizedFIFO(Elaboratable):
     """ Transactionalized, buffer first-in-first-out queue.
@@ -222,3 +226,321 @@ class TransactionalizedFIFO(Elaboratable):
             m = DomainRenamer({"sync": self.domain})(m)
 
         return m
+
+
+
+class HyperRAMFIFO(Elaboratable):
+    """ Large first-in-first-out queue that stores its data in HyperRAM.
+
+    Data enters and leaves the queue via on-chip staging FIFOs; the HyperRAM is used to store any backlog
+    that won't fit in them. Data is moved to and from the HyperRAM in bursts of up to ``burst_length`` words,
+    which amortizes the RAM's access latency. Whenever the HyperRAM holds no backlog, data bypasses it
+    entirely; so the queue adds little latency when it's not needed.
+
+    Each entry in the queue holds a stream payload; and, if ``store_flags`` is set, the ``first`` and ``last``
+    signals that accompanied it. Entries are padded out to a whole number of RAM words; so, for example, an 8-bit
+    payload and its flags occupy a single word of a 16-bit RAM interface. Our output can also be narrowed by a
+    :class:`StreamDownConverter`. To sit directly in front of a ``USBStreamInEndpoint``, use either an 8-bit
+    payload, or a wider payload with an ``output_width`` of 8; in each case, with ``store_flags`` set.
+
+    Attributes
+    ----------
+    input: StreamInterface(payload_width=payload_width), input stream
+        The stream that fills our queue.
+    output: StreamInterface(payload_width=output_width), output stream
+        The stream that drains our queue.
+
+    level: Signal(range(0, capacity + 1)), output
+        The number of RAM words currently stored in the queue; including words in our staging FIFOs.
+    ram_level: Signal(range(0, depth + 1)), output
+        The number of RAM words currently stored in the HyperRAM.
+
+    Parameters
+    ----------
+    ram: HyperRAMInterface or HyperRAMDQSInterface
+        The interface to the HyperRAM used to store our data. This module takes control of the interface;
+        and adds it as a submodule.
+    depth: int
+        The number of RAM words we're allowed to store in the HyperRAM.
+    base_address: int, optional
+        The HyperRAM address at which our storage begins. Defaults to the start of the RAM.
+    burst_length: int, optional
+        The largest number of words to transfer in a single HyperRAM transaction.
+    buffer_depth: int, optional
+        The depth of each of our on-chip staging FIFOs. Defaults to twice our burst length.
+    payload_width: int, optional
+        The width of our input stream's payload. Defaults to the width of the RAM interface's data.
+    store_flags: bool, optional
+        If true, each payload's ``first`` and ``last`` signals are stored alongside it. Otherwise, they're unused.
+    output_width: int, optional
+        The width of our output stream's payload; which must evenly divide ``payload_width``. Defaults to
+        ``payload_width``.
+    """
+
+    def __init__(self, *, ram, depth, base_address=0, burst_length=64, buffer_depth=None,
+            payload_width=None, store_flags=False, output_width=None):
+        self._ram          = ram
+        self.depth         = depth
+        self.base_address  = base_address
+        self.burst_length  = burst_length
+        self.buffer_depth  = buffer_depth if (buffer_depth is not None) else (burst_length * 2)
+
+        self.word_width    = len(ram.read_data)
+        self.capacity      = self.depth + self.buffer_depth * 2
+
+        self.payload_width = payload_width if (payload_width is not None) else self.word_width
+        self.output_width  = output_width  if (output_width  is not None) else self.payload_width
+        self.store_flags   = store_flags
+
+        if self.payload_width % self.output_width:
+            raise ValueError("output_width must evenly divide payload_width")
+
+        # Figure out how many RAM words each entry occupies, once padded.
+        entry_bits           = self.payload_width + (2 if store_flags else 0)
+        self.words_per_entry = (entry_bits + self.word_width - 1) // self.word_width
+
+        #
+        # I/O port
+        #
+        self.input      = StreamInterface(payload_width=self.payload_width)
+        self.output     = StreamInterface(payload_width=self.output_width)
+
+        self.level      = Signal(range(0, self.capacity + 1))
+        self.ram_level  = Signal(range(0, self.depth + 1))
+
+
+    @staticmethod
+    def _minimum(m, *values, name):
+        """ Returns a signal that carries the minimum of the given values. """
+        result = Signal.like(values[0], name=name)
+
+        minimum = values[0]
+        for value in values[1:]:
+            minimum = Mux(value < minimum, value, minimum)
+
+        m.d.comb += result.eq(minimum)
+        return result
+
+
+    def _elaborate_entry_adapters(self, m):
+        """ Adds logic that converts our streams to and from streams of RAM words.
+
+        Returns a pair of (input, output) word_width streams, which fill and drain our RAM-backed queue.
+        """
+
+        entry_width = self.words_per_entry * self.word_width
+
+        # Pack each of our entries, including its flags, into a whole number of RAM words...
+        entries_in = StreamInterface(payload_width=entry_width)
+        m.d.comb += [
+            entries_in.valid    .eq(self.input.valid),
+            self.input.ready    .eq(entries_in.ready),
+        ]
+        if self.store_flags:
+            m.d.comb += entries_in.payload.eq(Cat(self.input.payload, self.input.first, self.input.last))
+        else:
+            m.d.comb += entries_in.payload.eq(self.input.payload)
+
+        # ... and unpack them again on the way out.
+        entries_out = StreamInterface(payload_width=entry_width)
+        output      = StreamInterface(payload_width=self.payload_width)
+        m.d.comb += [
+            output.payload      .eq(entries_out.payload[0:self.payload_width]),
+            output.valid        .eq(entries_out.valid),
+            entries_out.ready   .eq(output.ready),
+        ]
+        if self.store_flags:
+            m.d.comb += [
+                output.first    .eq(entries_out.payload[self.payload_width]),
+                output.last     .eq(entries_out.payload[self.payload_width + 1]),
+            ]
+
+        # If an entry spans more than one RAM word, split it up into words, and reassemble it afterwards.
+        # Our entries are always whole words; so these never need to flush partial words.
+        if self.words_per_entry > 1:
+            m.submodules.entry_splitter = splitter = StreamDownConverter(input_width=entry_width,
+                output_width=self.word_width, lane_width=self.word_width)
+            m.submodules.entry_joiner   = joiner   = StreamUpConverter(input_width=self.word_width,
+                output_width=entry_width, lane_width=self.word_width)
+            m.d.comb += [
+                splitter.input  .stream_eq(entries_in),
+                entries_out     .stream_eq(joiner.output),
+            ]
+            ram_input, ram_output = splitter.output, joiner.input
+        else:
+            ram_input, ram_output = entries_in, entries_out
+
+        # Finally, narrow our output, if we've been asked to.
+        if self.output_width != self.payload_width:
+            m.submodules.output_converter = converter = StreamDownConverter(input_width=self.payload_width,
+                output_width=self.output_width, lane_width=self.output_width)
+            m.d.comb += [
+                converter.input  .stream_eq(output),
+                self.output      .stream_eq(converter.output),
+            ]
+        else:
+            m.d.comb += self.output.stream_eq(output)
+
+        return ram_input, ram_output
+
+
+    def elaborate(self, platform):
+        m = Module()
+
+        ram = self._ram
+        m.submodules.ram = ram
+
+        # If our streams carry anything other than bare RAM words, adapt them to RAM words.
+        if self.store_flags or (self.payload_width != self.word_width) or (self.output_width != self.word_width):
+            ram_input, ram_output = self._elaborate_entry_adapters(m)
+        else:
+            ram_input, ram_output = self.input, self.output
+
+        # Each word we store occupies one 16-bit HyperRAM address per 16 bits of data.
+        address_step = self.word_width // 16
+
+        #
+        # Staging FIFOs.
+        #
+        m.submodules.write_buffer = write_buffer = SyncFIFOBuffered(width=self.word_width, depth=self.buffer_depth)
+        m.submodules.read_buffer  = read_buffer  = SyncFIFOBuffered(width=self.word_width, depth=self.buffer_depth)
+
+        m.d.comb += [
+            write_buffer.w_data  .eq(ram_input.payload),
+            write_buffer.w_en    .eq(ram_input.valid),
+            ram_input.ready      .eq(write_buffer.w_rdy),
+
+            ram_output.payload   .eq(read_buffer.r_data),
+            ram_output.valid     .eq(read_buffer.r_rdy),
+            read_buffer.r_en     .eq(ram_output.ready),
+
+            self.level           .eq(write_buffer.level + self.ram_level + read_buffer.level),
+        ]
+
+
+        #
+        # HyperRAM ring state.
+        #
+
+        # Our HyperRAM storage is used as a ring buffer; with words written at our write pointer,
+        # and read back from our read pointer.
+        write_pointer = Signal(range(self.depth))
+        read_pointer  = Signal(range(self.depth))
+
+        # Keep track of how many words are left in the transaction we're performing.
+        words_remaining = Signal(range(self.burst_length + 1))
+
+        # Figure out how long our next transaction in each direction could be. We'll never want to
+        # transfer more than a burst at once; and we'll split transactions that would wrap around
+        # the end of our ring buffer.
+        write_length = self._minimum(m,
+            write_buffer.level,
+            self.burst_length,
+            self.depth - write_pointer,
+            self.depth - self.ram_level,
+            name="write_length"
+        )
+        read_length = self._minimum(m,
+            self.ram_level,
+            self.burst_length,
+            self.depth - read_pointer,
+            name="read_length"
+        )
+
+        # We'll read from the HyperRAM whenever our read buffer has room for our next transaction...
+        read_space   = self.buffer_depth - read_buffer.level
+        read_request = (read_length != 0) & (read_space >= read_length)
+
+        # ... and write to it whenever our data can't bypass it -- either because the HyperRAM already
+        # holds a backlog, or because our read buffer is full. We'll write whenever we have a full burst
+        # to write; or have any data to write, and no read waiting.
+        must_store    = (self.ram_level != 0) | ~read_buffer.w_rdy
+        write_request = \
+            (write_length != 0) & must_store & ((write_buffer.level >= self.burst_length) | ~read_request)
+
+        # When both directions want the HyperRAM, we'll alternate between them.
+        prefer_write = Signal()
+
+        m.d.comb += [
+            ram.register_space  .eq(0),
+            ram.single_page     .eq(0),
+        ]
+
+        with m.FSM():
+
+            # IDLE -- decide what to do with the HyperRAM next.
+            with m.State("IDLE"):
+
+                # If we don't have a backlog in the HyperRAM, we don't need to use it; we'll
+                # move data directly from our write buffer to our read buffer.
+                with m.If(self.ram_level == 0):
+                    m.d.comb += [
+                        read_buffer.w_data  .eq(write_buffer.r_data),
+                        read_buffer.w_en    .eq(write_buffer.r_rdy),
+                        write_buffer.r_en   .eq(read_buffer.w_rdy),
+                    ]
+
+                # If we're going to write, start a write transaction at our write pointer...
+                with m.If(ram.idle & write_request & (prefer_write | ~read_request)):
+                    m.d.comb += [
+                        ram.start_transfer  .eq(1),
+                        ram.perform_write   .eq(1),
+                        ram.address         .eq(self.base_address + write_pointer * address_step),
+                    ]
+                    m.d.sync += [
+                        words_remaining     .eq(write_length),
+                        write_pointer       .eq(Mux(write_pointer + write_length == self.depth, 0, write_pointer + write_length)),
+                        prefer_write        .eq(0),
+                    ]
+                    m.next = "WRITE"
+
+                # ... otherwise, if we're going to read, start a read transaction at our read pointer.
+                with m.Elif(ram.idle & read_request):
+                    m.d.comb += [
+                        ram.start_transfer  .eq(1),
+                        ram.address         .eq(self.base_address + read_pointer * address_step),
+                    ]
+                    m.d.sync += [
+                        words_remaining     .eq(read_length),
+                        read_pointer        .eq(Mux(read_pointer + read_length == self.depth, 0, read_pointer + read_length)),
+                        prefer_write        .eq(1),
+                    ]
+                    m.next = "READ"
+
+
+            # WRITE -- move data from our write buffer into the HyperRAM.
+            with m.State("WRITE"):
+                m.d.comb += [
+                    ram.write_data      .eq(write_buffer.r_data),
+                    ram.final_word      .eq(words_remaining == 1),
+                    write_buffer.r_en   .eq(ram.write_ready),
+                ]
+
+                with m.If(ram.write_ready):
+                    m.d.sync += [
+                        words_remaining  .eq(words_remaining - 1),
+                        self.ram_level   .eq(self.ram_level + 1),
+                    ]
+
+                    with m.If(words_remaining == 1):
+                        m.next = "IDLE"
+
+
+            # READ -- move data from the HyperRAM into our read buffer.
+            with m.State("READ"):
+                m.d.comb += [
+                    read_buffer.w_data  .eq(ram.read_data),
+                    read_buffer.w_en    .eq(ram.read_ready),
+                    ram.final_word      .eq(words_remaining == 1),
+                ]
+
+                with m.If(ram.read_ready):
+                    m.d.sync += [
+                        words_remaining  .eq(words_remaining - 1),
+                        self.ram_level   .eq(self.ram_level - 1),
+                    ]
+
+                    with m.If(words_remaining == 1):
+                        m.next = "IDLE"
+
+        return m
@@ -22,32 +22,42 @@ from .toolchain import configure_toolchain
 def _get_platform_from_string(platform):
     """ Attempts to get the most appropriate platform given a <module>:<class> specification."""
 
-    # Attempt to split the platform into a module / name.
     module, _, name = platform.partition(':')
     if (not module) or (not name):
         raise TypeError("LUNA_PLATFORM must be in <module path>:<class name> format.")
 
+    platform_class = _get_object_from_string(platform)
+    return platform_class()
+
+
+def _get_object_from_string(specification):
+    """ Returns the object named by a <module>:<name> specification; where the module can be a file path."""
+
+    # Attempt to split the specification into a module / name.
+    module, _, name = specification.partition(':')
+    if (not module) or (not name):
+        raise TypeError(f"'{specification}' is not in <module path>:<name> format.")
+
 
     # If we have a filename, load the module from our file.
     module_path = os.path.expanduser(module)
     if os.path.isfile(module_path):
 
-        # Get a reference to the platform module to be loaded...
-        import_path     = "luna.gateware.platform.dynamic"
-        spec            = importlib.util.spec_from_file_location(import_path, module_path)
-        platform_module = importlib.util.module_from_spec(spec)
+        # Get a reference to the module to be loaded...
+        import_path   = "luna.gateware.platform.dynamic"
+        spec          = importlib.util.spec_from_file_location(import_path, module_path)
+        loaded_module = importlib.util.module_from_spec(spec)
 
         # ... and pull in its code .
-        spec.loader.exec_module(platform_module)
+        spec.loader.exec_module(loaded_module)
 
 
     # Otherwise, try to parse it as a module path.
     else:
-        platform_module = importlib.import_module(module)
+        loaded_module = importlib.import_module(module)
 
-    # Once we have the relevant module, extract our class from it.
-    platform_class = getattr(platform_module, name)
-    return platform_class()
+    # Once we have the relevant module, extract our object from it.
+    return getattr(loaded_module, name)
 
 
 def get_appropriate_platform() -> LUNAPlatform:
@@ -0,0 +1,168 @@
+#
+# This file is part of LUNA.
+#
+# Copyright (c) 2025 Great Scott Gadgets <info@greatscottgadgets.com>
+# SPDX-License-Identifier: BSD-3-Clause
+
+""" Content-addressed cache for gateware build products. """
+
+import os
+import shutil
+import hashlib
+import logging
+import tempfile
+import subprocess
+
+from amaranth.build.run import LocalBuildProducts
+
+
+def _default_cache_directory():
+    """ Returns the directory in which we'll cache builds, unless told otherwise. """
+
+    if os.getenv("LUNA_BUILD_CACHE"):
+        return os.path.expanduser(os.getenv("LUNA_BUILD_CACHE"))
+
+    cache_home = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "luna", "builds")
+
+
+def _toolchain_version(tool):
+    """ Returns the version string reported by a given toolchain tool; or None if it can't be run. """
+
+    # Respect the same tool overrides Amaranth (and our YoWASP fallback) use; e.g. NEXTPNR_ECP5.
+    command = os.getenv(tool.replace('-', '_').upper(), tool)
+
+    try:
+        result = subprocess.run([command, "--version"], capture_output=True, timeout=30)
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+    return result.stdout.decode("utf-8", errors="replace").strip()
+
+
+class BuildCache:
+    """ Content-addressed cache of build products.
+
+    Builds are keyed by the hash of everything that goes into them: the files of the build plan
+    (the generated RTLIL/Verilog, constraints, and the build script, which carries the toolchain
+    invocations), the platform and FPGA part, and the versions of each tool in the toolchain. A build
+    whose inputs are unchanged can then reuse the products of a previous build.
+
+    The cache evicts its least-recently-used builds once it holds more than ``max_entries`` builds,
+    or more than ``max_size`` bytes.
+
+    Parameters
+    ----------
+    directory: str, optional
+        The directory in which builds are cached. Defaults to the directory named by the
+        ``LUNA_BUILD_CACHE`` environment variable; or to ``luna/builds`` in the user's cache directory.
+    max_entries: int
+        The maximum number of builds to keep.
+    max_size: int
+        The maximum total size of our cached builds, in bytes.
+    """
+
+    def __init__(self, directory=None, *, max_entries=16, max_size=1024 ** 3):
+        self.directory   = directory if directory else _default_cache_directory()
+        self.max_entries = max_entries
+        self.max_size    = max_size
+
+
+    def key_for(self, platform, plan):
+        """ Returns the cache key for building a given build plan on a given platform. """
+
+        hasher = hashlib.blake2b(digest_size=32)
+        hasher.update(plan.digest())
+
+        # The platform and part are typically captured by the build script; but we'll include
+        # them explicitly, in case a platform's script doesn't name them.
+        platform_class = type(platform)
+        hasher.update(f"{platform_class.__module__}.{platform_class.__qualname__}".encode("utf-8"))
+        for attribute in ('device', 'package', 'speed', 'toolchain'):
+            hasher.update(f"{attribute}={getattr(platform, attribute, None)}".encode("utf-8"))
+
+        # Include our toolchain's versions, so toolchain upgrades invalidate our builds.
+        for tool in sorted(getattr(platform, 'required_tools', ())):
+            hasher.update(f"{tool}={_toolchain_version(tool)}".encode("utf-8"))
+
+        return hasher.hexdigest()
+
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, key)
+
+
+    def lookup(self, key):
+        """ Returns the build products cached under the given key; or None if there are none. """
+
+        path = self._entry_path(key)
+        if not os.path.isdir(path):
+            return None
+
+        # Mark this entry as recently used, so it's the last to be evicted.
+        os.utime(path)
+        return LocalBuildProducts(path)
+
+
+    def store(self, key, build_dir):
+        """ Stores the contents of a completed build directory under the given key.
+
+        Returns the build products, as stored in the cache.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Copy our build into a temporary directory in the cache; and then move it into place,
+        # so a failed or concurrent store never leaves behind a partial entry.
+        staging = tempfile.mkdtemp(dir=self.directory, prefix=".incomplete-")
+        try:
+            shutil.copytree(build_dir, staging, dirs_exist_ok=True)
+            os.replace(staging, self._entry_path(key))
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+
+            # If another build stored this entry first, its products are just as good as ours.
+            if not os.path.isdir(self._entry_path(key)):
+                raise
+
+        self.evict()
+        return LocalBuildProducts(self._entry_path(key))
+
+
+    def entries(self):
+        """ Returns a list of (key, last_used, size) tuples for each cached build; most recently used first. """
+
+        if not os.path.isdir(self.directory):
+            return []
+
+        entries = []
+        for key in os.listdir(self.directory):
+            path = self._entry_path(key)
+            if key.startswith(".") or not os.path.isdir(path):
+                continue
+
+            size = sum(
+                os.path.getsize(os.path.join(root, filename))
+                    for root, _, filenames in os.walk(path) for filename in filenames
+            )
+            entries.append((key, os.path.getmtime(path), size))
+
+        return sorted(entries, key=lambda entry: entry[1], reverse=True)
+
+
+    def evict(self):
+        """ Removes least-recently-used builds until we're within our limits. """
+
+        total_size = 0
+        for index, (key, _, size) in enumerate(self.entries()):
+            total_size += size
+
+            # We'll always keep our most recently used build, even if it alone exceeds our size limit.
+            if index and ((index >= self.max_entries) or (total_size > self.max_size)):
+                logging.debug(f"Evicting cached build {key}.")
+                shutil.rmtree(self._entry_path(key), ignore_errors=True)
+
+
+    def clear(self):
+        """ Removes every cached build. """
+        for key, _, _ in self.entries():
+            shutil.rmtree(self._entry_path(key), ignore_errors=True)
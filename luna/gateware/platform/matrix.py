@@ -0,0 +1,245 @@
+#
+# This file is part of LUNA.
+#
+# Copyright (c) 2025 Great Scott Gadgets <info@greatscottgadgets.com>
+# SPDX-License-Identifier: BSD-3-Clause
+
+""" Builds a matrix of designs for a matrix of platforms, in parallel.
+
+Each (design, platform, FPGA) combination is elaborated once, in the calling process; its toolchain
+run is then performed in a pool of worker processes. The results of each build -- its elaboration and
+build times, the toolchain's peak memory use, and the Fmax and utilization nextpnr reports -- are
+collected into a single report.
+
+Designs and platforms are specified in ``<module path>:<name>`` format, like ``LUNA_PLATFORM``; and
+each design must name a callable that returns an elaboratable. For example: ::
+
+    python -m luna.gateware.platform.matrix \\
+        --design examples/blinky/blinky.py:Blinky \\
+        --platform cynthion.gateware.platform:CynthionPlatformRev1D4 \\
+        --fpga LFE5U-12F --fpga LFE5U-25F
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import logging
+import argparse
+import itertools
+import multiprocessing
+
+from dataclasses import dataclass
+from typing      import Optional
+
+from .           import _get_object_from_string, _get_platform_from_string
+from .toolchain  import configure_toolchain
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# Matches nextpnr's reports of each clock's maximum frequency.
+_FMAX_PATTERN = re.compile(r"Max frequency for clock\s+'(?P<clock>[^']+)':\s+(?P<fmax>[\d.]+) MHz")
+
+# Matches each line of nextpnr's device utilisation report.
+_UTILIZATION_PATTERN = re.compile(r"^Info:\s+(?P<cell>\w+):\s+(?P<used>\d+)/\s*(?P<available>\d+)\s+\d+%", re.MULTILINE)
+
+
+@dataclass(frozen=True)
+class BuildMatrixJob:
+    """ A single entry in a build matrix. """
+
+    #: The <module>:<name> specification of the design to build.
+    design: str
+
+    #: The <module>:<class> specification of the platform to build for.
+    platform: str
+
+    #: The FPGA part to build for, if it should differ from the platform's default.
+    fpga: Optional[str] = None
+
+
+    @property
+    def name(self):
+        """ A short, filesystem-safe name for this job. """
+        parts = [self.design.rpartition(':')[2], self.platform.rpartition(':')[2]]
+        if self.fpga:
+            parts.append(self.fpga)
+
+        return "-".join(re.sub(r"[^\w.]", "_", part) for part in parts)
+
+
+def parse_nextpnr_log(log):
+    """ Extracts the timing and utilization results from a nextpnr log.
+
+    Returns a dictionary with an ``fmax`` dictionary, mapping each clock to its maximum frequency in MHz;
+    and a ``utilization`` dictionary, mapping each cell type to a (used, available) tuple.
+    """
+
+    # nextpnr reports each clock's Fmax several times as the design is placed and routed;
+    # we'll keep only the last, post-route figure.
+    fmax = {}
+    for match in _FMAX_PATTERN.finditer(log):
+        fmax[match.group('clock')] = float(match.group('fmax'))
+
+    utilization = {}
+    for match in _UTILIZATION_PATTERN.finditer(log):
+        utilization[match.group('cell')] = (int(match.group('used')), int(match.group('available')))
+
+    return {'fmax': fmax, 'utilization': utilization}
+
+
+def _peak_child_memory():
+    """ Returns the peak memory used by any of our child processes, in bytes; or None if unknown. """
+
+    if resource is None:
+        return None
+
+    # Linux reports our maximum RSS in kilobytes; macOS in bytes.
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _execute_plan(name, plan, build_dir):
+    """ Executes a single build plan. Runs in a worker process that performs only this build. """
+
+    os.makedirs(build_dir, exist_ok=True)
+
+    # Send our toolchain's output to a log, rather than interleaving it with our other builds.
+    with open(os.path.join(build_dir, "build.log"), "wb") as log:
+        os.dup2(log.fileno(), 1)
+        os.dup2(log.fileno(), 2)
+
+    result = {}
+    start = time.perf_counter()
+    try:
+        products = plan.execute_local(build_dir)
+        result['success'] = True
+    except Exception as e:
+        products = None
+        result['success'] = False
+        result['error']   = str(e)
+
+    result['build_time']  = time.perf_counter() - start
+    result['peak_memory'] = _peak_child_memory()
+
+    # Gather our timing and utilization results, if our toolchain produced them.
+    if products is not None:
+        try:
+            result.update(parse_nextpnr_log(products.get("top.tim", "t")))
+        except FileNotFoundError:
+            pass
+
+    return name, result
+
+
+def run_build_matrix(jobs, *, concurrency=None, build_root="build"):
+    """ Builds each of the given BuildMatrixJobs; returning a dictionary mapping each job's name to its results.
+
+    Parameters:
+        jobs        -- An iterable of BuildMatrixJobs to build.
+        concurrency -- The maximum number of toolchain runs to perform at once. Defaults to one per CPU.
+        build_root  -- The directory in which each job's build directory is created.
+    """
+
+    results = {}
+    plans   = []
+
+    # Elaborate each of our designs up front, so any errors surface quickly.
+    for job in jobs:
+        result = results[job.name] = {'design': job.design, 'platform': job.platform, 'fpga': job.fpga}
+
+        start = time.perf_counter()
+        try:
+            platform = _get_platform_from_string(job.platform)
+            if job.fpga:
+                platform.device = job.fpga
+
+            configure_toolchain(platform)
+
+            design = _get_object_from_string(job.design)()
+            plans.append((job.name, platform.build(design, do_build=False)))
+        except Exception as e:
+            logging.error(f"Failed to elaborate {job.name}: {e}")
+            result['success'] = False
+            result['error']   = str(e)
+        finally:
+            result['elaboration_time'] = time.perf_counter() - start
+
+    # Run our toolchain jobs in worker processes; using a fresh process for each job,
+    # so we can measure each toolchain run's peak memory in isolation.
+    with multiprocessing.Pool(processes=concurrency, maxtasksperchild=1) as pool:
+        pending = [
+            pool.apply_async(_execute_plan, (name, plan, os.path.join(build_root, name)))
+                for name, plan in plans
+        ]
+
+        for task in pending:
+            name, result = task.get()
+            results[name].update(result)
+
+            status = "complete" if result['success'] else "failed"
+            logging.info(f"Build of {name} {status} after {result['build_time']:.1f}s.")
+
+    return results
+
+
+def format_report(results):
+    """ Formats a build matrix's results as a human-readable table. """
+
+    lines = [f"{'job':<48} {'status':<8} {'elab (s)':>9} {'build (s)':>10} {'peak (MiB)':>11}  fmax (MHz)"]
+
+    for name, result in results.items():
+        peak = result.get('peak_memory')
+        fmax = ", ".join(f"{clock}: {value:.1f}" for clock, value in result.get('fmax', {}).items())
+
+        lines.append(
+            f"{name:<48} {'ok' if result.get('success') else 'FAILED':<8} "
+            f"{result.get('elaboration_time', 0):>9.2f} {result.get('build_time', 0):>10.1f} "
+            f"{(peak / 1024 ** 2) if peak else 0:>11.1f}  {fmax}"
+        )
+
+    return "\n".join(lines)
+
+
+def main():
+    from ... import configure_default_logging
+
+    parser = argparse.ArgumentParser(description="Builds a matrix of LUNA designs and platforms in parallel.")
+    parser.add_argument('--design', action='append', required=True, metavar='module:name',
+        help="A design to build; as a callable that returns an elaboratable. Can be repeated.")
+    parser.add_argument('--platform', action='append', required=True, metavar='module:class',
+        help="A platform to build for. Can be repeated.")
+    parser.add_argument('--fpga', action='append', metavar='part_number',
+        help="An FPGA part to build for, overriding each platform's default. Can be repeated.")
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+        help="The maximum number of toolchain runs to perform at once. Defaults to one per CPU.")
+    parser.add_argument('--build-dir', default="build",
+        help="The directory in which each build's files are kept.")
+    parser.add_argument('--output', '-o', metavar='filename',
+        help="Writes the matrix's full results to the given JSON file.")
+
+    args = parser.parse_args()
+    configure_default_logging()
+
+    jobs = [
+        BuildMatrixJob(design, platform, fpga)
+            for design, platform, fpga in itertools.product(args.design, args.platform, args.fpga or [None])
+    ]
+    results = run_build_matrix(jobs, concurrency=args.jobs, build_root=args.build_dir)
+
+    print(format_report(results))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    return 0 if all(result.get('success') for result in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,6 +8,7 @@
 
 from amaranth       import *
 from .              import StreamInterface
+from .pipeline      import StreamRegisterSlice
 
 
 class StreamMultiplexer(Elaboratable):
@@ -69,10 +70,19 @@ class StreamMultiplexer(Elaboratable):
 class StreamArbiter(Elaboratable):
     """ Gateware that merges a collection of StreamInterfaces into a single interface.
 
-    This variant uses a simple priority scheduler; and will use a standard valid/ready handshake
-    to schedule a single stream to communicate at a time. Bursts of ``valid`` will never be interrupted,
-    so streams will only be switched once the current transmitter drops ``valid`` low.
+    This arbiter uses a standard valid/ready handshake to schedule a single stream to communicate at a time.
+    By default, it uses a simple priority scheduler: bursts of ``valid`` will never be interrupted, so streams
+    will only be switched once the current transmitter drops ``valid`` low.
 
+    Other scheduling modes can be selected with the ``mode`` parameter:
+
+        - ``"priority"`` always grants the lowest-numbered (earliest added) requesting stream.
+        - ``"round_robin"`` grants the first requesting stream after the most recently granted one.
+        - ``"weighted"`` schedules as ``"round_robin"``; but scales each stream's maximum burst by its weight.
+
+    If ``max_burst`` is set, a grant ends once its stream has transferred ``max_burst`` beats; allowing other
+    streams to be scheduled even while a busy stream keeps ``valid`` high. Packets are never split: for streams
+    that have a ``last`` field, a grant only ends on a beat that has ``last`` set.
 
     Attributes
     ----------
@@ -82,44 +92,107 @@ class StreamArbiter(Elaboratable):
     idle: Signal(), output
         Asserted when none of our streams is currently active.
 
+    clear_counters: Signal(), input
+        Strobe that resets each of our grant and wait-cycle counters to zero.
+    grant_count: list of Signal(counter_width), output
+        For each of our streams, the number of times it has been granted access to our output.
+    wait_cycles: list of Signal(counter_width), output
+        For each of our streams, the number of cycles it has spent requesting access without being granted it.
+
     Parameters
     ----------
     stream_type: subclass of StreamInterface
         If provided, sets the type of stream we'll be multiplexing (and thus our output type).
     domain: str
         The name of the domain in which this arbiter should operate. Defaults to "sync".
+    mode: str
+        The scheduling mode to use; one of "priority", "round_robin", or "weighted". Defaults to "priority".
+    max_burst: int, optional
+        If provided, the maximum number of beats a stream can transfer per grant. Required for weighted mode.
+    counter_width: int
+        The width of each of our grant and wait-cycle counters.
+    input_register: str, optional
+        If provided, a :class:`StreamRegisterSlice` of the given mode is inserted on each of our input streams.
+    output_register: str, optional
+        If provided, a :class:`StreamRegisterSlice` of the given mode is inserted on our output stream.
     """
 
-    def __init__(self, *, stream_type=StreamInterface, domain="sync"):
-        self._domain = domain
+    MODES = ("priority", "round_robin", "weighted")
 
-        # Collection that stores each of the interfaces added to this bus.
-        self._sinks = []
+    def __init__(self, *, stream_type=StreamInterface, domain="sync", input_register=None, output_register=None,
+            mode="priority", max_burst=None, counter_width=32):
+
+        if mode not in self.MODES:
+            raise ValueError(f"unknown arbitration mode {mode!r}; must be one of {self.MODES}")
+        if (mode == "weighted") and not max_burst:
+            raise ValueError("weighted arbitration requires a max_burst")
+
+        self._domain          = domain
+        self._input_register  = input_register
+        self._output_register = output_register
+        self._mode            = mode
+        self._max_burst       = max_burst
+        self._counter_width   = counter_width
+
+        # Collection that stores each of the interfaces added to this bus; and their weights.
+        self._sinks   = []
+        self._weights = []
 
         #
         # I/O port
         #
-        self.source = stream_type()
-        self.idle   = Signal()
+        self.source         = stream_type()
+        self.idle           = Signal()
 
+        self.clear_counters = Signal()
+        self.grant_count    = []
+        self.wait_cycles    = []
 
-    def add_stream(self, stream):
+
+    def add_stream(self, stream, *, weight=1):
         """ Adds a stream to our arbiter.
 
         Parameters
         ----------
         stream: StreamInterface subclass
             The stream to be added. Streams added first will have higher priority.
+        weight: int
+            In weighted mode, the multiple of ``max_burst`` this stream can transfer per grant.
         """
+        index = len(self._sinks)
+
         self._sinks.append(stream)
+        self._weights.append(weight)
+
+        self.grant_count.append(Signal(self._counter_width, name=f"grant_count_{index}"))
+        self.wait_cycles.append(Signal(self._counter_width, name=f"wait_cycles_{index}"))
 
 
     def elaborate(self, platform):
         m = Module()
         active_stream = self.source
+        sinks         = self._sinks
+
+        #
+        # Register slices.
+        #
+        if self._output_register:
+            m.submodules.output_register = output_register = \
+                StreamRegisterSlice.like(self.source, mode=self._output_register)
+            m.d.comb += self.source.stream_eq(output_register.output)
+            active_stream = output_register.input
+
+        if self._input_register:
+            sinks = []
+            for index, stream in enumerate(self._sinks):
+                input_register = StreamRegisterSlice.like(stream, mode=self._input_register)
+                m.submodules[f"input_register_{index}"] = input_register
+
+                m.d.comb += input_register.input.stream_eq(stream)
+                sinks.append(input_register.output)
 
         # Keep track of which stream is currently active.
-        stream_count        = len(self._sinks)
+        stream_count        = len(sinks)
         active_stream_index = Signal(range(stream_count))
 
         #
@@ -128,31 +201,114 @@ class StreamArbiter(Elaboratable):
         with m.Switch(active_stream_index):
 
             # Generate a switch case for each of our possible stream indexes..
-            for index, stream in enumerate(self._sinks):
+            for index, stream in enumerate(sinks):
                 with m.Case(index):
 
                     # ... and connect up the stream while in that case.
                     m.d.comb += active_stream.stream_eq(stream)
 
 
+        #
+        # Burst limiting.
+        #
+
+        # Figure out whether our active stream has reached the end of its grant.
+        grant_complete = Signal()
+
+        if self._max_burst:
+            burst_length = Signal(range(max(self._weights) * self._max_burst + 1))
+            burst_limit  = Signal.like(burst_length)
+
+            with m.Switch(active_stream_index):
+                for index in range(stream_count):
+                    with m.Case(index):
+                        weight = self._weights[index] if (self._mode == "weighted") else 1
+                        m.d.comb += burst_limit.eq(weight * self._max_burst)
+
+            # Count the beats transferred in our current grant...
+            beat_transferred = active_stream.valid & active_stream.ready
+            with m.If(beat_transferred):
+                m.d.sync += burst_length.eq(burst_length + 1)
+
+            # ... and end our grant once our limit has been reached; but never in the middle of a packet.
+            at_packet_boundary = active_stream.last if hasattr(active_stream, 'last') else 1
+            m.d.comb += grant_complete.eq(beat_transferred & at_packet_boundary & (burst_length + 1 >= burst_limit))
+
+
         #
         # Active stream selection.
         #
 
-        # Only change which stream we're working with when the active stream stops transmitting.
-        with m.If(~active_stream.valid):
+        # Figure out which stream should be granted access next. In priority mode, this is simply the lowest-numbered
+        # stream that's requesting access; in our other modes, this is the first requesting stream that follows our
+        # active one, in round-robin order.
+        next_stream_index = Signal.like(active_stream_index)
+        any_requesting    = Signal()
+
+        def _find_next_stream(order):
+            # We'll use a reversed list in order to maintain our order; as the last assignment here "wins".
+            for stream_index in reversed(order):
+                with m.If(sinks[stream_index].valid):
+                    m.d.comb += [
+                        any_requesting     .eq(1),
+                        next_stream_index  .eq(stream_index),
+                    ]
+
+        if self._mode == "priority":
+            _find_next_stream(list(range(stream_count)))
+        else:
+            with m.Switch(active_stream_index):
+                for index in range(stream_count):
+                    with m.Case(index):
+                        _find_next_stream([(index + offset) % stream_count for offset in range(1, stream_count + 1)])
 
-            # Assume we're idle until proven otherwise.
-            m.d.comb += self.idle.eq(1)
 
-            # Check other streams to see if any are valid. We'll use a reversed list in order to maintain
-            # our priority order; as the last assignment here "wins".
-            for stream_index in reversed(range(stream_count)):
+        # Keep track of whether our active stream has transferred anything since it was granted access;
+        # so we can count each grant as it's first used.
+        grant_started = Signal()
+        new_grant     = Signal()
+        m.d.comb += new_grant.eq(active_stream.valid & active_stream.ready & ~grant_started)
 
-                # If another stream -is- valid, set it to be the active stream.
-                with m.If(self._sinks[stream_index].valid):
-                    m.d.comb += self.idle.eq(0)
-                    m.d.sync += active_stream_index.eq(stream_index)
+        with m.If(new_grant):
+            m.d.sync += grant_started.eq(1)
+
+        # Only change which stream we're working with when the active stream stops transmitting,
+        # or when its grant is complete.
+        with m.If(~active_stream.valid | grant_complete):
+
+            # We're idle unless some stream is requesting access.
+            m.d.comb += self.idle.eq(~active_stream.valid & ~any_requesting)
+            m.d.sync += grant_started.eq(0)
+
+            with m.If(any_requesting):
+                m.d.sync += active_stream_index.eq(next_stream_index)
+
+            if self._max_burst:
+                m.d.sync += burst_length.eq(0)
+
+
+        #
+        # Statistics.
+        #
+        for index, stream in enumerate(sinks):
+            grant_count = self.grant_count[index]
+            wait_cycles = self.wait_cycles[index]
+
+            with m.If(self.clear_counters):
+                m.d.sync += [
+                    grant_count  .eq(0),
+                    wait_cycles  .eq(0),
+                ]
+            with m.Else():
+
+                # Count each time this stream is granted access...
+                with m.If(new_grant & (active_stream_index == index)):
+                    m.d.sync += grant_count.eq(grant_count + 1)
+
+                # ... and each cycle it spends requesting access while another stream has it.
+                is_active = (active_stream_index == index) & active_stream.valid
+                with m.If(stream.valid & ~is_active):
+                    m.d.sync += wait_cycles.eq(wait_cycles + 1)
 
 
         # If we're operating in a domain other than sync, replace 'sync' with it.
@@ -0,0 +1,231 @@
+#
+# This file is part of LUNA.
+#
+# Copyright (c) 2025 Great Scott Gadgets <info@greatscottgadgets.com>
+# SPDX-License-Identifier: BSD-3-Clause
+
+""" Stream width converters. """
+
+from amaranth   import Cat, DomainRenamer, Elaboratable, Module, Mux, Signal
+from .          import StreamInterface
+from .pipeline  import StreamRegisterSlice
+
+
+class StreamGearbox(Elaboratable):
+    """ Gateware that converts a stream between two payload widths.
+
+    Payloads are treated as a sequence of ``lane_width``-bit lanes, with lane 0 in the least significant
+    bits, and are repacked from our input's width into our output's width; so this can convert between any
+    two widths that are multiples of the lane width. Conversions proceed at full throughput: while our output
+    is ready, we accept an input beat on every cycle in which the output's lanes can absorb it.
+
+    Packet boundaries are preserved. The ``first`` flag is carried onto the first output beat of each packet;
+    and when an input beat with ``last`` set arrives, the remainder of its packet is flushed out, with the
+    final output beat carrying ``last``. Once a flush completes, the next packet is accepted immediately.
+
+    Streams with a ``valid_width`` greater than one carry a per-lane valid mask; as in
+    :class:`SuperSpeedStreamInterface`. Valid lanes must be contiguous, starting from lane 0. Only the valid
+    lanes of each input beat are passed on; and partially-filled output beats -- which can only occur at the
+    end of a packet -- are marked with a partial mask. If our output has only a single valid bit, these
+    beats are padded with zeroes instead.
+
+    Attributes
+    ----------
+    input: StreamInterface(payload_width=input_width, valid_width=input_valid_width), input stream
+        The stream to be converted.
+    output: StreamInterface(payload_width=output_width, valid_width=output_valid_width), output stream
+        The converted stream.
+
+    Parameters
+    ----------
+    input_width: int
+        The width of our input payload, in bits.
+    output_width: int
+        The width of our output payload, in bits.
+    lane_width: int
+        The width of the units in which data is moved. Defaults to a byte.
+    input_valid_width: int
+        Either 1, or the number of lanes in our input; in which case each bit of ``valid`` qualifies a lane.
+    output_valid_width: int
+        Either 1, or the number of lanes in our output.
+    domain: str
+        The name of the domain in which this gearbox should operate. Defaults to "sync".
+    output_register: str, optional
+        If provided, a :class:`StreamRegisterSlice` of the given mode is inserted on our output stream.
+    """
+
+    def __init__(self, *, input_width, output_width, lane_width=8, input_valid_width=1, output_valid_width=1,
+            domain="sync", output_register=None):
+
+        if (input_width % lane_width) or (output_width % lane_width):
+            raise ValueError("stream widths must be multiples of the lane width")
+
+        self._lane_width    = lane_width
+        self._input_lanes   = input_width // lane_width
+        self._output_lanes  = output_width // lane_width
+        self._domain        = domain
+        self._register_mode = output_register
+
+        if input_valid_width not in (1, self._input_lanes):
+            raise ValueError("input_valid_width must be 1, or the number of input lanes")
+        if output_valid_width not in (1, self._output_lanes):
+            raise ValueError("output_valid_width must be 1, or the number of output lanes")
+
+        #
+        # I/O port
+        #
+        self.input  = StreamInterface(payload_width=input_width,  valid_width=input_valid_width)
+        self.output = StreamInterface(payload_width=output_width, valid_width=output_valid_width)
+
+
+    def elaborate(self, platform):
+        m = Module()
+
+        lane_width    = self._lane_width
+        input_lanes   = self._input_lanes
+        output_lanes  = self._output_lanes
+
+        # If we've been asked to register our output, drive our output stream through a register slice.
+        if self._register_mode:
+            m.submodules.output_register = output_register = \
+                StreamRegisterSlice.like(self.output, mode=self._register_mode)
+            m.d.comb += self.output.stream_eq(output_register.output)
+            output = output_register.input
+        else:
+            output = self.output
+
+        # Our buffer holds enough lanes to accept a full input beat while holding almost a full output beat;
+        # which is what we need to keep both sides moving on every cycle.
+        capacity = input_lanes + output_lanes
+
+        buffer = Signal(capacity * lane_width)
+        level  = Signal(range(capacity + 1))
+
+        # Set when the final lane of a packet is in our buffer; and so our buffer should be flushed.
+        flushing = Signal()
+
+        # Set when our next output beat is the first of a packet.
+        output_first = Signal()
+
+
+        #
+        # Output side.
+        #
+
+        # We'll output a beat whenever we have a full output beat's worth of lanes; or whenever
+        # we're flushing out the end of a packet.
+        lanes_out    = Signal(range(output_lanes + 1))
+        has_output   = Signal()
+        output_last  = Signal()
+        output_taken = Signal()
+        m.d.comb += [
+            lanes_out     .eq(Mux(level >= output_lanes, output_lanes, level)),
+            has_output    .eq((level >= output_lanes) | (flushing & (level != 0))),
+            output_last   .eq(flushing & (level <= output_lanes)),
+            output_taken  .eq(has_output & output.ready),
+
+            output.payload  .eq(buffer),
+            output.first    .eq(output_first),
+            output.last     .eq(output_last),
+        ]
+
+        if len(output.valid) == 1:
+            m.d.comb += output.valid.eq(has_output)
+        else:
+            m.d.comb += output.valid.eq(Cat(has_output & (lanes_out > i) for i in range(output_lanes)))
+
+        # Figure out what remains in our buffer once this cycle's output beat is taken.
+        level_after_output = Signal.like(level)
+        remaining          = Signal.like(buffer)
+        m.d.comb += [
+            level_after_output  .eq(level - Mux(output_taken, lanes_out, 0)),
+            remaining           .eq(buffer >> (Mux(output_taken, lanes_out, 0) * lane_width)),
+        ]
+
+
+        #
+        # Input side.
+        #
+
+        # Figure out how many lanes each input beat carries; and discard any invalid lanes.
+        if len(self.input.valid) == 1:
+            input_valid = self.input.valid
+            lanes_in    = input_lanes
+            input_data  = self.input.payload
+        else:
+            input_valid = self.input.valid.any()
+            lanes_in    = sum(self.input.valid[i] for i in range(input_lanes))
+            input_data  = Cat(
+                Mux(self.input.valid[i], self.input.payload.word_select(i, lane_width), 0)
+                    for i in range(input_lanes)
+            )
+
+        # We'll accept new data whenever it fits; but won't mix the start of a new packet into our buffer
+        # until the end of our current one has been flushed out.
+        flush_complete = output_taken & output_last
+        input_accepted = Signal()
+        m.d.comb += [
+            self.input.ready  .eq((~flushing | flush_complete) & (level_after_output <= capacity - input_lanes)),
+            input_accepted    .eq(input_valid & self.input.ready),
+        ]
+
+        # Append any accepted data to the end of our remaining lanes.
+        with m.If(input_accepted):
+            m.d.sync += [
+                buffer  .eq(remaining | (input_data << (level_after_output * lane_width))),
+                level   .eq(level_after_output + lanes_in),
+            ]
+        with m.Else():
+            m.d.sync += [
+                buffer  .eq(remaining),
+                level   .eq(level_after_output),
+            ]
+
+
+        #
+        # Packet boundaries.
+        #
+        with m.If(flush_complete):
+            m.d.sync += flushing.eq(0)
+        with m.If(input_accepted & self.input.last):
+            m.d.sync += flushing.eq(1)
+
+        with m.If(output_taken):
+            m.d.sync += output_first.eq(0)
+        with m.If(input_accepted & self.input.first):
+            m.d.sync += output_first.eq(1)
+
+
+        # If we're operating in a domain other than sync, replace 'sync' with it.
+        if self._domain != "sync":
+            m = DomainRenamer(self._domain)(m)
+
+        return m
+
+
+
+class StreamUpConverter(StreamGearbox):
+    """ Gateware that widens a stream by an integer factor; e.g. from bytes to 32-bit words.
+
+    See :class:`StreamGearbox` for details; this variant only checks that the conversion is a simple widening.
+    """
+
+    def __init__(self, *, input_width, output_width, **kwargs):
+        if output_width % input_width:
+            raise ValueError("an up-converter's output width must be a multiple of its input width")
+
+        super().__init__(input_width=input_width, output_width=output_width, **kwargs)
+
+
+
+class StreamDownConverter(StreamGearbox):
+    """ Gateware that narrows a stream by an integer factor; e.g. from 32-bit words to bytes.
+
+    See :class:`StreamGearbox` for details; this variant only checks that the conversion is a simple narrowing.
+    """
+
+    def __init__(self, *, input_width, output_width, **kwargs):
+        if input_width % output_width:
+            raise ValueError("a down-converter's input width must be a multiple of its output width")
+
+        super().__init__(input_width=input_width, output_width=output_width, **kwargs)
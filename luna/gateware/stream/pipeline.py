@@ -0,0 +1,146 @@
+#
+# This file is part of LUNA.
+#
+# Copyright (c) 2025 Great Scott Gadgets <info@greatscottgadgets.com>
+# SPDX-License-Identifier: BSD-3-Clause
+
+""" Stream pipelining elements. """
+
+from amaranth import DomainRenamer, Elaboratable, Module, Mux, Signal
+from .        import StreamInterface
+
+
+class StreamRegisterSlice(Elaboratable):
+    """ Gateware that breaks a stream's combinational paths with registers; without adding bubbles.
+
+    Simple ``stream_eq`` connections are purely combinational; so ``ready`` can ripple back through a long
+    chain of stream components in a single cycle. Inserting a register slice anywhere in a stream pipeline
+    breaks that chain, in exchange for a cycle of latency, without reducing the stream's throughput.
+
+    The slice can operate in one of several modes:
+
+        - ``"forward"`` registers the signals travelling with the data (``valid``, ``payload``, and friends);
+          ``ready`` is passed back combinationally.
+        - ``"backward"`` registers ``ready``, using a single-entry skid buffer to hold the beat that arrives
+          while the upstream side is still seeing our previous ``ready``. Data passes through combinationally
+          whenever the skid buffer is empty.
+        - ``"full"`` registers both directions, by chaining a backward slice into a forward one.
+        - ``None`` inserts no registers at all; which is useful for components that make their
+          register slices optional.
+
+    Attributes
+    ----------
+    input: StreamInterface(), input stream
+        The stream to be registered.
+    output: StreamInterface(), output stream
+        The registered stream.
+
+    Parameters
+    ----------
+    payload_width: int
+        The width of the stream's payload, in bits.
+    valid_width: int
+        The width of the stream's ``valid`` signal; as in :class:`StreamInterface`.
+    extra_fields: list of tuples, optional
+        Any extra fields carried by the stream; as in :class:`StreamInterface`.
+    mode: str
+        One of "forward", "backward", "full", or None. Defaults to "full".
+    domain: str
+        The name of the domain in which this slice should operate. Defaults to "sync".
+    """
+
+    MODES = ("forward", "backward", "full", None)
+
+    def __init__(self, *, payload_width=8, valid_width=1, extra_fields=None, mode="full", domain="sync"):
+        if mode not in self.MODES:
+            raise ValueError(f"unknown register slice mode {mode!r}; must be one of {self.MODES}")
+
+        self._stream_layout = dict(payload_width=payload_width, valid_width=valid_width, extra_fields=extra_fields)
+        self._mode          = mode
+        self._domain        = domain
+
+        #
+        # I/O port
+        #
+        self.input  = StreamInterface(**self._stream_layout)
+        self.output = StreamInterface(**self._stream_layout)
+
+
+    @classmethod
+    def like(cls, stream, **kwargs):
+        """ Creates a register slice whose streams have the same layout as the given stream. """
+        return cls(
+            payload_width = len(stream.payload),
+            valid_width   = len(stream.valid),
+            extra_fields  = stream._extra_fields,
+            **kwargs
+        )
+
+
+    def _forward_fields(self, stream):
+        """ Returns each of the signals in a stream that travel alongside its data. """
+        return [stream[name] for name in stream.fields if name != 'ready']
+
+
+    def _elaborate_forward(self, m, input, output):
+        """ Adds a slice that registers our data-path signals. """
+
+        # We can accept a new beat whenever our output register is empty, or being emptied this cycle.
+        m.d.comb += input.ready.eq(~output.valid.any() | output.ready)
+
+        with m.If(input.ready):
+            m.d.sync += [
+                output_signal.eq(input_signal)
+                    for output_signal, input_signal in zip(self._forward_fields(output), self._forward_fields(input))
+            ]
+
+
+    def _elaborate_backward(self, m, input, output):
+        """ Adds a slice that registers our ``ready`` signal. """
+
+        # Our skid buffer holds a beat that our upstream pushed before it saw us stop being ready.
+        skid_fields = [Signal.like(signal) for signal in self._forward_fields(input)]
+        skid_valid  = Signal()
+
+        # We're ready whenever our skid buffer is empty; this is a direct register output.
+        m.d.comb += input.ready.eq(~skid_valid)
+
+        # Present our skid buffer's contents if it has any; and our input's contents otherwise.
+        m.d.comb += [
+            output_signal.eq(Mux(skid_valid, skid_signal, input_signal))
+                for output_signal, skid_signal, input_signal
+                in zip(self._forward_fields(output), skid_fields, self._forward_fields(input))
+        ]
+
+        # If we accept a beat that our output can't, catch it in our skid buffer...
+        with m.If(input.ready & input.valid.any() & ~output.ready):
+            m.d.sync += [
+                skid_signal.eq(input_signal) for skid_signal, input_signal in zip(skid_fields, self._forward_fields(input))
+            ]
+            m.d.sync += skid_valid.eq(1)
+
+        # ... and empty it once its contents have been passed on.
+        with m.Elif(output.ready):
+            m.d.sync += skid_valid.eq(0)
+
+
+    def elaborate(self, platform):
+        m = Module()
+
+        if self._mode is None:
+            m.d.comb += self.output.stream_eq(self.input)
+        elif self._mode == "forward":
+            self._elaborate_forward(m, self.input, self.output)
+        elif self._mode == "backward":
+            self._elaborate_backward(m, self.input, self.output)
+        else:
+            intermediate = StreamInterface(**self._stream_layout)
+            self._elaborate_backward(m, self.input, intermediate)
+            self._elaborate_forward(m, intermediate, self.output)
+
+
+        # If we're operating in a domain other than sync, replace 'sync' with it.
+        if self._domain != "sync":
+            m = DomainRenamer(self._domain)(m)
+
+        return m
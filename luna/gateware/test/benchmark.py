@@ -0,0 +1,545 @@
+# amaranth: UnusedElaboratable=no
+#
+# This file is part of LUNA.
+#
+# Copyright (c) 2020 Great Scott Gadgets <info@greatscottgadgets.com>
+# SPDX-License-Identifier: BSD-3-Clause
+
+""" Benchmarks for the simulation harness used by LUNA's unit tests.
+
+Each benchmark measures how long a representative device-under-test takes to elaborate,
+how long the simulator takes to prepare it, and how many cycles per second it simulates.
+Results can be saved as a JSON baseline; and later runs compared against that baseline
+to flag regressions. Run ``python -m luna.gateware.test.benchmark --help`` for usage.
+
+This module also contains a behavioural benchmark, :func:`measure_nak_rate`, which measures how
+often a USB IN transfer manager NAKs a greedy host when fed by a jittery producer; and a synthesis
+benchmark, :func:`measure_endpoint_multiplexer`, which reports how the size and logic depth of a
+USB endpoint multiplexer scale with its endpoint count. The latter requires Yosys.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import tempfile
+import subprocess
+import random
+import argparse
+import platform
+
+from amaranth.hdl import Fragment, Module, Signal
+from amaranth.sim import Simulator
+
+
+# Version of our baseline file format.
+BASELINE_FORMAT_VERSION = 1
+
+# The metrics we record, and whether a larger value is an improvement.
+METRICS = {
+    'elaboration_time':  False,
+    'construction_time': False,
+    'cycles_per_second': True,
+}
+
+
+class SimulationBenchmark:
+    """ Describes a single device-under-test to benchmark.
+
+    Parameters
+    ----------
+    name: str
+        A unique name for this benchmark; used to match results against baselines.
+    factory: callable
+        A function that returns a new instance of the device-under-test.
+    domain: str
+        The clock domain that drives the device-under-test.
+    frequency: float
+        The frequency of that clock domain, in Hz.
+    cycles: int
+        The number of cycles to simulate.
+    """
+
+    def __init__(self, name, factory, *, domain="sync", frequency=60e6, cycles=10000):
+        self.name      = name
+        self.factory   = factory
+        self.domain    = domain
+        self.frequency = frequency
+        self.cycles    = cycles
+
+
+    def run(self, *, cycles=None):
+        """ Runs this benchmark once, and returns a dictionary of its measurements. """
+
+        cycles = cycles or self.cycles
+        dut    = self.factory()
+
+        # Time our elaboration...
+        start      = time.perf_counter()
+        fragment   = Fragment.get(dut, platform=None)
+        elaborated = time.perf_counter()
+
+        # ... our simulator construction ...
+        simulator = Simulator(fragment)
+        simulator.add_clock(1 / self.frequency, domain=self.domain)
+        constructed = time.perf_counter()
+
+        # ... and our simulation itself. We stop half a cycle short of our deadline,
+        # so floating-point error can't cost or gain us an edge.
+        simulator.run_until((cycles - 0.5) / self.frequency)
+        simulated = time.perf_counter()
+
+        return {
+            'elaboration_time':  elaborated - start,
+            'construction_time': constructed - elaborated,
+            'simulated_cycles':  cycles,
+            'simulation_time':   simulated - constructed,
+            'cycles_per_second': cycles / (simulated - constructed),
+        }
+
+
+    def measure(self, *, repeat=3, cycles=None):
+        """ Runs this benchmark several times; and returns the best result for each metric. """
+        runs = [self.run(cycles=cycles) for _ in range(repeat)]
+
+        result = {}
+        for key in runs[0]:
+            if key in METRICS and METRICS[key]:
+                result[key] = max(run[key] for run in runs)
+            else:
+                result[key] = min(run[key] for run in runs)
+
+        return result
+
+
+
+#
+# Representative devices-under-test.
+#
+
+def _example_descriptors():
+    """ Returns a small descriptor collection, similar to those of our example devices. """
+    from usb_protocol.emitters import DeviceDescriptorCollection
+
+    descriptors = DeviceDescriptorCollection()
+
+    with descriptors.DeviceDescriptor() as d:
+        d.idVendor           = 0x1209
+        d.idProduct          = 0x0001
+
+        d.iManufacturer      = "LUNA"
+        d.iProduct           = "Benchmark Device"
+        d.iSerialNumber      = "1234"
+
+        d.bNumConfigurations = 1
+
+    with descriptors.ConfigurationDescriptor() as c:
+
+        with c.InterfaceDescriptor() as i:
+            i.bInterfaceNumber = 0
+
+            with i.EndpointDescriptor() as e:
+                e.bEndpointAddress = 0x01
+                e.wMaxPacketSize   = 512
+
+            with i.EndpointDescriptor() as e:
+                e.bEndpointAddress = 0x81
+                e.wMaxPacketSize   = 512
+
+    return descriptors
+
+
+def _usb_device():
+    from ..interface.utmi   import UTMIInterface
+    from ..usb.usb2.device  import USBDevice
+
+    device = USBDevice(bus=UTMIInterface(), handle_clocking=False)
+    device.add_standard_control_endpoint(_example_descriptors())
+    return device
+
+
+def _get_descriptor_handler():
+    from ..usb.usb2.descriptor import GetDescriptorHandlerBlock
+    return GetDescriptorHandlerBlock(_example_descriptors())
+
+
+def _usb3_link_layer():
+    from ..interface.pipe         import PIPEInterface
+    from ..usb.usb3.physical      import USB3PhysicalLayer
+    from ..usb.usb3.link          import USB3LinkLayer
+
+    physical_layer = USB3PhysicalLayer(phy=PIPEInterface(width=2), sync_frequency=125e6)
+    return USB3LinkLayer(physical_layer=physical_layer)
+
+
+def _stream_ila():
+    from amaranth                import Signal
+    from ..debug.ila             import StreamILA
+
+    return StreamILA(signals=[Signal(8), Signal(16)], sample_depth=1024, domain="usb")
+
+
+DEFAULT_BENCHMARKS = [
+    SimulationBenchmark("usb_device",             _usb_device,              domain="usb", frequency=60e6),
+    SimulationBenchmark("get_descriptor_handler", _get_descriptor_handler,  domain="usb", frequency=60e6),
+    SimulationBenchmark("usb3_link_layer",        _usb3_link_layer,         domain="ss",  frequency=125e6),
+    SimulationBenchmark("stream_ila",             _stream_ila,              domain="usb", frequency=60e6),
+]
+
+
+
+#
+# NAK rate benchmark.
+#
+
+def measure_nak_rate(*, packet_buffers=2, max_stall=0, max_packet_size=512, packets=64,
+        stall_probability=None, turnaround_cycles=16, seed=0):
+    """ Measures how often a USBInTransferManager NAKs a host that's polling it as fast as it can.
+
+    Our producer offers one byte per cycle; but, on average once per packet, stalls for a random
+    period of up to ``max_stall`` cycles. Our host issues an IN token ``turnaround_cycles`` after
+    each transaction completes; and ACKs every packet it receives.
+
+    Parameters
+    ----------
+    packet_buffers: int
+        The number of packet buffers given to the transfer manager under test.
+    max_stall: int
+        The longest producer stall, in cycles. A value of zero disables producer jitter.
+    max_packet_size: int
+        The maximum packet size used for the transfer, in bytes.
+    packets: int
+        The number of packets to transfer before finishing our measurement.
+    stall_probability: float
+        The per-byte probability of a producer stall. Defaults to once per packet, on average.
+    turnaround_cycles: int
+        The number of cycles between the end of a transaction and our host's next IN token.
+    seed: int
+        The seed for our producer's random stalls; so measurements are repeatable.
+
+    Returns a dictionary containing the number of IN tokens issued, the number of NAKs received,
+    the resulting ``nak_rate``, and the number of cycles the transfer took.
+    """
+
+    from ..usb.usb2.transfer import USBInTransferManager
+
+    if stall_probability is None:
+        stall_probability = 1 / max_packet_size
+
+    dut       = USBInTransferManager(max_packet_size, packet_buffers=packet_buffers)
+    results   = {'in_tokens': 0, 'naks': 0, 'cycles': 0}
+    stalls    = random.Random(seed)
+
+    async def producer(ctx):
+        ctx.set(dut.transfer_stream.valid, 1)
+
+        for _ in range(packets * max_packet_size):
+            await ctx.tick("usb").until(dut.transfer_stream.ready)
+
+            # Every so often, stop producing data for a while.
+            if max_stall and (stalls.random() < stall_probability):
+                ctx.set(dut.transfer_stream.valid, 0)
+                await ctx.tick("usb").repeat(stalls.randint(1, max_stall))
+                ctx.set(dut.transfer_stream.valid, 1)
+
+        ctx.set(dut.transfer_stream.valid, 0)
+
+
+    async def host(ctx):
+        ctx.set(dut.active,              1)
+        ctx.set(dut.tokenizer.is_in,     1)
+        ctx.set(dut.packet_stream.ready, 1)
+
+        # Give our producer the chance to fill our buffers before we start polling.
+        await ctx.tick("usb").repeat(packet_buffers * max_packet_size)
+
+        start = ctx.get(cycle_count)
+        sent  = 0
+        while sent < packets:
+            await ctx.tick("usb").repeat(turnaround_cycles)
+
+            # Issue our IN token...
+            ctx.set(dut.tokenizer.ready_for_response, 1)
+            nak = ctx.get(dut.handshakes_out.nak)
+            await ctx.tick("usb")
+            ctx.set(dut.tokenizer.ready_for_response, 0)
+
+            results['in_tokens'] += 1
+            if nak:
+                results['naks'] += 1
+                continue
+
+            # ... and, if we're sent a packet, wait for it to finish, and ACK it.
+            await ctx.tick("usb").until(dut.packet_stream.valid & dut.packet_stream.last)
+            ctx.set(dut.handshakes_in.ack, 1)
+            await ctx.tick("usb")
+            ctx.set(dut.handshakes_in.ack, 0)
+            sent += 1
+
+        results['cycles'] = ctx.get(cycle_count) - start
+
+
+    # Keep a free-running cycle count, so we can measure our transfer duration.
+    m = Module()
+    m.submodules.dut = dut
+    cycle_count = Signal(32)
+    m.d.usb += cycle_count.eq(cycle_count + 1)
+
+    simulator = Simulator(m)
+    simulator.add_clock(1 / 60e6, domain="usb")
+    simulator.add_testbench(producer)
+    simulator.add_testbench(host)
+    simulator.run()
+
+    results['nak_rate'] = results['naks'] / results['in_tokens']
+    return results
+
+
+
+def print_nak_rates(*, packet_buffers=(2, 3, 4), max_stalls=(0, 16, 32, 64, 128)):
+    """ Prints a table of NAK rates; one row per maximum producer stall, and one column per buffer count. """
+
+    print(f"{'max stall (cycles)':<20}" + "".join(f"{f'{count} buffers':>12}" for count in packet_buffers))
+    for max_stall in max_stalls:
+        rates = [measure_nak_rate(packet_buffers=count, max_stall=max_stall)['nak_rate'] for count in packet_buffers]
+        print(f"{max_stall:<20}" + "".join(f"{rate:>12.1%}" for rate in rates))
+
+
+
+#
+# Endpoint multiplexer synthesis benchmark.
+#
+
+def _interface_signals(interface):
+    """ Returns each of the signals that make up an endpoint interface; for use as top-level ports. """
+    from amaranth.hdl import Value
+
+    signals = []
+    for member in vars(interface).values():
+        if hasattr(member, 'fields'):
+            signals.extend(member.fields.values())
+        elif isinstance(member, Value) or hasattr(member, 'as_value'):
+            signals.append(Value.cast(member))
+
+    return signals
+
+
+def _yosys_command():
+    """ Returns the command used to run Yosys; preferring a system Yosys, and falling back to YoWASP. """
+
+    if os.getenv("YOSYS"):
+        return os.getenv("YOSYS")
+
+    return "yosys" if shutil.which("yosys") else "yowasp-yosys"
+
+
+def measure_endpoint_multiplexer(endpoint_count, *, registered_output=False):
+    """ Synthesizes a USBEndpointMultiplexer for an ECP5; and returns its size and logic depth.
+
+    Returns a dictionary containing the number of ``luts`` and ``flip_flops`` used, and the ``logic_depth``
+    of the longest combinational path, in cells.
+
+    Parameters
+    ----------
+    endpoint_count: int
+        The number of endpoint interfaces to multiplex.
+    registered_output: bool
+        Passed on to the USBEndpointMultiplexer.
+    """
+    from amaranth.back     import rtlil
+    from ..usb.usb2.endpoint import EndpointInterface, USBEndpointMultiplexer
+
+    multiplexer = USBEndpointMultiplexer(registered_output=registered_output)
+    interfaces  = [EndpointInterface() for _ in range(endpoint_count)]
+    for interface in interfaces:
+        multiplexer.add_interface(interface)
+
+    ports = [signal for interface in (multiplexer.shared, *interfaces) for signal in _interface_signals(interface)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, "top.il"), "w") as f:
+            f.write(rtlil.convert(multiplexer, name="top", ports=ports))
+
+        result = subprocess.run(
+            [_yosys_command(), "-q", "-p", "read_rtlil top.il; synth_ecp5 -top top; tee -o stat.txt stat; tee -o ltp.txt ltp -noff"],
+            cwd=directory, capture_output=True, check=True
+        )
+        with open(os.path.join(directory, "stat.txt")) as f:
+            stat = f.read()
+        with open(os.path.join(directory, "ltp.txt")) as f:
+            ltp = f.read()
+
+    def cell_count(cell_type):
+        match = re.search(rf"^\s+(\d+)?\s*{cell_type}(\s+(\d+))?\s*$", stat, re.MULTILINE)
+        if not match:
+            return 0
+        return int(match.group(1) or match.group(3))
+
+    depth = re.search(r"length=(\d+)", ltp)
+
+    return {
+        'luts':        cell_count("LUT4"),
+        'flip_flops':  cell_count("TRELLIS_FF"),
+        'logic_depth': int(depth.group(1)) if depth else 0,
+    }
+
+
+def print_endpoint_multiplexer_scaling(*, endpoint_counts=(1, 2, 4, 8, 15, 16, 32)):
+    """ Prints a table of USBEndpointMultiplexer size and logic depth against endpoint count. """
+
+    print(f"{'endpoints':<12} {'LUTs':>8} {'depth':>8} {'LUTs (reg)':>12} {'FFs (reg)':>10} {'depth (reg)':>12}")
+    for count in endpoint_counts:
+        combinational = measure_endpoint_multiplexer(count)
+        registered    = measure_endpoint_multiplexer(count, registered_output=True)
+        print(
+            f"{count:<12} {combinational['luts']:>8} {combinational['logic_depth']:>8} "
+            f"{registered['luts']:>12} {registered['flip_flops']:>10} {registered['logic_depth']:>12}"
+        )
+
+
+
+#
+# Baseline handling.
+#
+
+def run_benchmarks(benchmarks=None, *, repeat=3, cycles=None):
+    """ Runs each of the provided benchmarks; and returns a dictionary of results, keyed by name. """
+    benchmarks = DEFAULT_BENCHMARKS if benchmarks is None else benchmarks
+    return {benchmark.name: benchmark.measure(repeat=repeat, cycles=cycles) for benchmark in benchmarks}
+
+
+def save_baseline(filename, results):
+    """ Saves a set of benchmark results as a JSON baseline. """
+
+    baseline = {
+        'version':    BASELINE_FORMAT_VERSION,
+        'python':     platform.python_version(),
+        'machine':    platform.machine(),
+        'benchmarks': results,
+    }
+
+    with open(filename, "w") as f:
+        json.dump(baseline, f, indent=4, sort_keys=True)
+        f.write("\n")
+
+
+def load_baseline(filename):
+    """ Loads a JSON baseline; and returns its results, keyed by benchmark name. """
+
+    with open(filename) as f:
+        baseline = json.load(f)
+
+    if baseline.get('version') != BASELINE_FORMAT_VERSION:
+        raise ValueError(f"unsupported benchmark baseline version {baseline.get('version')}")
+
+    return baseline['benchmarks']
+
+
+def find_regressions(baseline, results, *, tolerance=0.25):
+    """ Compares a set of results against a baseline.
+
+    Parameters
+    ----------
+    baseline: dict
+        Baseline results, as returned by :func:`load_baseline`.
+    results: dict
+        New results, as returned by :func:`run_benchmarks`.
+    tolerance: float
+        The fractional change in any metric that's tolerated before it's considered a regression.
+
+    Returns a list of (benchmark name, metric, baseline value, new value) tuples; one per regression.
+    Benchmarks present in only one of the two sets are ignored.
+    """
+
+    regressions = []
+
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        for metric, higher_is_better in METRICS.items():
+            old, new = baseline[name].get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+
+            if higher_is_better:
+                regressed = new < old * (1 - tolerance)
+            else:
+                regressed = new > old * (1 + tolerance)
+
+            if regressed:
+                regressions.append((name, metric, old, new))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for LUNA's gateware simulation harness.")
+    parser.add_argument('benchmarks', metavar='NAME', nargs='*',
+        help="the benchmarks to run; defaults to all of them")
+    parser.add_argument('--list', action='store_true',
+        help="list the available benchmarks, and exit")
+    parser.add_argument('--baseline', metavar='FILE',
+        help="compare our results against the baseline in FILE, and fail on any regression")
+    parser.add_argument('--save', metavar='FILE',
+        help="save our results as a baseline in FILE")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+        help="fractional change tolerated before a metric is considered regressed (default: 0.25)")
+    parser.add_argument('--repeat', type=int, default=3,
+        help="number of times to run each benchmark; the best result is kept (default: 3)")
+    parser.add_argument('--cycles', type=int,
+        help="override the number of cycles simulated by each benchmark")
+    parser.add_argument('--nak-rate', action='store_true',
+        help="measure USB IN NAK rates against producer jitter for several buffer depths, and exit")
+    parser.add_argument('--endpoint-mux', action='store_true',
+        help="synthesize the USB endpoint multiplexer for several endpoint counts, report its size, and exit")
+    args = parser.parse_args()
+
+    available = {benchmark.name: benchmark for benchmark in DEFAULT_BENCHMARKS}
+
+    if args.list:
+        print("\n".join(available))
+        return 0
+
+    if args.nak_rate:
+        print_nak_rates()
+        return 0
+
+    if args.endpoint_mux:
+        print_endpoint_multiplexer_scaling()
+        return 0
+
+    # Figure out which benchmarks we're running.
+    try:
+        benchmarks = [available[name] for name in args.benchmarks] if args.benchmarks else DEFAULT_BENCHMARKS
+    except KeyError as e:
+        parser.error(f"unknown benchmark {e}")
+
+    # Run our benchmarks, and print a summary of their results.
+    results = run_benchmarks(benchmarks, repeat=args.repeat, cycles=args.cycles)
+
+    print(f"{'benchmark':<24} {'elaborate (s)':>14} {'construct (s)':>14} {'cycles/s':>12}")
+    for name, result in results.items():
+        print(f"{name:<24} {result['elaboration_time']:>14.3f} "
+              f"{result['construction_time']:>14.3f} {result['cycles_per_second']:>12.0f}")
+
+    if args.save:
+        save_baseline(args.save, results)
+
+    # If we have a baseline, flag any regressions against it.
+    if args.baseline:
+        regressions = find_regressions(load_baseline(args.baseline), results, tolerance=args.tolerance)
+
+        for name, metric, old, new in regressions:
+            print(f"REGRESSION: {name}: {metric} went from {old:.4g} to {new:.4g}", file=sys.stderr)
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -32,8 +32,11 @@
 """
 This module can model common CRC algorithms given the set of defining
 parameters.  This is intended to be easy to use for experimentation
-rather than optimized for speed.  It is slow even for a native Python
-CRC implementation.
+rather than optimized for speed.
+
+(LUNA modification: whole bytes of input are processed through a
+byte-wise lookup table, where the algorithm allows; and many messages
+can be processed at once with NumPy via `CrcAlgorithm.calcArray`.)
 
 Several common CRC algorithms are predefined in this module.
 
@@ -56,6 +59,7 @@ input string '123456789':
   CRC-15: 059E
   CRC-16: BB3D
   CRC-16-USB: B4C8
+  CRC-16-USB3: 0A3D
   CRC-CCITT: 29B1
   CRC-HDLC: 906E
   CRC-24: 21CF02
@@ -78,6 +82,14 @@ Or, done a different way:
   >>> '%X' % crc.getFinalValue()
   'CBF43926'
 
+Or, a byte at a time:
+
+  >>> '%X' % CRC32.calcBytes(b'123456789')
+  'CBF43926'
+  >>> import numpy
+  >>> ['%X' % v for v in CRC32.calcArray(numpy.frombuffer(b'123456789', dtype=numpy.uint8).reshape(1, 9))]
+  ['CBF43926']
+
 Inversion of a CRC function:
 
   >>> CRC_CCITT.reverse().reflect().calcWord(54321, 16, 0)
@@ -235,6 +247,9 @@ class CrcAlgorithm:
         self.lsbFirstData = lsbFirstData
         self.xorMask = xorMask
 
+        # Lazily-generated; see byteTable.
+        self._byteTable = None
+
         if not hasattr(width, "__rlshift__"):
             raise ValueError
 
@@ -265,6 +280,87 @@ class CrcAlgorithm:
         r.takeWord(word, width)
         return r.getFinalValue()
 
+    def calcBytes(self, data, value=None):
+        """
+        Calculate the CRC of *data*, a sequence of 8-bit integers.
+        """
+        r = CrcRegister(self, value)
+        r.takeBytes(data)
+        return r.getFinalValue()
+
+    def calcArray(self, data, value=None):
+        """
+        Calculate the CRCs of many equal-length messages at once.
+
+        *data* is a two-dimensional NumPy array of 8-bit integers, with
+        one message per row.  Returns a NumPy array containing the CRC
+        of each message.
+        """
+        import numpy
+
+        table = self.byteTable()
+        if table is None:
+            raise ValueError("calcArray requires an algorithm with a byte table")
+
+        data = numpy.asarray(data, dtype=numpy.uint64)
+        table = numpy.array(table, dtype=numpy.uint64)
+        bitMask = numpy.uint64((1 << self.width) - 1)
+
+        register = CrcRegister(self, value)
+        values = numpy.full(data.shape[0], register.value, dtype=numpy.uint64)
+
+        for column in data.T:
+            if self.lsbFirst:
+                index = (values ^ column) & numpy.uint64(0xFF)
+                values = (values >> numpy.uint64(8)) ^ table[index]
+            else:
+                shift = numpy.uint64(self.width - 8)
+                index = ((values >> shift) ^ column) & numpy.uint64(0xFF)
+                values = ((values << numpy.uint64(8)) & bitMask) ^ table[index]
+
+        return values ^ numpy.uint64(self.xorMask)
+
+    def byteTable(self):
+        """
+        Return a 256-entry table that advances the CRC register by a
+        byte of input; or ``None`` if this algorithm can't be computed
+        a byte at a time (because its data is taken in the opposite
+        bit order to the register's shift, or because it shifts toward
+        the most-significant bit and is narrower than a byte).
+        """
+        if self._byteTable is None:
+            register = CrcRegister(self)
+
+            if register.lsbFirstData != self.lsbFirst:
+                return None
+            if not self.lsbFirst and self.width < 8:
+                return None
+
+            # Note that, for registers narrower than a byte, the value
+            # shifted through here can briefly exceed the register width.
+            table = []
+            for byte in range(256):
+                if self.lsbFirst:
+                    value = byte
+                    for _ in range(8):
+                        outBit = value & 1
+                        value >>= 1
+                        if outBit:
+                            value ^= register.polyMask
+                else:
+                    value = byte << (self.width - 8)
+                    for _ in range(8):
+                        outBit = value & register.outBitMask
+                        value = (value << 1) & register.bitMask
+                        if outBit:
+                            value ^= register.polyMask
+
+                table.append(value)
+
+            self._byteTable = table
+
+        return self._byteTable
+
     def reflect(self):
         """
         Return the algorithm with the bit-order reversed.
@@ -293,6 +389,7 @@ class CrcAlgorithm:
         return ca
 
     def _initFromOther(self, other):
+        self._byteTable = None
         self.width = other.width
         self.polynomial = other.polynomial
         self.name = other.name
@@ -403,20 +500,52 @@ class CrcRegister:
 
           an integer
         """
+        byteCount = width // 8 if self.crcAlgorithm.byteTable() else 0
+        extraBits = width - (byteCount * 8)
+
+        # Whole bytes are processed through our byte table; any remaining
+        # bits are taken one at a time.
         if self.lsbFirstData:
-            bitList = list(range(0, width))
+            self.takeBytes((word >> (8 * n)) & 0xFF for n in range(byteCount))
+            bitList = range(byteCount * 8, width)
         else:
-            bitList = list(range(width - 1, -1, -1))
+            bitList = range(width - 1, width - 1 - extraBits, -1)
+
         for n in bitList:
             self.takeBit((word >> n) & 1)
 
+        if not self.lsbFirstData:
+            self.takeBytes((word >> (8 * n)) & 0xFF for n in range(byteCount - 1, -1, -1))
+
+    def takeBytes(self, data):
+        """
+        Process a sequence of 8-bit integers as input.
+        """
+        table = self.crcAlgorithm.byteTable()
+
+        if table is None:
+            for byte in data:
+                self.takeWord(byte, 8)
+
+        elif self.crcAlgorithm.lsbFirst:
+            value = self.value
+            for byte in data:
+                value = (value >> 8) ^ table[(value ^ byte) & 0xFF]
+            self.value = value
+
+        else:
+            value = self.value
+            shift = self.crcAlgorithm.width - 8
+            for byte in data:
+                value = ((value << 8) & self.bitMask) ^ table[((value >> shift) ^ byte) & 0xFF]
+            self.value = value
+
     def takeString(self, s):
         """
         Process a string as input.  It is handled as a sequence of
         8-bit integers.
         """
-        for c in s:
-            self.takeWord(ord(c))
+        self.takeBytes(ord(c) for c in s)
 
     def getValue(self):
         """
@@ -470,6 +599,14 @@ CRC16_USB = CrcAlgorithm(name="CRC-16-USB",
                          lsbFirst=True,
                          xorMask=0xFFFF)
 
+#: Used in USB3 header packets.
+CRC16_USB3 = CrcAlgorithm(name="CRC-16-USB3",
+                          width=16,
+                          polynomial=(16, 12, 3, 1, 0),
+                          seed=0xFFFF,
+                          lsbFirst=True,
+                          xorMask=0xFFFF)
+
 CRC_CCITT = CrcAlgorithm(name="CRC-CCITT",
                          width=16,
                          polynomial=(16, 12, 5, 0),
@@ -92,10 +92,7 @@ def crc5_token(addr, ep):
     >>> hex(crc5_token(56, 4))
     '0xb'
     """
-    reg = crc.CrcRegister(crc.CRC5_USB)
-    reg.takeWord(addr, 7)
-    reg.takeWord(ep, 4)
-    return reg.getFinalValue()
+    return crc.CRC5_USB.calcWord(addr | (ep << 7), 11)
 
 
 def crc5_sof(v):
@@ -114,11 +111,8 @@ def crc16(input_data):
     # width=16 poly=0x8005 init=0xffff refin=true refout=true xorout=0xffff
     # check=0xb4c8 residue=0xb001 name="CRC-16/USB"
     # CRC appended low byte first.
-    reg = crc.CrcRegister(crc.CRC16_USB)
-    for d in input_data:
-        assert d <= 0xff, input_data
-        reg.takeWord(d, 8)
-    crc16 = reg.getFinalValue()
+    assert all(d <= 0xff for d in input_data), input_data
+    crc16 = crc.CRC16_USB.calcBytes(input_data)
     return [crc16 & 0xff, (crc16 >> 8) & 0xff]
 
 
@@ -0,0 +1,119 @@
+#
+# This file is part of LUNA.
+#
+# Copyright (c) 2025 Great Scott Gadgets <info@greatscottgadgets.com>
+# SPDX-License-Identifier: BSD-3-Clause
+
+""" Simulation models for testing gateware that talks to HyperRAM. """
+
+from amaranth            import Elaboratable, Module, Signal, Mux
+from amaranth.lib.memory import Memory
+
+
+class HyperRAMSimulationModel(Elaboratable):
+    """ Behavioural model of a HyperRAM chip, as seen through a :class:`HyperBusPHY`.
+
+    This model is intended for simulation only. It implements linear reads and writes of the
+    RAM's memory space; register accesses are accepted but otherwise ignored. Write timing is
+    not checked: any word driven while RWDS is driven is written to memory.
+
+    Parameters
+    ----------
+    phy: HyperBusPHY
+        The PHY record our controller-under-test drives.
+    depth: int
+        The number of 16-bit words in our memory.
+    read_latency: int
+        The number of cycles between the end of a read's command and its first data word.
+    extra_latency: bool
+        If true, we'll request additional latency for every transaction via RWDS, as a
+        chip with a refresh collision would.
+    """
+
+    def __init__(self, *, phy, depth=1024, read_latency=16, extra_latency=True):
+        self.phy            = phy
+        self.depth          = depth
+        self.read_latency   = read_latency
+        self.extra_latency  = extra_latency
+
+
+    def elaborate(self, platform):
+        m = Module()
+        phy = self.phy
+
+        m.submodules.memory = memory = Memory(shape=16, depth=self.depth, init=[])
+        write_port = memory.write_port()
+        read_port  = memory.read_port(domain="comb")
+
+        # Our command-derived state.
+        is_read          = Signal()
+        is_register      = Signal()
+        address          = Signal(32)
+        latency_counter  = Signal(range(self.read_latency + 1))
+
+        m.d.comb += [
+            read_port.addr   .eq(address),
+            write_port.addr  .eq(address),
+            write_port.data  .eq(phy.dq.o),
+        ]
+
+        with m.FSM():
+
+            # IDLE -- wait for our controller to start shifting out a command.
+            with m.State("IDLE"):
+                m.d.comb += phy.rwds.i.eq(Mux(self.extra_latency, 0b11, 0b00))
+
+                with m.If(phy.cs & phy.dq.e):
+                    m.d.sync += [
+                        is_read              .eq(phy.dq.o[15]),
+                        is_register          .eq(phy.dq.o[14]),
+                        address[19:32]       .eq(phy.dq.o[0:13]),
+                    ]
+                    m.next = "COMMAND1"
+
+            with m.State("COMMAND1"):
+                m.d.sync += address[3:19].eq(phy.dq.o)
+                m.next = "COMMAND2"
+
+            with m.State("COMMAND2"):
+                m.d.sync += [
+                    address[0:3]     .eq(phy.dq.o[0:3]),
+                    latency_counter  .eq(self.read_latency),
+                ]
+
+                with m.If(is_read):
+                    m.next = "LATENCY"
+                with m.Else():
+                    m.next = "WRITE"
+
+            # LATENCY -- wait before providing our read data.
+            with m.State("LATENCY"):
+                m.d.sync += latency_counter.eq(latency_counter - 1)
+
+                with m.If(latency_counter == 0):
+                    m.next = "READ"
+                with m.If(~phy.cs):
+                    m.next = "IDLE"
+
+            # READ -- provide a word per cycle; strobing RWDS to indicate each is valid.
+            with m.State("READ"):
+                m.d.comb += [
+                    phy.dq.i    .eq(Mux(is_register, 0, read_port.data)),
+                    phy.rwds.i  .eq(0b10),
+                ]
+                m.d.sync += address.eq(address + 1)
+
+                # Our transaction ends when chip select is released.
+                with m.If(~phy.cs):
+                    m.next = "IDLE"
+
+            # WRITE -- capture each word our controller drives.
+            with m.State("WRITE"):
+                with m.If(phy.dq.e & phy.rwds.e & ~is_register):
+                    m.d.comb += write_port.en.eq(1)
+                    m.d.sync += address.eq(address + 1)
+
+                with m.If(~phy.cs):
+                    m.next = "IDLE"
+
+        return m
@@ -6,14 +6,55 @@
 
 """ Full-device test harnesses for USB2. """
 
+from functools          import lru_cache
+
 from usb_protocol.types import USBStandardRequests
 from ..usb.usb2         import USBPacketID
 
 from .                  import LunaGatewareTestCase
 
-from .contrib           import usb_packet
+from .contrib.crc       import CRC5_USB, CRC16_USB
 from ..interface.utmi   import UTMIInterface
 
+
+#
+# Packet construction.
+#
+# These build packets directly as octets, rather than going through the bit strings
+# used by our contrib packet library; which keeps stimulus generation out of the way of
+# simulation in long tests, like full enumerations.
+#
+
+def crc16_octets(data):
+    """ Returns the USB CRC16 of the provided octets, as a [low, high] pair of octets. """
+    crc = CRC16_USB.calcBytes(data)
+    return [crc & 0xFF, crc >> 8]
+
+
+@lru_cache(maxsize=None)
+def token_packet_octets(pid, address, endpoint):
+    """ Returns the octets that make up a token packet, starting with its PID. """
+
+    assert address < 128, address
+    assert endpoint < 16, endpoint
+
+    fields = address | (endpoint << 7)
+    fields |= CRC5_USB.calcWord(fields, 11) << 11
+
+    return (USBPacketID(pid).byte(), fields & 0xFF, fields >> 8)
+
+
+def data_packet_octets(pid, payload):
+    """ Returns the octets that make up a data packet, starting with its PID and ending with its CRC. """
+    payload = list(payload)
+    return [USBPacketID(pid).byte(), *payload, *crc16_octets(payload)]
+
+
+def handshake_packet_octets(pid):
+    """ Returns the octets that make up a handshake packet. """
+    return [USBPacketID(pid).byte()]
+
+
 class USBDeviceTest(LunaGatewareTestCase):
     """ Test case strap for UTMI-connected devices. """
 
@@ -31,6 +72,10 @@ class USBDeviceTest(LunaGatewareTestCase):
     def instantiate_dut(self):
         self.utmi    = UTMIInterface()
 
+        # Pre-build the statements that drive each possible byte onto our bus; so we don't
+        # have to build them for every byte we provide.
+        self._rx_data_assignments = [self.utmi.rx_data.eq(value) for value in range(256)]
+
         # Vitals about the device.
         self.address             = 0
         self.max_packet_size_ep0 = 64
@@ -56,7 +101,7 @@ class USBDeviceTest(LunaGatewareTestCase):
 
     def provide_byte(self, byte):
         """ Provides a given byte on the UTMI receive data for one cycle. """
-        yield self.utmi.rx_data.eq(byte)
+        yield self._rx_data_assignments[byte]
         yield
 
 
@@ -80,12 +125,21 @@ class USBDeviceTest(LunaGatewareTestCase):
     def provide_packet(self, *octets, cycle_after=True):
         """ Provides an entire packet transaction at once. """
 
-        yield from self.start_packet()
+        # Equivalent to start_packet / provide_byte / end_packet; but flattened into a single loop,
+        # as this is the innermost loop of most of our device-level tests.
+        assignments = self._rx_data_assignments
 
-        for b in octets:
-            yield from self.provide_byte(b)
+        yield self.utmi.rx_active.eq(1)
+        yield self.utmi.rx_valid.eq(1)
+        yield
 
-        yield from self.end_packet()
+        for octet in octets:
+            yield assignments[octet]
+            yield
+
+        yield self.utmi.rx_active.eq(0)
+        yield self.utmi.rx_valid.eq(0)
+        yield
 
         if cycle_after:
             yield
@@ -133,12 +187,8 @@ class USBDeviceTest(LunaGatewareTestCase):
                         If omitted, the most recently set-address'd address is used.
         """
 
-        # Grab the raw bits that make up our token from the Antmicro library...
         address = address if address else self.address
-        bits    = usb_packet.token_packet(pid, address, endpoint)
-
-        # ... and issue them ourselves.
-        yield from self.provide_bits(bits)
+        yield from self.provide_packet(*token_packet_octets(pid, address, endpoint))
 
 
 
@@ -150,8 +200,7 @@ class USBDeviceTest(LunaGatewareTestCase):
             *data -- The data to be sent.
         """
 
-        bits = usb_packet.data_packet(pid, octets)
-        yield from self.provide_bits(bits)
+        yield from self.provide_packet(*data_packet_octets(pid, octets))
 
 
 
@@ -163,9 +212,7 @@ class USBDeviceTest(LunaGatewareTestCase):
             pid      -- The PID of the packet to be sent.
         """
 
-        # Ensure we have an USBPacketID-wrapped PID.
-        pid = USBPacketID(pid)
-        yield from self.provide_packet(pid.byte())
+        yield from self.provide_packet(*handshake_packet_octets(pid))
 
 
 
@@ -316,7 +363,7 @@ class USBDeviceTest(LunaGatewareTestCase):
             return USBPacketID.from_int(result[0]), None
 
         # ... validate its CRC...
-        expected_crc = usb_packet.crc16(data)
+        expected_crc = crc16_octets(data)
         self.assertEqual([crc_low, crc_high], expected_crc)
 
         # ... validate pid toggling, if desired...
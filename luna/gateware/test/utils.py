@@ -36,7 +36,7 @@ def sync_test_case(process_function, *, domain="sync"):
 
         self.domain = domain
         self._ensure_clocks_present()
-        self.sim.add_sync_process(test_case, domain=domain)
+        self.add_test_process(test_case, domain=domain)
         self.simulate(vcd_suffix=process_function.__name__)
 
     return run_test
@@ -67,10 +67,46 @@ def ss_domain_test_case(process_function):
 
 
 
+class _CachedSimulation:
+    """ A simulation shared by every test in a :class:`LunaGatewareTestCase` that sets CACHE_ELABORATION. """
+
+    def __init__(self, simulator, attributes):
+        self.simulator  = simulator
+
+        # The attributes our test case set up while instantiating its DUT; which we'll restore for each test.
+        self.attributes = attributes
+
+        # The test process to run in each domain, for the current test; and the domains
+        # for which we've already added a process that dispatches to them.
+        self.processes  = {}
+        self.domains    = set()
+
+
+    def dispatcher_for(self, domain):
+        """ Returns a process that runs the current test's process for the given domain, if any. """
+
+        def dispatch():
+            process = self.processes.get(domain)
+            if process is not None:
+                yield from process()
+
+        return dispatch
+
+
+
 class LunaGatewareTestCase(unittest.TestCase):
 
     domain = 'sync'
 
+    # Convenience property: if set, the DUT is elaborated -- and its simulator compiled -- only
+    # once for each test class; and the simulation is reset to its initial state between tests.
+    # Test cases that set this must only add processes via add_test_process, and must not rely
+    # on receiving a fresh DUT object for each test.
+    CACHE_ELABORATION = False
+
+    # Simulations shared between tests; keyed by test class. See CACHE_ELABORATION.
+    _simulation_cache = {}
+
     # Convenience property: if set, instantiate_dut will automatically create
     # the relevant fragment with FRAGMENT_ARGUMENTS.
     FRAGMENT_UNDER_TEST = None
@@ -98,17 +134,76 @@ class LunaGatewareTestCase(unittest.TestCase):
 
 
     def setUp(self):
-        self.dut = self.instantiate_dut()
-        self.sim = Simulator(self.dut)
+        if self.CACHE_ELABORATION:
+            self._set_up_cached_simulation()
+        else:
+            self.dut = self.instantiate_dut()
+            self.sim = self._create_simulator(self.dut)
+
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._simulation_cache.pop(cls, None)
+        super().tearDownClass()
+
+
+    def _create_simulator(self, dut):
+        """ Creates a simulator for the given DUT, with all of our clocks present. """
+        sim = Simulator(dut)
 
         if self.USB_CLOCK_FREQUENCY:
-            self.sim.add_clock(1 / self.USB_CLOCK_FREQUENCY, domain="usb")
+            sim.add_clock(1 / self.USB_CLOCK_FREQUENCY, domain="usb")
         if self.SYNC_CLOCK_FREQUENCY:
-            self.sim.add_clock(1 / self.SYNC_CLOCK_FREQUENCY, domain="sync")
+            sim.add_clock(1 / self.SYNC_CLOCK_FREQUENCY, domain="sync")
         if self.FAST_CLOCK_FREQUENCY:
-            self.sim.add_clock(1 / self.FAST_CLOCK_FREQUENCY, domain="fast")
+            sim.add_clock(1 / self.FAST_CLOCK_FREQUENCY, domain="fast")
         if self.SS_CLOCK_FREQUENCY:
-            self.sim.add_clock(1 / self.SS_CLOCK_FREQUENCY, domain="ss")
+            sim.add_clock(1 / self.SS_CLOCK_FREQUENCY, domain="ss")
+
+        return sim
+
+
+    def _set_up_cached_simulation(self):
+        """ Sets up this test using our class's shared simulation; creating it if necessary. """
+        cache = self._simulation_cache.get(type(self))
+
+        # If we don't yet have a simulation, create one; keeping track of any attributes
+        # instantiate_dut sets up, so we can provide them to subsequent tests.
+        if cache is None:
+            existing_attributes = dict(self.__dict__)
+
+            self.dut = self.instantiate_dut()
+            self.sim = self._create_simulator(self.dut)
+
+            attributes = {
+                name: value for name, value in self.__dict__.items()
+                    if name not in existing_attributes or existing_attributes[name] is not value
+            }
+            cache = self._simulation_cache[type(self)] = _CachedSimulation(self.sim, attributes)
+
+        # Otherwise, restore our simulation to its initial state.
+        else:
+            cache.simulator.reset()
+            self.__dict__.update(cache.attributes)
+
+        cache.processes.clear()
+
+
+    def add_test_process(self, process, *, domain="sync"):
+        """ Adds a synchronous process to this test's simulation. Safe to use with CACHE_ELABORATION. """
+
+        if not self.CACHE_ELABORATION:
+            self.sim.add_sync_process(process, domain=domain)
+            return
+
+        # If we're using a shared simulation, we can't remove processes once they're added; so
+        # instead, we add a single process per domain that runs whichever process the current test provides.
+        cache = self._simulation_cache[type(self)]
+        cache.processes[domain] = process
+
+        if domain not in cache.domains:
+            cache.domains.add(domain)
+            self.sim.add_sync_process(cache.dispatcher_for(domain), domain=domain)
 
 
     def initialize_signals(self):
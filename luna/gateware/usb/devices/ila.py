@@ -6,30 +6,99 @@
 
 """ Pre-made gateware that implements an ILA connection serial. """
 
+import math
+import logging
+
 from amaranth                          import Elaboratable, Module, Signal, Cat
 
-from ...debug.ila                      import StreamILA, ILAFrontend
+from ...debug.ila                      import StreamILA, ContinuousStreamILA, HyperRAMStreamILA, ILAFrontend, ILARingBuffer
 from ...stream                         import StreamInterface
+from ...stream.generator               import StreamSerializer
+from ..request.control                 import ControlRequestHandler
+from ..stream                          import USBInStreamInterface
 from ..usb2.device                     import USBDevice
 from ..usb2.request                    import USBRequestHandler, StallOnlyRequestHandler
 from ..usb2.endpoints.stream           import USBMultibyteStreamInEndpoint
 
-from usb_protocol.types                import USBRequestType
+from usb_protocol.types                import USBRequestType, USBRequestRecipient
 from usb_protocol.emitters             import DeviceDescriptorCollection
 from usb_protocol.emitters.descriptors import cdc
 
 
+class ILAStatusRequestHandler(ControlRequestHandler):
+    """ Vendor request handler that reports the status of a continuous ILA.
+
+    Parameters
+    ----------
+    dropped_samples: Signal(32)
+        The ILA's count of dropped samples; in the `usb` domain.
+    """
+
+    REQUEST_GET_DROPPED_SAMPLES = 0
+
+    def __init__(self, dropped_samples):
+        self._dropped_samples = dropped_samples
+        super().__init__()
+
+
+    def elaborate(self, platform):
+        m = Module()
+
+        interface = self.interface
+        setup     = self.interface.setup
+
+        # Transmitter for our small, fixed-size responses.
+        m.submodules.transmitter = transmitter = \
+            StreamSerializer(data_length=4, domain="usb", stream_type=USBInStreamInterface, max_length_width=3)
+
+        with m.FSM(domain="usb"):
+
+            # IDLE -- wait for a vendor request directed at our interface.
+            with m.State('IDLE'):
+                is_vendor_request = \
+                    (setup.type      == USBRequestType.VENDOR) & \
+                    (setup.recipient == USBRequestRecipient.INTERFACE) & \
+                    (setup.index     == 0)
+
+                with m.If(setup.received & is_vendor_request):
+                    with m.Switch(setup.request):
+                        with m.Case(self.REQUEST_GET_DROPPED_SAMPLES):
+                            m.d.comb += interface.claim.eq(1)
+                            m.next = 'GET_DROPPED_SAMPLES'
+
+            # GET_DROPPED_SAMPLES -- report how many samples the ILA has dropped.
+            with m.State('GET_DROPPED_SAMPLES'):
+                m.d.comb += interface.claim.eq(1)
+                self.handle_simple_data_request(m, transmitter, self._dropped_samples, length=4)
+
+        return m
+
+
+
 class USBIntegratedLogicAnalyzer(Elaboratable):
     """ Pre-made gateware that presents a USB-connected ILA.
 
     Samples are presented over a USB endpoint.
+
+    Parameters
+    ----------
+    continuous: bool
+        If true, the ILA will stream samples continuously once triggered, rather than
+        capturing a single buffer; see :class:`ContinuousStreamILA`. In this mode, the
+        ILA's dropped-sample count is available via a vendor request.
+    ram: HyperRAMInterface or HyperRAMDQSInterface, optional
+        If provided, samples are stored in HyperRAM via this interface, rather than in on-chip
+        memory; see :class:`HyperRAMStreamILA`. This allows far deeper captures. The RAM's PHY
+        must be added to the design separately.
     """
 
     BULK_ENDPOINT_NUMBER = 1
 
-    def __init__(self, *args, bus=None, delayed_connect=False, max_packet_size=512, **kwargs):
+    def __init__(self, *args, bus=None, delayed_connect=False, max_packet_size=512, continuous=False, ram=None,
+            **kwargs):
         self._delayed_connect = delayed_connect
         self._max_packet_size = max_packet_size
+        self._continuous      = continuous
 
         # Store our USB bus.
         self._bus = bus
@@ -38,7 +107,15 @@ class USBIntegratedLogicAnalyzer(Elaboratable):
         kwargs['o_domain'] = 'usb'
 
         # Create our core ILA, which we'll use later.
-        self.ila = StreamILA(*args, **kwargs)
+        if continuous and (ram is not None):
+            raise ValueError("a continuous ILA can't store its samples in RAM")
+
+        if continuous:
+            self.ila = ContinuousStreamILA(*args, **kwargs)
+        elif ram is not None:
+            self.ila = HyperRAMStreamILA(*args, ram=ram, **kwargs)
+        else:
+            self.ila = StreamILA(*args, **kwargs)
 
         #
         # I/O port
@@ -50,13 +127,21 @@ class USBIntegratedLogicAnalyzer(Elaboratable):
         self.sample_depth     = self.ila.sample_depth
         self.sample_rate      = self.ila.sample_rate
         self.sample_period    = self.ila.sample_period
+        self.delta_width      = self.ila.delta_width
         self.bits_per_sample  = self.ila.bits_per_sample
         self.bytes_per_sample = self.ila.bytes_per_sample
 
         # Expose our ILA's trigger and status ports directly.
         self.trigger  = self.ila.trigger
         self.sampling = self.ila.sampling
-        self.complete = self.ila.complete
+
+        if continuous:
+            self.stop            = self.ila.stop
+            self.dropped_samples = self.ila.dropped_samples
+        else:
+            self.complete        = self.ila.complete
+            self.armed           = self.ila.armed
+            self.trigger_unit    = self.ila.trigger_unit
 
 
 
@@ -113,7 +198,11 @@ class USBIntegratedLogicAnalyzer(Elaboratable):
 
         # Add our standard control endpoint to the device.
         descriptors = self.create_descriptors()
-        usb.add_standard_control_endpoint(descriptors)
+        control_ep = usb.add_standard_control_endpoint(descriptors)
+
+        # If we're streaming continuously, allow the host to monitor our dropped samples.
+        if self._continuous:
+            control_ep.add_request_handler(ILAStatusRequestHandler(self.ila.dropped_samples))
 
         # Add a stream endpoint to our device.
         stream_ep = USBMultibyteStreamInEndpoint(
@@ -126,7 +215,7 @@ class USBIntegratedLogicAnalyzer(Elaboratable):
         # Handle our connection criteria: we'll either connect immediately,
         # or once sampling is done, depending on our _delayed_connect setting.
         connect = Signal()
-        if self._delayed_connect:
+        if self._delayed_connect and not self._continuous:
             with m.If(self.ila.complete):
                 m.d.usb += connect.eq(1)
         else:
@@ -145,25 +234,52 @@ class USBIntegratedLogicAnalyzer(Elaboratable):
 class USBIntegratedLogicAnalyzerFrontend(ILAFrontend):
     """ Frontend for USB-attached integrated logic analyzers.
 
+    Samples are read using a queue of asynchronous bulk transfers, which land directly in a
+    single preallocated buffer; this keeps the bus busy and avoids any per-sample copies.
+    After each readout, ``readout_time`` and ``readout_throughput`` (in bytes per second)
+    describe how quickly the host was able to receive the capture.
+
     Parameters
     ------------
     delay: int
         The number of seconds to wait before trying to connect.
     ila: IntegratedLogicAnalyzer
         The ILA object to work with.
+    transfer_size: int
+        The size of each individual bulk transfer, in bytes. Should be a multiple of the
+        endpoint's maximum packet size.
+    transfer_queue_depth: int
+        The maximum number of bulk transfers to keep in flight at once.
+    timeout: int
+        The timeout for each individual transfer, in milliseconds. Zero, the default, waits indefinitely;
+        which allows a readout to be started before the ILA has been triggered. Once the device ends its
+        capture with a short transfer, any transfers still in flight are cancelled. With a non-zero
+        timeout, a transfer that times out fails the readout with an IOError.
     """
 
-    def __init__(self, *args, ila, delay=3, **kwargs):
-        import usb
+    def __init__(self, *args, ila, delay=3, transfer_size=16 * 1024, transfer_queue_depth=16, timeout=0, **kwargs):
+        import usb1
         import time
 
+        self._transfer_size        = transfer_size
+        self._transfer_queue_depth = transfer_queue_depth
+        self._timeout              = timeout
+
+        self.readout_time       = None
+        self.readout_throughput = None
+
         # If we have a connection delay, wait that long.
         if delay:
             time.sleep(delay)
 
-        # Create our USB connection the device
-        self._device = usb.core.find(idVendor=0x1209, idProduct=0x0002)
+        # Create our USB connection the device...
+        self._context = usb1.USBContext()
+        self._device  = self._context.openByVendorIDAndProductID(0x1209, 0x0002)
+        if self._device is None:
+            raise IOError("could not find a USB integrated logic analyzer")
 
+        # ... and claim its bulk interface.
+        self._device.claimInterface(0)
 
         super().__init__(ila)
 
@@ -182,12 +298,291 @@ class USBIntegratedLogicAnalyzerFrontend(ILAFrontend):
             yield bits.from_bytes(raw_sample, length=sample_length, byteorder='little')
 
 
-    def _read_samples(self):
-        """ Reads a set of ILA samples, and returns them. """
+    def _read_sample_buffer(self):
+        """ Reads a set of ILA samples, and returns them as a single raw buffer. """
+        import usb1
+        import time
 
         sample_width_bytes = self.ila.bytes_per_sample
         total_to_read      = self.ila.sample_depth * sample_width_bytes
+        endpoint_address   = usb1.ENDPOINT_IN | USBIntegratedLogicAnalyzer.BULK_ENDPOINT_NUMBER
+
+        # Preallocate our buffer, and split it into transfer-sized regions. Each transfer
+        # receives directly into its own region of our buffer.
+        buffer  = bytearray(total_to_read)
+        view    = memoryview(buffer)
+        regions = [view[i:i + self._transfer_size] for i in range(0, total_to_read, self._transfer_size)]
+
+        next_region     = 0
+        bytes_received  = 0
+        transfers_ended = False
+        failed_status   = None
+        transfers       = []
+
+        def _submit_next(transfer):
+            """ Points a transfer at our next unfilled region, and submits it. """
+            nonlocal next_region
+
+            transfer.setBulk(endpoint_address, regions[next_region],
+                callback=_transfer_completed, timeout=self._timeout)
+            transfer.submit()
+            next_region += 1
+
+
+        def _cancel_pending():
+            """ Cancels each of our transfers that's still in flight; e.g. once our readout has ended. """
+
+            for transfer in transfers:
+                if transfer.isSubmitted():
+                    try:
+                        transfer.cancel()
+                    except usb1.USBError:
+                        pass
+
+
+        def _transfer_completed(transfer):
+            """ Callback executed when an async transfer completes. """
+            nonlocal bytes_received, transfers_ended, failed_status
+
+            status = transfer.getStatus()
+
+            # If our readout has already ended, any remaining transfers are just being wound down;
+            # and we'll discard anything they received.
+            if transfers_ended or (failed_status is not None):
+                return
+
+            # If our transfer failed, stop reading; and stop waiting on everything else in flight.
+            if status != usb1.TRANSFER_COMPLETED:
+                failed_status = status
+                _cancel_pending()
+                return
+
+            actual_length   = transfer.getActualLength()
+            bytes_received += actual_length
+
+            # A short transfer means the device has nothing more to send; so nothing else in flight
+            # will ever complete on its own.
+            if actual_length < len(transfer.getBuffer()):
+                transfers_ended = True
+                _cancel_pending()
+
+            # Otherwise, keep our transfer queue full.
+            elif next_region < len(regions):
+                _submit_next(transfer)
+
+
+        # Allocate and submit our initial queue of transfers.
+        start_time = time.time()
+        for _ in range(min(self._transfer_queue_depth, len(regions))):
+            transfer = self._device.getTransfer()
+            transfers.append(transfer)
+            _submit_next(transfer)
+
+        # Service our transfers until they've all completed, or been cancelled.
+        try:
+            while any(transfer.isSubmitted() for transfer in transfers):
+                self._context.handleEvents()
+        finally:
+            _cancel_pending()
+            while any(transfer.isSubmitted() for transfer in transfers):
+                self._context.handleEvents()
+
+            for transfer in transfers:
+                transfer.close()
+
+        if failed_status is not None:
+            raise IOError(f"ILA readout failed with libusb transfer status {failed_status}")
+
+        # Keep track of how quickly we were able to read samples out.
+        self.readout_time       = time.time() - start_time
+        self.readout_throughput = bytes_received / self.readout_time if self.readout_time else math.inf
+        logging.info(f"Read {bytes_received} bytes of ILA samples "
+            f"in {self.readout_time:.3f}s ({self.readout_throughput / 1e6:.2f} MB/s).")
+
+        return view[:bytes_received]
+
+
+    def _read_samples(self):
+        """ Reads a set of ILA samples, and returns them. """
+        return list(self._split_samples(self._read_sample_buffer()))
+
+
+
+class USBContinuousILAFrontend(USBIntegratedLogicAnalyzerFrontend):
+    """ Frontend for USB-attached ILAs operating in continuous mode.
+
+    A background thread keeps a queue of bulk transfers in flight, and moves their data into
+    a bounded :class:`ILARingBuffer`. When that buffer fills, the thread either stops reading
+    (applying back-pressure, so samples are dropped -- and counted -- on the device), or
+    overwrites the oldest samples; depending on ``overwrite``.
+
+    Parameters
+    ------------
+    ila: USBIntegratedLogicAnalyzer
+        The ILA object to work with. Should have been created with ``continuous=True``.
+    buffer_samples: int
+        The capacity of the host-side ring buffer, in samples.
+    buffer_filename: str, optional
+        If provided, the ring buffer will be backed by the given file, rather than by memory.
+    overwrite: bool
+        If true, the oldest samples are discarded when the ring buffer is full; otherwise,
+        back-pressure is applied to the device.
+    capture_samples: int, optional
+        The number of samples returned by each :meth:`refresh`. Defaults to the ring buffer's capacity.
+    """
+
+    def __init__(self, *args, ila, buffer_samples=1024 * 1024, buffer_filename=None, overwrite=False,
+            capture_samples=None, **kwargs):
+
+        self._overwrite       = overwrite
+        self._capture_samples = capture_samples or buffer_samples
+
+        self.ring = ILARingBuffer(
+            capacity=buffer_samples,
+            bytes_per_sample=ila.bytes_per_sample,
+            filename=buffer_filename
+        )
+
+        self._reader   = None
+        self._running  = False
+        self._error    = None
+
+        super().__init__(*args, ila=ila, **kwargs)
+
+
+    @property
+    def dropped_samples(self):
+        """ The number of samples dropped by the device since it was last triggered. """
+        import usb1
+
+        request_type = usb1.TYPE_VENDOR | usb1.RECIPIENT_INTERFACE | usb1.ENDPOINT_IN
+        response = self._device.controlRead(request_type, ILAStatusRequestHandler.REQUEST_GET_DROPPED_SAMPLES, 0, 0, 4)
+        return int.from_bytes(response, byteorder='little')
+
+
+    @property
+    def overwritten_samples(self):
+        """ The number of samples discarded by the host because its ring buffer was full. """
+        return self.ring.overwritten_samples
+
+
+    def start(self):
+        """ Starts streaming samples from the device into our ring buffer. """
+        import threading
+
+        if self._running:
+            return
+
+        self._running = True
+        self._error   = None
+        self._reader  = threading.Thread(target=self._stream_samples, name="ila-reader", daemon=True)
+        self._reader.start()
+
+
+    def stop(self):
+        """ Stops streaming samples from the device. Samples already buffered remain available. """
+
+        if not self._running:
+            return
+
+        self._running = False
+        self._reader.join()
+        self._reader = None
+
+
+    def _stream_samples(self):
+        """ Background thread that moves samples from the device into our ring buffer. """
+        import usb1
+        import collections
+
+        endpoint_address = usb1.ENDPOINT_IN | USBIntegratedLogicAnalyzer.BULK_ENDPOINT_NUMBER
+        completed        = collections.deque()
+
+        def _transfer_completed(transfer):
+            """ Callback executed when an async transfer completes. """
+            completed.append(transfer)
+
+        # Allocate and submit our queue of transfers, each with its own buffer.
+        transfers = []
+        for _ in range(self._transfer_queue_depth):
+            transfer = self._device.getTransfer()
+            transfer.setBulk(endpoint_address, bytearray(self._transfer_size),
+                callback=_transfer_completed, timeout=self._timeout)
+            transfer.submit()
+            transfers.append(transfer)
+
+        try:
+            while self._running:
+                self._context.handleEventsTimeout(tv=0.1)
+
+                # Process our completed transfers in order...
+                while completed and self._running:
+                    transfer = completed[0]
+                    status   = transfer.getStatus()
+
+                    if status not in (usb1.TRANSFER_COMPLETED, usb1.TRANSFER_TIMED_OUT):
+                        raise IOError(f"ILA readout failed with libusb transfer status {status}")
+
+                    # ... moving their data into our ring buffer; which may block to apply back-pressure ...
+                    data = transfer.getBuffer()[:transfer.getActualLength()]
+                    if not self.ring.write(data, overwrite=self._overwrite, timeout=0.1):
+                        continue
+
+                    # ... and then resubmitting them.
+                    completed.popleft()
+                    transfer.submit()
+
+        except Exception as e:
+            self._error   = e
+            self._running = False
+
+        finally:
+            for transfer in transfers:
+                if transfer.isSubmitted():
+                    try:
+                        transfer.cancel()
+                    except usb1.USBError:
+                        pass
+
+            while any(transfer.isSubmitted() for transfer in transfers):
+                self._context.handleEventsTimeout(tv=0.1)
+
+            for transfer in transfers:
+                transfer.close()
+
+
+    def read_samples(self, sample_count, *, timeout=None):
+        """ Reads up to ``sample_count`` samples from our ring buffer, as a dictionary of name -> sample array.
+
+        Waits up to ``timeout`` seconds for the samples to arrive; or indefinitely if no timeout is provided.
+        """
+
+        if self._error:
+            raise self._error
+
+        return self._unpack_sample_buffer(self.ring.read(sample_count, timeout=timeout))
+
+
+    def _read_sample_buffer(self):
+        """ Captures a set of ILA samples from our stream, and returns them as a single raw buffer. """
+
+        # If we're not already streaming, stream only for the duration of this capture.
+        was_running = self._running
+        self.start()
+
+        try:
+            data     = bytearray()
+            required = self._capture_samples * self.ila.bytes_per_sample
+
+            # Read until we've captured enough samples; bailing out if our reader fails.
+            while len(data) < required:
+                if self._error:
+                    raise self._error
+
+                remaining = (required - len(data)) // self.ila.bytes_per_sample
+                data += self.ring.read(remaining, timeout=0.5)
 
-        # Fetch all of our samples from the given device.
-        all_samples = self._device.read(0x81, total_to_read, timeout=0)
-        return list(self._split_samples(all_samples))
+            return data
+        finally:
+            if not was_running:
+                self.stop()
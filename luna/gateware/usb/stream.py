@@ -320,10 +320,13 @@ class USBRawSuperSpeedStream(StreamInterface):
 
 
 class SuperSpeedStreamArbiter(StreamArbiter):
-    """ Convenience variant of our StreamArbiter that operates SuperSpeed streams in the ``ss`` domain. """
+    """ Convenience variant of our StreamArbiter that operates SuperSpeed streams in the ``ss`` domain.
 
-    def __init__(self):
-        super().__init__(stream_type=USBRawSuperSpeedStream, domain="ss")
+    Any keyword arguments, such as the scheduling ``mode``, are passed on to :class:`StreamArbiter`.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(stream_type=USBRawSuperSpeedStream, domain="ss", **kwargs)
 
 
 class SuperSpeedStreamInterface(StreamInterface):
@@ -12,7 +12,7 @@ import logging
 
 from luna                      import configure_default_logging
 
-from amaranth                  import Signal, Module, Elaboratable, Const
+from amaranth                  import Signal, Module, Elaboratable, Const, Cat
 from usb_protocol.emitters     import DeviceDescriptorCollection
 
 from ...interface.ulpi         import UTMITranslator
@@ -313,13 +313,14 @@ class USBDevice(Elaboratable):
             endpoint_collection.rx_complete            .eq(receiver.packet_complete),
             endpoint_collection.rx_invalid             .eq(receiver.crc_mismatch),
             endpoint_collection.rx_ready_for_response  .eq(receiver.ready_for_response),
-            endpoint_collection.rx_pid_toggle          .eq(receiver.active_pid[3]),
+            endpoint_collection.rx_pid_toggle          .eq(Cat(receiver.active_pid[3], receiver.active_pid[2])),
 
             # Transmit interface.
             endpoint_collection.tx                     .attach(transmitter.stream),
             handshake_generator.issue_ack              .eq(endpoint_collection.handshakes_out.ack),
             handshake_generator.issue_nak              .eq(endpoint_collection.handshakes_out.nak),
             handshake_generator.issue_stall            .eq(endpoint_collection.handshakes_out.stall),
+            handshake_generator.issue_nyet             .eq(endpoint_collection.handshakes_out.nyet),
             transmitter.data_pid                       .eq(endpoint_collection.tx_pid_toggle),
         ]
 
@@ -6,16 +6,14 @@
 
 """ Gateware for working with abstract endpoints. """
 
-import functools
-import operator
-
-from amaranth         import Signal, Elaboratable, Module, Cat
+from amaranth         import Signal, Elaboratable, Module, Cat, DomainRenamer
 
 from .packet          import DataCRCInterface, InterpacketTimerInterface, TokenDetectorInterface
 from .packet          import HandshakeExchangeInterface
 from .request         import ClearEndpointHaltInterface
 from ..stream         import USBInStreamInterface, USBOutStreamInterface
-from ...utils.bus     import OneHotMultiplexer
+from ...stream.pipeline import StreamRegisterSlice
+from ...utils.bus     import OneHotMultiplexer, one_hot_select, or_tree
 
 
 class EndpointInterface:
@@ -38,8 +36,9 @@ class EndpointInterface:
         Indicates that an interpacket delay has passed after an `rx_complete` strobe.
     rx_invalid: Signal(), input to endpoint
         Strobe that indicates that the concluding rx-stream was invalid (CRC check failed).
-    rx_pid_toggle: Signal(), input to endpoint
+    rx_pid_toggle: Signal(2), input to endpoint
         Value for the data PID toggle; 0 indicates we're receiving a DATA0; 1 indicates Data1.
+        2 indicates we're receiving a DATA2, while 3 indicates an MDATA.
 
     tx: USBInStreamInterface, output stream from endpoint
         Transmit interface for this endpoint.
@@ -113,14 +112,25 @@ class USBEndpointMultiplexer(Elaboratable):
 
     Interfaces are added using :attr:`add_interface`.
 
+    Each shared signal is selected using a one-hot AND-OR multiplexer, whose logic depth grows only
+    logarithmically with the number of endpoints. If ``registered_output`` is set, the signals driven from our
+    endpoints onto :attr:`shared` are additionally registered; which removes the multiplexer from the timing
+    paths into the rest of the device, at the cost of a cycle of latency on each of those signals.
+
     Attributes
     ----------
 
     shared: EndpointInterface
         The post-multiplexer endpoint interface.
+
+    Parameters
+    ----------
+    registered_output: bool
+        If true, the signals driven from our endpoints onto our shared interface are registered.
     """
 
-    def __init__(self):
+    def __init__(self, *, registered_output=False):
+        self._registered_output = registered_output
 
         #
         # I/O port
@@ -142,16 +152,19 @@ class USBEndpointMultiplexer(Elaboratable):
         self._interfaces.append(interface)
 
 
-    def _multiplex_signals(self, m, *, when, multiplex, sub_bus=None):
-        """ Helper that creates a simple priority-encoder multiplexer.
+    def _multiplex_signals(self, m, *, when, multiplex, sub_bus=None, target=None):
+        """ Helper that creates a one-hot AND-OR multiplexer.
 
         Parmeters
         ---------
         when: str
             The name of the interface signal that indicates that the `multiplex` signals should be
             selected for output. If this signals should be multiplexed, it should be included in `multiplex`.
+            It's expected that only one interface will assert this signal at a time.
         multiplex: iterable(str)
             The names of the interface signals to be multiplexed.
+        target: EndpointInterface, optional
+            The interface to drive with the multiplexed signals. Defaults to our shared interface.
         """
 
         def get_signal(interface, name):
@@ -163,38 +176,34 @@ class USBEndpointMultiplexer(Elaboratable):
             else:
                 return  getattr(interface, name)
 
+        if target is None:
+            target = self.shared
 
-        # We're building an if-elif tree; so we should start with an If entry.
-        conditional = m.If
+        selects = [get_signal(interface, when) for interface in self._interfaces]
 
-        for interface in self._interfaces:
-            condition = get_signal(interface, when)
-
-            with conditional(condition):
-
-                # Connect up each of our signals.
-                for signal_name in multiplex:
+        # Connect up each of our signals.
+        for signal_name in multiplex:
 
-                    # Get the actual signals for our input and output...
-                    driving_signal = get_signal(interface,   signal_name)
-                    target_signal  = get_signal(self.shared, signal_name)
+            # Get the actual signals for our inputs and output...
+            driving_signals = [get_signal(interface, signal_name) for interface in self._interfaces]
+            target_signal   = get_signal(target, signal_name)
 
-                    # ... and connect them.
-                    m.d.comb += target_signal   .eq(driving_signal)
+            # ... and connect them.
+            m.d.comb += target_signal.eq(one_hot_select(selects, driving_signals))
 
-            # After the first element, all other entries should be created with Elif.
-            conditional = m.Elif
 
-
-    def or_join_interface_signals(self, m, signal_for_interface):
+    def or_join_interface_signals(self, m, signal_for_interface, *, target=None):
         """ Joins together a set of signals on each interface by OR'ing the signals together. """
 
+        if target is None:
+            target = self.shared
+
         # Find the value of all of our pre-mux signals OR'd together...
         all_signals = (signal_for_interface(i) for i in self._interfaces)
-        or_value = functools.reduce(operator.__or__, all_signals, 0)
+        or_value = or_tree(all_signals)
 
         # ... and tie it to our post-mux signal.
-        m.d.comb += signal_for_interface(self.shared).eq(or_value)
+        m.d.comb += signal_for_interface(target).eq(or_value)
 
 
     def elaborate(self, platform):
@@ -235,13 +244,20 @@ class USBEndpointMultiplexer(Elaboratable):
         #
         # Multiplex the signals being routed -from- our pre-mux interface.
         #
+
+        # If we're registering our outputs, we'll multiplex onto an internal interface, and then register
+        # its signals onto our shared interface. Otherwise, we'll multiplex directly onto our shared interface.
+        muxed = EndpointInterface() if self._registered_output else shared
+
         self._multiplex_signals(m,
             when='address_changed',
-            multiplex=['address_changed', 'new_address']
+            multiplex=['address_changed', 'new_address'],
+            target=muxed
         )
         self._multiplex_signals(m,
             when='config_changed',
-            multiplex=['config_changed', 'new_config']
+            multiplex=['config_changed', 'new_config'],
+            target=muxed
         )
 
         # Connect up our transmit interface.
@@ -252,33 +268,62 @@ class USBEndpointMultiplexer(Elaboratable):
             pass_signals=('ready',)
         )
         tx_mux.add_interfaces(i.tx for i in self._interfaces)
-        m.d.comb += self.shared.tx.stream_eq(tx_mux.output)
+        m.d.comb += muxed.tx.stream_eq(tx_mux.output)
 
         # OR together all of our handshake-generation requests...
-        self.or_join_interface_signals(m, lambda interface : interface.handshakes_out.ack)
-        self.or_join_interface_signals(m, lambda interface : interface.handshakes_out.nak)
-        self.or_join_interface_signals(m, lambda interface : interface.handshakes_out.stall)
+        self.or_join_interface_signals(m, lambda interface : interface.handshakes_out.ack,   target=muxed)
+        self.or_join_interface_signals(m, lambda interface : interface.handshakes_out.nak,   target=muxed)
+        self.or_join_interface_signals(m, lambda interface : interface.handshakes_out.stall, target=muxed)
+        self.or_join_interface_signals(m, lambda interface : interface.handshakes_out.nyet,  target=muxed)
 
         # ... our CRC start signals...
-        self.or_join_interface_signals(m, lambda interface : interface.data_crc.start)
+        self.or_join_interface_signals(m, lambda interface : interface.data_crc.start, target=muxed)
 
         # ... and our timer start signals.
-        self.or_join_interface_signals(m, lambda interface : interface.timer.start)
-
-        self.or_join_interface_signals(m, lambda interface : interface.clear_endpoint_halt_out.enable)
-        self.or_join_interface_signals(m, lambda interface : interface.clear_endpoint_halt_out.direction)
-        self.or_join_interface_signals(m, lambda interface : interface.clear_endpoint_halt_out.number)
+        self.or_join_interface_signals(m, lambda interface : interface.timer.start, target=muxed)
 
-        # Finally, connect up our transmit PID select.
-        conditional = m.If
+        self.or_join_interface_signals(m, lambda interface : interface.clear_endpoint_halt_out.enable,    target=muxed)
+        self.or_join_interface_signals(m, lambda interface : interface.clear_endpoint_halt_out.direction, target=muxed)
+        self.or_join_interface_signals(m, lambda interface : interface.clear_endpoint_halt_out.number,    target=muxed)
 
-        # We'll connect our PID toggle to whichever interface has a valid transmission going.
+        # Finally, connect up our transmit PID select. We'll connect our PID toggle to whichever interface
+        # has a valid transmission going; as transmissions are always separated by interpacket gaps,
+        # at most one interface can be selected at a time.
         past_valid  = Signal(len(self._interfaces))
         m.d.usb    += past_valid.eq(Cat(interface.tx.valid for interface in self._interfaces))
-        for i, interface in enumerate(self._interfaces):
-            with conditional(interface.tx.valid | past_valid[i]):
-                m.d.comb += shared.tx_pid_toggle.eq(interface.tx_pid_toggle)
+        m.d.comb   += muxed.tx_pid_toggle.eq(one_hot_select(
+            (interface.tx.valid | past_valid[i] for i, interface in enumerate(self._interfaces)),
+            (interface.tx_pid_toggle for interface in self._interfaces)
+        ))
+
+        #
+        # Output registers.
+        #
+        if self._registered_output:
 
-            conditional = m.Elif
+            # Register our transmit stream without adding bubbles...
+            m.submodules.tx_register = tx_register = DomainRenamer("usb")(
+                StreamRegisterSlice.like(muxed.tx, mode="forward")
+            )
+            m.d.comb += [
+                tx_register.input  .stream_eq(muxed.tx),
+                shared.tx          .stream_eq(tx_register.output),
+            ]
+
+            # ... and each of our other endpoint-driven signals directly.
+            m.d.usb += [
+                shared.address_changed          .eq(muxed.address_changed),
+                shared.new_address              .eq(muxed.new_address),
+                shared.config_changed           .eq(muxed.config_changed),
+                shared.new_config               .eq(muxed.new_config),
+                shared.tx_pid_toggle            .eq(muxed.tx_pid_toggle),
+                shared.handshakes_out.ack       .eq(muxed.handshakes_out.ack),
+                shared.handshakes_out.nak       .eq(muxed.handshakes_out.nak),
+                shared.handshakes_out.stall     .eq(muxed.handshakes_out.stall),
+                shared.handshakes_out.nyet      .eq(muxed.handshakes_out.nyet),
+                shared.data_crc.start           .eq(muxed.data_crc.start),
+                shared.timer.start              .eq(muxed.timer.start),
+                shared.clear_endpoint_halt_out  .eq(muxed.clear_endpoint_halt_out),
+            ]
 
         return m
@@ -26,6 +26,11 @@ class USBIsochronousStreamOutEndpoint(Elaboratable):
     Used for repeatedly streaming data from a host to a stream or stream-like interface.
     Intended to be useful as a transport for e.g. video or audio data.
 
+    This endpoint supports high-bandwidth operation, in which the host sends up to three transactions
+    per microframe. Each microframe's data is only passed on once all of its packets have been received
+    intact, in the PID sequence required by [USB2.0: 5.9.2]; and is presented on :attr:``stream`` as a
+    single packet. A microframe that can't be received intact is dropped in its entirety.
+
 
     Attributes
     ----------
@@ -34,23 +39,43 @@ class USBIsochronousStreamOutEndpoint(Elaboratable):
     interface: EndpointInterface
         Communications link to our USB device.
 
+    dropped_microframes: Signal(16), output
+        Counts microframes dropped due to a corrupted packet, a missing packet, or a PID sequence error.
+        Wraps around on overflow.
+    overruns: Signal(16), output
+        Counts microframes dropped because we didn't have buffer space for one of their packets.
+        Wraps around on overflow.
+
     Parameters
     ----------
     endpoint_number: int
         The endpoint number (not address) this endpoint should respond to.
     max_packet_size: int, optional
         The maximum packet size for this endpoint. If there isn't `max_packet_size` space in
-        the endpoint buffer, additional data will be silently dropped.
+        the endpoint buffer, the relevant microframe will be dropped, and counted in :attr:``overruns``.
+    transactions_per_microframe: int, optional
+        The number of transactions the host may issue per microframe; between one and three.
+        Should match the additional transaction opportunities in the USB endpoint descriptor's
+        wMaxPacketSize, plus one. Defaults to one.
     buffer_size: int, optional
-        The total amount of data we'll keep in the buffer; typically two (TODO three?) max-packet-sizes or more.
-        Defaults to twice (TODO three?) times the maximum packet size.
+        The total amount of data we'll keep in the buffer; typically two microframes' worth of
+        max-packet-sizes or more. Defaults to two microframes' worth.
     """
 
-    def __init__(self, *, endpoint_number, max_packet_size, buffer_size=None):
+    _MAX_TRANSACTIONS_PER_MICROFRAME = 3
+
+    # Our `rx_pid_toggle` value for an MDATA packet. DATA0, DATA1, and DATA2 are represented by 0, 1, and 2.
+    _MDATA = 3
+
+    def __init__(self, *, endpoint_number, max_packet_size, transactions_per_microframe=1, buffer_size=None):
+
+        if not (1 <= transactions_per_microframe <= self._MAX_TRANSACTIONS_PER_MICROFRAME):
+            raise ValueError(f"transactions_per_microframe must be between 1 and 3, not {transactions_per_microframe}")
+
         self._endpoint_number = endpoint_number
         self._max_packet_size = max_packet_size
-        # TODO self._buffer_size = buffer_size if (buffer_size is not None) else (self._max_packet_size * 3)
-        self._buffer_size = buffer_size if (buffer_size is not None) else (self._max_packet_size * 2)
+        self._transactions    = transactions_per_microframe
+        self._buffer_size     = buffer_size if (buffer_size is not None) else (self._max_packet_size * self._transactions * 2)
 
         #
         # I/O port
@@ -62,6 +87,9 @@ class USBIsochronousStreamOutEndpoint(Elaboratable):
         )
         self.interface = EndpointInterface()
 
+        self.dropped_microframes = Signal(16)
+        self.overruns            = Signal(16)
+
     def elaborate(self, platform):
         m = Module()
 
@@ -73,11 +101,15 @@ class USBIsochronousStreamOutEndpoint(Elaboratable):
         # Internal state.
         #
 
-        # Stores whether we've had a receive overflow.
-        overflow = Signal()
+        # Stores the position of the packet we're receiving within the current microframe.
+        packet_index = Signal(range(self._transactions))
 
-        # Stores a count of received bytes in the current packet.
-        rx_cnt = Signal(range(self._max_packet_size))
+        # Stores whether the packet we're receiving has overrun our buffer.
+        overrun = Signal()
+
+        # Stores whether we've dropped the current microframe; in which case we'll discard any of its
+        # remaining packets.
+        microframe_dropped = Signal()
 
         #
         # Receiver logic.
@@ -108,23 +140,28 @@ class USBIsochronousStreamOutEndpoint(Elaboratable):
 
         sufficient_space         = (fifo.space_available >= self._max_packet_size)
 
-        okay_to_receive          = targeting_endpoint & sufficient_space
-        data_is_lost             = okay_to_receive & rx.next & rx.valid & fifo.full
+        # We'll decide whether we have room for a packet as it starts; since its own data will
+        # reduce our available space as it arrives.
+        receiving_byte           = targeting_endpoint & rx.next & rx.valid
+        packet_overruns          = Mux(rx_first, ~sufficient_space, overrun)
+
+        # Each microframe consists of zero or more MDATA packets, followed by a packet whose PID
+        # indicates the number of packets in the microframe: DATA0, DATA1, or DATA2 [USB2.0: 5.9.2].
+        is_mdata                 = (interface.rx_pid_toggle == self._MDATA)
+        final_pid_expected       = (interface.rx_pid_toggle == packet_index)
+        mdata_expected           = is_mdata & (packet_index != self._transactions - 1)
 
-        full_packet              = rx_cnt == self._max_packet_size - 1
+        packet_complete          = targeting_endpoint & boundary_detector.complete_out
+        packet_invalid           = targeting_endpoint & boundary_detector.invalid_out
 
         m.d.comb += [
 
-            # We'll always populate our FIFO directly from the receive stream; but we'll also include our
-            # "short packet detected" signal, as this indicates that we're detecting the last byte of a transfer.
+            # We'll always populate our FIFO directly from the receive stream; marking the first and last
+            # bytes of each microframe, rather than of each packet.
             fifo.write_data[0:8] .eq(rx.payload),
-            fifo.write_data[8]   .eq(rx_last),
-            fifo.write_data[9]   .eq(rx_first),
-            fifo.write_en        .eq(okay_to_receive & rx.next & rx.valid),
-
-            # We'll keep data if our packet finishes with a valid CRC; and discard it otherwise.
-            fifo.write_commit    .eq(targeting_endpoint & boundary_detector.complete_out),
-            fifo.write_discard   .eq(targeting_endpoint & boundary_detector.invalid_out),
+            fifo.write_data[8]   .eq(rx_last & ~is_mdata),
+            fifo.write_data[9]   .eq(rx_first & (packet_index == 0)),
+            fifo.write_en        .eq(receiving_byte & ~packet_overruns & ~microframe_dropped),
 
             # Our stream data always comes directly out of the FIFO; and is valid
             # whenever our FIFO actually has data for us to read.
@@ -141,17 +178,60 @@ class USBIsochronousStreamOutEndpoint(Elaboratable):
             fifo.read_commit     .eq(1)
         ]
 
-        # Count bytes in packet.
-        with m.If(fifo.write_en):
-            m.d.usb += rx_cnt.eq(rx_cnt + 1)
+        # Track whether each packet has overrun our buffer.
+        with m.If(receiving_byte):
+            m.d.usb += overrun.eq(packet_overruns)
 
-        # We'll set the overflow flag if we're receiving data we don't have room for.
-        with m.If(data_is_lost):
-            m.d.usb += overflow.eq(1)
 
-        # We'll clear the overflow flag and byte counter when the packet is done.
-        with m.Elif(fifo.write_commit | fifo.write_discard):
-            m.d.usb += overflow.eq(0)
-            m.d.usb += rx_cnt.eq(0)
+        #
+        # Microframe assembly.
+        #
+
+        # If we've already dropped this microframe, discard the rest of its packets, until we reach its end.
+        with m.If(microframe_dropped & (packet_complete | packet_invalid)):
+            m.d.comb += fifo.write_discard.eq(1)
+
+            with m.If(~is_mdata):
+                m.d.usb += microframe_dropped.eq(0)
+
+        # If a packet has arrived intact, and in sequence...
+        with m.Elif(packet_complete & ~overrun & (mdata_expected | final_pid_expected)):
+
+            # ... and it's the final packet in its microframe, we've received our microframe in its entirety.
+            # We'll commit it; making it available on our output stream.
+            with m.If(final_pid_expected):
+                m.d.comb += fifo.write_commit.eq(1)
+                m.d.usb  += packet_index.eq(0)
+
+            # Otherwise, we'll hold on to the packet until we've seen the rest of the microframe.
+            with m.Else():
+                m.d.usb  += packet_index.eq(packet_index + 1)
+
+        # If a packet has arrived corrupted, out of sequence, or without space to store it, we'll drop
+        # its entire microframe...
+        with m.Elif(packet_complete | packet_invalid):
+            m.d.comb += fifo.write_discard.eq(1)
+            m.d.usb  += packet_index.eq(0)
+
+            with m.If(packet_complete & overrun):
+                m.d.usb += self.overruns.eq(self.overruns + 1)
+            with m.Else():
+                m.d.usb += self.dropped_microframes.eq(self.dropped_microframes + 1)
+
+            # ... and if we know more of its packets are on the way, we'll ignore them as well.
+            with m.If(is_mdata & (packet_index != self._transactions - 1)):
+                m.d.usb += microframe_dropped.eq(1)
+
+        # If a new microframe starts before we've seen the end of the last one, we've missed
+        # some of its packets; so we'll drop it.
+        with m.Elif(tokenizer.new_frame):
+            m.d.usb += [
+                packet_index        .eq(0),
+                microframe_dropped  .eq(0),
+            ]
+
+            with m.If(packet_index != 0):
+                m.d.comb += fifo.write_discard.eq(1)
+                m.d.usb  += self.dropped_microframes.eq(self.dropped_microframes + 1)
 
         return m
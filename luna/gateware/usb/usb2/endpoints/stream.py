@@ -12,6 +12,7 @@ connecting streams to USB endpoints.
 
 from amaranth       import Elaboratable, Module, Signal
 
+from ..            import USBSpeed
 from ..endpoint     import EndpointInterface
 from ...stream      import StreamInterface, USBOutStreamBoundaryDetector
 from ..transfer     import USBInTransferManager
@@ -31,8 +32,9 @@ class USBStreamInEndpoint(Elaboratable):
     possible. When ``flush`` is asserted, packets of varying length will be sent as needed, according
     to the data available.
 
-    This implementation is double buffered; and can store a single packets worth of data while transmitting
-    a second packet.
+    By default, this implementation is double buffered; and can store a single packets worth of data while
+    transmitting a second packet. Additional packet buffers can be requested, which allows the endpoint to
+    keep sending packets to the host through brief stalls in the data stream.
 
 
     Attributes
@@ -57,13 +59,16 @@ class USBStreamInEndpoint(Elaboratable):
     max_packet_size: int
         The maximum packet size for this endpoint. Should match the wMaxPacketSize provided in the
         USB endpoint descriptor.
+    packet_buffers: int
+        The number of max-packet-size buffers to use; see :class:`USBInTransferManager`. Defaults to two.
     """
 
 
-    def __init__(self, *, endpoint_number, max_packet_size):
+    def __init__(self, *, endpoint_number, max_packet_size, packet_buffers=2):
 
         self._endpoint_number = endpoint_number
         self._max_packet_size = max_packet_size
+        self._packet_buffers  = packet_buffers
 
         #
         # I/O port
@@ -79,7 +84,7 @@ class USBStreamInEndpoint(Elaboratable):
         interface = self.interface
 
         # Create our transfer manager, which will be used to sequence packet transfers for our stream.
-        m.submodules.tx_manager = tx_manager = USBInTransferManager(self._max_packet_size)
+        m.submodules.tx_manager = tx_manager = USBInTransferManager(self._max_packet_size, packet_buffers=self._packet_buffers)
 
         # Check there has been a ClearFeature(ENDPOINT_HALT) request address to this endpoint.
         clear_endpoint_halt = \
@@ -128,8 +133,8 @@ class USBMultibyteStreamInEndpoint(Elaboratable):
     a short data packet. If the stream's ``last`` signal is tied to zero, then a continuous stream of
     maximum-length-packets will be sent with no inserted ZLPs.
 
-    This implementation is double buffered; and can store a single packets worth of data while transmitting
-    a second packet.
+    By default, this implementation is double buffered; and can store a single packets worth of data while
+    transmitting a second packet.
 
 
     Attributes
@@ -149,11 +154,14 @@ class USBMultibyteStreamInEndpoint(Elaboratable):
     max_packet_size: int
         The maximum packet size for this endpoint. Should match the wMaxPacketSize provided in the
         USB endpoint descriptor.
+    packet_buffers: int
+        The number of max-packet-size buffers to use; see :class:`USBStreamInEndpoint`. Defaults to two.
     """
-    def __init__(self, *, byte_width, endpoint_number, max_packet_size):
+    def __init__(self, *, byte_width, endpoint_number, max_packet_size, packet_buffers=2):
         self._byte_width      = byte_width
         self._endpoint_number = endpoint_number
         self._max_packet_size = max_packet_size
+        self._packet_buffers  = packet_buffers
 
         #
         # I/O port
@@ -168,7 +176,8 @@ class USBMultibyteStreamInEndpoint(Elaboratable):
         # Create our core, single-byte-wide endpoint, and attach it directly to our interface.
         m.submodules.stream_ep = stream_ep = USBStreamInEndpoint(
             endpoint_number=self._endpoint_number,
-            max_packet_size=self._max_packet_size
+            max_packet_size=self._max_packet_size,
+            packet_buffers=self._packet_buffers
         )
         stream_ep.interface = self.interface
 
@@ -261,6 +270,10 @@ class USBStreamOutEndpoint(Elaboratable):
 
     This interface is suitable for a single bulk or interrupt endpoint.
 
+    When operating at high speed, this endpoint participates in the PING protocol: a packet that's
+    accepted while leaving room for another is ACK'd, and one that fills our buffer is answered with
+    a NYET, so the host knows to PING us before sending more data [USB 2.0: 8.5.1].
+
 
     Attributes
     ----------
@@ -276,16 +289,18 @@ class USBStreamOutEndpoint(Elaboratable):
     max_packet_size: int
         The maximum packet size for this endpoint. If this there isn't `max_packet_size` space in
         the endpoint buffer, this endpoint will NAK (or participate in the PING protocol.)
+    buffer_packets: int, optional
+        The number of max-packet-size packets we'll keep in the buffer. Defaults to two.
     buffer_size: int, optional
         The total amount of data we'll keep in the buffer; typically two max-packet-sizes or more.
-        Defaults to twice the maximum packet size.
+        Overrides ``buffer_packets``, if provided.
     """
 
 
-    def __init__(self, *, endpoint_number, max_packet_size, buffer_size=None):
+    def __init__(self, *, endpoint_number, max_packet_size, buffer_packets=2, buffer_size=None):
         self._endpoint_number = endpoint_number
         self._max_packet_size = max_packet_size
-        self._buffer_size = buffer_size if (buffer_size is not None) else (self._max_packet_size * 2 - 1)
+        self._buffer_size = buffer_size if (buffer_size is not None) else (self._max_packet_size * buffer_packets)
 
         #
         # I/O port
@@ -347,6 +362,7 @@ class USBStreamOutEndpoint(Elaboratable):
 
         expected_pid_match       = (interface.rx_pid_toggle == expected_data_toggle)
         sufficient_space         = (fifo.space_available >= self._max_packet_size)
+        high_speed               = (interface.speed == USBSpeed.HIGH)
 
         ping_response_requested  = endpoint_number_matches & tokenizer.is_ping & tokenizer.ready_for_response
         data_response_requested  = targeting_endpoint & tokenizer.is_out & interface.rx_ready_for_response
@@ -374,12 +390,19 @@ class USBStreamOutEndpoint(Elaboratable):
             # We'll ACK each packet if it's received correctly; _or_ if we skipped the packet
             # due to a PID sequence mismatch. If we get a PID sequence mismatch, we assume that
             # we missed a previous ACK from the host; and ACK without accepting data [USB 2.0: 8.6.3].
+            # At high speed, we'll only ACK received data if we have room for another packet.
             interface.handshakes_out.ack  .eq(
-                (data_response_requested & data_accepted) |
+                (data_response_requested & data_accepted & (sufficient_space | ~high_speed)) |
                 (ping_response_requested & sufficient_space) |
                 (data_response_requested & should_skip)
             ),
 
+            # If we've accepted a packet at high speed, but no longer have room for another, we'll
+            # NYET; which tells the host to PING us until we're ready for more data [USB 2.0: 8.5.1].
+            interface.handshakes_out.nyet .eq(
+                data_response_requested & data_accepted & ~sufficient_space & high_speed
+            ),
+
             # We'll NAK any time we want to accept a packet, but we don't have enough room.
             interface.handshakes_out.nak  .eq(
                 (data_response_requested & ~data_accepted & ~should_skip) |
@@ -413,9 +436,13 @@ class USBStreamOutEndpoint(Elaboratable):
         with m.If(data_is_lost):
             m.d.usb += overflow.eq(1)
 
-        # We'll clear the overflow flag and byte counter when the packet is done.
-        with m.Elif(fifo.write_commit | fifo.write_discard):
+        # We'll clear the overflow flag once the host starts its next transaction; as we need it to
+        # decide how to respond to the packet that overflowed.
+        with m.Elif(tokenizer.new_token):
             m.d.usb += overflow.eq(0)
+
+        # We'll clear the byte counter when the packet is done.
+        with m.If(fifo.write_commit | fifo.write_discard):
             m.d.usb += rx_cnt.eq(0)
 
         # We'll toggle our DATA PID each time we issue an ACK to the host [USB 2.0: 8.6.2].
@@ -16,6 +16,7 @@ from amaranth.hdl.rec  import Record, DIR_FANIN, DIR_FANOUT
 from .                 import USBSpeed, USBPacketID
 from ..stream          import USBInStreamInterface, USBOutStreamInterface
 from ...interface.utmi import UTMITransmitInterface
+from ...utils.lfsr     import LFSRMatrix
 
 #
 # Interfaces.
@@ -542,6 +543,9 @@ class USBDataPacketCRC(Elaboratable):
             The initial value of the CRC shift register; the USB default is used if not provided.
     """
 
+    # The USB CRC16 polynomial, x^16 + x^15 + x^2 + 1; applied a byte at a time.
+    _CRC_MATRIX = LFSRMatrix(width=16, polynomial=0x8005, data_width=8)
+
     def __init__(self, initial_value=0xFFFF):
 
         self._initial_value = initial_value
@@ -583,28 +587,7 @@ class USBDataPacketCRC(Elaboratable):
 
     def _generate_next_crc(self, current_crc, data_in):
         """ Generates the next round of a bytewise USB CRC16. """
-        xor_reduce = lambda bits : functools.reduce(operator.__xor__, bits)
-
-        # Extracted from the USB spec's definition of the CRC16 polynomial.
-        return Cat(
-            xor_reduce(data_in)      ^ xor_reduce(current_crc[ 8:16]),
-            xor_reduce(data_in[0:7]) ^ xor_reduce(current_crc[ 9:16]),
-            xor_reduce(data_in[6:8]) ^ xor_reduce(current_crc[ 8:10]),
-            xor_reduce(data_in[5:7]) ^ xor_reduce(current_crc[ 9:11]),
-            xor_reduce(data_in[4:6]) ^ xor_reduce(current_crc[10:12]),
-            xor_reduce(data_in[3:5]) ^ xor_reduce(current_crc[11:13]),
-            xor_reduce(data_in[2:4]) ^ xor_reduce(current_crc[12:14]),
-            xor_reduce(data_in[1:3]) ^ xor_reduce(current_crc[13:15]),
-
-            xor_reduce(data_in[0:2]) ^ xor_reduce(current_crc[14:16]) ^ current_crc[0],
-            data_in[0] ^ current_crc[1] ^ current_crc[15],
-            current_crc[2],
-            current_crc[3],
-            current_crc[4],
-            current_crc[5],
-            current_crc[6],
-            xor_reduce(data_in) ^ xor_reduce(current_crc[7:16]),
-        )
+        return self._CRC_MATRIX.next_state(current_crc, data_in)
 
 
     def elaborate(self, platform):
@@ -1249,16 +1232,19 @@ class USBHandshakeGenerator(Elaboratable):
         Pulsed to generate a NAK handshake packet.
     issue_stall: Signal(), input
         Pulsed to generate a STALL handshake.
+    issue_nyet: Signal(), input
+        Pulsed to generate a NYET handshake.
 
     tx: UTMITransmitInterface
         Interface to the relevant UTMI interface.
     """
 
-    # Full contents of an ACK, NAK, and STALL packet.
+    # Full contents of an ACK, NAK, STALL, and NYET packet.
     # These include the four check bits; which consist of the inverted PID.
     _PACKET_ACK   = 0b11010010
     _PACKET_NAK   = 0b01011010
     _PACKET_STALL = 0b00011110
+    _PACKET_NYET  = 0b10010110
 
     def __init__(self):
 
@@ -1268,6 +1254,7 @@ class USBHandshakeGenerator(Elaboratable):
         self.issue_ack    = Signal()
         self.issue_nak    = Signal()
         self.issue_stall  = Signal()
+        self.issue_nyet   = Signal()
 
         self.tx           = UTMITransmitInterface()
 
@@ -1281,7 +1268,7 @@ class USBHandshakeGenerator(Elaboratable):
             with m.State('IDLE'):
                 m.d.comb += self.tx.valid.eq(0)
 
-                # Wait until we have an ACK, NAK, or STALL request;
+                # Wait until we have an ACK, NAK, STALL, or NYET request;
                 # Then set our data value to the appropriate PID,
                 # in preparation for the next cycle.
 
@@ -1297,6 +1284,10 @@ class USBHandshakeGenerator(Elaboratable):
                     m.d.usb += self.tx.data  .eq(self._PACKET_STALL),
                     m.next = 'TRANSMIT'
 
+                with m.If(self.issue_nyet):
+                    m.d.usb += self.tx.data  .eq(self._PACKET_NYET),
+                    m.next = 'TRANSMIT'
+
 
             # TRANSMIT -- send the handshake.
             with m.State('TRANSMIT'):
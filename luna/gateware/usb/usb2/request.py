@@ -10,7 +10,6 @@ import functools
 import operator
 
 from amaranth            import Signal, Module, Elaboratable, Cat
-from amaranth.lib.coding import Encoder
 from amaranth.lib.data   import Struct
 from amaranth.hdl.rec    import Record, DIR_FANOUT
 
@@ -20,6 +19,7 @@ from .packet             import DataCRCInterface, USBInterpacketTimer, TokenDete
 from .packet             import InterpacketTimerInterface, HandshakeExchangeInterface
 from ..stream            import USBInStreamInterface, USBOutStreamInterface
 from ..request           import SetupPacket
+from ...utils.bus        import one_hot_select
 
 
 class ClearEndpointHaltInterface(Struct):
@@ -312,12 +312,12 @@ class USBRequestHandlerMultiplexer(Elaboratable):
         self._fallback = interface
 
     def _multiplex_signals(self, m, *, when, multiplex, sub_bus=None):
-        """ Helper that creates a simple priority-encoder multiplexer.
+        """ Helper that creates a one-hot AND-OR multiplexer.
 
         Parmeters:
             when      -- The name of the interface signal that indicates that the `multiplex` signals
                          should be selected for output. If this signals should be multiplex, it
-                         should be included in `multiplex`.
+                         should be included in `multiplex`. Only one interface should assert it at a time.
             multiplex -- The names of the interface signals to be multiplexed.
         """
 
@@ -331,26 +331,17 @@ class USBRequestHandlerMultiplexer(Elaboratable):
                 return  getattr(interface, name)
 
 
-        # We're building an if-elif tree; so we should start with an If entry.
-        conditional = m.If
+        selects = [get_signal(interface, when) for interface in self._interfaces]
 
-        for interface in self._interfaces:
-            condition = get_signal(interface, when)
+        # Connect up each of our signals.
+        for signal_name in multiplex:
 
-            with conditional(condition):
+            # Get the actual signals for our inputs and output...
+            driving_signals = [get_signal(interface, signal_name) for interface in self._interfaces]
+            target_signal   = get_signal(self.shared, signal_name)
 
-                # Connect up each of our signals.
-                for signal_name in multiplex:
-
-                    # Get the actual signals for our input and output...
-                    driving_signal = get_signal(interface,   signal_name)
-                    target_signal  = get_signal(self.shared, signal_name)
-
-                    # ... and connect them.
-                    m.d.comb += target_signal   .eq(driving_signal)
-
-            # After the first element, all other entries should be created with Elif.
-            conditional = m.Elif
+            # ... and connect them.
+            m.d.comb += target_signal.eq(one_hot_select(selects, driving_signals))
 
 
 
@@ -385,36 +376,33 @@ class USBRequestHandlerMultiplexer(Elaboratable):
         # Multiplex the signals being routed -from- our pre-mux interface.
         #
 
-        def _connect_interface_outputs(interface):
-            m.d.comb += [
-                shared.tx                 .stream_eq(interface.tx),
-
-                shared.tx_data_pid        .eq(interface.tx_data_pid),
-
-                shared.handshakes_out     .eq(interface.handshakes_out),
-
-                shared.address_changed    .eq(interface.address_changed),
-                shared.new_address        .eq(interface.new_address),
-                shared.config_changed     .eq(interface.config_changed),
-                shared.new_config         .eq(interface.new_config),
-                shared.clear_endpoint_halt.eq(interface.clear_endpoint_halt),
-            ]
+        # Each interface drives our outputs while it claims them; and our fallback interface drives them
+        # while no interface does. We'll select between these using a one-hot AND-OR multiplexer.
+        unclaimed  = ~Cat(interface.claim for interface in self._interfaces).any()
+        interfaces = [*self._interfaces, self._fallback]
+        selects    = [*(interface.claim for interface in self._interfaces), unclaimed]
+
+        def _multiplex_outputs(signal_for_interface):
+            m.d.comb += signal_for_interface(shared).eq(
+                one_hot_select(selects, (signal_for_interface(interface) for interface in interfaces))
+            )
+
+        _multiplex_outputs(lambda interface : interface.tx.valid)
+        _multiplex_outputs(lambda interface : interface.tx.first)
+        _multiplex_outputs(lambda interface : interface.tx.last)
+        _multiplex_outputs(lambda interface : interface.tx.payload)
+        _multiplex_outputs(lambda interface : interface.tx_data_pid)
+        _multiplex_outputs(lambda interface : interface.handshakes_out)
+        _multiplex_outputs(lambda interface : interface.address_changed)
+        _multiplex_outputs(lambda interface : interface.new_address)
+        _multiplex_outputs(lambda interface : interface.config_changed)
+        _multiplex_outputs(lambda interface : interface.new_config)
+        _multiplex_outputs(lambda interface : interface.clear_endpoint_halt)
+
+        # Only the selected interface sees our transmitter become ready.
+        for interface, select in zip(interfaces, selects):
+            m.d.comb += interface.tx.ready.eq(shared.tx.ready & select)
 
-        # The encoder provides the index of the single interface that claims the 
-        # output lines. Otherwise, it asserts the .n (invalid) line.
-        m.submodules.encoder = encoder = Encoder(len(self._interfaces))
-        m.d.comb += encoder.i.eq(Cat(interface.claim for interface in self._interfaces))
-
-        # Connect the interface outputs to the interface that claims them.
-        with m.Switch(encoder.o):
-            for index, interface in enumerate(self._interfaces):
-                with m.Case(index):
-                    _connect_interface_outputs(interface)
-
-        # Use the fallback handler interface for the invalid case.
-        with m.If(encoder.n):
-            _connect_interface_outputs(self._fallback)
-        
         return m
 
 
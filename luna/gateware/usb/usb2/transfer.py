@@ -9,7 +9,7 @@ This module contains gateware designed to assist with endpoint/transfer state ma
 Its components facilitate data transfer longer than a single packet.
 """
 
-from amaranth            import Signal, Elaboratable, Module, Array
+from amaranth            import Signal, Elaboratable, Module, Array, Mux
 from amaranth.lib.memory import Memory
 
 from .packet             import HandshakeExchangeInterface, TokenDetectorInterface
@@ -74,11 +74,19 @@ class USBInTransferManager(Elaboratable):
     ----------
     max_packet_size: int
         The maximum packet size for our associated endpoint, in bytes.
+    packet_buffers: int
+        The number of max-packet-size buffers to use. One buffer is always being filled from our
+        transfer stream; the remainder hold packets queued for transmission, which lets us ride out
+        brief stalls in our transfer stream without NAK'ing the host. Must be at least two.
     """
 
-    def __init__(self, max_packet_size):
+    def __init__(self, max_packet_size, *, packet_buffers=2):
+
+        if packet_buffers < 2:
+            raise ValueError(f"packet_buffers must be at least 2, not {packet_buffers}")
 
         self._max_packet_size = max_packet_size
+        self._packet_buffers  = packet_buffers
 
         #
         # I/O port
@@ -94,7 +102,6 @@ class USBInTransferManager(Elaboratable):
         # Note: we'll start with DATA1 in our register; as we'll toggle our data PID
         # before we send.
         self.data_pid         = Signal(2, init=1)
-        self.buffer_toggle    = Signal()
 
         self.tokenizer        = TokenDetectorInterface()
         self.handshakes_in    = HandshakeExchangeInterface(is_detector=True)
@@ -130,26 +137,27 @@ class USBInTransferManager(Elaboratable):
         # Accordingly, we'll buffer a full USB packet of data, and then transmit
         # it once either a) our buffer is full, or 2) the transfer ends (last=1).
         #
-        # This implementation is double buffered; so a buffer fill can be pipelined
-        # with a transmit.
+        # This implementation stores ``packet_buffers`` packets in a ring; so we can keep filling
+        # packets while we transmit (and, if needed, re-transmit) the oldest one. With the default
+        # of two buffers, this is a simple double buffer.
         #
+        buffer_count = self._packet_buffers
 
-        # We'll create two buffers; so we can fill one as we empty the other.
-        m.submodules.transmit_buffer_0 = transmit_buffer_0 = Memory(shape=8, depth=self._max_packet_size, init=[])
-        m.submodules.transmit_buffer_1 = transmit_buffer_1 = Memory(shape=8, depth=self._max_packet_size, init=[])
-        buffer = Array([transmit_buffer_0, transmit_buffer_1])
-        buffer_write_ports = Array(buffer[i].write_port(domain="usb") for i in range(2))
-        buffer_read_ports  = Array(buffer[i].read_port(domain="usb") for i in range(2))
+        # We'll store all of our packet buffers in a single memory; with each buffer occupying
+        # a max-packet-sized region.
+        m.submodules.transmit_buffer = transmit_buffer = \
+            Memory(shape=8, depth=self._max_packet_size * buffer_count, init=[])
+        buffer_write = transmit_buffer.write_port(domain="usb")
+        buffer_read  = transmit_buffer.read_port(domain="usb")
 
-        # Create values equivalent to the buffer numbers for our read and write buffer; which switch
-        # whenever we swap our two buffers.
-        write_buffer_number =  self.buffer_toggle
-        read_buffer_number  = ~self.buffer_toggle
+        # Keep track of the buffer we're currently filling; and of the buffer we're sending from,
+        # which always holds the oldest packet that's yet to be acknowledged.
+        write_buffer_number = Signal(range(buffer_count))
+        read_buffer_number  = Signal(range(buffer_count))
 
-        # Create a shorthand that refers to the buffer to be filled; and the buffer to send from.
-        # We'll call these the Read and Write buffers.
-        buffer_write = buffer_write_ports[write_buffer_number]
-        buffer_read  = buffer_read_ports[read_buffer_number]
+        # Keep track of how many packets are ready to send; including any packet we're currently sending.
+        # One buffer is always reserved for filling; so this can be at most ``packet_buffers - 1``.
+        packets_queued      = Signal(range(buffer_count))
 
         # Buffer state tracking:
         # - Our ``fill_count`` keeps track of how much data is stored in a given buffer.
@@ -157,8 +165,8 @@ class USBInTransferManager(Elaboratable):
         #   the given buffer. This indicates that the buffer cannot be filled further; and, when
         #   ``generate_zlps`` is enabled, is used to determine if the given buffer should end in
         #   a short packet; which determines whether ZLPs are emitted.
-        buffer_fill_count   = Array(Signal(range(0, self._max_packet_size + 1)) for _ in range(2))
-        buffer_stream_ended = Array(Signal(name=f"stream_ended_in_buffer{i}") for i in range(2))
+        buffer_fill_count   = Array(Signal(range(0, self._max_packet_size + 1)) for _ in range(buffer_count))
+        buffer_stream_ended = Array(Signal(name=f"stream_ended_in_buffer{i}") for i in range(buffer_count))
 
         # Create shortcuts to active fill_count / stream_ended signals for the buffer being written.
         write_fill_count   = buffer_fill_count[write_buffer_number]
@@ -171,6 +179,10 @@ class USBInTransferManager(Elaboratable):
         # Keep track of our current send position; which determines where we are in the packet.
         send_position = Signal(range(0, self._max_packet_size + 1))
 
+        # Create shortcuts to the start of the Write and Read buffers in our memory.
+        write_buffer_base = write_buffer_number * self._max_packet_size
+        read_buffer_base  = read_buffer_number  * self._max_packet_size
+
         # Shortcut names.
         in_stream  = self.transfer_stream
         out_stream = self.packet_stream
@@ -181,32 +193,21 @@ class USBInTransferManager(Elaboratable):
         # we can just unconditionally connect these.
         m.d.comb += [
 
-            # We'll only ever -write- data from our input stream...
-            buffer_write_ports[0].data   .eq(in_stream.payload),
-            buffer_write_ports[0].addr   .eq(write_fill_count),
-            buffer_write_ports[1].data   .eq(in_stream.payload),
-            buffer_write_ports[1].addr   .eq(write_fill_count),
+            # We'll only ever -write- data from our input stream into the Write buffer...
+            buffer_write.data   .eq(in_stream.payload),
+            buffer_write.addr   .eq(write_buffer_base + write_fill_count),
 
             # ... and we'll only ever -send- data from the Read buffer.
-            buffer_read.addr             .eq(send_position),
-            out_stream.payload           .eq(buffer_read.data),
+            buffer_read.addr    .eq(read_buffer_base + send_position),
+            out_stream.payload  .eq(buffer_read.data),
 
             # We're ready to receive data iff we have space in the buffer we're currently filling.
-            in_stream.ready              .eq((write_fill_count != self._max_packet_size) & ~write_stream_ended),
-            buffer_write.en              .eq(in_stream.valid & in_stream.ready)
+            in_stream.ready     .eq((write_fill_count != self._max_packet_size) & ~write_stream_ended),
+            buffer_write.en     .eq(in_stream.valid & in_stream.ready)
         ]
 
-        # Set both fill counts to zero when we discard data.
-        with m.If(self.discard):
-            m.d.usb += [
-                write_fill_count    .eq(0),
-                write_stream_ended  .eq(0),
-                read_fill_count     .eq(0),
-                read_stream_ended   .eq(0),
-            ]
-
         # Increment our fill count whenever we accept new data.
-        with m.Elif(buffer_write.en):
+        with m.If(buffer_write.en):
             m.d.usb += write_fill_count.eq(write_fill_count + 1)
 
         # If the stream ends while we're adding data to the buffer, mark this as an ended stream.
@@ -227,6 +228,44 @@ class USBInTransferManager(Elaboratable):
         # We're ready to send a packet when either of the above conditions is met, and not discarding.
         packet_ready = (packet_completing | packet_to_flush) & ~self.discard
 
+        # Our FSM indicates when it's done with the packet at the head of our queue; which frees its buffer.
+        release_packet = Signal()
+
+        # We'll queue up the packet in our Write buffer once it's ready to send, or can't accept any more data;
+        # provided we'll still have a buffer left to fill afterwards.
+        buffer_available = (packets_queued < buffer_count - 1) | release_packet
+        queue_packet     = (packet_ready | ~in_stream.ready) & ~self.discard & buffer_available
+
+        with m.If(queue_packet):
+            m.d.usb += write_buffer_number.eq(self._next_buffer_number(write_buffer_number))
+
+        with m.If(release_packet):
+            m.d.usb += [
+                read_buffer_number  .eq(self._next_buffer_number(read_buffer_number)),
+
+                # Clear the buffer we've just released, so it's ready to be filled again.
+                read_fill_count     .eq(0),
+                read_stream_ended   .eq(0),
+            ]
+
+        with m.If(queue_packet & ~release_packet):
+            m.d.usb += packets_queued.eq(packets_queued + 1)
+        with m.Elif(release_packet & ~queue_packet):
+            m.d.usb += packets_queued.eq(packets_queued - 1)
+
+        # Empty all of our buffers when we discard data.
+        with m.If(self.discard):
+            m.d.usb += [
+                write_buffer_number  .eq(0),
+                read_buffer_number   .eq(0),
+                packets_queued       .eq(0),
+            ]
+            for i in range(buffer_count):
+                m.d.usb += [
+                    buffer_fill_count[i]    .eq(0),
+                    buffer_stream_ended[i]  .eq(0),
+                ]
+
         # Shortcut for when we need to deal with an in token.
         # Pulses high an interpacket delay after receiving an IN token.
         in_token_received = self.active & self.tokenizer.is_in & self.tokenizer.ready_for_response
@@ -242,18 +281,11 @@ class USBInTransferManager(Elaboratable):
                 m.d.comb += self.handshakes_out.nak.eq(in_token_received)
 
                 # If we've just finished a packet, we now have data we can send!
-                with m.If(packet_ready):
+                # We're now ready to take the data we've captured and _transmit_ it; so we'll
+                # toggle our data PID for our new packet.
+                with m.If(queue_packet):
                     m.next = "WAIT_TO_SEND"
-                    m.d.usb += [
-
-                        # We're now ready to take the data we've captured and _transmit_ it.
-                        # We'll swap our read and write buffers, and toggle our data PID.
-                        self.buffer_toggle  .eq(~self.buffer_toggle),
-                        self.data_pid[0]    .eq(~self.data_pid[0]),
-
-                        # Mark our current stream as no longer having ended.
-                        read_stream_ended  .eq(0)
-                    ]
+                    m.d.usb += self.data_pid[0].eq(~self.data_pid[0])
 
 
             # WAIT_TO_SEND -- we now have at least a buffer full of data to send; we'll
@@ -315,7 +347,7 @@ class USBInTransferManager(Elaboratable):
                     ]
 
                     # Move our memory pointer to its next position.
-                    m.d.comb += buffer_read.addr  .eq(send_position + 1),
+                    m.d.comb += buffer_read.addr  .eq(read_buffer_base + send_position + 1),
 
                     # If we've just sent our last packet, we're now ready to wait for a
                     # response from our host.
@@ -333,8 +365,6 @@ class USBInTransferManager(Elaboratable):
 
                 # If the host does ACK...
                 with m.Elif(self.handshakes_in.ack):
-                    # ... clear the data we've sent from our buffer.
-                    m.d.usb += read_fill_count.eq(0)
 
                     # Figure out if we'll need to follow up with a ZLP. If we have ZLP generation enabled,
                     # we'll make sure we end on a short packet. If this is max-packet-size packet _and_ our
@@ -343,27 +373,31 @@ class USBInTransferManager(Elaboratable):
                         self.generate_zlps & (read_fill_count == self._max_packet_size) & read_stream_ended
 
                     # If we're following up with a ZLP, move back to our "wait to send" state.
-                    # Since we've now cleared our fill count; this next go-around will emit a ZLP.
+                    # We'll keep our current buffer, but clear the data we've sent from it; so this
+                    # next go-around will emit a ZLP.
                     with m.If(follow_up_with_zlp):
-                        m.d.usb += self.data_pid[0].eq(~self.data_pid[0]),
-                        m.next = "WAIT_TO_SEND"
-
-                    # Otherwise, there's a possibility we already have a packet-worth of data waiting
-                    # for us in our "write buffer", which we've been filling in the background.
-                    # If this is the case, we'll flip which buffer we're working with, toggle our data pid,
-                    # and then ready ourselves for transmit.
-                    with m.Elif(~in_stream.ready | packet_ready):
-                        m.next = "WAIT_TO_SEND"
                         m.d.usb += [
-                            self.buffer_toggle .eq(~self.buffer_toggle),
-                            self.data_pid[0]   .eq(~self.data_pid[0]),
-                            read_stream_ended  .eq(0)
+                            read_fill_count   .eq(0),
+                            self.data_pid[0]  .eq(~self.data_pid[0]),
                         ]
+                        m.next = "WAIT_TO_SEND"
 
-                    # If neither of the above conditions are true; we now don't have enough data to send.
-                    # We'll wait for enough data to transmit.
+                    # Otherwise, we're done with our current buffer; and can release it to be filled again.
+                    # (If we've discarded our data mid-packet, we have no buffer left to release.)
                     with m.Else():
-                        m.next = "WAIT_FOR_DATA"
+                        m.d.comb += release_packet.eq(packets_queued != 0)
+
+                        # There's a possibility we already have packets' worth of data waiting for us,
+                        # which we've been buffering in the background. If this is the case, we'll move
+                        # on to the next packet, toggle our data pid, and then ready ourselves for transmit.
+                        with m.If((packets_queued > 1) | queue_packet):
+                            m.next = "WAIT_TO_SEND"
+                            m.d.usb += self.data_pid[0].eq(~self.data_pid[0])
+
+                        # If this isn't the case; we now don't have enough data to send.
+                        # We'll wait for enough data to transmit.
+                        with m.Else():
+                            m.next = "WAIT_FOR_DATA"
 
 
                 # If the host starts a new packet without ACK'ing, we'll need to retransmit, unless discarding.
@@ -372,3 +406,8 @@ class USBInTransferManager(Elaboratable):
                     m.next = 'WAIT_TO_SEND'
 
         return m
+
+
+    def _next_buffer_number(self, buffer_number):
+        """ Returns an expression for the buffer number that follows ``buffer_number`` in our ring. """
+        return Mux(buffer_number == self._packet_buffers - 1, 0, buffer_number + 1)
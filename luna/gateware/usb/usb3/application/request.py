@@ -5,6 +5,8 @@
 # SPDX-License-Identifier: BSD-3-Clause
 """ Control-request interfacing and gateware for USB3. """
 
+import functools
+
 from amaranth               import *
 
 from ...request             import SetupPacket
@@ -13,6 +15,7 @@ from ..protocol.transaction import HandshakeGeneratorInterface, HandshakeReceive
 from ..protocol.data        import DataHeaderPacket
 
 from ....utils              import falling_edge_detected
+from ....utils.bus          import one_hot_connect
 
 class SuperSpeedRequestHandlerInterface:
     """ Interface representing a connection between a control endpoint and a request handler.
@@ -239,12 +242,12 @@ class SuperSpeedRequestHandlerMultiplexer(Elaboratable):
 
 
     def _multiplex_signals(self, m, *, when, multiplex, sub_bus=None):
-        """ Helper that creates a simple priority-encoder multiplexer.
+        """ Helper that creates a one-hot AND-OR multiplexer.
 
         Parmeters:
             when      -- The name of the interface signal that indicates that the `multiplex` signals
                          should be selected for output. If this signals should be multiplex, it
-                         should be included in `multiplex`.
+                         should be included in `multiplex`. Only one interface should assert it at a time.
             multiplex -- The names of the interface signals to be multiplexed.
         """
 
@@ -258,26 +261,9 @@ class SuperSpeedRequestHandlerMultiplexer(Elaboratable):
                 return  getattr(interface, name)
 
 
-        # We're building an if-elif tree; so we should start with an If entry.
-        conditional = m.If
-
-        for interface in self._interfaces:
-            condition = get_signal(interface, when)
-
-            with conditional(condition):
-
-                # Connect up each of our signals.
-                for signal_name in multiplex:
-
-                    # Get the actual signals for our input and output...
-                    driving_signal = get_signal(interface,   signal_name)
-                    target_signal  = get_signal(self.shared, signal_name)
-
-                    # ... and connect them.
-                    m.d.comb += target_signal   .eq(driving_signal)
-
-            # After the first element, all other entries should be created with Elif.
-            conditional = m.Elif
+        selects = [get_signal(interface, when) for interface in self._interfaces]
+        m.d.comb += one_hot_connect(selects, self._interfaces, self.shared,
+            forward=[functools.partial(get_signal, name=name) for name in multiplex])
 
 
 
@@ -320,34 +306,40 @@ class SuperSpeedRequestHandlerMultiplexer(Elaboratable):
         )
 
         #
-        # Multiplex each of our transmit interfaces.
+        # Multiplex each of our transmit interfaces. Only one handler should transmit at a time;
+        # so we'll connect up whichever handler is currently transmitting.
         #
-        for interface in self._interfaces:
-
-            # If the transmit interface is valid, connect it up to our endpoint.
-            # The latest assignment will win; so we can treat these all as a parallel 'if's
-            # and still get an appropriate priority encoder.
-            with m.If(interface.tx.valid.any()):
-                m.d.comb += [
-                    shared.tx                  .stream_eq(interface.tx),
-                    shared.tx_sequence_number  .eq(interface.tx_sequence_number),
-                    shared.tx_length           .eq(interface.tx_length)
-                ]
+        m.d.comb += one_hot_connect(
+            (interface.tx.valid.any() for interface in self._interfaces),
+            self._interfaces, shared,
+            forward=[
+                lambda interface : interface.tx.valid,
+                lambda interface : interface.tx.first,
+                lambda interface : interface.tx.last,
+                lambda interface : interface.tx.payload,
+                'tx_sequence_number', 'tx_length'
+            ],
+            backward=[lambda interface : interface.tx.ready]
+        )
 
 
         #
-        # Multiplex each of our handshake-out interfaces.
+        # Multiplex each of our handshake-out interfaces; connecting up whichever interface
+        # is currently trying to send a handshake.
         #
-        for interface in self._interfaces:
-            any_generate_signal_asserted = (
+        m.d.comb += one_hot_connect(
+            (
                 interface.handshakes_out.send_ack   |
                 interface.handshakes_out.send_stall
-            )
-
-            # If the given interface is trying to send an handshake, connect it up
-            # to our shared interface.
-            with m.If(any_generate_signal_asserted):
-                m.d.comb += shared.handshakes_out.connect(interface.handshakes_out)
+                    for interface in self._interfaces
+            ),
+            (interface.handshakes_out for interface in self._interfaces), shared.handshakes_out,
+            forward=[
+                'endpoint_number', 'retry_required', 'next_sequence', 'number_of_packets', 'direction',
+                'send_ack', 'send_stall', 'send_nrdy', 'send_erdy'
+            ],
+            backward=['ready', 'done']
+        )
 
 
         return m
@@ -186,8 +186,12 @@ class USB3ControlEndpoint(Elaboratable):
             ]
 
 
-        # Always set the endpoint number in our handshakes.
-        m.d.comb += handshakes_out.endpoint_number  .eq(self._endpoint_number),
+        # Always set the endpoint number in our handshakes; and, since control transfers don't burst,
+        # always advertise a single packet.
+        m.d.comb += [
+            handshakes_out.endpoint_number    .eq(self._endpoint_number),
+            handshakes_out.number_of_packets  .eq(1),
+        ]
 
         #
         # DATA stage handling.
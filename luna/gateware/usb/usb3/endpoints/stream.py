@@ -27,8 +27,9 @@ class SuperSpeedStreamInEndpoint(Elaboratable):
     a short data packet. If the stream's ``last`` signal is tied to zero, then a continuous stream of
     maximum-length-packets will be sent with no inserted ZLPs.
 
-    This implementation is double buffered; and can store a single packet's worth of data while transmitting
-    a second packet. Bursting is currently not supported.
+    This implementation supports SuperSpeed bursts. It buffers up to ``max_burst + 1`` packets, and can
+    have up to ``max_burst`` of those packets in flight at once. Each packet is held in its buffer until
+    the host acknowledges its sequence number; so any packet the host asks us to retry can be re-sent.
 
 
     Attributes
@@ -46,14 +47,22 @@ class SuperSpeedStreamInEndpoint(Elaboratable):
     max_packet_size: int
         The maximum packet size for this endpoint. Should match the wMaxPacketSize provided in the
         USB endpoint descriptor.
+    max_burst: int
+        The maximum number of packets this endpoint will send in a single burst; from 1 to 16. Should be one
+        more than the bMaxBurst provided in the endpoint's SuperSpeed companion descriptor.
     """
 
     SEQUENCE_NUMBER_BITS = 5
+    MAX_BURST            = 16
 
 
-    def __init__(self, *, endpoint_number, max_packet_size=1024):
+    def __init__(self, *, endpoint_number, max_packet_size=1024, max_burst=1):
         self._endpoint_number = endpoint_number
         self._max_packet_size = max_packet_size
+        self._max_burst       = max_burst
+
+        if not 1 <= max_burst <= self.MAX_BURST:
+            raise ValueError(f"max_burst must be between 1 and {self.MAX_BURST}, not {max_burst}")
 
         #
         # I/O port
@@ -70,134 +79,143 @@ class SuperSpeedStreamInEndpoint(Elaboratable):
         handshakes_out = interface.handshakes_out
 
         # Parameters for later use.
-        data_width     = len(self.stream.data)
-        bytes_per_word = data_width // 8
-        buffer_depth   = self._max_packet_size // bytes_per_word
-
-        #
-        # Transciever sequencing.
-        #
+        data_width       = len(self.stream.data)
+        bytes_per_word   = data_width // 8
+        words_per_packet = self._max_packet_size // bytes_per_word
+        max_burst        = self._max_burst
 
-        # Keep track of the sequence number used as we're transmitting.
-        sequence_number = Signal(self.SEQUENCE_NUMBER_BITS)
+        # We'll keep one more buffer than we can have packets in flight; so we can always be filling
+        # a buffer while a full burst waits to be acknowledged.
+        buffer_count     = max_burst + 1
 
-        # Create a signal equal to the next sequence number; for easy comparisons.
-        next_sequence_number = Signal.like(sequence_number)
-        m.d.comb += next_sequence_number.eq(sequence_number + 1)
-
-        # Advance the sequence number after transmission, or reset it when the endpoint is reset.
-        advance_sequence = Signal()
-        with m.If(interface.ep_reset):
-            m.d.ss += sequence_number.eq(0)
-        with m.Elif(advance_sequence):
-            m.d.ss += sequence_number.eq(next_sequence_number)
+        # Shortcut names.
+        in_stream  = self.stream
+        out_stream = self.interface.tx
 
 
         #
-        # Transmit buffer.
+        # Transmit buffers.
         #
         # Our USB connection imposed a few requirements on our stream:
         # 1) we must be able to transmit packets at a full rate; i.e. ```valid``
         #    must be asserted from the start to the end of our transfer; and
         # 2) we must be able to re-transmit data if a given packet is not ACK'd.
         #
-        # Accordingly, we'll buffer a full USB packet of data, and then transmit
-        # it once either a) our buffer is full, or 2) the transfer ends (last=1).
+        # Accordingly, we'll buffer full USB packets of data, and then transmit each
+        # one once either a) its buffer is full, or 2) the transfer ends (last=1).
         #
-        # This implementation is double buffered; so a buffer fill can be pipelined
-        # with a transmit.
+        # Our buffers form a ring: we fill packets in at its head, and only release
+        # them from its tail once the host has acknowledged them. Each buffer occupies
+        # a packet-sized region of a single memory.
         #
-        ping_pong_toggle = Signal()
-
-        # We'll create two buffers; so we can fill one as we empty the other.
-        # Since each buffer will be used for every other transaction, we'll use a simple flag to identify
-        # which of our "ping-pong" buffers is currently being targeted.
-        buffer = Array(Memory(shape=data_width, depth=buffer_depth, init=[]) for _ in range(2))
-        buffer_write_ports = Array(buffer[i].write_port(domain="ss") for i in range(2))
-        buffer_read_ports  = Array(buffer[i].read_port(domain="ss") for i in range(2))
-
-        m.submodules.transmit_buffer_0, m.submodules.transmit_buffer_1 = buffer
-
-        # Create values equivalent to the buffer numbers for our read and write buffer; which switch
-        # whenever we swap our two buffers.
-        write_buffer_number =  ping_pong_toggle
-        read_buffer_number  = ~ping_pong_toggle
-
-        # Create a shorthand that refers to the buffer to be filled; and the buffer to send from.
-        # We'll call these the Read and Write buffers.
-        buffer_write = buffer_write_ports[write_buffer_number]
-        buffer_read  = buffer_read_ports[read_buffer_number]
-
-        # Buffer state tracking:
-        # - Our ``fill_count`` keeps track of how much data is stored in a given buffer.
-        # - Our ``stream_ended`` bit keeps track of whether the stream ended while filling up
-        #   the given buffer. This indicates that the buffer cannot be filled further; and, when
-        #   ``generate_zlps`` is enabled, is used to determine if the given buffer should end in
-        #   a short packet; which determines whether ZLPs are emitted.
-        buffer_fill_count   = Array(Signal(range(0, self._max_packet_size + 1)) for _ in range(2))
-        buffer_stream_ended = Array(Signal(name=f"stream_ended_in_buffer{i}") for i in range(2))
-
-        # Create shortcuts to active fill_count / stream_ended signals for the buffer being written.
-        write_fill_count   = buffer_fill_count[write_buffer_number]
-        write_stream_ended = buffer_stream_ended[write_buffer_number]
-
-        # Create shortcuts to the fill_count / stream_ended signals for the packet being sent.
-        read_fill_count   = buffer_fill_count[read_buffer_number]
-        read_stream_ended = buffer_stream_ended[read_buffer_number]
+        m.submodules.transmit_buffer = buffer = \
+            Memory(shape=data_width, depth=buffer_count * words_per_packet, init=[])
+        buffer_write = buffer.write_port(domain="ss")
+        buffer_read  = buffer.read_port(domain="ss")
+
+        def buffer_address(buffer_number, word):
+            """ Returns the memory address of a word within one of our packet buffers. """
+            return buffer_number * words_per_packet + word
+
+        def wrap(buffer_number):
+            """ Wraps a buffer number that's run past the end of our ring. """
+            return Mux(buffer_number >= buffer_count, buffer_number - buffer_count, buffer_number)
+
+        # Ring state tracking:
+        # - Our ``ack_buffer`` is the oldest buffer whose packet the host has yet to acknowledge.
+        # - Our ``buffered`` count keeps track of how many complete packets we're holding, starting
+        #   from the ``ack_buffer``; and our ``fill_buffer`` is the buffer following those, which
+        #   is being filled from our stream.
+        # - Each buffer's ``buffer_length`` records the length of the packet it holds; where a length
+        #   of zero indicates a ZLP.
+        ack_buffer    = Signal(range(buffer_count))
+        fill_buffer   = Signal(range(buffer_count))
+        buffered      = Signal(range(buffer_count + 1))
+        buffer_length = Array(
+            Signal(range(self._max_packet_size + 1), name=f"buffer{i}_length") for i in range(buffer_count)
+        )
+
+        # Each cycle, our ring can gain a packet at its head, and have packets released from its tail.
+        buffer_completed = Signal()
+        buffers_released = Signal(range(buffer_count + 1))
+        m.d.ss += buffered.eq(buffered + buffer_completed - buffers_released)
 
-        # Keep track of our current send position; which determines where we are in the packet.
-        send_position  = Signal(range(0, self._max_packet_size + 1))
 
-        # Shortcut names.
-        in_stream  = self.stream
-        out_stream = self.interface.tx
+        #
+        # Buffer filling.
+        #
+
+        # Keep track of how much data we've stored in our fill buffer; and whether we owe the host
+        # a ZLP, because our stream ended exactly on a packet boundary.
+        fill_count  = Signal(range(self._max_packet_size + 1))
+        zlp_pending = Signal()
+        ring_full   = (buffered == buffer_count)
 
-        # We're ready to receive data iff we have space in the buffer we're currently filling.
+        # We're ready to receive data iff we have a buffer to fill, and don't need to insert a ZLP.
         m.d.comb += [
-            in_stream.ready.eq((write_fill_count + 4 <= self._max_packet_size) & ~write_stream_ended),
-            buffer_write.en.eq(in_stream.valid.any() & in_stream.ready),
+            in_stream.ready    .eq(~ring_full & ~zlp_pending),
+            buffer_write.en    .eq(in_stream.valid.any() & in_stream.ready),
+            buffer_write.data  .eq(in_stream.payload),
+            buffer_write.addr  .eq(buffer_address(fill_buffer, fill_count >> 2)),
         ]
 
-        # Increment our fill count whenever we accept new data;
-        # based on the number of valid bits we have.
+        # Figure out how many bytes we're accepting, based on the number of valid bits we have.
+        bytes_accepted = Signal(range(bytes_per_word + 1))
+        with m.Switch(in_stream.valid):
+            with m.Case(0b0001):
+                m.d.comb += bytes_accepted.eq(1)
+            with m.Case(0b0011):
+                m.d.comb += bytes_accepted.eq(2)
+            with m.Case(0b0111):
+                m.d.comb += bytes_accepted.eq(3)
+            with m.Case(0b1111):
+                m.d.comb += bytes_accepted.eq(4)
+
+        new_fill_count  = fill_count + bytes_accepted
+        packet_complete = (new_fill_count >= self._max_packet_size) | in_stream.last
+
         with m.If(buffer_write.en):
-            with m.Switch(in_stream.valid):
-                with m.Case(0b0001):
-                    m.d.ss += write_fill_count.eq(write_fill_count + 1)
-                with m.Case(0b0011):
-                    m.d.ss += write_fill_count.eq(write_fill_count + 2)
-                with m.Case(0b0111):
-                    m.d.ss += write_fill_count.eq(write_fill_count + 3)
-                with m.Case(0b1111):
-                    m.d.ss += write_fill_count.eq(write_fill_count + 4)
-
-        # If the stream ends while we're adding data to the buffer, mark this as an ended stream.
-        with m.If(in_stream.last & buffer_write.en):
-            m.d.ss += write_stream_ended.eq(1)
-
-
-        # Use our memory's two ports to capture data from our transfer stream; and two to emit packets
-        # into our packet stream. Since we'll never receive to anywhere else, or transmit to anywhere else,
-        # we can just unconditionally connect these.
-        m.d.comb += [
-            # We'll only ever -write- data from our input stream...
-            buffer_write_ports[0].data   .eq(in_stream.payload),
-            buffer_write_ports[0].addr   .eq(write_fill_count >> 2),
-            buffer_write_ports[1].data   .eq(in_stream.payload),
-            buffer_write_ports[1].addr   .eq(write_fill_count >> 2),
-
-            # ... and we'll only ever -send- data from the Read buffer; in the SEND_PACKET state.
-            buffer_read.addr             .eq(send_position),
-        ]
+            m.d.ss += fill_count.eq(new_fill_count)
+
+            # If we've just finished a packet, hand its buffer over to our transmitter, and move on to the next.
+            with m.If(packet_complete):
+                m.d.comb += buffer_completed.eq(1)
+                m.d.ss += [
+                    buffer_length[fill_buffer]  .eq(new_fill_count),
+                    fill_buffer                 .eq(wrap(fill_buffer + 1)),
+                    fill_count                  .eq(0),
+                ]
+
+                # If our stream ended with a max-length packet, we'll need to follow up with a ZLP.
+                with m.If(in_stream.last & (new_fill_count == self._max_packet_size)):
+                    m.d.ss += zlp_pending.eq(1)
+
+        # We'll queue up any ZLPs as a packet of their own; so they're sent and retried like any other.
+        with m.Elif(zlp_pending & ~ring_full):
+            m.d.comb += buffer_completed.eq(1)
+            m.d.ss += [
+                buffer_length[fill_buffer]  .eq(0),
+                fill_buffer                 .eq(wrap(fill_buffer + 1)),
+                zlp_pending                 .eq(0),
+            ]
 
 
         #
-        # Transmit controller.
+        # Transmit sequencing.
         #
 
-        # Stores whether the last packet transmitted was a ZLP. This bit of state determines how
-        # retranmission behaves.
-        last_packet_was_zlp = Signal()
+        # Sequence tracking:
+        # - Our ``ack_sequence`` is the sequence number of the packet in our ``ack_buffer``.
+        # - Our ``in_flight`` count tracks how many of our buffered packets have been sent,
+        #   but not yet acknowledged.
+        # - Our ``credit`` is the number of packets the host has asked for, counting from
+        #   our ``ack_buffer``.
+        # - Our ``burst_ended`` flag is set once we've sent a short packet; which ends a burst,
+        #   and thus stops us from sending until everything in flight has been acknowledged.
+        ack_sequence = Signal(self.SEQUENCE_NUMBER_BITS)
+        in_flight    = Signal(range(buffer_count + 1))
+        credit       = Signal.like(handshakes_in.number_of_packets)
+        burst_ended  = Signal()
 
         # Stores whether we'll need to send an ERDY packet before we send any additional data.
         # If we send an NRDY packet indicating that we have no data for the host, the host will
@@ -205,116 +223,183 @@ class SuperSpeedStreamInEndpoint(Elaboratable):
         # to send an ERDY packet to have it resume polling.
         erdy_required = Signal()
 
-        # Shortcut for when we need to deal with an in token.
+        # Strobes from our transmit controller.
+        packet_started = Signal()
+        packet_short   = Signal()
+
+        # Shortcut for when we need to deal with an ACK.
         # Note that, for USB3, an IN token is an ACK that contains a non-zero ``number_of_packets``.
-        is_to_us          = (handshakes_in.endpoint_number == self._endpoint_number)
+        is_to_us          = \
+            (handshakes_in.endpoint_number == self._endpoint_number) & \
+            (handshakes_in.direction == USBDirection.IN)
         is_in_token       = (handshakes_in.number_of_packets != 0)
         ack_received      = handshakes_in.ack_received & is_to_us
-        in_token_received = ack_received & is_in_token
 
-        with m.FSM(domain='ss'):
-
-            # WAIT_FOR_DATA -- We don't yet have a full packet to transmit, so  we'll capture data
-            # to fill the our buffer. At full throughput, this state will never be reached after
-            # the initial post-reset fill.
-            with m.State("WAIT_FOR_DATA"):
-
-                # We can't yet send data; so we'll send an NRDY transaction packet.
-                with m.If(in_token_received):
-                    m.d.comb += handshakes_out.send_nrdy  .eq(1)
-                    m.d.ss   += erdy_required             .eq(1)
-
-                # If we have valid data that will end our packet, we're no longer waiting for data.
-                # We'll now wait for the host to request data from us.
-                packet_complete = (write_fill_count + 4 >= self._max_packet_size)
-                will_end_packet = packet_complete | in_stream.last
+        # An ACK carries the sequence number the host next expects; which acknowledges every packet before
+        # it [USB3.2r1: 8.12.1.2]. Figure out how many of our packets it acknowledges; and only trust it if
+        # it doesn't acknowledge packets we've yet to send.
+        acknowledged_count = Signal(self.SEQUENCE_NUMBER_BITS)
+        m.d.comb += acknowledged_count.eq(handshakes_in.next_sequence - ack_sequence)
+
+        ack_valid          = ack_received & (acknowledged_count <= in_flight)
+        retry_requested    = ack_valid & handshakes_in.retry_required
+
+        # Figure out how many packets will be in flight once this cycle's events are accounted for.
+        # A retry request asks us to re-send everything from the host's next expected sequence number;
+        # so it returns all of our unacknowledged packets to the ring.
+        next_in_flight = Signal.like(in_flight)
+        with m.If(retry_requested):
+            m.d.comb += next_in_flight.eq(0)
+        with m.Else():
+            m.d.comb += next_in_flight.eq(in_flight - buffers_released + packet_started)
+
+        m.d.ss += in_flight.eq(next_in_flight)
+
+        # Release any acknowledged packets from our ring; and accept the host's new request.
+        with m.If(ack_valid):
+            m.d.comb += buffers_released.eq(acknowledged_count)
+            m.d.ss += [
+                ack_buffer    .eq(wrap(ack_buffer + acknowledged_count)),
+                ack_sequence  .eq(handshakes_in.next_sequence),
+                credit        .eq(handshakes_in.number_of_packets),
+            ]
+
+            # If the host is asking for data, and we have nothing left to send or in flight, we'll
+            # need to tell it we're not ready, with an NRDY.
+            nothing_to_send = (buffered == acknowledged_count) & (next_in_flight == 0)
+            with m.If(is_in_token & nothing_to_send):
+                m.d.comb += handshakes_out.send_nrdy  .eq(1)
+                m.d.ss   += erdy_required             .eq(1)
+
+        # Once everything we've sent has been acknowledged, any burst we've been sending is over...
+        with m.If(next_in_flight == 0):
+            m.d.ss += burst_ended.eq(0)
+
+        # ... and any short packet we start ends the current burst.
+        with m.If(packet_started & packet_short & ~retry_requested):
+            m.d.ss += burst_ended.eq(1)
+
+        # If our endpoint is reset, restart our sequencing; but keep any data we've buffered.
+        with m.If(interface.ep_reset):
+            m.d.ss += [
+                ack_sequence   .eq(0),
+                in_flight      .eq(0),
+                credit         .eq(0),
+                burst_ended    .eq(0),
+                erdy_required  .eq(0),
+            ]
 
-                with m.If(in_stream.valid & will_end_packet):
 
-                    # If we've just finished a packet, we now have data we can send!
-                    with m.If(packet_complete | in_stream.last):
-                        m.d.ss += [
+        #
+        # Transmit controller.
+        #
 
-                            # We're now ready to take the data we've captured and _transmit_ it.
-                            # We'll swap our read and write buffers.
-                            ping_pong_toggle.eq(~ping_pong_toggle),
+        # Figure out which packet we'd send next...
+        send_buffer   = Signal.like(ack_buffer)
+        send_length   = Signal.like(fill_count)
+        send_sequence = Signal.like(ack_sequence)
+        m.d.comb += [
+            send_buffer    .eq(wrap(ack_buffer + in_flight)),
+            send_length    .eq(buffer_length[send_buffer]),
+            send_sequence  .eq(ack_sequence + in_flight),
+        ]
 
-                            # Mark our current stream as no longer having ended.
-                            read_stream_ended  .eq(0)
-                        ]
+        # ... and whether we're allowed to send it. We'll only send a ZLP once everything before it has been
+        # acknowledged; as our data packet transmitter can only accept a ZLP while it's otherwise idle.
+        zlp_blocked = (send_length == 0) & (in_flight != 0)
+        can_send    = \
+            (in_flight < buffered) & (in_flight < credit) & (in_flight < max_burst) & \
+            ~burst_ended & ~erdy_required & ~zlp_blocked
 
-                        # If we've already sent an NRDY token, we'll need to request an IN token
-                        # before the host will be willing to send us one.
-                        with m.If(erdy_required | in_token_received):
-                            m.next = "REQUEST_IN_TOKEN"
+        # If the host has asked for more packets than we have ready, we'll need to mark the last packet we
+        # can send as the end of our burst; so the host doesn't wait for the rest.
+        ends_burst = (in_flight + 1 == buffered) & (in_flight + 1 < credit)
 
-                        # Otherwise, we can wait for an IN token directly.
-                        with m.Else():
-                            m.next = "WAIT_TO_SEND"
+        # Store the details of the packet we're currently transmitting.
+        active_buffer       = Signal.like(send_buffer)
+        active_length       = Signal.like(send_length)
+        active_sequence     = Signal.like(send_sequence)
+        active_end_of_burst = Signal()
 
+        # Keep track of our current send position; which determines where we are in the packet.
+        send_position = Signal(range(words_per_packet + 1))
 
-            # REQUEST_IN_TOKEN -- we now have at least a buffer full of data to send; but
-            # we've sent a NRDY token to the host; and thus the host is no longer polling for data.
-            # We'll send an ERDY token to the host, in order to request it poll us again.
-            with m.State("REQUEST_IN_TOKEN"):
+        # We'll always report our own endpoint number and direction with our handshakes.
+        m.d.comb += [
+            handshakes_out.endpoint_number  .eq(self._endpoint_number),
+            handshakes_out.direction        .eq(USBDirection.IN),
+        ]
 
-                # Send our ERDY token...
-                m.d.comb += handshakes_out.send_erdy.eq(1)
+        with m.FSM(domain='ss'):
 
-                # ... and once that send is complete, move on to waiting for an IN token.
-                with m.If(handshakes_out.done):
-                    m.next = "WAIT_TO_SEND"
+            # IDLE -- we're not currently sending a packet; wait until we're permitted to send one.
+            with m.State("IDLE"):
 
+                # Keep the first word of our next packet queued up; so it's available
+                # as soon as we start sending.
+                m.d.comb += buffer_read.addr.eq(buffer_address(send_buffer, 0))
 
-            # WAIT_TO_SEND -- we now have at least a buffer full of data to send; we'll
-            # need to wait for an IN token to send it.
-            with m.State("WAIT_TO_SEND"):
+                # If we've sent an NRDY token, and now have data to send, we'll need to ask
+                # the host to resume polling us before we can send it.
+                with m.If(erdy_required & (buffered != 0)):
+                    m.next = "REQUEST_IN_TOKEN"
 
-                # Once we get an IN token, move to sending a packet.
-                with m.If(in_token_received):
+                with m.Elif(can_send):
+                    m.d.comb += [
+                        packet_started  .eq(1),
+                        packet_short    .eq(send_length != self._max_packet_size),
+                    ]
 
-                    # If we have a packet to send, send it.
-                    with m.If(read_fill_count):
-                        m.next = "SEND_PACKET"
-                        m.d.ss += [
-                            last_packet_was_zlp  .eq(0)
+                    # If the packet we're sending is a ZLP, send it directly...
+                    with m.If(send_length == 0):
+                        m.d.comb += [
+                            interface.tx_zlp              .eq(1),
+                            interface.tx_direction        .eq(USBDirection.IN),
+                            interface.tx_sequence_number  .eq(send_sequence),
+                            interface.tx_endpoint_number  .eq(self._endpoint_number),
                         ]
 
-                    # Otherwise, we entered a transmit path without any data in the buffer.
+                    # ... otherwise, capture its details, and start sending its data.
                     with m.Else():
-                        # ... send a ZLP...
-                        m.d.comb += interface.tx_zlp.eq(1)
-
-                        # ... and clear the need to follow up with one, since we've just sent a short packet.
                         m.d.ss += [
-                            read_stream_ended    .eq(0),
-                            last_packet_was_zlp  .eq(1)
+                            active_buffer        .eq(send_buffer),
+                            active_length        .eq(send_length),
+                            active_sequence      .eq(send_sequence),
+                            active_end_of_burst  .eq(ends_burst),
                         ]
-
-                        # We've now completed a packet send; so wait for it to be acknowledged.
-                        m.next = "WAIT_FOR_ACK"
+                        m.next = "SEND_PACKET"
 
 
-            # SEND_PACKET -- we now have enough data to send _and_ have received an IN token.
-            # We can now send our data over to the host.
-            with m.State("SEND_PACKET"):
+            # REQUEST_IN_TOKEN -- we now have at least a buffer full of data to send; but
+            # we've sent a NRDY token to the host; and thus the host is no longer polling for data.
+            # We'll send an ERDY token to the host, in order to request it poll us again.
+            with m.State("REQUEST_IN_TOKEN"):
 
+                # Send our ERDY token, letting the host know how many packets we're ready to send...
                 m.d.comb += [
-                    # Apply our general transfer information.
-                    interface.tx_direction        .eq(USBDirection.IN),
-                    interface.tx_sequence_number  .eq(sequence_number),
-                    interface.tx_length           .eq(read_fill_count),
-                    interface.tx_endpoint_number  .eq(self._endpoint_number),
+                    handshakes_out.send_erdy          .eq(1),
+                    handshakes_out.number_of_packets  .eq(Mux(buffered > max_burst, max_burst, buffered)),
                 ]
 
+                # ... and once that send is complete, move on to waiting for an IN token.
+                with m.If(handshakes_out.done):
+                    m.d.ss += erdy_required.eq(0)
+                    m.next = "IDLE"
+
+
+            # SEND_PACKET -- we have a packet to send, and permission from the host to send it.
+            # We can now send our data over to the host.
+            with m.State("SEND_PACKET"):
+                m.d.comb += buffer_read.addr.eq(buffer_address(active_buffer, send_position))
+
                 with m.If(~out_stream.valid.any() | out_stream.ready):
                     # Once we emitted a word of data for our receiver, move to the next word in our packet.
                     m.d.ss   += send_position     .eq(send_position + 1)
-                    m.d.comb += buffer_read.addr  .eq(send_position + 1)
+                    m.d.comb += buffer_read.addr  .eq(buffer_address(active_buffer, send_position + 1))
 
                     # We're on our last word whenever the next word would be contain the end of our data.
                     first_word = (send_position == 0)
-                    last_word  = ((send_position + 1) << 2 >= read_fill_count)
+                    last_word  = ((send_position + 1) << 2 >= active_length)
 
                     m.d.ss += [
                         # Block RAM often has a large clock-to-dout delay; register the output to
@@ -333,7 +418,7 @@ class SuperSpeedStreamInEndpoint(Elaboratable):
 
                         # We can figure out how many bytes are valid by looking at the last two bits of our
                         # count; which happen to be the mod-4 remainder.
-                        with m.Switch(read_fill_count[0:2]):
+                        with m.Switch(active_length[0:2]):
 
                             # If we're evenly divisible by four, all four bytes are valid.
                             with m.Case(0):
@@ -352,111 +437,372 @@ class SuperSpeedStreamInEndpoint(Elaboratable):
                     with m.Else():
                         m.d.ss += out_stream.valid.eq(0b1111)
 
-                    # If we've just sent our last word, we're now ready to wait for a response
-                    # from our host.
+                    # If we've just queued our last word, we'll finish up once it's accepted.
                     with m.If(last_word):
-                        m.next = 'WAIT_FOR_ACK'
+                        m.next = 'FINISH_PACKET'
+
+
+            # FINISH_PACKET -- we've queued the last word of our packet; wait for our transmitter to accept it.
+            # We don't need to wait for an acknowledgement, here; as any further packets in our burst can be sent
+            # while the host is handling this one.
+            with m.State("FINISH_PACKET"):
+
+                with m.If(out_stream.ready):
+                    m.d.ss += [
+                        out_stream.valid  .eq(0),
+                        send_position     .eq(0),
+                    ]
+                    m.next = "IDLE"
 
 
-            # WAIT_FOR_ACK -- We've just sent a packet; but don't know if the host has
-            # received it correctly. We'll wait to see if the host ACKs.
-            with m.State("WAIT_FOR_ACK"):
+        # Apply our general transfer information whenever we're presenting packet data.
+        with m.If(out_stream.valid.any()):
+            m.d.comb += [
+                interface.tx_direction        .eq(USBDirection.IN),
+                interface.tx_sequence_number  .eq(active_sequence),
+                interface.tx_length           .eq(active_length),
+                interface.tx_endpoint_number  .eq(self._endpoint_number),
+                interface.tx_end_of_burst     .eq(active_end_of_burst),
+            ]
 
-                # We're done transmitting data.
-                m.d.ss   += out_stream.valid.eq(0)
+        return m
 
-                # Reset our send-position for the next data packet.
-                m.d.ss   += send_position   .eq(0)
-                m.d.comb += buffer_read.addr.eq(0)
 
-                # In USB3, an ACK handshake can act as an ACK, an error indicator, and/or an IN token.
-                # This helps to maximize bus bandwidth, but means we have to handle each case carefully.
-                with m.If(ack_received):
 
-                    # Figure out how the sequence advertisement in our ACK relates to our current sequence number.
-                    sequence_advancing = (handshakes_in.next_sequence == next_sequence_number)
+class SuperSpeedStreamOutEndpoint(Elaboratable):
+    """ Endpoint interface that receives data from the host, and produces a simple data stream.
 
-                    # Our simplest case is actually when an error occurs, which is indicated by receiving
-                    # an ACK packet with Retry set to `1`. For now, we'll also treat a repeated sequence number
-                    # as an indication that we need to re-try the given packet.
-                    with m.If(handshakes_in.retry_required | ~sequence_advancing):
+    This interface is suitable for a single bulk or interrupt endpoint.
 
-                        # In this case, we'll re-transmit the relevant data, either by sending another ZLP...
-                        with m.If(last_packet_was_zlp):
-                            m.d.comb += [
-                                interface.tx_zlp.eq(1),
-                                advance_sequence.eq(1),
-                            ]
+    This implementation buffers up to ``max_burst + 1`` packets. Each ACK we send advertises how many more
+    packets we have room for; if we run out of room, the host will wait for us to send an ERDY before it sends
+    any more data [USB3.2r1: 8.10.1].
 
-                        # ... or by moving right back into sending a data packet.
-                        with m.Else():
-                            m.next = 'SEND_PACKET'
+    The output stream's ``first`` signal marks the first word of each transfer; and its ``last`` signal marks
+    the final word of any transfer that ends in a short packet. A ZLP is a short packet; so, to find out whether
+    one follows, the final word of each full-size packet is held back until the next packet has been received.
+    A zero-length transfer carries no data, and so produces no output.
 
 
-                    # Otherwise, if our ACK contains the next sequence number, then this is an acknowledgement
-                    # of the previous packet [USB3.2r1: 8.12.1.2].
-                    with m.Else():
+    Attributes
+    ----------
+    stream: SuperSpeedStreamInterface, output stream
+        Full-featured stream interface that carries the data we've received from the host.
+    interface: SuperSpeedEndpointInterface
+        Communications link to our USB device.
+
+
+    Parameters
+    ----------
+    endpoint_number: int
+        The endpoint number (not address) this endpoint should respond to.
+    max_packet_size: int
+        The maximum packet size for this endpoint. Should match the wMaxPacketSize provided in the
+        USB endpoint descriptor.
+    max_burst: int
+        The maximum number of packets the host may send this endpoint in a single burst; from 1 to 16. Should be
+        one more than the bMaxBurst provided in the endpoint's SuperSpeed companion descriptor.
+    """
+
+    SEQUENCE_NUMBER_BITS = 5
+    MAX_BURST            = 16
+
+
+    def __init__(self, *, endpoint_number, max_packet_size=1024, max_burst=1):
+        self._endpoint_number = endpoint_number
+        self._max_packet_size = max_packet_size
+        self._max_burst       = max_burst
+
+        if not 1 <= max_burst <= self.MAX_BURST:
+            raise ValueError(f"max_burst must be between 1 and {self.MAX_BURST}, not {max_burst}")
+
+        #
+        # I/O port
+        #
+        self.stream    = SuperSpeedStreamInterface()
+        self.interface = SuperSpeedEndpointInterface()
+
+
+    def elaborate(self, platform):
+        m = Module()
+
+        interface      = self.interface
+        handshakes_out = interface.handshakes_out
+
+        # Parameters for later use.
+        data_width       = len(self.stream.data)
+        bytes_per_word   = data_width // 8
+        words_per_packet = self._max_packet_size // bytes_per_word
+        max_burst        = self._max_burst
+
+        # We'll keep one more buffer than the host can send us in a burst; so we can always be draining
+        # a buffer into our stream while a full burst is arriving.
+        buffer_count     = max_burst + 1
+
+        # Shortcut names.
+        rx         = self.interface.rx
+        out_stream = self.stream
+
+
+        #
+        # Receive buffers.
+        #
+        # We can't apply backpressure to the host while a packet is arriving, and we can't know if a packet
+        # is good until it's been fully received. Accordingly, we'll capture each packet into a buffer of its
+        # own; and only pass it along to our stream once it's been validated.
+        #
+        # Our buffers form a ring: we receive packets in at its head, and drain them into our stream
+        # from its tail. Each buffer occupies a packet-sized region of a single memory.
+        #
+        m.submodules.receive_buffer = buffer = \
+            Memory(shape=data_width, depth=buffer_count * words_per_packet, init=[])
+        buffer_write = buffer.write_port(domain="ss")
+        buffer_read  = buffer.read_port(domain="ss")
+
+        def buffer_address(buffer_number, word):
+            """ Returns the memory address of a word within one of our packet buffers. """
+            return buffer_number * words_per_packet + word
+
+        def wrap(buffer_number):
+            """ Wraps a buffer number that's run past the end of our ring. """
+            return Mux(buffer_number >= buffer_count, buffer_number - buffer_count, buffer_number)
+
+        # Ring state tracking:
+        # - Our ``read_buffer`` is the oldest buffer holding a packet we've yet to pass along.
+        # - Our ``buffered`` count keeps track of how many validated packets we're holding, starting
+        #   from the ``read_buffer``; and our ``write_buffer`` is the buffer following those, which
+        #   receives the packet currently arriving.
+        # - Each buffer's ``buffer_length`` records the length of the packet it holds; where a length
+        #   of zero indicates a ZLP.
+        read_buffer   = Signal(range(buffer_count))
+        write_buffer  = Signal(range(buffer_count))
+        buffered      = Signal(range(buffer_count + 1))
+        buffer_length = Array(
+            Signal(range(self._max_packet_size + 1), name=f"buffer{i}_length") for i in range(buffer_count)
+        )
+
+        # Each cycle, our ring can gain a packet at its head, and lose one from its tail.
+        buffer_committed = Signal()
+        buffer_released  = Signal()
+        m.d.ss += buffered.eq(buffered + buffer_committed - buffer_released)
+
+        # Figure out how many more packets we can accept; and thus how many we can advertise to the host.
+        free_buffers = Signal(range(buffer_count + 1))
+        m.d.comb += free_buffers.eq(buffer_count - buffered)
+
+        def packets_advertised(free):
+            return Mux(free > max_burst, max_burst, free)
+
+
+        #
+        # Packet reception.
+        #
+
+        # Keep track of how much data we've received in the current packet; and whether any of it arrived
+        # while we had no buffer to put it in.
+        rx_count    = Signal(range(self._max_packet_size + 1))
+        rx_dropped  = Signal()
+        ring_full   = (buffered == buffer_count)
+
+        # We'll only capture data from packets that target our endpoint.
+        is_to_us    = (interface.rx_header.endpoint_number == self._endpoint_number)
+        rx_data     = is_to_us & rx.valid.any()
+
+        m.d.comb += [
+            buffer_write.en    .eq(rx_data & ~ring_full),
+            buffer_write.data  .eq(rx.payload),
+            buffer_write.addr  .eq(buffer_address(write_buffer, rx_count >> 2)),
+        ]
+
+        # Figure out how many bytes we're receiving, based on the number of valid bits we have.
+        bytes_received = Signal(range(bytes_per_word + 1))
+        with m.Switch(rx.valid):
+            with m.Case(0b0001):
+                m.d.comb += bytes_received.eq(1)
+            with m.Case(0b0011):
+                m.d.comb += bytes_received.eq(2)
+            with m.Case(0b0111):
+                m.d.comb += bytes_received.eq(3)
+            with m.Case(0b1111):
+                m.d.comb += bytes_received.eq(4)
+
+        with m.If(rx_data):
+            m.d.ss += rx_count.eq(rx_count + bytes_received)
+
+            with m.If(ring_full):
+                m.d.ss += rx_dropped.eq(1)
+
+
+        #
+        # Handshake generation.
+        #
+
+        # Keep track of the sequence number we expect the host to send next.
+        expected_sequence = Signal(self.SEQUENCE_NUMBER_BITS)
+
+        # Stores whether we'll need to send an ERDY packet before the host will send us more data.
+        # If we send an NRDY packet, or an ACK advertising no free buffers, the host will stop sending
+        # to this endpoint until an ERDY packet is sent [USB3.2r1: 8.10.1].
+        erdy_required = Signal()
+
+        # Shortcuts for the end of a packet that targets us.
+        packet_good       = is_to_us & interface.rx_complete
+        packet_bad        = is_to_us & interface.rx_invalid
+        sequence_matches  = (interface.rx_header.data_sequence == expected_sequence)
+
+        # We'll always report our own endpoint number and direction with our handshakes.
+        m.d.comb += [
+            handshakes_out.endpoint_number  .eq(self._endpoint_number),
+            handshakes_out.direction        .eq(USBDirection.OUT),
+        ]
+
+        with m.If(packet_good | packet_bad):
+            m.d.ss += [
+                rx_count    .eq(0),
+                rx_dropped  .eq(0),
+            ]
+
+            # If we've received the packet we expected intact, but had nowhere to put it, we'll drop it,
+            # and let the host know we're not ready for it.
+            with m.If(packet_good & sequence_matches & (rx_dropped | ring_full)):
+                m.d.comb += handshakes_out.send_nrdy  .eq(1)
+                m.d.ss   += erdy_required             .eq(1)
+
+            # If we've received the packet we expected intact, keep it; and acknowledge it, letting
+            # the host know how many more packets we have room for.
+            with m.Elif(packet_good & sequence_matches):
+                remaining = free_buffers - 1
+
+                m.d.comb += [
+                    buffer_committed                  .eq(1),
 
-                        # We no longer need to keep the data that's been acknowledged; clear it.
-                        m.d.ss += read_fill_count.eq(0)
-
-                        # Figure out if we'll need to follow up with a ZLP. If we have ZLP generation enabled,
-                        # we'll make sure we end on a short packet. If this is max-packet-size packet _and_ our
-                        # transfer ended with this packet; we'll need to inject a ZLP.
-                        follow_up_with_zlp = \
-                            (read_fill_count == self._max_packet_size) & read_stream_ended
-
-                        # If we're following up with a ZLP, we have two cases, depending on whether this ACK
-                        # is also requesting another packet.
-                        with m.If(follow_up_with_zlp):
-
-                            # If we are requesting another packet immediately, we can said ZLP our immediately,
-                            # and then continue waiting for the next ACK.
-                            with m.If(is_in_token):
-
-                                # ... send a ZLP...
-                                m.d.comb += [
-                                    interface.tx_zlp.eq(1),
-                                    advance_sequence.eq(1),
-                                ]
-
-                                # ... and clear the need to follow up with one, since we've just sent a short packet.
-                                m.d.ss += [
-                                    read_stream_ended    .eq(0),
-                                    last_packet_was_zlp  .eq(1)
-                                ]
-
-                            # Otherwise, we'll wait for an attempt to send data before we generate a ZLP.
-                            with m.Else():
-                                m.next = "WAIT_TO_SEND"
-
-
-                        # Otherwise, there's a possibility we already have a packet-worth of data waiting
-                        # for us in our "write buffer", which we've been filling in the background.
-                        # If this is the case, we'll flip which buffer we're working with, and then
-                        # ready ourselves for transmit.
-                        packet_completing = in_stream.valid & (write_fill_count + 4 >= self._max_packet_size)
-                        with m.Elif(~in_stream.ready | packet_completing):
-                            m.d.comb += [
-                                advance_sequence   .eq(1),
-                            ]
-                            m.d.ss += [
-                                ping_pong_toggle   .eq(~ping_pong_toggle),
-                                read_stream_ended  .eq(0),
-                            ]
-
-                            with m.If(is_in_token):
-                                m.d.ss += [
-                                    last_packet_was_zlp  .eq(0)
-                                ]
-                                m.next = "SEND_PACKET"
-
-                            with m.Else():
-                                m.next = "WAIT_TO_SEND"
-
-                        # If neither of the above conditions are true; we now don't have enough data to send.
-                        # We'll wait for enough data to transmit.
-                        with m.Else():
-                            m.next = "WAIT_FOR_DATA"
+                    handshakes_out.retry_required     .eq(0),
+                    handshakes_out.next_sequence      .eq(expected_sequence + 1),
+                    handshakes_out.number_of_packets  .eq(packets_advertised(remaining)),
+                    handshakes_out.send_ack           .eq(1),
+                ]
+                m.d.ss += [
+                    buffer_length[write_buffer]  .eq(rx_count),
+                    write_buffer                 .eq(wrap(write_buffer + 1)),
+                    expected_sequence            .eq(expected_sequence + 1),
+                ]
+
+                # If we've just filled our last free buffer, we'll need to ERDY once we have room.
+                with m.If(remaining == 0):
+                    m.d.ss += erdy_required.eq(1)
+
+            # Otherwise, the packet was either corrupted or out of sequence. We'll discard it, and ask the
+            # host to retry from the packet we expected [USB3.2r1: 8.12.1.2].
+            with m.Else():
+                m.d.comb += [
+                    handshakes_out.retry_required     .eq(1),
+                    handshakes_out.next_sequence      .eq(expected_sequence),
+                    handshakes_out.number_of_packets  .eq(packets_advertised(free_buffers)),
+                    handshakes_out.send_ack           .eq(1),
+                ]
+
+                with m.If(free_buffers == 0):
+                    m.d.ss += erdy_required.eq(1)
+
+
+        # If the host is waiting for us to have room, let it know once we do; by sending an ERDY
+        # advertising how many packets we can accept.
+        with m.Elif(erdy_required & (free_buffers != 0)):
+            m.d.comb += [
+                handshakes_out.send_erdy          .eq(1),
+                handshakes_out.number_of_packets  .eq(packets_advertised(free_buffers)),
+            ]
+
+            with m.If(handshakes_out.done):
+                m.d.ss += erdy_required.eq(0)
+
+
+        # If our endpoint is reset, restart our sequencing; but keep any data we've buffered.
+        with m.If(interface.ep_reset):
+            m.d.ss += [
+                expected_sequence  .eq(0),
+                erdy_required      .eq(0),
+            ]
+
+
+        #
+        # Stream output.
+        #
+
+        # Keep track of our position in the packet we're draining; and whether we're in the middle
+        # of a transfer, so we can mark the start of each new one.
+        read_position  = Signal(range(words_per_packet))
+        read_length    = buffer_length[read_buffer]
+        in_transfer    = Signal()
+
+        # We're on our last word whenever the next word would contain the end of our data; and our transfer
+        # ends whenever that's the last word of a short packet -- or of a full packet followed by a ZLP.
+        next_length   = buffer_length[wrap(read_buffer + 1)]
+        full_packet   = (read_length == self._max_packet_size)
+        last_word     = ((read_position + 1) << 2 >= read_length)
+        ends_transfer = last_word & (~full_packet | (next_length == 0))
+
+        # We'll read a new word from our buffer whenever our output register is free, or is being emptied.
+        # Our memory's read port holds its output while disabled; so it serves as our output register.
+        advance = ~out_stream.valid.any() | out_stream.ready
+        m.d.comb += [
+            buffer_read.en      .eq(advance),
+            buffer_read.addr    .eq(buffer_address(read_buffer, read_position)),
+            out_stream.payload  .eq(buffer_read.data),
+        ]
+
+        with m.If(advance):
+
+            # Unless we have data to present, our stream won't be valid.
+            m.d.ss += out_stream.valid.eq(0)
+
+            with m.If(buffered != 0):
+
+                # A ZLP carries no data. Any transfer it ends was marked as ending when we passed along
+                # that transfer's final word; so we'll just discard it.
+                with m.If(read_length == 0):
+                    m.d.comb += buffer_released.eq(1)
+                    m.d.ss += [
+                        read_buffer  .eq(wrap(read_buffer + 1)),
+                        in_transfer  .eq(0),
+                    ]
+
+                # If we're about to pass along the last word of a full-size packet, we can't yet know
+                # whether it ends our transfer; that depends on whether a ZLP follows. We'll hold it back
+                # until our next packet arrives.
+                with m.Elif(last_word & full_packet & (buffered == 1)):
+                    pass
+
+                with m.Else():
+                    m.d.ss += [
+                        read_position     .eq(read_position + 1),
+
+                        out_stream.first  .eq(~in_transfer),
+                        out_stream.last   .eq(ends_transfer),
+                        in_transfer       .eq(~ends_transfer),
+                    ]
+
+                    # Figure out which bytes of our stream are valid. Normally; this is all of them,
+                    # but the last word of a packet may only be partially filled.
+                    with m.If(last_word):
+                        with m.Switch(read_length[0:2]):
+                            with m.Case(0):
+                                m.d.ss += out_stream.valid.eq(0b1111)
+                            with m.Case(1):
+                                m.d.ss += out_stream.valid.eq(0b0001)
+                            with m.Case(2):
+                                m.d.ss += out_stream.valid.eq(0b0011)
+                            with m.Case(3):
+                                m.d.ss += out_stream.valid.eq(0b0111)
+
+                        # Once we've read our packet's last word, we're done with its buffer.
+                        m.d.comb += buffer_released.eq(1)
+                        m.d.ss += [
+                            read_buffer    .eq(wrap(read_buffer + 1)),
+                            read_position  .eq(0),
+                        ]
+
+                    with m.Else():
+                        m.d.ss += out_stream.valid.eq(0b1111)
 
         return m
@@ -211,8 +211,15 @@ class DataPacketReceiver(Elaboratable):
                         source.first          .eq(1)
                     ]
 
-                    # Move to receiving data.
-                    m.next = "RECEIVE_PAYLOAD"
+                    # If we're receiving a zero-length packet, our payload consists only of its CRC;
+                    # which we'll check directly, as though it followed a word-aligned payload.
+                    with m.If(header.dw1[16:] == 0):
+                        m.d.ss += previous_valid.eq(0b1111)
+                        m.next = "CHECK_CRC32"
+
+                    # Otherwise, move to receiving data.
+                    with m.Else():
+                        m.next = "RECEIVE_PAYLOAD"
 
                 # If our data is valid and we're -not- a start of DPP, this isn't for us.
                 # Go back to watching for data.
@@ -306,7 +313,7 @@ class DataPacketReceiver(Elaboratable):
                     m.d.comb += self.packet_bad.eq(1)
 
                 # Finally, wait for our next packet.
-                    m.next = "WAIT_FOR_HPSTART"
+                m.next = "WAIT_FOR_HPSTART"
 
 
         return m
@@ -334,6 +341,8 @@ class DataPacketTransmitter(Elaboratable):
     direction: Signal(), input
         The direction to indicate in the data header packet. Typically Direction.IN; but will be Direction.OUT
         when data is sent to the host as part of a control transfer.
+    end_of_burst: Signal(), input
+        Set to mark the relevant data packet as the last in a burst. Latched in once :attr:``data_sink`` goes valid.
 
     address: Signal(7), input
         The current address of the USB device.
@@ -357,6 +366,7 @@ class DataPacketTransmitter(Elaboratable):
         self.data_length     = Signal(range(self.MAX_PACKET_SIZE + 1))
         self.address         = Signal(7)
         self.direction       = Signal()
+        self.end_of_burst    = Signal()
 
         # Output streams.
         self.header_source   = HeaderQueue()
@@ -376,7 +386,13 @@ class DataPacketTransmitter(Elaboratable):
         endpoint_number = Signal.like(self.endpoint_number)
         data_length     = Signal.like(self.data_length)
         direction       = Signal.like(self.direction)
+        end_of_burst    = Signal.like(self.end_of_burst)
+
 
+        # Keep track of whether we've passed along the final word of our current payload. Packets can be
+        # presented back-to-back; so we can't rely on our data stream going idle between payloads.
+        payload_complete = Signal()
+        accepting_last   = Signal()
 
         # For now, we'll pass our data stream through unmodified; only buffered to improve
         # timing.
@@ -387,6 +403,10 @@ class DataPacketTransmitter(Elaboratable):
             m.d.ss   += data_source.stream_eq(data_sink, omit={'ready'})
             m.d.comb += data_sink.ready.eq(1)
 
+        m.d.comb += accepting_last.eq(data_sink.valid.any() & data_sink.ready & data_sink.last)
+        with m.If(accepting_last):
+            m.d.ss += payload_complete.eq(1)
+
 
         with m.FSM(domain="ss"):
 
@@ -398,7 +418,8 @@ class DataPacketTransmitter(Elaboratable):
                     sequence_number  .eq(self.sequence_number),
                     endpoint_number  .eq(self.endpoint_number),
                     data_length      .eq(self.data_length),
-                    direction        .eq(self.direction)
+                    direction        .eq(self.direction),
+                    end_of_burst     .eq(self.end_of_burst)
                 ]
 
                 # Once our data goes valid, begin sending our data.
@@ -425,6 +446,7 @@ class DataPacketTransmitter(Elaboratable):
                     header.data_sequence    .eq(sequence_number),
                     header.data_length      .eq(data_length),
                     header.endpoint_number  .eq(endpoint_number),
+                    header.end_of_burst     .eq(end_of_burst),
                 ]
 
                 # Once our header is accepted, move on to passing through our payload.
@@ -436,8 +458,10 @@ class DataPacketTransmitter(Elaboratable):
             # drive ready when it's time to accept data.
             with m.State("SEND_PAYLOAD"):
 
-                # Once our packet is complete, we'll go back to idle.
-                with m.If(~data_sink.valid.any()):
+                # Once our packet is complete, we'll go back to idle. If the next packet's final
+                # word is being accepted as we leave, we'll keep track of it for that packet.
+                with m.If(payload_complete | ~data_sink.valid.any()):
+                    m.d.ss += payload_complete.eq(accepting_last)
                     m.next = "WAIT_FOR_DATA"
 
 
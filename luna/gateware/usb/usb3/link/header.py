@@ -106,15 +106,17 @@ class HeaderQueueArbiter(StreamArbiter):
     ----------
     source: HeaderQueue(), output queue
         A single header queue that carries data from all producer queues.
+
+    Any keyword arguments, such as the scheduling ``mode``, are passed on to :class:`StreamArbiter`.
     """
 
-    def __init__(self):
-        super().__init__(stream_type=HeaderQueue, domain="ss")
+    def __init__(self, **kwargs):
+        super().__init__(stream_type=HeaderQueue, domain="ss", **kwargs)
 
 
-    def add_producer(self, interface: HeaderQueue):
+    def add_producer(self, interface: HeaderQueue, **kwargs):
         """ Adds a HeaderQueue interface that will add packets into this mux. """
-        self.add_stream(interface)
+        self.add_stream(interface, **kwargs)
 
 
 
@@ -54,6 +54,7 @@ class USB3LinkLayer(Elaboratable):
         self.data_sink_endpoint_number = Signal(4)
         self.data_sink_length          = Signal(range(1024 + 1))
         self.data_sink_direction       = Signal()
+        self.data_sink_end_of_burst    = Signal()
 
         # Device state for header packets
         self.current_address           = Signal(7)
@@ -277,7 +278,8 @@ class USB3LinkLayer(Elaboratable):
             data_tx.sequence_number  .eq(self.data_sink_sequence_number),
             data_tx.endpoint_number  .eq(self.data_sink_endpoint_number),
             data_tx.data_length      .eq(self.data_sink_length),
-            data_tx.direction        .eq(self.data_sink_direction)
+            data_tx.direction        .eq(self.data_sink_direction),
+            data_tx.end_of_burst     .eq(self.data_sink_end_of_burst)
         ]
 
 
@@ -8,13 +8,11 @@
 # SPDX-License-Identifier: BSD-3-Clause
 """ Scrambling and descrambling for USB3. """
 
-import operator
-import functools
-
 from amaranth import *
 
-from .coding   import COM, stream_word_matches_symbol
-from ...stream import USBRawSuperSpeedStream
+from .coding          import COM, stream_word_matches_symbol
+from ...stream        import USBRawSuperSpeedStream
+from ....utils.lfsr   import LFSRMatrix
 
 
 #
@@ -44,6 +42,10 @@ class ScramblerLFSR(Elaboratable):
     initial_value: 32-bit int, optional
         The initial value for the LFSR. Optional; defaults to all 1's, per the USB3 spec.
     """
+
+    # Our LFSR advances 32 bits per cycle.
+    _LFSR_MATRIX = LFSRMatrix(width=16, polynomial=0x0039, steps=32)
+
     def __init__(self, initial_value=0xffff):
         self._initial_value = initial_value
 
@@ -61,66 +63,12 @@ class ScramblerLFSR(Elaboratable):
         next_value       = Signal(16)
         current_value    = Signal(16, init=self._initial_value)
 
-        def xor_bits(*indices):
-            bits = (current_value[i] for i in indices)
-            return functools.reduce(operator.__xor__, bits)
-
-
-        # Compute the next value in our internal LFSR state...
-        m.d.comb += next_value.eq(Cat(
-            xor_bits(0, 6, 8, 10),               # 0
-            xor_bits(1, 7, 9, 11),               # 1
-            xor_bits(2, 8, 10, 12),              # 2
-            xor_bits(3, 6, 8, 9, 10, 11, 13),    # 3
-            xor_bits(4, 6, 7, 8, 9, 11, 12, 14), # 4
-            xor_bits(5, 6, 7, 9, 12, 13, 15),    # 5
-            xor_bits(0, 6, 7, 8, 10, 13, 14),    # 6
-            xor_bits(1, 7, 8, 9, 11, 14, 15),    # 7
-            xor_bits(0, 2, 8, 9, 10, 12, 15),    # 8
-            xor_bits(1, 3, 9, 10, 11, 13),       # 9
-            xor_bits(0, 2, 4, 10, 11, 12, 14),   # 10
-            xor_bits(1, 3, 5, 11, 12, 13, 15),   # 11
-            xor_bits(2, 4, 6, 12, 13, 14),       # 12
-            xor_bits(3, 5, 7, 13, 14, 15),       # 13
-            xor_bits(4, 6, 8, 14, 15),           # 14
-            xor_bits(5, 7, 9, 15)                # 15
-        ))
-
-        # Compute the LFSR's current output.
-        m.d.comb += self.value.eq(Cat(
-            current_value[15],
-            current_value[14],
-            current_value[13],
-            current_value[12],
-            current_value[11],
-            current_value[10],
-            current_value[9],
-            current_value[8],
-            current_value[7],
-            current_value[6],
-            current_value[5],
-            xor_bits(4,  15),
-            xor_bits(3,  14, 15),
-            xor_bits(2,  13, 14, 15),
-            xor_bits(1,  12, 13, 14),
-            xor_bits(0,  11, 12, 13),
-            xor_bits(10, 11, 12, 15),
-            xor_bits(9,  10, 11, 14),
-            xor_bits(8,  9 , 10, 13),
-            xor_bits(7,  8 , 9,  12),
-            xor_bits(6,  7 , 8,  11),
-            xor_bits(5,  6 , 7,  10),
-            xor_bits(4,  5 , 6,  9,  15),
-            xor_bits(3,  4 , 5,  8,  14),
-            xor_bits(2,  3 , 4,  7,  13, 15),
-            xor_bits(1,  2 , 3,  6,  12, 14),
-            xor_bits(0,  1 , 2,  5,  11, 13, 15),
-            xor_bits(0,  1 , 4,  10, 12, 14),
-            xor_bits(0,  3 , 9,  11, 13),
-            xor_bits(2,  8 , 10, 12),
-            xor_bits(1,  7 , 9,  11),
-            xor_bits(0,  6 , 8,  10)
-        ))
+        # Compute the next value in our internal LFSR state, and its current output; which are the
+        # 32 bits shifted out as our LFSR advances by a full word.
+        m.d.comb += [
+            next_value  .eq(self._LFSR_MATRIX.next_state(current_value)),
+            self.value  .eq(self._LFSR_MATRIX.outputs(current_value)),
+        ]
 
         # If we have a reset, clear our LFSR.
         with m.If(self.clear):
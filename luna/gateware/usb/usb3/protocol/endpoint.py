@@ -13,7 +13,7 @@ from amaranth import *
 from .transaction import HandshakeGeneratorInterface, HandshakeReceiverInterface
 
 from ..link.data   import DataHeaderPacket
-from ....utils.bus import OneHotMultiplexer
+from ....utils.bus import OneHotMultiplexer, one_hot_connect
 from ...stream     import SuperSpeedStreamInterface
 
 class SuperSpeedEndpointInterface:
@@ -48,6 +48,8 @@ class SuperSpeedEndpointInterface:
         The sequence number associated with the active transmission.
     tx_direction: Signal(), output from endpoint
         The direction associated with the active transmission; used for control endpoints.
+    tx_end_of_burst: Signal(), output from endpoint
+        Set when the active transmission is the last packet the endpoint will send in the current burst.
 
     active_address: Signal(7), input to endpoint
         Contains the device's current address.
@@ -79,6 +81,7 @@ class SuperSpeedEndpointInterface:
         self.tx_endpoint_number    = Signal(4)
         self.tx_sequence_number    = Signal(5)
         self.tx_direction          = Signal(init=1)
+        self.tx_end_of_burst       = Signal()
 
         # Handshaking / transaction packet exchange.
         self.handshakes_out        = HandshakeGeneratorInterface()
@@ -133,37 +136,19 @@ class SuperSpeedEndpointMultiplexer(Elaboratable):
 
 
     def _multiplex_signals(self, m, *, when, multiplex):
-        """ Helper that creates a simple priority-encoder multiplexer.
+        """ Helper that creates a one-hot AND-OR multiplexer.
 
         Parmeters
         ---------
         when: str
             The name of the interface signal that indicates that the `multiplex` signals should be
             selected for output. If this signals should be multiplexed, it should be included in `multiplex`.
+            It's expected that only one interface will assert this signal at a time.
         multiplex: iterable(str)
             The names of the interface signals to be multiplexed.
         """
-
-        # We're building an if-elif tree; so we should start with an If entry.
-        conditional = m.If
-
-        for interface in self._interfaces:
-            condition = getattr(interface, when)
-
-            with conditional(condition):
-
-                # Connect up each of our signals.
-                for signal_name in multiplex:
-
-                    # Get the actual signals for our input and output...
-                    driving_signal = getattr(interface,   signal_name)
-                    target_signal  = getattr(self.shared, signal_name)
-
-                    # ... and connect them.
-                    m.d.comb += target_signal   .eq(driving_signal)
-
-            # After the first element, all other entries should be created with Elif.
-            conditional = m.Elif
+        selects = [getattr(interface, when) for interface in self._interfaces]
+        m.d.comb += one_hot_connect(selects, self._interfaces, self.shared, forward=multiplex)
 
 
 
@@ -193,37 +178,42 @@ class SuperSpeedEndpointMultiplexer(Elaboratable):
             ]
 
         #
-        # Multiplex each of our transmit interfaces.
+        # Multiplex each of our transmit interfaces. Only one endpoint should transmit at a time;
+        # so we'll connect up whichever endpoint is currently transmitting.
         #
-        for interface in self._interfaces:
-
-            # If the transmit interface is valid, connect it up to our endpoint.
-            # The latest assignment will win; so we can treat these all as a parallel 'if's
-            # and still get an appropriate priority encoder.
-            with m.If(interface.tx.valid.any() | interface.tx_zlp):
-                m.d.comb += [
-                    shared.tx                  .stream_eq(interface.tx),
-                    shared.tx_zlp              .eq(interface.tx_zlp),
-                    shared.tx_direction        .eq(interface.tx_direction),
-                    shared.tx_endpoint_number  .eq(interface.tx_endpoint_number),
-                    shared.tx_sequence_number  .eq(interface.tx_sequence_number),
-                    shared.tx_length           .eq(interface.tx_length)
-                ]
+        m.d.comb += one_hot_connect(
+            (interface.tx.valid.any() | interface.tx_zlp for interface in self._interfaces),
+            self._interfaces, shared,
+            forward=[
+                lambda interface : interface.tx.valid,
+                lambda interface : interface.tx.first,
+                lambda interface : interface.tx.last,
+                lambda interface : interface.tx.payload,
+                'tx_zlp', 'tx_direction', 'tx_endpoint_number', 'tx_sequence_number', 'tx_length', 'tx_end_of_burst'
+            ],
+            backward=[lambda interface : interface.tx.ready]
+        )
 
 
         #
-        # Multiplex each of our handshake-out interfaces.
+        # Multiplex each of our handshake-out interfaces; connecting up whichever interface
+        # is currently trying to send a handshake.
         #
-        for interface in self._interfaces:
-            any_generate_signal_asserted = (
+        m.d.comb += one_hot_connect(
+            (
                 interface.handshakes_out.send_ack   |
-                interface.handshakes_out.send_stall
-            )
-
-            # If the given interface is trying to send an handshake, connect it up
-            # to our shared interface.
-            with m.If(any_generate_signal_asserted):
-                m.d.comb += shared.handshakes_out.connect(interface.handshakes_out)
+                interface.handshakes_out.send_stall |
+                interface.handshakes_out.send_nrdy  |
+                interface.handshakes_out.send_erdy
+                    for interface in self._interfaces
+            ),
+            (interface.handshakes_out for interface in self._interfaces), shared.handshakes_out,
+            forward=[
+                'endpoint_number', 'retry_required', 'next_sequence', 'number_of_packets', 'direction',
+                'send_ack', 'send_stall', 'send_nrdy', 'send_erdy'
+            ],
+            backward=['ready', 'done']
+        )
 
 
         #
@@ -120,6 +120,7 @@ class USB3ProtocolLayer(Elaboratable):
             link.data_sink_endpoint_number  .eq(endpoint_interface.tx_endpoint_number),
             link.data_sink_sequence_number  .eq(endpoint_interface.tx_sequence_number),
             link.data_sink_direction        .eq(endpoint_interface.tx_direction),
+            link.data_sink_end_of_burst     .eq(endpoint_interface.tx_end_of_burst),
 
             # Handshake exchange interface.
             tp_generator.interface          .connect(endpoint_interface.handshakes_out),
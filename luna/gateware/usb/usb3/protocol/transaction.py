@@ -28,9 +28,20 @@ class HandshakeGeneratorInterface(Record):
         If set, an ACK will be interpreted as a request to re-send the relevant packet.
     next_sequence: Signal(5), input to handshake generator
         Reports the next expected data packet sequence number to the host.
+    number_of_packets: Signal(5), input to handshake generator
+        The number of packets to advertise in ACK and ERDY packets; i.e. the number of packets the endpoint
+        can accept or send in a burst. An ACK advertising zero packets tells the host to wait for an ERDY.
+    direction: Signal(), input to handshake generator
+        The direction of the endpoint generating the packet; used for NRDY and ERDY packets.
 
     send_ack: Signal(), input to handshake generator
         Strobe; requests generation of an ACK packet.
+    send_stall: Signal(), input to handshake generator
+        Strobe; requests generation of a STALL packet.
+    send_nrdy: Signal(), input to handshake generator
+        Strobe; requests generation of an NRDY packet.
+    send_erdy: Signal(), input to handshake generator
+        Strobe; requests generation of an ERDY packet.
 
     ready: Signal(), output from handshake generator
         Asserted when the handshake generator is ready to accept new signals.
@@ -42,19 +53,21 @@ class HandshakeGeneratorInterface(Record):
         super().__init__([
 
             # Parameters.
-            ('endpoint_number', 7, DIR_FANIN),
-            ('retry_required',  1, DIR_FANIN),
-            ('next_sequence',   5, DIR_FANIN),
+            ('endpoint_number',   7, DIR_FANIN),
+            ('retry_required',    1, DIR_FANIN),
+            ('next_sequence',     5, DIR_FANIN),
+            ('number_of_packets', 5, DIR_FANIN),
+            ('direction',         1, DIR_FANIN),
 
             # Commands.
-            ('send_ack',        1, DIR_FANIN),
-            ('send_stall',      1, DIR_FANIN),
-            ('send_nrdy',       1, DIR_FANIN),
-            ('send_erdy',       1, DIR_FANIN),
+            ('send_ack',          1, DIR_FANIN),
+            ('send_stall',        1, DIR_FANIN),
+            ('send_nrdy',         1, DIR_FANIN),
+            ('send_erdy',         1, DIR_FANIN),
 
             # Status.
-            ('ready',           1, DIR_FANOUT),
-            ('done',            1, DIR_FANOUT),
+            ('ready',             1, DIR_FANOUT),
+            ('done',              1, DIR_FANOUT),
 
         ])
 
@@ -218,6 +231,8 @@ class TransactionPacketGenerator(Elaboratable):
         endpoint_number = Signal.like(interface.endpoint_number)
         data_error      = Signal.like(interface.retry_required)
         next_sequence   = Signal.like(interface.next_sequence)
+        packet_count    = Signal.like(interface.number_of_packets)
+        direction       = Signal.like(interface.direction)
         device_address  = Signal.like(self.address)
 
 
@@ -257,6 +272,8 @@ class TransactionPacketGenerator(Elaboratable):
                     endpoint_number  .eq(interface.endpoint_number),
                     data_error       .eq(interface.retry_required),
                     next_sequence    .eq(interface.next_sequence),
+                    packet_count     .eq(interface.number_of_packets),
+                    direction        .eq(interface.direction),
                     device_address   .eq(self.address)
                 ]
 
@@ -267,7 +284,7 @@ class TransactionPacketGenerator(Elaboratable):
                 with m.If(interface.send_nrdy):
                     m.next = "SEND_NRDY"
                 with m.If(interface.send_erdy):
-                    m.next = "SEND_NRDY"
+                    m.next = "SEND_ERDY"
 
 
             # SEND_ACK -- actively send an ACK packet to our link partner; and wait for that to complete.
@@ -277,9 +294,7 @@ class TransactionPacketGenerator(Elaboratable):
                     direction         = USBDirection.OUT,
                     retry             = data_error,
                     data_sequence     = next_sequence,
-
-                    # TODO: eventually support bursting?
-                    number_of_packets = 1,
+                    number_of_packets = packet_count,
                 )
 
 
@@ -287,18 +302,16 @@ class TransactionPacketGenerator(Elaboratable):
             with m.State("SEND_NRDY"):
                 send_packet(NRDYHeaderPacket,
                     subtype           = TransactionPacketSubtype.NRDY,
-                    direction         = USBDirection.IN,
+                    direction         = direction,
                 )
 
 
-            # SEND_NRDY -- actively send an NRDY packet to our link partner; and wait for that to complete.
+            # SEND_ERDY -- actively send an ERDY packet to our link partner; and wait for that to complete.
             with m.State("SEND_ERDY"):
                 send_packet(ERDYHeaderPacket,
                     subtype           = TransactionPacketSubtype.ERDY,
-                    direction         = USBDirection.IN,
-
-                    # TODO: eventually support bursting?
-                    number_of_packets = 1,
+                    direction         = direction,
+                    number_of_packets = packet_count,
                 )
 
 
@@ -6,11 +6,66 @@
 
 """ Utilities for working with busses. """
 
-import operator
-import functools
+from amaranth            import Elaboratable, Signal, Module, Const, Mux
 
-from amaranth            import Elaboratable, Signal, Module
-from amaranth.lib.coding import Encoder
+
+def or_tree(values):
+    """ ORs together a collection of values, using a balanced tree rather than a linear chain. """
+
+    values = list(values)
+    if not values:
+        return Const(0)
+
+    while len(values) > 1:
+        pairs  = [a | b for a, b in zip(values[0::2], values[1::2])]
+        values = pairs + values[len(pairs) * 2:]
+
+    return values[0]
+
+
+def one_hot_select(selects, values):
+    """ Creates an AND-OR multiplexer, which selects among values using a set of one-hot select signals.
+
+    Each value is masked by its select signal; and the results are OR'd together with :func:`or_tree`.
+    Unlike a chain of ``If``/``Elif`` statements, this creates logic whose depth grows only logarithmically
+    with the number of values. The result is zero if no select is asserted; and the OR of all selected
+    values if more than one is.
+
+    Parameters:
+        selects -- An iterable of single-bit select signals.
+        values  -- An iterable of values to be selected among; one per select signal.
+    """
+    return or_tree(Mux(select, value, 0) for select, value in zip(selects, values))
+
+
+def one_hot_connect(selects, sources, target, *, forward=(), backward=()):
+    """ Returns statements that connect whichever of a set of interfaces is selected to a shared interface.
+
+    Parameters:
+        selects  -- An iterable of one-hot select signals; one per source interface.
+        sources  -- An iterable of source interfaces.
+        target   -- The shared interface to be connected to the selected source.
+        forward  -- An iterable of {signal names, or functions that accept an interface and return a Signal}.
+                    These signals are driven from the selected source onto the target, using :func:`one_hot_select`.
+        backward -- An iterable of {signal names, or functions that accept an interface and return a Signal}.
+                    These signals are driven from the target back to the selected source; and are held
+                    at zero for every other source.
+    """
+
+    selects = list(selects)
+    sources = list(sources)
+    get     = OneHotMultiplexer._get_signal
+
+    statements = []
+    for identifier in forward:
+        values = (get(source, identifier) for source in sources)
+        statements.append(get(target, identifier).eq(one_hot_select(selects, values)))
+
+    for identifier in backward:
+        for select, source in zip(selects, sources):
+            statements.append(get(source, identifier).eq(Mux(select, get(target, identifier), 0)))
+
+    return statements
 
 
 class OneHotMultiplexer(Elaboratable):
@@ -94,32 +149,17 @@ class OneHotMultiplexer(Elaboratable):
         m = Module()
 
         #
-        # Our module has three core parts:
-        #   - an encoder, which converts from our one-hot signal to a mux select line
-        #   - a multiplexer, which handles multiplexing e.g. payload signals
+        # Our module has two core parts:
+        #   - an AND-OR multiplexer, which handles multiplexing e.g. payload signals
         #   - a set of OR'ing logic, which joints together our simple or'd signals
 
-        # Create our encoder...
-        m.submodules.encoder = encoder = Encoder(len(self._inputs))
-        for index, interface in enumerate(self._inputs):
-
-            # ... and tie its inputs to each of our 'valid' signals.
-            valid_signal = getattr(interface, self._valid_field)
-            m.d.comb += encoder.i[index].eq(valid_signal)
-
-
         # Create our multiplexer, and drive each of our output signals from it.
-        with m.Switch(encoder.o):
-            for index, interface in enumerate(self._inputs):
-
-                # If an interface is selected...
-                with m.Case(index):
-                    for identifier in self._mux_signals:
+        valid_signals = [getattr(interface, self._valid_field) for interface in self._inputs]
+        for identifier in self._mux_signals:
+            output_signal = self._get_signal(self.output, identifier)
+            input_signals = [self._get_signal(interface, identifier) for interface in self._inputs]
 
-                        # ... connect all of its muxed signals through to the output.
-                        output_signal = self._get_signal(self.output, identifier)
-                        input_signal  = self._get_signal(interface,   identifier)
-                        m.d.comb += output_signal.eq(input_signal)
+            m.d.comb += output_signal.eq(one_hot_select(valid_signals, input_signals))
 
 
         # Create the OR'ing logic for each of or or_signals.
@@ -130,8 +170,7 @@ class OneHotMultiplexer(Elaboratable):
             input_signals = (self._get_signal(i, identifier) for i in self._inputs)
 
             # ... and OR them together.
-            or_reduced = functools.reduce(operator.__or__, input_signals, 0)
-            m.d.comb += output_signal.eq(or_reduced)
+            m.d.comb += output_signal.eq(or_tree(input_signals))
 
 
         # Finally, pass each of our pass-back signals from the output interface
@@ -0,0 +1,202 @@
+#
+# This file is part of LUNA.
+#
+# Copyright (c) 2025 Great Scott Gadgets <info@greatscottgadgets.com>
+# SPDX-License-Identifier: BSD-3-Clause
+
+""" Parametric generators for parallel CRCs and LFSRs. """
+
+import operator
+import functools
+
+from amaranth import Cat, Const, DomainRenamer, Elaboratable, Module, Signal
+
+
+class LFSRMatrix:
+    """ Elaboration-time model of a Galois LFSR, advanced several bits at a time.
+
+    CRCs and scramblers are both built around a linear feedback shift register; which, in hardware, we'd
+    like to advance by a whole data word per cycle. Each bit of the register's next state is then the XOR
+    of some set of its current state bits and data bits. This class derives those sets -- the rows of the
+    update's XOR matrix -- by symbolically stepping a bit-serial LFSR; so no equations need be derived by hand.
+
+    Our register is stored with bit ``i`` holding the coefficient of ``x^i``. On each serial step, the feedback
+    bit is the register's top bit XOR'd with the next data bit; the register shifts up by one, and the feedback
+    bit is XOR'd into each bit whose coefficient is set in the polynomial.
+
+    Parameters
+    ----------
+    width: int
+        The width of the LFSR; i.e. the degree of its polynomial.
+    polynomial: int
+        The polynomial, without its implicit ``x^width`` term; e.g. ``0x8005`` for the USB CRC-16.
+    data_width: int
+        The number of data bits shifted in per update. Can be zero, for an LFSR without any data input.
+    steps: int, optional
+        The number of bits the LFSR advances per update. Defaults to ``data_width``.
+    data_msb_first: bool
+        If true, the most significant data bit is shifted in first; otherwise, the least significant is.
+    """
+
+    def __init__(self, *, width, polynomial, data_width=0, steps=None, data_msb_first=False):
+        self.width          = width
+        self.polynomial     = polynomial
+        self.data_width     = data_width
+        self.steps          = data_width if steps is None else steps
+        self.data_msb_first = data_msb_first
+
+        if self.steps < data_width:
+            raise ValueError("an LFSR must advance at least one step per data bit")
+
+        # Each bit is represented as a mask over our inputs: bits [0:width] of each mask select
+        # state bits, while the bits above select data bits.
+        state   = [1 << i for i in range(width)]
+        outputs = []
+
+        for step in range(self.steps):
+            if step < data_width:
+                data_bit = (data_width - 1 - step) if data_msb_first else step
+                data     = 1 << (width + data_bit)
+            else:
+                data     = 0
+
+            feedback = state[-1] ^ data
+            outputs.append(feedback)
+
+            state = [0, *state[:-1]]
+            for i in range(width):
+                if (polynomial >> i) & 1:
+                    state[i] ^= feedback
+
+        self._state_masks  = state
+        self._output_masks = outputs
+
+
+    def _xor_terms(self, mask, state, data):
+        """ Returns the XOR of the state and data bits selected by a given mask. """
+
+        terms  = [state[i] for i in range(self.width) if (mask >> i) & 1]
+        terms += [data[i]  for i in range(self.data_width) if (mask >> (self.width + i)) & 1]
+
+        if not terms:
+            return Const(0)
+
+        return functools.reduce(operator.__xor__, terms)
+
+
+    def next_state(self, state, data=None):
+        """ Returns an expression for our LFSR's state after a single update. """
+        return Cat(self._xor_terms(mask, state, data) for mask in self._state_masks)
+
+
+    def state_term(self, state):
+        """ Returns the part of :meth:`next_state` that depends only on the LFSR's current state. """
+        return Cat(self._xor_terms(mask & ((1 << self.width) - 1), state, None) for mask in self._state_masks)
+
+
+    def data_term(self, data):
+        """ Returns the part of :meth:`next_state` that depends only on the data; which can be computed early. """
+        return Cat(self._xor_terms(mask & ~((1 << self.width) - 1), None, data) for mask in self._state_masks)
+
+
+    def outputs(self, state, data=None):
+        """ Returns an expression for the bits shifted out of our LFSR during an update; first bit in bit zero. """
+        return Cat(self._xor_terms(mask, state, data) for mask in self._output_masks)
+
+
+    def evaluate(self, state, data=0):
+        """ Computes our LFSR's next state from integer values; for use in software models. """
+
+        inputs = state | (data << self.width)
+        return sum((bin(mask & inputs).count("1") & 1) << i for i, mask in enumerate(self._state_masks))
+
+
+
+class ParallelCRC(Elaboratable):
+    """ Gateware that computes a running CRC over a stream of data words.
+
+    Attributes
+    ----------
+    clear: Signal(), input
+        Strobe; restores the CRC to its initial value.
+    data: Signal(data_width), input
+        The data word to be added to our CRC.
+    advance: Signal(), input
+        When asserted, the current data word is added to our CRC.
+    crc: Signal(width), output
+        The current contents of our CRC register. Many CRCs expect this to be inverted and/or
+        bit-reversed before it's transmitted.
+
+    Parameters
+    ----------
+    width: int
+        The width of the CRC.
+    polynomial: int
+        The CRC's polynomial, without its implicit ``x^width`` term.
+    data_width: int
+        The width of each data word; e.g. 8, 16, 32, 64 or 128 bits.
+    initial_value: int
+        The value our CRC register holds after a ``clear``.
+    data_msb_first: bool
+        If true, the most significant bit of each data word is treated as its first bit.
+    pipelined: bool
+        If true, the data-dependent part of each update is computed and registered a cycle before it's
+        applied; so only the state-dependent part remains in the CRC's feedback path. This shortens the
+        critical path at wide data widths, at the cost of delaying ``crc`` by one cycle.
+    domain: str
+        The name of the domain in which this CRC operates. Defaults to "sync".
+    """
+
+    def __init__(self, *, width, polynomial, data_width, initial_value=0, data_msb_first=False,
+            pipelined=False, domain="sync"):
+
+        self._matrix        = LFSRMatrix(width=width, polynomial=polynomial, data_width=data_width,
+            data_msb_first=data_msb_first)
+        self._initial_value = initial_value
+        self._pipelined     = pipelined
+        self._domain        = domain
+
+        #
+        # I/O port
+        #
+        self.clear   = Signal()
+        self.data    = Signal(data_width)
+        self.advance = Signal()
+        self.crc     = Signal(width, init=initial_value)
+
+
+    def elaborate(self, platform):
+        m = Module()
+
+        matrix = self._matrix
+
+        if self._pipelined:
+
+            # Compute the data-dependent part of our update a cycle early...
+            data_term = Signal(matrix.width)
+            clear     = Signal()
+            advance   = Signal()
+            m.d.sync += [
+                data_term  .eq(matrix.data_term(self.data)),
+                clear      .eq(self.clear),
+                advance    .eq(self.advance),
+            ]
+
+            # ... so only the state-dependent part remains in our feedback path.
+            next_crc = matrix.state_term(self.crc) ^ data_term
+        else:
+            clear    = self.clear
+            advance  = self.advance
+            next_crc = matrix.next_state(self.crc, self.data)
+
+        with m.If(clear):
+            m.d.sync += self.crc.eq(self._initial_value)
+        with m.Elif(advance):
+            m.d.sync += self.crc.eq(next_crc)
+
+
+        # If we're operating in a domain other than sync, replace 'sync' with it.
+        if self._domain != "sync":
+            m = DomainRenamer(self._domain)(m)
+
+        return m
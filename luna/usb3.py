@@ -8,6 +8,6 @@
 # Create shorthands for the most common parts of the library's usb3 gateware.
 from .gateware.usb.usb3.device              import USBSuperSpeedDevice
 from .gateware.usb.usb3.application.request import SuperSpeedRequestHandlerInterface, SuperSpeedRequestHandler
-from .gateware.usb.usb3.endpoints.stream    import SuperSpeedStreamInEndpoint
+from .gateware.usb.usb3.endpoints.stream    import SuperSpeedStreamInEndpoint, SuperSpeedStreamOutEndpoint
 
 __all__ = ['USBSuperSpeedDevice', 'SuperSpeedRequestHandler']
@@ -0,0 +1,92 @@
+#
+# This file is part of LUNA.
+#
+# Copyright (c) 2020 Great Scott Gadgets <info@greatscottgadgets.com>
+# SPDX-License-Identifier: BSD-3-Clause
+
+import os
+import shutil
+import tempfile
+
+from unittest import TestCase, skipUnless
+
+from amaranth import Module, Signal
+
+from luna.gateware.test.benchmark import (
+    SimulationBenchmark, find_regressions, save_baseline, load_baseline, measure_nak_rate,
+    measure_endpoint_multiplexer
+)
+
+
+def _counter():
+    m = Module()
+    counter = Signal(8)
+    m.d.sync += counter.eq(counter + 1)
+    return m
+
+
+class SimulationBenchmarkTest(TestCase):
+
+    def test_measurement(self):
+        benchmark = SimulationBenchmark("counter", _counter, cycles=100)
+        result = benchmark.measure(repeat=2)
+
+        self.assertEqual(result['simulated_cycles'], 100)
+        for metric in ('elaboration_time', 'construction_time', 'simulation_time', 'cycles_per_second'):
+            self.assertGreater(result[metric], 0)
+
+
+    def test_baseline_round_trip(self):
+        results = {"counter": {'elaboration_time': 1.0, 'construction_time': 2.0, 'cycles_per_second': 1000}}
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "baseline.json")
+            save_baseline(filename, results)
+            self.assertEqual(load_baseline(filename), results)
+
+
+    def test_regression_detection(self):
+        baseline = {
+            "counter": {'elaboration_time': 1.0, 'construction_time': 2.0, 'cycles_per_second': 1000},
+            "removed": {'elaboration_time': 1.0, 'construction_time': 2.0, 'cycles_per_second': 1000},
+        }
+        results  = {
+            "counter": {'elaboration_time': 1.1, 'construction_time': 3.0, 'cycles_per_second': 500},
+            "added":   {'elaboration_time': 9.0, 'construction_time': 9.0, 'cycles_per_second': 1},
+        }
+
+        regressions = find_regressions(baseline, results, tolerance=0.25)
+        self.assertEqual(regressions, [
+            ("counter", 'construction_time', 2.0, 3.0),
+            ("counter", 'cycles_per_second', 1000, 500),
+        ])
+
+
+
+class NAKRateBenchmarkTest(TestCase):
+
+    def test_no_naks_without_jitter(self):
+        result = measure_nak_rate(max_packet_size=16, packets=8)
+        self.assertEqual(result['in_tokens'], 8)
+        self.assertEqual(result['nak_rate'], 0)
+
+
+    def test_additional_buffers_absorb_jitter(self):
+        double_buffered = measure_nak_rate(packet_buffers=2, max_stall=32, max_packet_size=16, packets=16)
+        quad_buffered   = measure_nak_rate(packet_buffers=4, max_stall=32, max_packet_size=16, packets=16)
+
+        self.assertGreater(double_buffered['naks'], 0)
+        self.assertLess(quad_buffered['naks'], double_buffered['naks'])
+
+
+
+@skipUnless(os.getenv("YOSYS") or shutil.which("yosys") or shutil.which("yowasp-yosys"), "requires Yosys")
+class EndpointMultiplexerBenchmarkTest(TestCase):
+
+    def test_registered_output(self):
+        combinational = measure_endpoint_multiplexer(4)
+        registered    = measure_endpoint_multiplexer(4, registered_output=True)
+
+        self.assertGreater(combinational['luts'], 0)
+        self.assertGreater(combinational['logic_depth'], 0)
+        self.assertGreater(registered['flip_flops'], combinational['flip_flops'])
@@ -0,0 +1,87 @@
+#
+# This file is part of LUNA.
+#
+# Copyright (c) 2025 Great Scott Gadgets <info@greatscottgadgets.com>
+# SPDX-License-Identifier: BSD-3-Clause
+
+import os
+import time
+import tempfile
+
+from unittest import TestCase
+
+from amaranth.build.run import BuildPlan
+
+from luna.gateware.platform.cache import BuildCache
+
+
+class _StubPlatform:
+    """ Stand-in for a platform; with no toolchain to query. """
+    device         = "LFE5U-12F"
+    package        = "BG256"
+    required_tools = ()
+
+
+class BuildCacheTest(TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.cache = BuildCache(os.path.join(self._directory.name, "cache"), max_entries=2)
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+
+    def plan_for(self, design):
+        """ Creates a build plan for a (fake) design. """
+        plan = BuildPlan(script="build_top")
+        plan.add_file("top.il", design)
+        return plan
+
+
+    def store_build(self, key, bitstream):
+        """ Stores a fake build, producing the given bitstream, under the given key. """
+        with tempfile.TemporaryDirectory() as build_dir:
+            with open(os.path.join(build_dir, "top.bit"), "wb") as f:
+                f.write(bitstream)
+
+            return self.cache.store(key, build_dir)
+
+
+    def test_keys(self):
+        platform = _StubPlatform()
+
+        # Identical designs should share a key...
+        key = self.cache.key_for(platform, self.plan_for("design"))
+        self.assertEqual(key, self.cache.key_for(platform, self.plan_for("design")))
+
+        # ... while changes to the design or the target part should not.
+        self.assertNotEqual(key, self.cache.key_for(platform, self.plan_for("other design")))
+
+        platform.device = "LFE5U-25F"
+        self.assertNotEqual(key, self.cache.key_for(platform, self.plan_for("design")))
+
+
+    def test_store_and_lookup(self):
+        self.assertIsNone(self.cache.lookup("abc"))
+
+        products = self.store_build("abc", b"bitstream")
+        self.assertEqual(products.get("top.bit"), b"bitstream")
+        self.assertEqual(self.cache.lookup("abc").get("top.bit"), b"bitstream")
+
+
+    def test_lru_eviction(self):
+        self.store_build("first",  b"1")
+        self.store_build("second", b"2")
+
+        # Mark our first build as used more recently than our second...
+        past = time.time() - 10
+        os.utime(os.path.join(self.cache.directory, "second"), (past, past))
+        os.utime(os.path.join(self.cache.directory, "first"),  (past + 5, past + 5))
+
+        # ... so it's our second, least-recently-used build that's evicted once we exceed our limit.
+        self.store_build("third", b"3")
+
+        self.assertIsNotNone(self.cache.lookup("first"))
+        self.assertIsNone(self.cache.lookup("second"))
+        self.assertIsNotNone(self.cache.lookup("third"))
@@ -0,0 +1,87 @@
+#
+# This file is part of LUNA.
+#
+# Copyright (c) 2025 Great Scott Gadgets <info@greatscottgadgets.com>
+# SPDX-License-Identifier: BSD-3-Clause
+
+import os
+import tempfile
+
+from unittest import TestCase
+
+from amaranth           import Module
+from amaranth.build.run import BuildPlan
+
+from luna.gateware.platform.matrix import BuildMatrixJob, parse_nextpnr_log, run_build_matrix
+
+
+NEXTPNR_LOG = """\
+Info: Max frequency for clock '$glbnet$clk': 71.02 MHz (PASS at 60.00 MHz)
+Info: Device utilisation:
+Info: \t          TRELLIS_SLICE:   120/12144     0%
+Info: \t             DP16KD:     4/   56     7%
+Info: Max frequency for clock '$glbnet$clk': 84.75 MHz (PASS at 60.00 MHz)
+"""
+
+
+def _design():
+    return Module()
+
+
+class _StubPlatform:
+    """ Stand-in for a platform, whose 'toolchain' just produces a canned nextpnr log. """
+
+    device = "LFE5U-12F"
+
+    def has_required_tools(self):
+        return True
+
+    def build(self, design, *, do_build):
+        plan = BuildPlan(script="build_top")
+        plan.add_file("build_top.sh", f"cat > top.tim <<'EOF'\n{NEXTPNR_LOG}EOF\necho {self.device}\n")
+        return plan
+
+
+class _FailingPlatform(_StubPlatform):
+
+    def build(self, design, *, do_build):
+        plan = BuildPlan(script="build_top")
+        plan.add_file("build_top.sh", "exit 1\n")
+        return plan
+
+
+class BuildMatrixTest(TestCase):
+
+    def test_log_parsing(self):
+        results = parse_nextpnr_log(NEXTPNR_LOG)
+
+        # We should keep only our final Fmax report, and every cell type's utilization.
+        self.assertEqual(results['fmax'], {'$glbnet$clk': 84.75})
+        self.assertEqual(results['utilization'], {'TRELLIS_SLICE': (120, 12144), 'DP16KD': (4, 56)})
+
+
+    def test_matrix(self):
+        jobs = [
+            BuildMatrixJob(f"{__name__}:_design", f"{__name__}:_StubPlatform"),
+            BuildMatrixJob(f"{__name__}:_design", f"{__name__}:_StubPlatform", fpga="LFE5U-25F"),
+            BuildMatrixJob(f"{__name__}:_design", f"{__name__}:_FailingPlatform"),
+            BuildMatrixJob(f"{__name__}:_missing_design", f"{__name__}:_StubPlatform", fpga="LFE5U-45F"),
+        ]
+
+        with tempfile.TemporaryDirectory() as build_root:
+            results = run_build_matrix(jobs, concurrency=2, build_root=build_root)
+
+            # Each successful job should have been built in its own directory, for its own part...
+            with open(os.path.join(build_root, jobs[1].name, "build.log")) as f:
+                self.assertEqual(f.read().strip(), "LFE5U-25F")
+
+        # ... and have its results collected.
+        for job in jobs[:2]:
+            result = results[job.name]
+            self.assertTrue(result['success'])
+            self.assertEqual(result['fmax'], {'$glbnet$clk': 84.75})
+            self.assertGreaterEqual(result['build_time'], 0)
+
+        # Failed toolchain runs and elaborations should be reported, rather than ending our matrix.
+        self.assertFalse(results[jobs[2].name]['success'])
+        self.assertFalse(results[jobs[3].name]['success'])
@@ -0,0 +1,126 @@
+#
+# This file is part of LUNA.
+#
+# Copyright (c) 2020 Great Scott Gadgets <info@greatscottgadgets.com>
+# SPDX-License-Identifier: BSD-3-Clause
+
+import random
+
+from unittest import TestCase
+
+import numpy
+
+from amaranth import Elaboratable, Module, Signal
+
+from luna.gateware.test         import LunaGatewareTestCase, sync_test_case
+from luna.gateware.test.usb2    import USBDeviceTest, token_packet_octets, data_packet_octets, handshake_packet_octets, crc16_octets
+from luna.gateware.test.contrib import crc, usb_packet
+from luna.gateware.usb.usb2     import USBPacketID
+
+
+class _Counter(Elaboratable):
+    def __init__(self):
+        self.count = Signal(8)
+
+    def elaborate(self, platform):
+        m = Module()
+        m.d.sync += self.count.eq(self.count + 1)
+        return m
+
+
+class CachedElaborationTest(LunaGatewareTestCase):
+    FRAGMENT_UNDER_TEST = _Counter
+    CACHE_ELABORATION = True
+
+    # Shared across our tests, so we can check that they share a DUT.
+    duts = []
+
+    def instantiate_dut(self):
+        self.instantiated = True
+        return super().instantiate_dut()
+
+
+    def check_fresh_simulation(self):
+        self.assertTrue(self.instantiated)
+
+        # Each test should see the same DUT...
+        self.duts.append(self.dut)
+        self.assertIs(self.duts[0], self.dut)
+
+        # ... but in its initial state.
+        self.assertEqual((yield self.dut.count), 0)
+        yield from self.advance_cycles(10)
+        self.assertEqual((yield self.dut.count), 10)
+
+
+    @sync_test_case
+    def test_first(self):
+        yield from self.check_fresh_simulation()
+
+
+    @sync_test_case
+    def test_second(self):
+        yield from self.check_fresh_simulation()
+
+
+class USBPacketOctetsTest(TestCase):
+    """ Checks our octet-level packet builders against the bit-level contrib library. """
+
+    def test_token_packets(self):
+        for pid in (USBPacketID.OUT, USBPacketID.IN, USBPacketID.SETUP):
+            for address, endpoint in ((0, 0), (0x3a, 0xa), (0x70, 0xa), (127, 15)):
+                bits = usb_packet.token_packet(pid, address, endpoint)
+                self.assertEqual(list(token_packet_octets(pid, address, endpoint)), USBDeviceTest.bits_to_octets(bits))
+
+
+    def test_data_packets(self):
+        for payload in ([], [0x01], [0x80, 0x06, 0x03, 0x03, 0x09, 0x04, 0x00, 0x02], list(range(64))):
+            bits = usb_packet.data_packet(USBPacketID.DATA1, payload)
+            self.assertEqual(data_packet_octets(USBPacketID.DATA1, payload), USBDeviceTest.bits_to_octets(bits))
+            self.assertEqual(crc16_octets(payload), usb_packet.crc16(payload))
+
+
+    def test_handshake_packets(self):
+        for pid in (USBPacketID.ACK, USBPacketID.NAK, USBPacketID.STALL):
+            bits = usb_packet.handshake_packet(pid)
+            self.assertEqual(handshake_packet_octets(pid), USBDeviceTest.bits_to_octets(bits))
+
+
+class ReferenceCRCTest(TestCase):
+    """ Checks our table-driven reference CRCs against bit-at-a-time computation. """
+
+    ALGORITHMS = (crc.CRC5_USB, crc.CRC8_SMBUS, crc.CRC15, crc.CRC16_USB, crc.CRC16_USB3, crc.CRC_CCITT, crc.CRC32)
+
+    @staticmethod
+    def bitwise_crc(algorithm, words, width):
+        register = crc.CrcRegister(algorithm)
+
+        for word in words:
+            bits = range(width) if register.lsbFirstData else reversed(range(width))
+            for bit in bits:
+                register.takeBit((word >> bit) & 1)
+
+        return register.getFinalValue()
+
+
+    def test_words(self):
+        rng = random.Random(0)
+
+        for algorithm in self.ALGORITHMS:
+            for width in (4, 8, 11, 16, 32):
+                words = [rng.getrandbits(width) for _ in range(8)]
+
+                register = crc.CrcRegister(algorithm)
+                for word in words:
+                    register.takeWord(word, width)
+
+                self.assertEqual(register.getFinalValue(), self.bitwise_crc(algorithm, words, width), algorithm.name)
+
+
+    def test_arrays(self):
+        rng  = numpy.random.default_rng(0)
+        data = rng.integers(0, 256, size=(32, 20), dtype=numpy.uint8)
+
+        for algorithm in self.ALGORITHMS:
+            expected = [algorithm.calcBytes(row.tolist()) for row in data]
+            self.assertEqual(algorithm.calcArray(data).tolist(), expected, algorithm.name)
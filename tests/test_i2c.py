@@ -27,6 +27,7 @@ class I2CInitiatorTestbench(I2CInitiator):
 class TestI2CInitiator(LunaGatewareTestCase):
     FRAGMENT_UNDER_TEST = I2CInitiatorTestbench
     FRAGMENT_ARGUMENTS = { "pads": I2CBus(), "period_cyc": 16 }
+    CACHE_ELABORATION = True
 
     def wait_condition(self, strobe):
         yield from self.wait_until(strobe, timeout=3*self.dut.period_cyc)
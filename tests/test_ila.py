@@ -6,8 +6,18 @@
 from luna.gateware.interface.spi import SPIGatewareTestCase
 from luna.gateware.test import LunaGatewareTestCase, sync_test_case
 
-from amaranth import Signal, Cat
-from luna.gateware.debug.ila import IntegratedLogicAnalyzer, StreamILA, SyncSerialILA
+import os
+import tempfile
+
+from unittest import TestCase
+from vcd.reader import tokenize, TokenKind
+
+from amaranth import Signal, Cat, Module
+from luna.gateware.debug.ila import IntegratedLogicAnalyzer, StreamILA, SyncSerialILA, ContinuousStreamILA, ILATrigger
+from luna.gateware.debug.ila import HyperRAMStreamILA
+from luna.gateware.interface.psram import HyperBusPHY, HyperRAMInterface
+from luna.gateware.test.hyperram import HyperRAMSimulationModel
+from luna.gateware.debug.ila import ILAFrontend, ILARingBuffer
 
 class IntegratedLogicAnalyzerTest(LunaGatewareTestCase):
 
@@ -107,6 +117,161 @@ class IntegratedLogicAnalyzerTest(LunaGatewareTestCase):
         self.assertEqual((yield self.dut.complete), 1)
 
 
+class CompressedIntegratedLogicAnalyzerTest(IntegratedLogicAnalyzerTest):
+
+    def instantiate_dut(self):
+        self.input_a = Signal()
+        self.input_b = Signal(30)
+        self.input_c = Signal()
+
+        return IntegratedLogicAnalyzer(
+            signals=[self.input_a, self.input_b, self.input_c],
+            sample_depth = 8,
+            compress     = True,
+            delta_width  = 4
+        )
+
+
+    @sync_test_case
+    def test_sampling(self):
+        yield from self.provide_all_signals(0x11111111)
+        yield
+
+        # Trigger our capture; and then provide a set of values that change
+        # only occasionally, each of which is held for a given number of cycles.
+        held_values = [
+            (0x11111111, 1),
+            (0x22222222, 3),
+            (0x33333333, 1),
+            (0x44444444, 20),
+            (0x55555555, 2),
+        ]
+
+        yield from self.pulse(self.dut.trigger, step_after=False)
+        for value, cycles in held_values:
+            yield from self.provide_all_signals(value)
+            yield from self.advance_cycles(cycles)
+
+        # We should still be sampling, as we've only seen a few changes...
+        self.assertEqual((yield self.dut.sampling), 1)
+
+        # ... and a change that's held for longer than our delta can represent
+        # should have been split into repeated samples.
+        expected = [
+            (0x11111111, 0),
+            (0x22222222, 2),
+            (0x33333333, 3),
+            (0x44444444, 1),
+            (0x44444444, 15),
+            (0x55555555, 5),
+        ]
+        for i, (value, delta) in enumerate(expected):
+            yield from self.assert_sample_value(i, value | (delta << 32))
+
+
+
+class CircularPretriggerILATest(LunaGatewareTestCase):
+
+    def instantiate_dut(self):
+        self.input_signal = Signal(8)
+
+        return IntegratedLogicAnalyzer(
+            signals=[self.input_signal],
+            sample_depth     = 16,
+            pretrigger_depth = 6,
+            trigger_stages   = 1,
+        )
+
+
+    def assert_sample_value(self, address, value):
+        yield self.dut.captured_sample_number.eq(address)
+        yield
+        yield
+        self.assertEqual((yield self.dut.captured_sample), value, f"wrong sample at {address}")
+
+
+    @sync_test_case
+    def test_pretrigger_capture(self):
+        stage = self.dut.trigger_unit.stages[0]
+
+        # Configure our trigger unit to fire on a specific value.
+        yield stage.value .eq(40)
+        yield stage.mask  .eq(0xFF)
+        yield from self.pulse(self.dut.arm)
+
+        # Provide an incrementing count; which will trigger us partway through.
+        for i in range(64):
+            yield self.input_signal.eq(i)
+            yield
+
+        self.assertEqual((yield self.dut.complete), 1)
+        self.assertEqual((yield self.dut.armed), 0)
+
+        # Our capture should include the samples that led up to our trigger.
+        for i in range(16):
+            yield from self.assert_sample_value(i, 34 + i)
+
+        # Once we're re-armed, we should be able to trigger again.
+        yield from self.pulse(self.dut.arm)
+        yield from self.advance_cycles(8)
+        self.assertEqual((yield self.dut.armed), 1)
+        self.assertEqual((yield self.dut.complete), 0)
+
+
+class ILATriggerTest(LunaGatewareTestCase):
+
+    def instantiate_dut(self):
+        return ILATrigger(sample_width=8, stage_count=2)
+
+
+    def provide_samples(self, samples):
+        """ Provides a sequence of samples; and returns the cycles on which we were disarmed. """
+        disarmed_at = []
+
+        for i, sample in enumerate(samples):
+            yield self.dut.inputs.eq(sample)
+            yield
+
+            if not (yield self.dut.armed):
+                disarmed_at.append(i)
+
+        return disarmed_at
+
+
+    @sync_test_case
+    def test_sequence(self):
+        first, second = self.dut.stages
+
+        # Our first stage matches a fixed value...
+        yield first.value      .eq(0x10)
+        yield first.mask       .eq(0xFF)
+
+        # ... and our second matches the second rising edge of our top bit.
+        yield second.value     .eq(0x80)
+        yield second.mask      .eq(0x80)
+        yield second.edge_mask .eq(0x80)
+        yield second.count     .eq(2)
+
+        yield self.dut.active_stages.eq(2)
+        yield from self.pulse(self.dut.arm)
+
+        # A rising edge before our first stage completes shouldn't count...
+        disarmed_at = yield from self.provide_samples([0x00, 0x80, 0x00, 0x10, 0x80, 0x80, 0x00])
+        self.assertEqual(disarmed_at, [])
+        self.assertEqual((yield self.dut.stage), 1)
+
+        # ... and our trigger should fire on the second edge after it.
+        disarmed_at = yield from self.provide_samples([0x80, 0x00, 0x00])
+        self.assertEqual(disarmed_at, [1, 2])
+        self.assertEqual((yield self.dut.stage), 0)
+
+        # Re-arming should restart our sequence.
+        yield from self.pulse(self.dut.arm)
+        yield
+        self.assertEqual((yield self.dut.armed), 1)
+
+
+
 class SyncSerialReadoutILATest(SPIGatewareTestCase):
 
     def instantiate_dut(self):
@@ -205,3 +370,391 @@ class StreamILATest(LunaGatewareTestCase):
         # Match read data to what should have been sampled
         for i, datum in enumerate(data):
             self.assertEqual(datum, 0xF00 | i)
+
+
+class StreamILATriggerTest(LunaGatewareTestCase):
+    """ Checks which sample our triggers land on; with our inputs passing through a synchronizer. """
+
+    SAMPLES_PRETRIGGER = 3
+    PRETRIGGER_DEPTH   = 0
+
+    def instantiate_dut(self):
+        self.input_signal = Signal(8)
+        return StreamILA(
+            signals=[self.input_signal],
+            sample_depth=8,
+            samples_pretrigger=self.SAMPLES_PRETRIGGER,
+            pretrigger_depth=self.PRETRIGGER_DEPTH,
+            trigger_stages=1,
+        )
+
+    def capture(self, *, trigger_at=None):
+        """ Provides an incrementing count, optionally pulsing our trigger at a given count; and returns the samples sent. """
+        stream  = self.dut.stream
+        samples = []
+
+        yield stream.ready.eq(1)
+
+        for i in range(64):
+            yield self.input_signal.eq(i)
+            yield self.dut.trigger.eq(i == trigger_at)
+            yield
+
+            if (yield stream.valid):
+                samples.append((yield stream.payload))
+                if (yield stream.last):
+                    break
+
+        return samples
+
+
+    @sync_test_case
+    def test_trigger_unit_sample(self):
+        stage = self.dut.trigger_unit.stages[0]
+
+        # Have our trigger unit fire on a specific value...
+        yield stage.value .eq(20)
+        yield stage.mask  .eq(0xFF)
+        yield from self.pulse(self.dut.arm)
+
+        # ... which should be the first sample after our pre-trigger buffer.
+        samples = yield from self.capture()
+        self.assertEqual(len(samples), 8)
+        self.assertEqual(samples[self.PRETRIGGER_DEPTH], 20)
+        self.assertEqual(samples, list(range(20 - self.PRETRIGGER_DEPTH, 28 - self.PRETRIGGER_DEPTH)))
+
+
+    @sync_test_case
+    def test_trigger_input_sample(self):
+
+        # Our trigger input is read on the rising edge of our clock, after our inputs have passed
+        # through our synchronizer; so the sample captured alongside our trigger strobe is taken
+        # ``samples_pretrigger - 1`` samples into our capture.
+        yield from self.advance_cycles(self.PRETRIGGER_DEPTH + 1)
+        samples = yield from self.capture(trigger_at=20)
+        self.assertEqual(len(samples), 8)
+        self.assertEqual(samples[self.PRETRIGGER_DEPTH + self.SAMPLES_PRETRIGGER - 1], 20)
+
+
+class CircularStreamILATriggerTest(StreamILATriggerTest):
+    PRETRIGGER_DEPTH = 4
+
+
+
+class ContinuousStreamILATest(LunaGatewareTestCase):
+
+    def instantiate_dut(self):
+        self.input_signal = Signal(12)
+        return ContinuousStreamILA(
+            signals=[self.input_signal],
+            sample_depth=4,
+            samples_pretrigger=0
+        )
+
+    @sync_test_case
+    def test_continuous_readout(self):
+        stream = self.dut.stream
+
+        # Start sampling, and provide an incrementing sample each cycle,
+        # while reading them out as fast as they arrive.
+        yield stream.ready.eq(1)
+        yield from self.pulse(self.dut.trigger)
+        self.assertEqual((yield self.dut.sampling), 1)
+
+        received = []
+        for i in range(1, 32):
+            yield self.input_signal.eq(i)
+            yield
+            if (yield stream.valid):
+                received.append((yield stream.payload))
+
+        # Our stream should carry a contiguous run of samples, with nothing dropped.
+        self.assertGreater(len(received), 24)
+        self.assertEqual(received, list(range(received[0], received[0] + len(received))))
+        self.assertEqual((yield self.dut.dropped_samples), 0)
+
+    @sync_test_case
+    def test_overflow_counting(self):
+        stream = self.dut.stream
+
+        # Start sampling with our stream stalled; our FIFO should fill...
+        yield stream.ready.eq(0)
+        yield from self.pulse(self.dut.trigger)
+        yield from self.advance_cycles(16)
+
+        # ... and any samples beyond its depth should be counted as dropped.
+        dropped = (yield self.dut.dropped_samples)
+        self.assertGreater(dropped, 8)
+
+        # Once we stop sampling, we should stop dropping samples.
+        yield from self.pulse(self.dut.stop)
+        dropped = (yield self.dut.dropped_samples)
+        yield from self.advance_cycles(4)
+        self.assertEqual((yield self.dut.dropped_samples), dropped)
+        self.assertEqual((yield self.dut.sampling), 0)
+
+
+
+class HyperRAMStreamILATest(LunaGatewareTestCase):
+
+    SIGNAL_WIDTH  = 12
+    SAMPLE_DEPTH  = 40
+    STAGING_DEPTH = 64
+
+    def instantiate_dut(self):
+        m = Module()
+
+        # Create an ILA that stores its samples in a simulated RAM chip.
+        phy = HyperBusPHY()
+        self.input_signal = Signal(self.SIGNAL_WIDTH)
+        self.ila = HyperRAMStreamILA(
+            signals=[self.input_signal],
+            sample_depth=self.SAMPLE_DEPTH,
+            ram=HyperRAMInterface(phy=phy),
+            samples_pretrigger=0,
+            staging_depth=self.STAGING_DEPTH,
+            burst_length=8,
+        )
+
+        m.submodules.ila  = self.ila
+        m.submodules.chip = HyperRAMSimulationModel(phy=phy, depth=1024)
+        return m
+
+
+    def capture(self):
+        """ Triggers a capture of an incrementing count; and returns the samples read back out. """
+        stream = self.ila.stream
+
+        # Trigger our ILA, providing a new sample each cycle.
+        yield self.ila.trigger.eq(1)
+        for i in range(self.SAMPLE_DEPTH):
+            yield self.input_signal.eq(i + 1)
+            yield
+            yield self.ila.trigger.eq(0)
+
+        # Read out our samples, checking the capture is delimited.
+        samples = []
+        yield stream.ready.eq(1)
+        for _ in range(5000):
+            yield
+            if (yield stream.valid):
+                if not samples:
+                    self.assertEqual((yield stream.first), 1)
+                samples.append((yield stream.payload))
+                if (yield stream.last):
+                    break
+        yield stream.ready.eq(0)
+
+        return samples
+
+
+    @sync_test_case
+    def test_capture_readback(self):
+        self.assertEqual((yield self.ila.armed), 1)
+
+        # Our capture should contain each of our samples, in order...
+        samples = yield from self.capture()
+        self.assertEqual(samples, list(range(1, self.SAMPLE_DEPTH + 1)))
+        self.assertEqual((yield self.ila.overflow), 0)
+
+        # ... and we should be ready for another capture.
+        yield from self.advance_cycles(4)
+        self.assertEqual((yield self.ila.armed), 1)
+        self.assertEqual((yield from self.capture()), samples)
+
+
+class WideHyperRAMStreamILATest(HyperRAMStreamILATest):
+    """ Checks that samples wider than a RAM word are split across words, and reassembled. """
+    SIGNAL_WIDTH  = 20
+
+
+class HyperRAMStreamILAOverflowTest(HyperRAMStreamILATest):
+
+    STAGING_DEPTH = 8
+
+    @sync_test_case
+    def test_capture_readback(self):
+
+        # If our RAM can't keep up with our samples, our capture should retain its length...
+        samples = yield from self.capture()
+        self.assertEqual(len(samples), self.SAMPLE_DEPTH)
+
+        # ... with any samples we dropped padded at its end.
+        self.assertEqual((yield self.ila.overflow), 1)
+        self.assertEqual(samples[-1], 0)
+
+
+class ILARingBufferTest(TestCase):
+
+    def setUp(self):
+        self.ring = ILARingBuffer(capacity=4, bytes_per_sample=2)
+
+    def tearDown(self):
+        self.ring.close()
+
+    def test_wraparound(self):
+        self.assertTrue(self.ring.write(b"\x00\x01\x02\x03\x04\x05"))
+        self.assertEqual(self.ring.read(2), b"\x00\x01\x02\x03")
+
+        # This write must wrap around the end of our storage.
+        self.assertTrue(self.ring.write(b"\x06\x07\x08\x09\x0a\x0b"))
+        self.assertEqual(len(self.ring), 4)
+        self.assertEqual(self.ring.read(4), b"\x04\x05\x06\x07\x08\x09\x0a\x0b")
+
+    def test_back_pressure(self):
+        self.assertTrue(self.ring.write(bytes(8)))
+
+        # A full buffer should refuse data until it's drained...
+        self.assertFalse(self.ring.write(b"\xff\xff", timeout=0.01))
+        self.assertEqual(self.ring.stalls, 1)
+
+        # ... and accept it once there's room.
+        self.ring.read(1)
+        self.assertTrue(self.ring.write(b"\xff\xff", timeout=0.01))
+        self.assertEqual(self.ring.overwritten_samples, 0)
+
+    def test_overwrite(self):
+        self.ring.write(b"\x00\x00\x01\x01\x02\x02\x03\x03")
+        self.ring.write(b"\x04\x04", overwrite=True)
+
+        # Our oldest sample should have been replaced with our newest one.
+        self.assertEqual(self.ring.overwritten_samples, 1)
+        self.assertEqual(self.ring.read(4), b"\x01\x01\x02\x02\x03\x03\x04\x04")
+
+    def test_read_timeout(self):
+        self.ring.write(b"\x00\x01")
+        self.assertEqual(self.ring.read(2, timeout=0.01), b"\x00\x01")
+
+
+class ILAFrontendTest(TestCase):
+
+    class _BufferFrontend(ILAFrontend):
+        """ Minimal frontend that provides a fixed buffer of samples. """
+
+        def __init__(self, ila, buffer, *, byteorder):
+            self.SAMPLE_BYTEORDER = byteorder
+            self._buffer = buffer
+            super().__init__(ila)
+
+        def _read_sample_buffer(self):
+            return self._buffer
+
+        def _read_samples(self):
+            raise AssertionError("frontend should decode from the raw sample buffer")
+
+
+    class _SampleFrontend(ILAFrontend):
+        """ Minimal frontend that provides an iterable of integer samples. """
+
+        def __init__(self, ila, samples):
+            self._samples = samples
+            super().__init__(ila)
+
+        def _read_samples(self):
+            return self._samples
+
+
+    def setUp(self):
+        self.input_a = Signal()
+        self.input_b = Signal(70)
+        self.input_c = Signal(9)
+
+        self.ila = StreamILA(
+            signals=[self.input_a, self.input_b, self.input_c],
+            sample_depth=4
+        )
+        self.sample_length = len(Cat(self.ila.signals))
+
+        # Generate a handful of samples that exercise every bit of each signal.
+        self.expected = [
+            (1, (1 << 70) - 1, 0x155),
+            (0, 0x2A_DEAD_BEEF_CAFE_F00D, 0x0AA),
+            (1, 0x1,                      0x1FF),
+            (0, 0x0,                      0x000),
+        ]
+        self.raw_samples = [a | (b << 1) | (c << 71) for a, b, c in self.expected]
+
+
+    def assert_columns_match(self, frontend):
+        columns = frontend._sample_columns()
+
+        for index, (a, b, c) in enumerate(self.expected):
+            self.assertEqual(int(columns[self.input_a.name][index]), a)
+            self.assertEqual(int(columns[self.input_b.name][index]), b)
+            self.assertEqual(int(columns[self.input_c.name][index]), c)
+
+        samples = [sample for _, sample in frontend.enumerate_samples()]
+        self.assertEqual(len(samples), len(self.expected))
+        self.assertEqual(samples[1][self.input_b.name], self.expected[1][1])
+
+
+    def test_little_endian_buffer(self):
+        buffer = b"".join(sample.to_bytes(self.ila.bytes_per_sample, 'little') for sample in self.raw_samples)
+        self.assert_columns_match(self._BufferFrontend(self.ila, buffer, byteorder='little'))
+
+
+    def test_big_endian_buffer(self):
+        buffer = b"".join(sample.to_bytes(self.ila.bytes_per_sample, 'big') for sample in self.raw_samples)
+        self.assert_columns_match(self._BufferFrontend(self.ila, buffer, byteorder='big'))
+
+
+    def test_sample_iterable(self):
+        self.assert_columns_match(self._SampleFrontend(self.ila, self.raw_samples))
+
+
+    def test_samples_compatibility_property(self):
+        frontend = self._SampleFrontend(self.ila, self.raw_samples)
+
+        # We shouldn't have any samples until we've read some...
+        self.assertIsNone(frontend.samples)
+
+        # ... after which, they should be available as a list of per-sample dictionaries.
+        frontend.refresh()
+        self.assertEqual(len(frontend.samples), len(self.expected))
+        for sample, (a, b, c) in zip(frontend.samples, self.expected):
+            self.assertEqual(sample, {self.input_a.name: a, self.input_b.name: b, self.input_c.name: c})
+
+
+    def test_compressed_timestamps(self):
+        ila = StreamILA(
+            signals=[self.input_a, self.input_b, self.input_c],
+            sample_depth=4,
+            compress=True,
+            delta_width=8
+        )
+
+        # Append a cycle-delta to each of our samples.
+        deltas = [0, 3, 1, 10]
+        raw_samples = [sample | (delta << 80) for sample, delta in zip(self.raw_samples, deltas)]
+        buffer = b"".join(sample.to_bytes(ila.bytes_per_sample, 'little') for sample in raw_samples)
+
+        frontend = self._BufferFrontend(ila, buffer, byteorder='little')
+        timestamps = [timestamp for timestamp, _ in frontend.enumerate_samples()]
+
+        # Our deltas should have been converted back into absolute timestamps,
+        # and shouldn't appear among our signals.
+        self.assertEqual(frontend.sample_times.tolist(), [0, 3, 4, 14])
+        self.assertAlmostEqual(timestamps[3], 14 * ila.sample_period)
+        self.assertNotIn(ILAFrontend.DELTA_FIELD, frontend.columns)
+
+
+    def test_vcd_contains_only_changes(self):
+        buffer = b"".join(sample.to_bytes(self.ila.bytes_per_sample, 'little') for sample in self.raw_samples)
+        frontend = self._BufferFrontend(self.ila, buffer, byteorder='little')
+
+        # Hold our first signal steady, so it should appear in the dump only once.
+        frontend._sample_columns()[self.input_a.name][:] = 1
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "capture.vcd")
+            frontend.emit_vcd(filename, add_clock=False)
+
+            with open(filename, 'rb') as f:
+                changes = {}
+                for token in tokenize(f):
+                    if token.kind in (TokenKind.CHANGE_SCALAR, TokenKind.CHANGE_VECTOR):
+                        changes.setdefault(token.data.id_code, []).append(token.data.value)
+
+        # Our steady signal should only be dumped once; and every other signal should
+        # change on every sample.
+        self.assertEqual(sorted(len(values) for values in changes.values()), [1, 4, 4])
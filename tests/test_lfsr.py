@@ -0,0 +1,72 @@
+#
+# This file is part of LUNA.
+#
+# Copyright (c) 2025 Great Scott Gadgets <info@greatscottgadgets.com>
+# SPDX-License-Identifier: BSD-3-Clause
+
+import zlib
+import random
+
+from unittest import TestCase
+
+from luna.gateware.test       import LunaGatewareTestCase, sync_test_case
+from luna.gateware.utils.lfsr import LFSRMatrix, ParallelCRC
+
+
+# The CRC-32 used by Ethernet, zlib, and USB3 data packet payloads.
+CRC32_POLYNOMIAL = 0x04C11DB7
+
+
+def _final_crc32(register):
+    """ Converts our running CRC-32 register into a standard CRC-32; as USB3 does. """
+    return int(f"{register:032b}"[::-1], 2) ^ 0xFFFFFFFF
+
+
+class LFSRMatrixTest(TestCase):
+
+    def test_crc32_at_each_width(self):
+        data = random.Random(0).randbytes(64)
+
+        for data_width in (8, 16, 32, 64, 128):
+            matrix   = LFSRMatrix(width=32, polynomial=CRC32_POLYNOMIAL, data_width=data_width)
+            register = 0xFFFFFFFF
+
+            for position in range(0, len(data), data_width // 8):
+                word     = int.from_bytes(data[position:position + data_width // 8], byteorder="little")
+                register = matrix.evaluate(register, word)
+
+            self.assertEqual(_final_crc32(register), zlib.crc32(data), f"incorrect CRC at {data_width} bits")
+
+
+    def test_data_width_is_limited_by_steps(self):
+        with self.assertRaises(ValueError):
+            LFSRMatrix(width=16, polynomial=0x8005, data_width=8, steps=4)
+
+
+
+class ParallelCRCTest(LunaGatewareTestCase):
+    FRAGMENT_UNDER_TEST = ParallelCRC
+    FRAGMENT_ARGUMENTS  = dict(width=32, polynomial=CRC32_POLYNOMIAL, data_width=64, initial_value=0xFFFFFFFF)
+
+    LATENCY = 1
+
+    @sync_test_case
+    def test_running_crc(self):
+        dut  = self.dut
+        data = random.Random(1).randbytes(64)
+
+        # Feed our data in, a word at a time...
+        yield dut.advance.eq(1)
+        for position in range(0, len(data), 8):
+            yield dut.data.eq(int.from_bytes(data[position:position + 8], byteorder="little"))
+            yield
+        yield dut.advance.eq(0)
+
+        # ... and check that we get the matching CRC.
+        yield from self.advance_cycles(self.LATENCY)
+        self.assertEqual(_final_crc32((yield dut.crc)), zlib.crc32(data))
+
+
+class PipelinedParallelCRCTest(ParallelCRCTest):
+    FRAGMENT_ARGUMENTS = dict(ParallelCRCTest.FRAGMENT_ARGUMENTS, pipelined=True)
+    LATENCY = 2
@@ -3,9 +3,13 @@
 #
 # Copyright (c) 2024 Great Scott Gadgets <info@greatscottgadgets.com>
 # SPDX-License-Identifier: BSD-3-Clause
-from luna.gateware.test import LunaGatewareTestCase, sync_test_case
+from amaranth import Module
 
-from luna.gateware.memory import TransactionalizedFIFO
+from luna.gateware.test           import LunaGatewareTestCase, sync_test_case
+from luna.gateware.test.hyperram  import HyperRAMSimulationModel
+
+from luna.gateware.interface.psram import HyperBusPHY, HyperRAMInterface
+from luna.gateware.memory          import TransactionalizedFIFO, HyperRAMFIFO
 
 class TransactionalizedFIFOTest(LunaGatewareTestCase):
     FRAGMENT_UNDER_TEST = TransactionalizedFIFO
@@ -125,3 +129,182 @@ class TransactionalizedFIFOTest(LunaGatewareTestCase):
         self.assertEqual((yield dut.empty),            1)
         self.assertEqual((yield dut.full),             0)
         self.assertEqual((yield dut.space_available),  16)
+
+
+
+class HyperRAMFIFOTest(LunaGatewareTestCase):
+
+    DEPTH        = 48
+    BURST_LENGTH = 8
+
+    def instantiate_dut(self):
+        m = Module()
+
+        # Create a HyperRAM-backed FIFO, and attach it to a simulated RAM chip.
+        phy = HyperBusPHY()
+        self.fifo = HyperRAMFIFO(ram=HyperRAMInterface(phy=phy), depth=self.DEPTH, burst_length=self.BURST_LENGTH)
+
+        m.submodules.fifo = self.fifo
+        m.submodules.chip = HyperRAMSimulationModel(phy=phy, depth=1024)
+        return m
+
+
+    def write_words(self, words):
+        """ Feeds a sequence of words into our FIFO; waiting for it to be ready for each. """
+        stream = self.fifo.input
+
+        yield stream.valid.eq(1)
+        for word in words:
+            yield stream.payload.eq(word)
+            yield
+            while not (yield stream.ready):
+                yield
+        yield stream.valid.eq(0)
+
+
+    def read_words(self, count, *, timeout=10000):
+        """ Reads a number of words out of our FIFO. """
+        stream = self.fifo.output
+        words  = []
+
+        yield stream.ready.eq(1)
+        for _ in range(timeout):
+            yield
+            if (yield stream.valid):
+                words.append((yield stream.payload))
+                if len(words) == count:
+                    break
+        yield stream.ready.eq(0)
+
+        return words
+
+
+    @sync_test_case
+    def test_backlog_through_ram(self):
+        fifo = self.fifo
+
+        # If we fill our FIFO well past what its on-chip buffers can hold...
+        data = list(range(0x1000, 0x1000 + self.DEPTH + 2 * self.BURST_LENGTH))
+        yield from self.write_words(data)
+        yield from self.advance_cycles(200)
+
+        # ... the backlog should have been moved into our RAM, and should be reflected in our level...
+        self.assertEqual((yield fifo.level), len(data))
+        self.assertGreater((yield fifo.ram_level), 0)
+
+        # ... and we should be able to read it all back in order.
+        self.assertEqual((yield from self.read_words(len(data))), data)
+        yield
+        self.assertEqual((yield fifo.level), 0)
+
+
+    @sync_test_case
+    def test_ring_wraparound(self):
+
+        # Push data through our FIFO several times its depth, so our RAM's ring buffer wraps around;
+        # draining it in chunks that leave a small backlog behind each time.
+        expected = []
+        received = []
+        for chunk in range(4):
+            data = [(chunk << 8) | i for i in range(self.DEPTH)]
+            expected.extend(data)
+
+            yield from self.write_words(data)
+            received.extend((yield from self.read_words(self.DEPTH - self.BURST_LENGTH)))
+
+        received.extend((yield from self.read_words(len(expected) - len(received))))
+        self.assertEqual(received, expected)
+
+
+    @sync_test_case
+    def test_bypass_when_empty(self):
+        fifo = self.fifo
+
+        # With an empty RAM and a consumer that keeps up, our data should never touch the RAM...
+        yield fifo.output.ready.eq(1)
+        yield from self.write_words([1, 2, 3])
+        yield from self.advance_cycles(5)
+
+        self.assertEqual((yield fifo.ram_level), 0)
+        self.assertEqual((yield fifo.level), 0)
+
+
+
+class HyperRAMFIFOPacketTest(LunaGatewareTestCase):
+    """ Tests a HyperRAMFIFO that carries packets to a byte-wide output; as a USB IN endpoint would use. """
+
+    DEPTH          = 48
+    BURST_LENGTH   = 8
+    FIFO_ARGUMENTS = {'payload_width': 8, 'store_flags': True}
+
+    def instantiate_dut(self):
+        m = Module()
+
+        phy = HyperBusPHY()
+        self.fifo = HyperRAMFIFO(ram=HyperRAMInterface(phy=phy), depth=self.DEPTH, burst_length=self.BURST_LENGTH,
+            **self.FIFO_ARGUMENTS)
+
+        m.submodules.fifo = self.fifo
+        m.submodules.chip = HyperRAMSimulationModel(phy=phy, depth=1024)
+        return m
+
+
+    def write_packet(self, data):
+        """ Feeds a packet of bytes into our FIFO, packed into words of our FIFO's payload width. """
+        stream         = self.fifo.input
+        bytes_per_word = self.fifo.payload_width // 8
+        words          = [
+            int.from_bytes(bytes(data[i:i + bytes_per_word]), byteorder='little')
+                for i in range(0, len(data), bytes_per_word)
+        ]
+
+        yield stream.valid.eq(1)
+        for index, word in enumerate(words):
+            yield stream.payload  .eq(word)
+            yield stream.first    .eq(index == 0)
+            yield stream.last     .eq(index == len(words) - 1)
+            yield
+            while not (yield stream.ready):
+                yield
+        yield stream.valid.eq(0)
+
+
+    def read_bytes(self, count, *, timeout=10000):
+        """ Reads a number of bytes out of our FIFO; as a list of (byte, first, last) tuples. """
+        stream = self.fifo.output
+        data   = []
+
+        yield stream.ready.eq(1)
+        for _ in range(timeout):
+            yield
+            if (yield stream.valid):
+                data.append(((yield stream.payload), (yield stream.first), (yield stream.last)))
+                if len(data) == count:
+                    break
+        yield stream.ready.eq(0)
+
+        return data
+
+
+    @sync_test_case
+    def test_packet_boundaries_through_ram(self):
+        packets = [list(range(n * 16, n * 16 + 12)) for n in range(5)]
+
+        # If we queue up more packets than our on-chip buffers can hold...
+        for packet in packets:
+            yield from self.write_packet(packet)
+        yield from self.advance_cycles(200)
+        self.assertGreater((yield self.fifo.ram_level), 0)
+
+        # ... we should get them all back, with each packet's boundaries intact.
+        expected = [
+            (byte, int(index == 0), int(index == len(packet) - 1))
+                for packet in packets for index, byte in enumerate(packet)
+        ]
+        self.assertEqual((yield from self.read_bytes(len(expected))), expected)
+
+
+
+class HyperRAMFIFOWideEntryTest(HyperRAMFIFOPacketTest):
+    """ Tests a HyperRAMFIFO whose entries span several RAM words, and whose output is narrowed. """
+    FIFO_ARGUMENTS = {'payload_width': 32, 'store_flags': True, 'output_width': 8}
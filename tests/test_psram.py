@@ -3,9 +3,12 @@
 #
 # Copyright (c) 2024 Great Scott Gadgets <info@greatscottgadgets.com>
 # SPDX-License-Identifier: BSD-3-Clause
-from luna.gateware.test.utils import LunaGatewareTestCase, sync_test_case
+from amaranth import Module
 
-from luna.gateware.interface.psram import HyperBusPHY, HyperRAMInterface
+from luna.gateware.test.utils    import LunaGatewareTestCase, sync_test_case
+from luna.gateware.test.hyperram import HyperRAMSimulationModel
+
+from luna.gateware.interface.psram import HyperBusPHY, HyperRAMInterface, HyperRAMStreamInterface
 
 class TestHyperRAMInterface(LunaGatewareTestCase):
 
@@ -178,3 +181,122 @@ class TestHyperRAMInterface(LunaGatewareTestCase):
 
         # TODO: test recovery time
 
+
+
+class TestHyperRAMStreamInterface(LunaGatewareTestCase):
+
+    VARIABLE_LATENCY = False
+
+    def instantiate_dut(self):
+        m = Module()
+
+        # Create a streaming front-end, and attach it to a simulated RAM chip that only requests
+        # additional latency when we're not able to make use of variable latency.
+        phy = HyperBusPHY()
+        ram = HyperRAMInterface(phy=phy, variable_latency=self.VARIABLE_LATENCY)
+        self.frontend = HyperRAMStreamInterface(ram=ram, max_burst_length=16)
+
+        m.submodules.frontend = self.frontend
+        m.submodules.chip     = HyperRAMSimulationModel(phy=phy, extra_latency=False)
+        return m
+
+
+    def issue_command(self, address, length, *, write):
+        """ Queues a single burst command. """
+        command = self.frontend.command
+
+        yield command.payload  .eq(address)
+        yield command.length   .eq(length)
+        yield command.write    .eq(write)
+        yield command.valid    .eq(1)
+        yield
+        while not (yield command.ready):
+            yield
+        yield command.valid    .eq(0)
+
+
+    def write_burst(self, address, words):
+        """ Writes a burst of words to the RAM. """
+        stream = self.frontend.write_stream
+
+        yield from self.issue_command(address, len(words), write=1)
+
+        yield stream.valid.eq(1)
+        for word in words:
+            yield stream.payload.eq(word)
+            yield
+            while not (yield stream.ready):
+                yield
+        yield stream.valid.eq(0)
+
+
+    def read_burst(self, address, length, *, timeout=1000):
+        """ Reads a burst of words from the RAM; returning (word, first, last) tuples. """
+        stream = self.frontend.read_stream
+        words  = []
+
+        yield from self.issue_command(address, length, write=0)
+
+        yield stream.ready.eq(1)
+        for _ in range(timeout):
+            yield
+            if (yield stream.valid):
+                words.append(((yield stream.payload), (yield stream.first), (yield stream.last)))
+                if len(words) == length:
+                    break
+        yield stream.ready.eq(0)
+
+        return words
+
+
+    @sync_test_case
+    def test_burst_readback(self):
+        frontend = self.frontend
+        data = [0xCA00 | i for i in range(8)]
+
+        # Write a burst, and read it back.
+        yield from self.write_burst(0x10, data)
+        words = yield from self.read_burst(0x10, len(data))
+
+        # We should get back our data, with the burst's boundaries marked.
+        self.assertEqual([word for word, _, _ in words], data)
+        self.assertEqual([first for _, first, _ in words], [1] + [0] * 7)
+        self.assertEqual([last  for _, _, last  in words], [0] * 7 + [1])
+
+        # Our performance counters should have tracked both bursts.
+        yield from self.wait_until(frontend.idle, timeout=100)
+        self.assertEqual((yield frontend.words_transferred), 16)
+        self.assertGreater((yield frontend.busy_cycles), 16)
+
+        # ... and should be clearable.
+        yield frontend.clear_counters.eq(1)
+        yield
+        yield frontend.clear_counters.eq(0)
+        yield
+        self.assertEqual((yield frontend.words_transferred), 0)
+        self.assertEqual((yield frontend.busy_cycles),       0)
+
+
+    @sync_test_case
+    def test_queued_bursts(self):
+
+        # Queue several write bursts before providing any of their data...
+        for burst in range(3):
+            yield from self.issue_command(burst * 4, 4, write=1)
+
+        # ... then provide it all at once; and check that each burst landed where it should.
+        yield self.frontend.write_stream.valid.eq(1)
+        for word in range(12):
+            yield self.frontend.write_stream.payload.eq(word)
+            yield
+            while not (yield self.frontend.write_stream.ready):
+                yield
+        yield self.frontend.write_stream.valid.eq(0)
+
+        words = yield from self.read_burst(0, 12)
+        self.assertEqual([word for word, _, _ in words], list(range(12)))
+
+
+
+class TestHyperRAMStreamInterfaceVariableLatency(TestHyperRAMStreamInterface):
+    VARIABLE_LATENCY = True
@@ -0,0 +1,108 @@
+#
+# This file is part of LUNA.
+#
+# Copyright (c) 2025 Great Scott Gadgets <info@greatscottgadgets.com>
+# SPDX-License-Identifier: BSD-3-Clause
+
+from luna.gateware.test import LunaGatewareTestCase, sync_test_case
+
+from luna.gateware.stream         import StreamInterface
+from luna.gateware.stream.arbiter import StreamArbiter
+
+
+class StreamArbiterTestCase(LunaGatewareTestCase):
+    ARBITER_ARGUMENTS = {}
+    WEIGHTS           = (1, 1, 1)
+
+    def instantiate_dut(self):
+        self.inputs = [StreamInterface() for _ in self.WEIGHTS]
+
+        dut = StreamArbiter(**self.ARBITER_ARGUMENTS)
+        for stream, weight in zip(self.inputs, self.WEIGHTS):
+            dut.add_stream(stream, weight=weight)
+
+        return dut
+
+
+    def schedule(self, cycles, *, packet_length=1):
+        """ Keeps every input busy with packets; and returns which input owned each output beat. """
+        dut = self.dut
+
+        yield dut.source.ready.eq(1)
+        for index, stream in enumerate(self.inputs):
+            yield stream.valid    .eq(1)
+            yield stream.payload  .eq(index)
+
+        owners = []
+        positions = [0] * len(self.inputs)
+        for _ in range(cycles):
+            for index, stream in enumerate(self.inputs):
+                yield stream.last.eq(positions[index] % packet_length == packet_length - 1)
+            yield
+
+            for index, stream in enumerate(self.inputs):
+                if (yield stream.ready):
+                    positions[index] += 1
+            if (yield dut.source.valid):
+                owners.append((yield dut.source.payload))
+
+        return owners
+
+
+
+class PriorityStreamArbiterTest(StreamArbiterTestCase):
+    ARBITER_ARGUMENTS = {'max_burst': 1}
+
+    @sync_test_case
+    def test_priority_starves_lower_streams(self):
+        owners = yield from self.schedule(12)
+        self.assertEqual(set(owners), {0})
+
+        # Our other streams should have spent the whole time waiting.
+        self.assertEqual((yield self.dut.grant_count[1]), 0)
+        self.assertGreaterEqual((yield self.dut.wait_cycles[1]), 11)
+
+
+
+class RoundRobinStreamArbiterTest(StreamArbiterTestCase):
+    ARBITER_ARGUMENTS = {'mode': 'round_robin', 'max_burst': 2}
+
+    @sync_test_case
+    def test_round_robin(self):
+        owners = yield from self.schedule(12)
+
+        # Each stream should get a two-beat burst in turn, with no bubbles between grants.
+        self.assertEqual(owners, [0, 0, 1, 1, 2, 2] * 2)
+        for count in self.dut.grant_count:
+            self.assertEqual((yield count), 2)
+
+        # Our counters should be cleared on request.
+        yield self.dut.clear_counters.eq(1)
+        yield
+        yield self.dut.clear_counters.eq(0)
+        yield
+        self.assertEqual((yield self.dut.wait_cycles[2]), 0)
+
+
+    @sync_test_case
+    def test_packets_are_not_split(self):
+        owners = yield from self.schedule(18, packet_length=3)
+
+        # Our bursts should be extended to the end of each three-beat packet.
+        self.assertEqual(owners, [0, 0, 0, 1, 1, 1, 2, 2, 2] * 2)
+
+
+
+class WeightedStreamArbiterTest(StreamArbiterTestCase):
+    ARBITER_ARGUMENTS = {'mode': 'weighted', 'max_burst': 1}
+    WEIGHTS           = (1, 3, 2)
+
+    @sync_test_case
+    def test_weighted_bursts(self):
+        owners = yield from self.schedule(12)
+        self.assertEqual(owners, [0, 1, 1, 1, 2, 2] * 2)
+
+
+    def test_weighted_mode_requires_burst_length(self):
+        with self.assertRaises(ValueError):
+            StreamArbiter(mode="weighted")
@@ -0,0 +1,133 @@
+#
+# This file is part of LUNA.
+#
+# Copyright (c) 2025 Great Scott Gadgets <info@greatscottgadgets.com>
+# SPDX-License-Identifier: BSD-3-Clause
+from luna.gateware.test import LunaGatewareTestCase, sync_test_case
+
+from luna.gateware.stream.gearbox import StreamGearbox, StreamUpConverter, StreamDownConverter
+
+
+class StreamGearboxTestCase(LunaGatewareTestCase):
+
+    def transfer(self, beats, *, packets=1, timeout=100):
+        """ Feeds (payload, valid, first, last) beats through our DUT, while always accepting its output.
+
+        Returns a tuple of (output beats, cycles taken) once the given number of packets have been received.
+        """
+        dut = self.dut
+        received = []
+        position = 0
+
+        yield dut.output.ready.eq(1)
+        for cycle in range(timeout):
+
+            # Present our next input beat, if we have one...
+            if position < len(beats):
+                payload, valid, first, last = beats[position]
+                yield dut.input.payload .eq(payload)
+                yield dut.input.valid   .eq(valid)
+                yield dut.input.first   .eq(first)
+                yield dut.input.last    .eq(last)
+            else:
+                yield dut.input.valid.eq(0)
+
+            yield
+
+            # ... note whether it was accepted, and capture any output beat.
+            if (position < len(beats)) and (yield dut.input.ready):
+                position += 1
+            if (yield dut.output.valid):
+                received.append((
+                    (yield dut.output.payload),
+                    (yield dut.output.valid),
+                    (yield dut.output.first),
+                    (yield dut.output.last),
+                ))
+
+                if (yield dut.output.last):
+                    packets -= 1
+                if not packets:
+                    return received, cycle + 1
+
+        return received, timeout
+
+
+
+class StreamUpConverterTest(StreamGearboxTestCase):
+    FRAGMENT_UNDER_TEST = StreamUpConverter
+    FRAGMENT_ARGUMENTS  = {'input_width': 8, 'output_width': 32, 'output_valid_width': 4}
+
+    @sync_test_case
+    def test_packet_conversion(self):
+
+        # Send a ten-byte packet...
+        beats = [(byte, 1, byte == 0, byte == 9) for byte in range(10)]
+        received, cycles = yield from self.transfer(beats)
+
+        # ... which should arrive as three words; the last partially filled.
+        self.assertEqual(received, [
+            (0x03020100, 0b1111, 1, 0),
+            (0x07060504, 0b1111, 0, 0),
+            (0x00000908, 0b0011, 0, 1),
+        ])
+
+        # We should have accepted a byte on every cycle, so our packet ends right after its last byte.
+        self.assertLessEqual(cycles, len(beats) + 1)
+
+
+    @sync_test_case
+    def test_back_to_back_packets(self):
+
+        # Two packets, sent back to back, should be kept separate.
+        beats  = [(byte, 1, byte == 0, byte == 2) for byte in range(3)]
+        beats += [(byte, 1, byte == 3, byte == 6) for byte in range(3, 7)]
+
+        received, _ = yield from self.transfer(beats, packets=2)
+        self.assertEqual(received, [
+            (0x00020100, 0b0111, 1, 1),
+            (0x06050403, 0b1111, 1, 1),
+        ])
+
+
+
+class StreamDownConverterTest(StreamGearboxTestCase):
+    FRAGMENT_UNDER_TEST = StreamDownConverter
+    FRAGMENT_ARGUMENTS  = {'input_width': 32, 'output_width': 8, 'input_valid_width': 4}
+
+    @sync_test_case
+    def test_partial_final_word(self):
+
+        # Send a SuperSpeed-style packet, whose final word carries only two valid bytes...
+        beats = [
+            (0x03020100, 0b1111, 1, 0),
+            (0x07060504, 0b1111, 0, 0),
+            (0xFFFF0908, 0b0011, 0, 1),
+        ]
+        received, cycles = yield from self.transfer(beats)
+
+        # ... and we should receive only its valid bytes, one per cycle.
+        self.assertEqual([payload for payload, _, _, _ in received], list(range(10)))
+        self.assertEqual([first for _, _, first, _ in received], [1] + [0] * 9)
+        self.assertEqual([last  for _, _, _, last  in received], [0] * 9 + [1])
+        self.assertLessEqual(cycles, len(received) + 2)
+
+
+
+class StreamGearboxTest(StreamGearboxTestCase):
+    FRAGMENT_UNDER_TEST = StreamGearbox
+    FRAGMENT_ARGUMENTS  = {'input_width': 24, 'output_width': 16}
+
+    @sync_test_case
+    def test_throughput(self):
+
+        # Convert a long stream of 24-bit beats into 16-bit beats.
+        beats = [(0x020100 + 0x030303 * i, 1, i == 0, i == 15) for i in range(16)]
+        received, cycles = yield from self.transfer(beats)
+
+        data = b"".join(payload.to_bytes(2, "little") for payload, _, _, _ in received)
+        self.assertEqual(data, bytes(range(48)))
+
+        # Our output side is the bottleneck; so we should produce an output beat on every cycle.
+        self.assertEqual(len(received), 24)
+        self.assertLessEqual(cycles, len(received) + 2)
@@ -45,6 +45,7 @@ class GetDescriptorHandlerBlockTest(LunaUSBGatewareTestCase):
 
     FRAGMENT_UNDER_TEST = GetDescriptorHandlerBlock
     FRAGMENT_ARGUMENTS = {"descriptor_collection": descriptors}
+    CACHE_ELABORATION = True
 
     def traces_of_interest(self):
         dut = self.dut
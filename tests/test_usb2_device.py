@@ -17,6 +17,7 @@ class FullDeviceTest(USBDeviceTest):
 
     FRAGMENT_UNDER_TEST = USBDevice
     FRAGMENT_ARGUMENTS = {'handle_clocking': False}
+    CACHE_ELABORATION = True
 
     def traces_of_interest(self):
         return (
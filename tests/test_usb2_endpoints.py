@@ -12,8 +12,13 @@ from luna.gateware.test  import (
 from luna.usb2           import (
     USBIsochronousStreamInEndpoint,
     USBIsochronousStreamOutEndpoint,
+    USBStreamOutEndpoint,
 )
 
+from luna.gateware.usb.usb2  import USBSpeed
+
+from luna.gateware.usb.usb2.endpoint import EndpointInterface, USBEndpointMultiplexer
+
 
 MAX_PACKET_SIZE = 512
 
@@ -222,3 +227,295 @@ class USBIsochronousStreamOutEndpointTest(LunaUSBGatewareTestCase):
         self.assertEqual((yield consumer.p.first), 0)
         self.assertEqual((yield consumer.p.last), 0)
         self.assertEqual((yield consumer.p.data), 0)
+
+
+
+class USBStreamOutEndpointTest(LunaUSBGatewareTestCase):
+    FRAGMENT_UNDER_TEST = USBStreamOutEndpoint
+    FRAGMENT_ARGUMENTS  = {'endpoint_number': 1, 'max_packet_size': 8}
+
+    def initialize_signals(self):
+        # Pretend that our host is always targeting our endpoint.
+        yield self.dut.interface.tokenizer.endpoint.eq(self.dut._endpoint_number)
+
+
+    def get_handshake(self):
+        """ Returns the handshake our endpoint is currently requesting, if any. """
+        handshakes_out = self.dut.interface.handshakes_out
+
+        for name in ('ack', 'nak', 'nyet', 'stall'):
+            if (yield getattr(handshakes_out, name)):
+                return name
+
+        return None
+
+
+    def send_packet(self, data, *, pid):
+        """ Simulates the host sending an OUT data packet; and returns our endpoint's handshake. """
+        interface = self.dut.interface
+        rx        = interface.rx
+
+        yield interface.tokenizer.is_out.eq(1)
+        yield interface.rx_pid_toggle.eq(pid)
+        yield from self.pulse(interface.tokenizer.new_token)
+
+        yield rx.valid.eq(1)
+        yield rx.next.eq(1)
+        for byte in data:
+            yield rx.payload.eq(byte)
+            yield
+        yield rx.valid.eq(0)
+        yield rx.next.eq(0)
+
+        yield from self.pulse(interface.rx_complete)
+        yield from self.advance_cycles(3)
+
+        yield interface.rx_ready_for_response.eq(1)
+        yield
+        handshake = yield from self.get_handshake()
+        yield interface.rx_ready_for_response.eq(0)
+        yield interface.tokenizer.is_out.eq(0)
+        yield
+
+        return handshake
+
+
+    def send_ping(self):
+        """ Simulates the host sending a PING token; and returns our endpoint's handshake. """
+        tokenizer = self.dut.interface.tokenizer
+
+        yield tokenizer.is_ping.eq(1)
+        yield tokenizer.ready_for_response.eq(1)
+        yield
+        handshake = yield from self.get_handshake()
+        yield tokenizer.ready_for_response.eq(0)
+        yield tokenizer.is_ping.eq(0)
+        yield
+
+        return handshake
+
+
+    @usb_domain_test_case
+    def test_nyet_when_buffer_fills(self):
+        stream = self.dut.stream
+
+        # If we have room for another packet after receiving one, we should ACK it...
+        self.assertEqual((yield from self.send_packet(range(8), pid=0)), 'ack')
+
+        # ... but once our buffer fills, we should NYET; as we've accepted the data, but have no room for more...
+        self.assertEqual((yield from self.send_packet(range(8, 16), pid=1)), 'nyet')
+
+        # ... and we should NAK the host's PINGs until we've made room.
+        self.assertEqual((yield from self.send_ping()), 'nak')
+
+        # Both of our packets should have been kept.
+        received = []
+        yield stream.ready.eq(1)
+        yield
+        while (yield stream.valid):
+            received.append((yield stream.payload))
+            yield
+        yield stream.ready.eq(0)
+        self.assertEqual(received, list(range(16)))
+
+        # Once we've made room, we should ACK the host's PING.
+        self.assertEqual((yield from self.send_ping()), 'ack')
+
+
+    @usb_domain_test_case
+    def test_no_nyet_at_full_speed(self):
+        yield self.dut.interface.speed.eq(USBSpeed.FULL)
+
+        # At full speed, we should ACK every packet we accept...
+        self.assertEqual((yield from self.send_packet(range(8), pid=0)), 'ack')
+        self.assertEqual((yield from self.send_packet(range(8, 16), pid=1)), 'ack')
+
+        # ... and NAK any packet we don't have room for.
+        self.assertEqual((yield from self.send_packet(range(16, 24), pid=0)), 'nak')
+
+
+
+class USBIsochronousStreamOutEndpointHighBandwidthTest(LunaUSBGatewareTestCase):
+    FRAGMENT_UNDER_TEST = USBIsochronousStreamOutEndpoint
+    FRAGMENT_ARGUMENTS  = {'endpoint_number': 1, 'max_packet_size': 8, 'transactions_per_microframe': 3}
+
+    # Our values for `rx_pid_toggle`, for each data PID.
+    DATA0, DATA1, DATA2, MDATA = range(4)
+
+    def initialize_signals(self):
+        yield self.dut.interface.tokenizer.endpoint.eq(self.dut._endpoint_number)
+        yield self.dut.interface.tokenizer.is_out.eq(1)
+
+
+    def send_packet(self, data, *, pid, valid=True):
+        """ Simulates the host sending an isochronous OUT data packet. """
+        interface = self.dut.interface
+        rx        = interface.rx
+
+        yield interface.rx_pid_toggle.eq(pid)
+
+        yield rx.valid.eq(1)
+        yield rx.next.eq(1)
+        for byte in data:
+            yield rx.payload.eq(byte)
+            yield
+        yield rx.valid.eq(0)
+        yield rx.next.eq(0)
+
+        yield from self.pulse(interface.rx_complete if valid else interface.rx_invalid)
+        yield from self.advance_cycles(3)
+
+
+    def start_microframe(self):
+        """ Simulates the host sending a SOF packet. """
+        yield from self.pulse(self.dut.interface.tokenizer.new_frame)
+
+
+    def receive_stream(self, cycles=64):
+        """ Drains our endpoint's stream; and returns a list of (data, first, last) tuples. """
+        stream   = self.dut.stream
+        received = []
+
+        yield stream.ready.eq(1)
+        for _ in range(cycles):
+            yield
+            if (yield stream.valid):
+                received.append(((yield stream.p.data), (yield stream.p.first), (yield stream.p.last)))
+        yield stream.ready.eq(0)
+
+        return received
+
+
+    @usb_domain_test_case
+    def test_microframe_assembly(self):
+        data = list(range(24))
+
+        # If we receive a full, three-transaction microframe...
+        yield from self.start_microframe()
+        yield from self.send_packet(data[0:8],   pid=self.MDATA)
+        yield from self.send_packet(data[8:16],  pid=self.MDATA)
+        yield from self.send_packet(data[16:24], pid=self.DATA2)
+
+        # ... we should receive it as a single packet.
+        received = yield from self.receive_stream()
+        self.assertEqual([byte for byte, _, _ in received], data)
+        self.assertEqual([index for index, (_, first, _) in enumerate(received) if first], [0])
+        self.assertEqual([index for index, (_, _, last) in enumerate(received) if last], [23])
+
+        # Shorter microframes should work, too.
+        yield from self.start_microframe()
+        yield from self.send_packet(data[0:8],  pid=self.MDATA)
+        yield from self.send_packet(data[8:12], pid=self.DATA1)
+
+        received = yield from self.receive_stream()
+        self.assertEqual([byte for byte, _, _ in received], data[0:12])
+
+        self.assertEqual((yield self.dut.dropped_microframes), 0)
+        self.assertEqual((yield self.dut.overruns), 0)
+
+
+    @usb_domain_test_case
+    def test_incomplete_microframes_dropped(self):
+
+        # If we miss the end of a microframe...
+        yield from self.start_microframe()
+        yield from self.send_packet(range(8), pid=self.MDATA)
+        yield from self.start_microframe()
+
+        # ... or see its packets out of sequence...
+        yield from self.send_packet(range(8), pid=self.MDATA)
+        yield from self.send_packet(range(8), pid=self.DATA2)
+
+        # ... or see a corrupted packet...
+        yield from self.start_microframe()
+        yield from self.send_packet(range(8), pid=self.MDATA, valid=False)
+        yield from self.send_packet(range(8), pid=self.DATA1)
+
+        # ... we should drop the whole microframe, and count each drop.
+        received = yield from self.receive_stream()
+        self.assertEqual(received, [])
+        self.assertEqual((yield self.dut.dropped_microframes), 3)
+
+        # Once a new microframe arrives intact, we should receive it as normal.
+        yield from self.start_microframe()
+        yield from self.send_packet(range(8), pid=self.DATA0)
+
+        received = yield from self.receive_stream()
+        self.assertEqual([byte for byte, _, _ in received], list(range(8)))
+
+
+    @usb_domain_test_case
+    def test_overrun(self):
+
+        # Fill our buffer with two complete microframes...
+        for _ in range(2):
+            yield from self.start_microframe()
+            yield from self.send_packet(range(8), pid=self.MDATA)
+            yield from self.send_packet(range(8), pid=self.MDATA)
+            yield from self.send_packet(range(8), pid=self.DATA2)
+
+        # ... and then try to squeeze in a third.
+        yield from self.start_microframe()
+        yield from self.send_packet(range(8), pid=self.MDATA)
+        yield from self.send_packet(range(8), pid=self.DATA1)
+
+        # We should keep only the two microframes we had room for.
+        received = yield from self.receive_stream(cycles=64)
+        self.assertEqual(len(received), 48)
+        self.assertEqual((yield self.dut.overruns), 1)
+        self.assertEqual((yield self.dut.dropped_microframes), 0)
+
+
+
+class USBEndpointMultiplexerTest(LunaUSBGatewareTestCase):
+    REGISTERED_OUTPUT = False
+
+    def instantiate_dut(self):
+        self.endpoints = [EndpointInterface() for _ in range(3)]
+
+        dut = USBEndpointMultiplexer(registered_output=self.REGISTERED_OUTPUT)
+        for endpoint in self.endpoints:
+            dut.add_interface(endpoint)
+
+        return dut
+
+
+    @usb_domain_test_case
+    def test_multiplexing(self):
+        dut      = self.dut
+        endpoint = self.endpoints[1]
+        latency  = 1 if self.REGISTERED_OUTPUT else 0
+
+        # Have our middle endpoint transmit a byte, and request an ACK...
+        yield dut.shared.tx.ready        .eq(1)
+        yield endpoint.tx.valid          .eq(1)
+        yield endpoint.tx.first          .eq(1)
+        yield endpoint.tx.payload        .eq(0xAB)
+        yield endpoint.tx_pid_toggle     .eq(1)
+        yield endpoint.handshakes_out.ack.eq(1)
+        yield endpoint.new_config        .eq(3)
+        yield endpoint.config_changed    .eq(1)
+        yield from self.advance_cycles(latency + 1)
+
+        # ... and it should appear on our shared interface, after our output latency.
+        self.assertEqual((yield dut.shared.tx.valid),           1)
+        self.assertEqual((yield dut.shared.tx.payload),         0xAB)
+        self.assertEqual((yield dut.shared.tx_pid_toggle),      1)
+        self.assertEqual((yield dut.shared.handshakes_out.ack), 1)
+        self.assertEqual((yield dut.shared.config_changed),     1)
+        self.assertEqual((yield dut.shared.new_config),         3)
+
+        # Our transmitting endpoint should see our transmitter's ready signal.
+        self.assertEqual((yield endpoint.tx.ready), 1)
+
+        # Once our endpoint stops transmitting, so should our shared interface.
+        yield endpoint.tx.valid          .eq(0)
+        yield endpoint.handshakes_out.ack.eq(0)
+        yield endpoint.config_changed    .eq(0)
+        yield from self.advance_cycles(latency + 1)
+        self.assertEqual((yield dut.shared.tx.valid),           0)
+        self.assertEqual((yield dut.shared.handshakes_out.ack), 0)
+
+
+class RegisteredUSBEndpointMultiplexerTest(USBEndpointMultiplexerTest):
+    REGISTERED_OUTPUT = True
@@ -3,12 +3,16 @@
 #
 # Copyright (c) 2024 Great Scott Gadgets <info@greatscottgadgets.com>
 # SPDX-License-Identifier: BSD-3-Clause
-from luna.gateware.test           import LunaGatewareTestCase, usb_domain_test_case
+import random
+
+from luna.gateware.test             import LunaGatewareTestCase, usb_domain_test_case
+from luna.gateware.test.contrib.crc import CRC16_USB
 
 from amaranth import Record
 from luna.gateware.usb.usb2.packet import USBDataPacketDeserializer, USBDataPacketGenerator, USBDataPacketReceiver
 from luna.gateware.usb.usb2.packet import USBHandshakeDetector, USBHandshakeGenerator
 from luna.gateware.usb.usb2.packet import InterpacketTimerInterface, USBInterpacketTimer, USBTokenDetector
+from luna.gateware.usb.usb2.packet import DataCRCInterface, USBDataPacketCRC
 
 class USBPacketizerTest(LunaGatewareTestCase):
     SYNC_CLOCK_FREQUENCY = None
@@ -496,6 +500,19 @@ class USBHandshakeGeneratorTest(LunaGatewareTestCase):
         self.assertEqual((yield dut.tx.valid), 0)
 
 
+    @usb_domain_test_case
+    def test_nyet_generation(self):
+        dut = self.dut
+        yield dut.tx.ready.eq(1)
+
+        # When we request a NYET...
+        yield from self.pulse(dut.issue_nyet)
+
+        # ... we should see a NYET packet on our data lines.
+        self.assertEqual((yield dut.tx.data), USBHandshakeGenerator._PACKET_NYET)
+        self.assertEqual((yield dut.tx.valid), 1)
+
+
 class USBInterpacketTimerTest(LunaGatewareTestCase):
     SYNC_CLOCK_FREQUENCY = None
     USB_CLOCK_FREQUENCY = 60e6
@@ -552,3 +569,35 @@ class USBInterpacketTimerTest(LunaGatewareTestCase):
             self.assertEqual((yield self.rx_to_tx_min),     0)
             self.assertEqual((yield self.rx_to_tx_max),     0)
             self.assertEqual((yield self.tx_to_rx_timeout), 0)
+
+
+class USBDataPacketCRCTest(LunaGatewareTestCase):
+    SYNC_CLOCK_FREQUENCY = None
+    USB_CLOCK_FREQUENCY  = 60e6
+
+    def instantiate_dut(self):
+        self.interface = DataCRCInterface()
+
+        dut = USBDataPacketCRC()
+        dut.add_interface(self.interface)
+        return dut
+
+
+    @usb_domain_test_case
+    def test_against_reference_model(self):
+        dut = self.dut
+        rng = random.Random(0)
+
+        for length in (0, 1, 2, 8, 63, 64, 65):
+            data = [rng.getrandbits(8) for _ in range(length)]
+
+            yield from self.pulse(self.interface.start)
+
+            yield dut.rx_valid.eq(1)
+            for byte in data:
+                yield dut.rx_data.eq(byte)
+                yield
+            yield dut.rx_valid.eq(0)
+            yield
+
+            self.assertEqual((yield self.interface.crc), CRC16_USB.calcBytes(data))
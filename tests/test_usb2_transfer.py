@@ -287,3 +287,70 @@ class USBInTransferManagerTest(LunaGatewareTestCase):
 
         # ... with the correct DATA PID.
         self.assertEqual((yield dut.data_pid), 1)
+
+
+
+class USBInTransferManagerMultipleBufferTest(LunaGatewareTestCase):
+    FRAGMENT_UNDER_TEST = USBInTransferManager
+    FRAGMENT_ARGUMENTS  = {"max_packet_size": 4, "packet_buffers": 4}
+
+    SYNC_CLOCK_FREQUENCY = None
+    USB_CLOCK_FREQUENCY = 60e6
+
+    def initialize_signals(self):
+        yield self.dut.packet_stream.ready.eq(1)
+        yield self.dut.active.eq(1)
+        yield self.dut.tokenizer.is_in.eq(1)
+
+
+    def receive_packet(self):
+        """ Issues an IN token, and returns the data PID and payload of the packet we're sent in response. """
+        packet_stream = self.dut.packet_stream
+        payload       = []
+
+        yield from self.pulse(self.dut.tokenizer.ready_for_response)
+        while (yield packet_stream.valid):
+            payload.append((yield packet_stream.payload))
+            yield
+
+        return (yield self.dut.data_pid), payload
+
+
+    @usb_domain_test_case
+    def test_queued_packets(self):
+        dut = self.dut
+
+        packet_stream   = dut.packet_stream
+        transfer_stream = dut.transfer_stream
+
+        # We should be able to buffer three full packets, while filling a fourth...
+        yield transfer_stream.valid.eq(1)
+        for value in range(16):
+            yield transfer_stream.payload.eq(value)
+            yield
+        yield transfer_stream.valid.eq(0)
+
+        # ... after which, we should no longer be accepting data.
+        yield
+        self.assertEqual((yield transfer_stream.ready), 0)
+
+        # Our first packet should be sent with DATA0...
+        self.assertEqual((yield from self.receive_packet()), (0, [0, 1, 2, 3]))
+
+        # ... and re-sent, with the same PID, until it's acknowledged.
+        yield from self.pulse(dut.tokenizer.new_token)
+        self.assertEqual((yield from self.receive_packet()), (0, [0, 1, 2, 3]))
+        yield from self.pulse(dut.handshakes_in.ack)
+
+        # Once it has been, we should have room for more data...
+        self.assertEqual((yield transfer_stream.ready), 1)
+
+        # ... and each of our queued packets should follow, with alternating PIDs.
+        for pid, first_value in [(1, 4), (0, 8), (1, 12)]:
+            self.assertEqual((yield from self.receive_packet()), (pid, list(range(first_value, first_value + 4))))
+            yield from self.pulse(dut.handshakes_in.ack)
+
+        # Once we've run out of data, we should NAK any further requests.
+        yield from self.pulse(dut.tokenizer.ready_for_response, step_after=False)
+        self.assertEqual((yield dut.handshakes_out.nak), 1)
+        self.assertEqual((yield packet_stream.valid), 0)
@@ -3,9 +3,37 @@
 #
 # Copyright (c) 2024 Great Scott Gadgets <info@greatscottgadgets.com>
 # SPDX-License-Identifier: BSD-3-Clause
+import random
+
 from luna.gateware.test              import LunaSSGatewareTestCase, ss_domain_test_case
+from luna.gateware.test.contrib.crc  import CRC16_USB3, CRC32
+
+from luna.gateware.usb.usb3.link.crc import HeaderPacketCRC, DataPacketPayloadCRC
+
+
+class HeaderPacketCRCTest(LunaSSGatewareTestCase):
+    FRAGMENT_UNDER_TEST = HeaderPacketCRC
+
+    @ss_domain_test_case
+    def test_against_reference_model(self):
+        dut = self.dut
+        rng = random.Random(0)
+
+        for _ in range(16):
+            words = [rng.getrandbits(32) for _ in range(3)]
+
+            yield from self.pulse(dut.clear)
+
+            yield dut.advance_crc.eq(1)
+            for word in words:
+                yield dut.data_input.eq(word)
+                yield
+            yield dut.advance_crc.eq(0)
+            yield
+
+            data = b"".join(word.to_bytes(4, byteorder="little") for word in words)
+            self.assertEqual((yield dut.crc), CRC16_USB3.calcBytes(data))
 
-from luna.gateware.usb.usb3.link.crc import DataPacketPayloadCRC
 
 class DataPacketPayloadCRCTest(LunaSSGatewareTestCase):
     FRAGMENT_UNDER_TEST = DataPacketPayloadCRC
@@ -51,3 +79,29 @@ class DataPacketPayloadCRCTest(LunaSSGatewareTestCase):
         # ...and after advancing, we should see the same value on our CRC output.
         yield from self.pulse(dut.advance_2B)
         self.assertEqual((yield dut.crc), 0x540aa487)
+
+
+    @ss_domain_test_case
+    def test_against_reference_model(self):
+        dut = self.dut
+        rng = random.Random(0)
+
+        partial_strobes = {1: dut.advance_1B, 2: dut.advance_2B, 3: dut.advance_3B}
+
+        for length in range(1, 24):
+            data = bytes(rng.getrandbits(8) for _ in range(length))
+            whole_words, remainder = divmod(length, 4)
+
+            yield from self.pulse(dut.clear)
+
+            # Provide each of our whole words...
+            for i in range(whole_words):
+                yield dut.data_input.eq(int.from_bytes(data[i * 4:i * 4 + 4], byteorder="little"))
+                yield from self.pulse(dut.advance_word)
+
+            # ... followed by any partial word.
+            if remainder:
+                yield dut.data_input.eq(int.from_bytes(data[whole_words * 4:], byteorder="little"))
+                yield from self.pulse(partial_strobes[remainder])
+
+            self.assertEqual((yield dut.crc), CRC32.calcBytes(data))
@@ -5,7 +5,7 @@
 # SPDX-License-Identifier: BSD-3-Clause
 from luna.gateware.test    import LunaSSGatewareTestCase, ss_domain_test_case
 
-from luna.gateware.usb.usb3.link.data import DataPacketReceiver
+from luna.gateware.usb.usb3.link.data import DataPacketReceiver, DataPacketTransmitter
 
 class DataPacketReceiverTest(LunaSSGatewareTestCase):
     FRAGMENT_UNDER_TEST = DataPacketReceiver
@@ -93,3 +93,76 @@ class DataPacketReceiverTest(LunaSSGatewareTestCase):
 
         self.assertEqual((yield self.dut.packet_good), 1)
 
+
+    @ss_domain_test_case
+    def test_zlp_receive(self):
+
+        # Provide a zero-length packet to the device.
+        # (This is our aligned packet from above, with its length and CRCs adjusted.)
+        yield from self.provide_data(
+            # Header packet.
+            # data       ctrl
+            (0xF7FBFBFB, 0b1111),
+            (0x00000008, 0b0000),
+            (0x00008000, 0b0000),
+            (0x08000000, 0b0000),
+            (0xA8029D9C, 0b0000),
+
+            # Payload packet; which consists only of the CRC of our (empty) payload.
+            (0xF75C5C5C, 0b1111),
+            (0x00000000, 0b0000),
+        )
+
+        self.assertEqual((yield self.dut.packet_good), 1)
+
+
+
+
+class DataPacketTransmitterTest(LunaSSGatewareTestCase):
+    FRAGMENT_UNDER_TEST = DataPacketTransmitter
+
+    def initialize_signals(self):
+        # Our header queue always accepts headers immediately.
+        yield self.dut.header_source.ready.eq(1)
+
+
+    def capture_header_sequences(self, cycles):
+        """ Returns the sequence numbers of any data headers generated over the next few cycles. """
+        sequences = []
+
+        for _ in range(cycles):
+            yield
+            if (yield self.dut.header_source.valid):
+                sequences.append((yield self.dut.header_source.header.dw1[0:5]))
+
+        return sequences
+
+
+    @ss_domain_test_case
+    def test_back_to_back_packets(self):
+        dut       = self.dut
+        data_sink = dut.data_sink
+
+        # Present a single-word packet, which our transmitter will buffer immediately...
+        yield dut.sequence_number  .eq(1)
+        yield dut.data_length      .eq(4)
+        yield data_sink.data       .eq(0x11111111)
+        yield data_sink.valid      .eq(0b1111)
+        yield data_sink.first      .eq(1)
+        yield data_sink.last       .eq(1)
+        yield
+
+        # ... and follow it immediately with a second packet; which has to wait, as our
+        # payload transmitter isn't yet accepting data.
+        yield dut.sequence_number  .eq(2)
+        yield data_sink.data       .eq(0x22222222)
+        sequences = yield from self.capture_header_sequences(10)
+
+        # Once our payload transmitter takes the first packet, our second is accepted...
+        yield dut.data_source.ready.eq(1)
+        yield
+        yield data_sink.valid.eq(0)
+        sequences += yield from self.capture_header_sequences(10)
+
+        # ... and we should have generated a separate header for each of our packets.
+        self.assertEqual(sequences, [1, 2])
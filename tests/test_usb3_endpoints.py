@@ -0,0 +1,331 @@
+#
+# This file is part of LUNA.
+#
+# Copyright (c) 2025 Great Scott Gadgets <info@greatscottgadgets.com>
+# SPDX-License-Identifier: BSD-3-Clause
+
+from luna.gateware.test  import (
+    LunaSSGatewareTestCase,
+    ss_domain_test_case,
+)
+
+from luna.usb3           import (
+    SuperSpeedStreamInEndpoint,
+    SuperSpeedStreamOutEndpoint,
+)
+
+from usb_protocol.types  import USBDirection
+
+
+MAX_PACKET_SIZE  = 16
+WORDS_PER_PACKET = MAX_PACKET_SIZE // 4
+
+class SuperSpeedStreamInEndpointBurstTest(LunaSSGatewareTestCase):
+    FRAGMENT_UNDER_TEST = SuperSpeedStreamInEndpoint
+    FRAGMENT_ARGUMENTS  = {'endpoint_number': 1, 'max_packet_size': MAX_PACKET_SIZE, 'max_burst': 4}
+
+    def initialize_signals(self):
+        # Our transmitter always accepts data immediately.
+        yield self.dut.interface.tx.ready.eq(1)
+
+
+    def fill_stream(self, words, *, last=False):
+        """ Provides a sequence of full data words to our endpoint's stream. """
+        stream = self.dut.stream
+
+        for index, word in enumerate(words):
+            yield stream.payload  .eq(word)
+            yield stream.valid    .eq(0b1111)
+            yield stream.last     .eq(last and (index == len(words) - 1))
+            yield
+
+        yield stream.valid.eq(0)
+        yield stream.last.eq(0)
+        yield
+
+
+    def send_ack(self, next_sequence, number_of_packets, *, retry=False, direction=USBDirection.IN):
+        """ Simulates the host sending an ACK transaction packet to our endpoint. """
+        handshakes_in = self.dut.interface.handshakes_in
+
+        yield handshakes_in.endpoint_number    .eq(1)
+        yield handshakes_in.direction          .eq(direction)
+        yield handshakes_in.next_sequence      .eq(next_sequence)
+        yield handshakes_in.number_of_packets  .eq(number_of_packets)
+        yield handshakes_in.retry_required     .eq(retry)
+        yield from self.pulse(handshakes_in.ack_received, step_after=False)
+
+
+    def receive_packets(self, cycles=64):
+        """ Captures the data packets our endpoint transmits, as a list of (sequence, words) tuples. """
+        interface = self.dut.interface
+        packets   = []
+        words     = []
+
+        for _ in range(cycles):
+            yield
+
+            if (yield interface.tx.valid):
+                words.append((yield interface.tx.data))
+
+                if (yield interface.tx.last):
+                    packets.append(((yield interface.tx_sequence_number), words))
+                    words = []
+
+            elif (yield interface.tx_zlp):
+                packets.append(((yield interface.tx_sequence_number), []))
+
+        return packets
+
+
+    @ss_domain_test_case
+    def test_burst_transmission(self):
+        data = list(range(4 * WORDS_PER_PACKET))
+
+        # Fill up our endpoint with four packets' worth of data.
+        yield from self.fill_stream(data)
+
+        # Once the host asks for four packets, we should send all four in a single burst...
+        yield from self.send_ack(next_sequence=0, number_of_packets=4)
+        packets = yield from self.receive_packets()
+
+        self.assertEqual(packets, [
+            (sequence, data[sequence * WORDS_PER_PACKET:(sequence + 1) * WORDS_PER_PACKET])
+            for sequence in range(4)
+        ])
+
+        # ... and, since we've had no more data, answer a request for more with an NRDY.
+        yield from self.send_ack(next_sequence=4, number_of_packets=4)
+        self.assertEqual((yield self.dut.interface.handshakes_out.send_nrdy), 1)
+
+
+    @ss_domain_test_case
+    def test_burst_size_limited_by_host(self):
+        data = list(range(4 * WORDS_PER_PACKET))
+        yield from self.fill_stream(data)
+
+        # If the host only has room for two packets, we should only send two...
+        yield from self.send_ack(next_sequence=0, number_of_packets=2)
+        packets = yield from self.receive_packets()
+        self.assertEqual([sequence for sequence, _ in packets], [0, 1])
+
+        # ... until it acknowledges them, and asks for more.
+        yield from self.send_ack(next_sequence=2, number_of_packets=2)
+        packets = yield from self.receive_packets()
+        self.assertEqual([sequence for sequence, _ in packets], [2, 3])
+        self.assertEqual(packets[1][1], data[3 * WORDS_PER_PACKET:])
+
+
+    @ss_domain_test_case
+    def test_retry_resends_from_sequence(self):
+        data = list(range(4 * WORDS_PER_PACKET))
+        yield from self.fill_stream(data)
+
+        yield from self.send_ack(next_sequence=0, number_of_packets=4)
+        yield from self.receive_packets()
+
+        # If the host reports an error in packet 2, we should re-send packets 2 and 3 from our buffer.
+        yield from self.send_ack(next_sequence=2, number_of_packets=2, retry=True)
+        packets = yield from self.receive_packets()
+
+        self.assertEqual(packets, [
+            (2, data[2 * WORDS_PER_PACKET:3 * WORDS_PER_PACKET]),
+            (3, data[3 * WORDS_PER_PACKET:]),
+        ])
+
+
+    @ss_domain_test_case
+    def test_out_acks_ignored(self):
+        data = list(range(2 * WORDS_PER_PACKET))
+        yield from self.fill_stream(data)
+
+        # An ACK for the OUT endpoint that shares our number isn't a request for our data...
+        yield from self.send_ack(next_sequence=0, number_of_packets=4, direction=USBDirection.OUT)
+        self.assertEqual((yield from self.receive_packets()), [])
+
+        # ... so we should only start our burst once the host asks us for it.
+        yield from self.send_ack(next_sequence=0, number_of_packets=4)
+        packets = yield from self.receive_packets()
+        self.assertEqual([sequence for sequence, _ in packets], [0, 1])
+
+
+    @ss_domain_test_case
+    def test_zlp_ends_transfer(self):
+        data = list(range(WORDS_PER_PACKET))
+
+        # If our transfer ends on a packet boundary...
+        yield from self.fill_stream(data, last=True)
+
+        # ... we should send our full packet, and then follow it up with a ZLP once it's acknowledged.
+        yield from self.send_ack(next_sequence=0, number_of_packets=4)
+        packets = yield from self.receive_packets()
+        self.assertEqual(packets, [(0, data)])
+
+        yield from self.send_ack(next_sequence=1, number_of_packets=3)
+        packets = yield from self.receive_packets()
+        self.assertEqual(packets, [(1, [])])
+
+
+    @ss_domain_test_case
+    def test_erdy_after_nrdy(self):
+        handshakes_out = self.dut.interface.handshakes_out
+
+        # If the host asks for data before we have any, we should respond with an NRDY...
+        yield from self.send_ack(next_sequence=0, number_of_packets=4)
+        self.assertEqual((yield handshakes_out.send_nrdy), 1)
+        self.assertEqual((yield handshakes_out.direction), USBDirection.IN)
+
+        # ... and once we have data, we should request that the host resume polling with an ERDY,
+        # advertising the packets we have ready.
+        yield from self.fill_stream(list(range(2 * WORDS_PER_PACKET)))
+        self.assertEqual((yield handshakes_out.send_erdy), 1)
+        self.assertEqual((yield handshakes_out.direction), USBDirection.IN)
+        self.assertEqual((yield handshakes_out.number_of_packets), 2)
+
+        yield from self.pulse(handshakes_out.done)
+        self.assertEqual((yield handshakes_out.send_erdy), 0)
+
+
+
+class SuperSpeedStreamOutEndpointTest(LunaSSGatewareTestCase):
+    FRAGMENT_UNDER_TEST = SuperSpeedStreamOutEndpoint
+    FRAGMENT_ARGUMENTS  = {'endpoint_number': 1, 'max_packet_size': MAX_PACKET_SIZE, 'max_burst': 2}
+
+    def send_packet(self, sequence, words, *, length=None, good=True):
+        """ Simulates the host sending a data packet to our endpoint.
+
+        Returns a dictionary describing the handshake our endpoint generates in response.
+        """
+        interface = self.dut.interface
+        rx        = interface.rx
+        length    = len(words) * 4 if length is None else length
+
+        yield interface.rx_header.endpoint_number  .eq(1)
+        yield interface.rx_header.data_sequence    .eq(sequence)
+        yield interface.rx_header.data_length      .eq(length)
+
+        for index, word in enumerate(words):
+            remaining = length - (index * 4)
+
+            yield rx.data   .eq(word)
+            yield rx.valid  .eq(0b1111 if remaining >= 4 else (1 << remaining) - 1)
+            yield rx.first  .eq(index == 0)
+            yield rx.last   .eq(index == len(words) - 1)
+            yield
+
+        yield rx.valid.eq(0)
+        yield (interface.rx_complete if good else interface.rx_invalid).eq(1)
+        yield
+
+        handshakes_out = interface.handshakes_out
+        handshake = {
+            'ack':               (yield handshakes_out.send_ack),
+            'nrdy':              (yield handshakes_out.send_nrdy),
+            'retry':             (yield handshakes_out.retry_required),
+            'next_sequence':     (yield handshakes_out.next_sequence),
+            'number_of_packets': (yield handshakes_out.number_of_packets),
+        }
+
+        yield interface.rx_complete.eq(0)
+        yield interface.rx_invalid.eq(0)
+        yield
+
+        return handshake
+
+
+    def receive_stream(self, cycles=32):
+        """ Drains our endpoint's stream; and returns a list of (data, first, last) tuples. """
+        stream = self.dut.stream
+        words  = []
+
+        yield stream.ready.eq(1)
+        for _ in range(cycles):
+            yield
+            if (yield stream.valid):
+                words.append(((yield stream.data), (yield stream.first), (yield stream.last)))
+        yield stream.ready.eq(0)
+
+        return words
+
+
+    @ss_domain_test_case
+    def test_packets_acknowledged_with_credit(self):
+
+        # Each packet we accept should be acknowledged, advertising the space we have left...
+        handshake = yield from self.send_packet(0, [0x00010203] * WORDS_PER_PACKET)
+        self.assertEqual(handshake, {'ack': 1, 'nrdy': 0, 'retry': 0, 'next_sequence': 1, 'number_of_packets': 2})
+
+        handshake = yield from self.send_packet(1, [0x04050607] * WORDS_PER_PACKET)
+        self.assertEqual(handshake, {'ack': 1, 'nrdy': 0, 'retry': 0, 'next_sequence': 2, 'number_of_packets': 1})
+
+        # ... until we're out of space entirely; at which point we'll need to ERDY once we've made room.
+        handshake = yield from self.send_packet(2, [0x08090A0B, 0x0C0D0E0F], length=7)
+        self.assertEqual(handshake, {'ack': 1, 'nrdy': 0, 'retry': 0, 'next_sequence': 3, 'number_of_packets': 0})
+
+        words = yield from self.receive_stream()
+
+        handshakes_out = self.dut.interface.handshakes_out
+        self.assertEqual((yield handshakes_out.send_erdy), 1)
+        self.assertEqual((yield handshakes_out.number_of_packets), 2)
+
+        yield from self.pulse(handshakes_out.done)
+        self.assertEqual((yield handshakes_out.send_erdy), 0)
+
+        # Our packets should be streamed out in order; with the short packet ending our transfer.
+        self.assertEqual(len(words), 2 * WORDS_PER_PACKET + 2)
+        self.assertEqual(words[0], (0x00010203, 1, 0))
+        self.assertEqual(words[WORDS_PER_PACKET], (0x04050607, 0, 0))
+        self.assertEqual(words[-1], (0x0C0D0E0F, 0, 1))
+
+
+    @ss_domain_test_case
+    def test_bad_packets_retried(self):
+
+        # If a packet arrives corrupted, we should discard it, and ask the host to retry it...
+        handshake = yield from self.send_packet(0, [0x00010203] * WORDS_PER_PACKET, good=False)
+        self.assertEqual(handshake['retry'], 1)
+        self.assertEqual(handshake['next_sequence'], 0)
+
+        # ... and do the same if we see a packet out of sequence.
+        handshake = yield from self.send_packet(1, [0x00010203] * WORDS_PER_PACKET)
+        self.assertEqual(handshake['retry'], 1)
+        self.assertEqual(handshake['next_sequence'], 0)
+
+        # Neither of those packets should have been kept.
+        words = yield from self.receive_stream()
+        self.assertEqual(words, [])
+
+
+    @ss_domain_test_case
+    def test_nrdy_when_full(self):
+        for sequence in range(3):
+            yield from self.send_packet(sequence, [sequence] * WORDS_PER_PACKET)
+
+        # If the host sends us a packet we don't have room for, we should reply with an NRDY.
+        handshake = yield from self.send_packet(3, [3] * WORDS_PER_PACKET)
+        self.assertEqual(handshake['ack'], 0)
+        self.assertEqual(handshake['nrdy'], 1)
+
+
+    @ss_domain_test_case
+    def test_zlp_ends_transfer(self):
+        data = list(range(WORDS_PER_PACKET))
+
+        # Until we know whether our full-size packet ends its transfer, we should hold back its last word...
+        yield from self.send_packet(0, data)
+        words = yield from self.receive_stream()
+        self.assertEqual([word for word, _, _ in words], data[:-1])
+
+        # ... and once a ZLP arrives, pass it along, marked as the end of our transfer.
+        yield from self.send_packet(1, [], length=0)
+        words = yield from self.receive_stream()
+        self.assertEqual(words, [(data[-1], 0, 1)])
+
+        # If a full-size packet is followed by more data, its transfer continues.
+        yield from self.send_packet(2, data)
+        yield from self.send_packet(3, [0x12345678], length=4)
+        words = yield from self.receive_stream()
+
+        self.assertEqual(words[0], (data[0], 1, 0))
+        self.assertEqual(words[WORDS_PER_PACKET - 1], (data[-1], 0, 0))
+        self.assertEqual(words[-1], (0x12345678, 0, 1))
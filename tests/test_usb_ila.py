@@ -0,0 +1,300 @@
+#
+# This file is part of LUNA.
+#
+# Copyright (c) 2025 Great Scott Gadgets <info@greatscottgadgets.com>
+# SPDX-License-Identifier: BSD-3-Clause
+
+import usb1
+
+from types         import SimpleNamespace
+from unittest      import TestCase
+from unittest.mock import patch
+
+from amaranth                      import Elaboratable, Module, Signal
+
+from luna.gateware.test            import usb_domain_test_case
+from luna.gateware.test.usb2       import USBDeviceTest
+from luna.gateware.usb.usb2        import USBPacketID
+from luna.gateware.usb.devices.ila import USBIntegratedLogicAnalyzer, USBIntegratedLogicAnalyzerFrontend
+from luna.gateware.usb.devices.ila import ILAStatusRequestHandler
+
+
+class _FakeTransfer:
+    """ Stand-in for a libusb transfer; completed by a _FakeDevice. """
+
+    def __init__(self, device):
+        self._device   = device
+        self.submitted = False
+        self.closed    = False
+        self.cancelled = False
+        self.timeouts  = []
+
+    def setBulk(self, endpoint, buffer, *, callback, timeout):
+        self._buffer   = buffer
+        self._callback = callback
+        self.timeouts.append(timeout)
+
+    def submit(self):
+        self.submitted = True
+        self.cancelled = False
+        self._device.queue.append(self)
+
+    def cancel(self):
+        self.cancelled = True
+
+    def isSubmitted(self):
+        return self.submitted
+
+    def getBuffer(self):
+        return self._buffer
+
+    def getActualLength(self):
+        return self._actual_length
+
+    def getStatus(self):
+        return self._status
+
+    def close(self):
+        self.closed = True
+
+    def complete(self, status, data=b""):
+        self._buffer[:len(data)] = data
+        self._actual_length = len(data)
+        self._status        = status
+        self.submitted      = False
+        self._callback(self)
+
+
+class _FakeDevice:
+    """ Stand-in for a libusb device handle and its context.
+
+    The device responds to its queued transfers in order, with each of a list of responses;
+    which are either data to be sent, or a libusb transfer status. It can first wait through a number of
+    passes of our event loop, as a device waiting on its trigger would. Once it runs out of responses,
+    it leaves its transfers pending until they time out -- or fails the test, if they never could.
+    """
+
+    def __init__(self, responses, *, wait_passes=0):
+        self.responses   = list(responses)
+        self.wait_passes = wait_passes
+        self.queue     = []
+        self.transfers = []
+
+    # Device-handle methods.
+    def claimInterface(self, interface):
+        pass
+
+    def getTransfer(self):
+        transfer = _FakeTransfer(self)
+        self.transfers.append(transfer)
+        return transfer
+
+    # Context methods.
+    def openByVendorIDAndProductID(self, vendor_id, product_id):
+        return self
+
+    def handleEvents(self):
+        transfer = self.queue.pop(0)
+
+        # Cancelled transfers complete, with a cancelled status, on a later pass through our event loop.
+        if transfer.cancelled:
+            transfer.complete(usb1.TRANSFER_CANCELLED)
+        elif self.wait_passes:
+            self.wait_passes -= 1
+            if transfer.timeouts[-1]:
+                transfer.complete(usb1.TRANSFER_TIMED_OUT)
+            else:
+                self.queue.insert(0, transfer)
+        elif self.responses:
+            response = self.responses.pop(0)
+            if isinstance(response, bytes):
+                transfer.complete(usb1.TRANSFER_COMPLETED, response)
+            else:
+                transfer.complete(response)
+        elif transfer.timeouts[-1]:
+            transfer.complete(usb1.TRANSFER_TIMED_OUT)
+        else:
+            raise AssertionError("transfer left pending forever, with no timeout")
+
+
+class USBILAFrontendReadoutTest(TestCase):
+
+    TRANSFER_SIZE = 4
+
+    def create_frontend(self, responses, *, wait_passes=0, **kwargs):
+        self.device = _FakeDevice(responses, wait_passes=wait_passes)
+        ila = SimpleNamespace(bytes_per_sample=2, sample_depth=16)
+
+        with patch("usb1.USBContext", return_value=self.device):
+            return USBIntegratedLogicAnalyzerFrontend(ila=ila, delay=0, transfer_size=self.TRANSFER_SIZE,
+                transfer_queue_depth=4, **kwargs)
+
+
+    def assert_transfers_wound_down(self):
+        for transfer in self.device.transfers:
+            self.assertFalse(transfer.isSubmitted())
+            self.assertTrue(transfer.closed)
+
+
+    def test_full_readout(self):
+        responses = [bytes(range(i, i + self.TRANSFER_SIZE)) for i in range(0, 32, self.TRANSFER_SIZE)]
+        frontend  = self.create_frontend(responses)
+
+        self.assertEqual(bytes(frontend._read_sample_buffer()), bytes(range(32)))
+        self.assert_transfers_wound_down()
+
+
+    def test_short_transfer_cancels_pending(self):
+        frontend = self.create_frontend([b"\x00\x01\x02\x03", b"\x04\x05"])
+
+        # A short transfer should end our readout...
+        self.assertEqual(bytes(frontend._read_sample_buffer()), b"\x00\x01\x02\x03\x04\x05")
+
+        # ... with every other transfer cancelled, rather than left waiting on their timeouts.
+        self.assertEqual(sum(transfer.cancelled for transfer in self.device.transfers), 3)
+        self.assert_transfers_wound_down()
+
+
+    def test_failed_transfer_cancels_pending(self):
+        frontend = self.create_frontend([b"\x00\x01\x02\x03", usb1.TRANSFER_ERROR])
+
+        with self.assertRaises(IOError):
+            frontend._read_sample_buffer()
+
+        self.assertEqual(sum(transfer.cancelled for transfer in self.device.transfers), 3)
+        self.assert_transfers_wound_down()
+
+
+    def test_waits_for_trigger_by_default(self):
+        responses = [bytes(range(i, i + self.TRANSFER_SIZE)) for i in range(0, 32, self.TRANSFER_SIZE)]
+        frontend  = self.create_frontend(responses, wait_passes=100)
+
+        # By default, we should wait for as long as it takes for our ILA to be triggered...
+        self.assertEqual(bytes(frontend._read_sample_buffer()), bytes(range(32)))
+        self.assert_transfers_wound_down()
+
+
+    def test_timeout_before_trigger_fails(self):
+        frontend = self.create_frontend([], wait_passes=1, timeout=1000)
+
+        # ... unless we've asked for our transfers to time out.
+        with self.assertRaises(IOError):
+            frontend._read_sample_buffer()
+
+        self.assert_transfers_wound_down()
+
+
+    def test_unresponsive_device_times_out(self):
+        frontend = self.create_frontend([b"\x00\x01\x02\x03"], timeout=1000)
+
+        # If the device stops responding, our transfers should time out, rather than hang.
+        with self.assertRaises(IOError):
+            frontend._read_sample_buffer()
+
+        self.assert_transfers_wound_down()
+
+
+
+class _CountingContinuousILA(Elaboratable):
+    """ Continuous USB ILA that captures a count of the samples it's taken since it was triggered. """
+
+    def __init__(self, *, bus):
+        self.count = Signal(8)
+        self.ila   = USBIntegratedLogicAnalyzer(
+            bus=bus,
+            continuous=True,
+            signals=[self.count],
+            sample_depth=16,
+            samples_pretrigger=0,
+            max_packet_size=64,
+        )
+
+    def elaborate(self, platform):
+        m = Module()
+        m.submodules.ila = ila = self.ila
+
+        with m.If(ila.trigger & ~ila.sampling):
+            m.d.sync += self.count.eq(0)
+        with m.Elif(ila.sampling):
+            m.d.sync += self.count.eq(self.count + 1)
+
+        return m
+
+
+class ContinuousUSBILATest(USBDeviceTest):
+
+    FRAGMENT_UNDER_TEST  = _CountingContinuousILA
+    FRAGMENT_ARGUMENTS   = {}
+
+    # Run our ILA in its own domain, so its dropped-sample count has to cross into the USB domain.
+    SYNC_CLOCK_FREQUENCY = 100e6
+
+    def initialize_signals(self):
+        yield self.utmi.line_state.eq(0b01)
+
+
+    def read_dropped_samples(self):
+        """ Reads the ILA's dropped-sample count over USB. """
+
+        request_type = 0xC1 # vendor, IN, to interface
+        handshake, data = yield from self.control_request_in(request_type,
+            ILAStatusRequestHandler.REQUEST_GET_DROPPED_SAMPLES, length=4)
+        self.assertEqual(handshake, USBPacketID.ACK)
+
+        return int.from_bytes(bytes(data), byteorder='little')
+
+
+    def read_stream(self):
+        """ Reads samples from the ILA's bulk endpoint until it has nothing more to send. """
+
+        samples = []
+        while True:
+            pid, data = yield from self.in_transaction(endpoint=USBIntegratedLogicAnalyzer.BULK_ENDPOINT_NUMBER)
+            if pid == USBPacketID.NAK:
+                return samples
+
+            samples.extend(data)
+
+
+    def capture(self, cycles):
+        """ Samples for (about) the given number of USB cycles; and returns the number of samples taken. """
+        ila = self.dut.ila
+
+        yield from self.pulse(ila.trigger)
+        yield from self.advance_cycles(cycles)
+        yield from self.pulse(ila.stop)
+
+        return (yield self.dut.count)
+
+
+    @usb_domain_test_case
+    def test_streaming_and_dropped_count(self):
+        max_packet_size = 64
+
+        # Capture for long enough to overflow our ILA's buffers, without reading anything out...
+        taken = yield from self.capture(64)
+        yield from self.advance_cycles(16)
+
+        # ... so our ILA should have dropped every sample it couldn't store.
+        dropped = yield from self.read_dropped_samples()
+        self.assertGreater(dropped, 0)
+
+        # The samples we do receive should be the samples we took, in order; with gaps only where
+        # samples were dropped.
+        samples = yield from self.read_stream()
+        self.assertEqual(samples[0], 0)
+        self.assertEqual(samples, sorted(set(samples)))
+        self.assertLessEqual(samples[-1] + 1 - len(samples), dropped)
+
+        # Every sample we took should have either been dropped, sent, or be waiting to fill out a packet.
+        unsent = taken - len(samples) - dropped
+        self.assertGreaterEqual(unsent, 0)
+        self.assertLess(unsent, max_packet_size)
+
+        # Triggering again should restart our count, rather than adding to it.
+        taken = yield from self.capture(32)
+        yield from self.advance_cycles(16)
+
+        dropped = yield from self.read_dropped_samples()
+        self.assertGreater(dropped, 0)
+        self.assertLess(dropped, taken)